@@ -68,15 +68,38 @@ class Settings:
     DEFAULT_TIMEOUT = int(os.getenv("ETL_TIMEOUT", "3600"))  # 1 hora
     POLL_INTERVAL = float(os.getenv("ETL_POLL_INTERVAL", "2.0"))  # segundos
 
+    # Prazo entre SIGTERM e SIGKILL ao cancelar a arvore de processos do job
+    CANCEL_GRACE_SECONDS = float(os.getenv("ETL_CANCEL_GRACE_SECONDS", "10"))
+
     # Database - usar pasta data/ no diretorio da app
     DATA_DIR = APP_DIR / "data"
     DB_PATH = DATA_DIR / "tasks.db"
 
+    # Passar a chave derivada das credenciais ao main.py por pipe herdado
+    # (evita o PBKDF2 de 600k iteracoes a cada job)
+    CREDENTIALS_KEY_HANDOFF = os.getenv("ETL_CREDENTIALS_KEY_HANDOFF", "true").lower() == "true"
+    DATA_KEY_TTL_SECONDS = float(os.getenv("ETL_DATA_KEY_TTL_SECONDS", "60"))
+
+    # Checkpoints de unidades concluidas por job (resume)
+    CHECKPOINT_DIR = DATA_DIR / "checkpoints"
+
+    # Ledger permanente de unidades (sistema, fundo, tipo, data) ja baixadas
+    LEDGER_PATH = Path(os.getenv("ETL_LEDGER_PATH", str(DATA_DIR / "ledger.db")))
+
+    # Cookies de portal cifrados entre jobs (login pulado enquanto validos)
+    SESSION_DIR = Path(os.getenv("ETL_SESSION_DIR", str(DATA_DIR / "sessions")))
+
     # Logging
     LOG_DIR = APP_DIR / "logs"
     LOG_LEVEL = os.getenv("ETL_LOG_LEVEL", "INFO")
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+    # Saida bruta (stdout/stderr) de cada job, com indice de linhas
+    JOB_LOG_DIR = LOG_DIR / "jobs"
+
+    # Tamanho maximo de jobs.logs (so entradas INFO+; a saida completa fica no spool)
+    JOB_LOG_DB_MAX_CHARS = int(os.getenv("ETL_JOB_LOG_DB_MAX_CHARS", "200000"))
+
     # === MULTIPROCESSING CONFIG ===
     # Number of concurrent jobs (1 = single mode, >1 = pool mode)
     MAX_CONCURRENT_JOBS = int(os.getenv("ETL_MAX_CONCURRENT_JOBS", "1"))
@@ -87,6 +110,53 @@ class Settings:
     # Cleanup interval for orphan jobs in seconds (default: 5 min)
     JOB_CLEANUP_INTERVAL = int(os.getenv("ETL_JOB_CLEANUP_INTERVAL", "300"))
 
+    # === ADMISSION CONTROL (pool mode) ===
+    # Defer dispatch when starting a job would oversubscribe the host
+    ADMISSION_ENABLED = os.getenv("ETL_ADMISSION_ENABLED", "true").lower() == "true"
+
+    # Memory that must remain free after the job's estimated peak (MB)
+    ADMISSION_MIN_FREE_MB = float(os.getenv("ETL_ADMISSION_MIN_FREE_MB", "512"))
+
+    # Estimated peak RSS for a sistema without history (MB)
+    ADMISSION_DEFAULT_JOB_MB = float(os.getenv("ETL_ADMISSION_DEFAULT_JOB_MB", "1500"))
+
+    # Maximum 1-minute load average per CPU before deferring
+    ADMISSION_MAX_LOAD_PER_CPU = float(os.getenv("ETL_ADMISSION_MAX_LOAD_PER_CPU", "2.0"))
+
+    # Sistemas of one job that main.py may run at once (ETL_MAX_STEP_WORKERS /
+    # ETL_MAX_BROWSERS are read by the ETL process itself)
+    ADMISSION_STEP_PARALLELISM = min(
+        int(os.getenv("ETL_MAX_STEP_WORKERS", "0")) or 99,
+        int(os.getenv("ETL_MAX_BROWSERS", "3"))
+    )
+
+    # === BROWSER POOL ===
+    # Pre-launched headless Chrome instances leased by jobs (0 = disabled;
+    # each step launches its own Chrome)
+    BROWSER_POOL_SIZE = int(os.getenv("ETL_BROWSER_POOL_SIZE", "0"))
+
+    # Leases before an instance is relaunched with a fresh profile (0 = never)
+    BROWSER_POOL_MAX_USES = int(os.getenv("ETL_BROWSER_POOL_MAX_USES", "20"))
+
+    # Seconds between health checks of idle instances
+    BROWSER_POOL_HEALTH_INTERVAL = float(os.getenv("ETL_BROWSER_POOL_HEALTH_INTERVAL", "30"))
+
+    # Per-instance profile and download dirs
+    BROWSER_POOL_DIR = Path(os.getenv("ETL_BROWSER_POOL_DIR", str(DATA_DIR / "browser_pool")))
+
+    # === DATE-RANGE SHARDING ===
+    # Upper bound on shards created by one request (shard_days too small)
+    SHARD_MAX_SHARDS = int(os.getenv("ETL_SHARD_MAX_SHARDS", "60"))
+
+    # Per-shard download folders, moved into the configured paths at the end
+    SHARD_STAGING_DIR = Path(os.getenv("ETL_SHARD_STAGING_DIR", str(DATA_DIR / "shards")))
+
+    # Max concurrent jobs per portal, e.g. "maps=1,qore=2" (pool mode)
+    PORTAL_LIMITS = os.getenv("ETL_PORTAL_LIMITS", "")
+
+    # Limit for portals not listed in ETL_PORTAL_LIMITS (0 = unlimited)
+    PORTAL_DEFAULT_LIMIT = int(os.getenv("ETL_PORTAL_DEFAULT_LIMIT", "2"))
+
     # === REDIS CONFIG (optional - for horizontal scaling) ===
     REDIS_ENABLED = os.getenv("REDIS_ENABLED", "false").lower() == "true"
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -8,7 +8,7 @@ import threading
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Callable
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +80,7 @@ def init_db():
     # Run migrations for multiprocessing support
     migrate_db()
 
-def add_job(job_type, params):
+def add_job(job_type, params, parent_id=None, status='pending'):
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -88,9 +88,9 @@ def add_job(job_type, params):
     params_json = json.dumps(params)
 
     cursor.execute('''
-    INSERT INTO jobs (type, params, status, created_at)
-    VALUES (?, ?, ?, ?)
-    ''', (job_type, params_json, 'pending', now))
+    INSERT INTO jobs (type, params, status, created_at, parent_id)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (job_type, params_json, status, now, parent_id))
 
     job_id = cursor.lastrowid
     conn.commit()
@@ -122,12 +122,30 @@ def update_job_status(job_id, status, error=None):
 
     conn.commit()
 
-def append_log(job_id, message):
+    # Shard of a sharded job: keep the parent's combined status current
+    cursor.execute('SELECT parent_id FROM jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    if row and row[0] is not None:
+        refresh_parent_status(row[0])
+
+def append_log(job_id, message, max_chars: int = 0):
+    """
+    Appends a line to jobs.logs.
+
+    Args:
+        max_chars: Keep only the newest N characters (0 = unlimited), so each
+                   append rewrites a bounded value
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    # Append to existing logs
-    cursor.execute('UPDATE jobs SET logs = logs || ? || "\n" WHERE id = ?', (message, job_id))
+    if max_chars > 0:
+        cursor.execute(
+            'UPDATE jobs SET logs = substr(logs || ? || "\n", ?) WHERE id = ?',
+            (message, -max_chars, job_id)
+        )
+    else:
+        cursor.execute('UPDATE jobs SET logs = logs || ? || "\n" WHERE id = ?', (message, job_id))
 
     conn.commit()
 
@@ -279,6 +297,45 @@ def migrate_db():
         conn.commit()
         logger.info("[MIGRATION] Added worker_slot and locked_at columns")
 
+    # Date-range sharding: shards point to their parent job
+    if "parent_id" not in columns:
+        cursor.execute("ALTER TABLE jobs ADD COLUMN parent_id INTEGER DEFAULT NULL")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_parent ON jobs(parent_id)")
+        conn.commit()
+        logger.info("[MIGRATION] Added parent_id column")
+
+    # Per-sistema resource costs learned from past runs (admission control)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sistema_costs (
+        sistema TEXT PRIMARY KEY,
+        samples INTEGER DEFAULT 0,
+        peak_rss_mb REAL DEFAULT 0,
+        updated_at TEXT
+    )
+    ''')
+
+    # Seconds per progress unit learned from past runs (ETA)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS unit_timings (
+        sistema TEXT NOT NULL,
+        unit TEXT NOT NULL,
+        samples INTEGER DEFAULT 0,
+        seconds_per_unit REAL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (sistema, unit)
+    )
+    ''')
+
+    # Per-step timing tree of finished jobs (SPAN lines, JSON)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_spans (
+        job_id INTEGER PRIMARY KEY,
+        breakdown TEXT NOT NULL,
+        updated_at TEXT
+    )
+    ''')
+    conn.commit()
+
     conn.close()
 
 
@@ -341,7 +398,10 @@ def get_available_slot(max_slots: int) -> Optional[int]:
     return None
 
 
-def acquire_job_for_slot(slot: int) -> Optional[Dict[str, Any]]:
+def acquire_job_for_slot(
+    slot: int,
+    can_start: Optional[Callable[[str, List[str]], bool]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Atomically acquires the next pending job for a specific slot.
     Uses BEGIN IMMEDIATE for exclusive locking to prevent race conditions.
@@ -350,6 +410,9 @@ def acquire_job_for_slot(slot: int) -> Optional[Dict[str, Any]]:
 
     Args:
         slot: The worker slot ID (0 to max_workers-1)
+        can_start: Optional gate (job params JSON, params JSON of running
+            jobs) -> bool. The oldest pending job that passes is acquired
+            (e.g. per-portal concurrency limits).
 
     Returns:
         Job dict or None if no pending jobs
@@ -362,13 +425,26 @@ def acquire_job_for_slot(slot: int) -> Optional[Dict[str, Any]]:
         cursor.execute("BEGIN IMMEDIATE")
 
         # Find next pending job
-        cursor.execute('''
-            SELECT id FROM jobs
-            WHERE status = "pending"
-            ORDER BY created_at ASC
-            LIMIT 1
-        ''')
-        row = cursor.fetchone()
+        if can_start is None:
+            cursor.execute('''
+                SELECT id FROM jobs
+                WHERE status = "pending"
+                ORDER BY created_at ASC
+                LIMIT 1
+            ''')
+            row = cursor.fetchone()
+        else:
+            cursor.execute('SELECT params FROM jobs WHERE status = "running"')
+            running_params = [r[0] for r in cursor.fetchall()]
+            cursor.execute('''
+                SELECT id, params FROM jobs
+                WHERE status = "pending"
+                ORDER BY created_at ASC
+            ''')
+            row = next(
+                (r for r in cursor.fetchall() if can_start(r[1], running_params)),
+                None
+            )
 
         if not row:
             cursor.execute("ROLLBACK")
@@ -469,6 +545,13 @@ def cleanup_stale_jobs(timeout_seconds: int) -> List[int]:
         conn.commit()
         logger.warning(f"[CLEANUP] Marked {len(stale_ids)} stale jobs as error: {stale_ids}")
 
+        cursor.execute(f'''
+            SELECT DISTINCT parent_id FROM jobs
+            WHERE id IN ({placeholders}) AND parent_id IS NOT NULL
+        ''', stale_ids)
+        for row in cursor.fetchall():
+            refresh_parent_status(row[0])
+
     return stale_ids
 
 
@@ -498,3 +581,199 @@ def get_slot_status() -> List[Dict[str, Any]]:
         }
         for row in cursor.fetchall()
     ]
+
+
+# =============================================================================
+# SHARDING - Parent jobs aggregate the status of their shards
+# =============================================================================
+
+def list_child_jobs(parent_id: int) -> List[Dict[str, Any]]:
+    """Shards of a parent job, oldest first (without logs)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, type, params, status, error_message, created_at, started_at, finished_at, worker_slot
+        FROM jobs WHERE parent_id = ?
+        ORDER BY created_at ASC, id ASC
+    ''', (parent_id,))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+# Status of a parent job (date-range sharding) while shards are pending or running
+SHARDED_STATUS = "sharded"
+
+
+def aggregate_status(statuses) -> str:
+    """
+    Combined status of a parent job.
+
+    sharded while any shard is pending/running; then error if any shard
+    failed, cancelled if any was cancelled, otherwise completed.
+    """
+    statuses = set(statuses)
+    if not statuses:
+        return "completed"
+    if statuses & {"pending", "running"}:
+        return SHARDED_STATUS
+    if "error" in statuses:
+        return "error"
+    if "cancelled" in statuses:
+        return "cancelled"
+    return "completed"
+
+
+def refresh_parent_status(parent_id: int) -> Optional[str]:
+    """
+    Recomputes a parent job's status from its shards.
+
+    Returns:
+        The new status (None if the parent has no shards)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT status, started_at FROM jobs WHERE parent_id = ?', (parent_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+
+    status = aggregate_status(row[0] for row in rows)
+    started = [row[1] for row in rows if row[1]]
+    now = datetime.now().isoformat()
+
+    if status == SHARDED_STATUS:
+        cursor.execute(
+            'UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), finished_at = NULL WHERE id = ?',
+            (status, min(started) if started else None, parent_id)
+        )
+    else:
+        failed = sum(1 for row in rows if row[0] in ("error", "cancelled"))
+        error = f"{failed} de {len(rows)} shard(s) sem sucesso" if failed else None
+        cursor.execute(
+            '''UPDATE jobs SET status = ?, error_message = ?,
+               started_at = COALESCE(started_at, ?), finished_at = COALESCE(finished_at, ?)
+               WHERE id = ?''',
+            (status, error, min(started) if started else None, now, parent_id)
+        )
+    conn.commit()
+    return status
+
+
+# =============================================================================
+# ADMISSION CONTROL - Learned per-sistema resource costs
+# =============================================================================
+
+def get_sistema_costs() -> Dict[str, float]:
+    """
+    Returns learned peak RSS (MB) per sistema.
+
+    Returns:
+        Dict {sistema: peak_rss_mb}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT sistema, peak_rss_mb FROM sistema_costs WHERE samples > 0')
+
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def save_sistema_cost(sistema: str, peak_rss_mb: float):
+    """
+    Stores the smoothed peak RSS estimate for a sistema.
+
+    Args:
+        sistema: Sistema identifier
+        peak_rss_mb: Updated estimate in MB (already smoothed by the caller)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    now = datetime.now().isoformat()
+    cursor.execute('''
+        INSERT INTO sistema_costs (sistema, samples, peak_rss_mb, updated_at)
+        VALUES (?, 1, ?, ?)
+        ON CONFLICT(sistema) DO UPDATE SET
+            samples = samples + 1,
+            peak_rss_mb = excluded.peak_rss_mb,
+            updated_at = excluded.updated_at
+    ''', (sistema, peak_rss_mb, now))
+
+    conn.commit()
+
+
+# =============================================================================
+# PROGRESS - Learned per-unit durations (ETA)
+# =============================================================================
+
+def get_unit_timings() -> Dict[Tuple[str, str], float]:
+    """
+    Returns learned seconds-per-unit by (sistema, unit).
+
+    Returns:
+        Dict {(sistema, unit): seconds_per_unit}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT sistema, unit, seconds_per_unit FROM unit_timings WHERE samples > 0')
+
+    return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+
+def save_unit_timing(sistema: str, unit: str, seconds_per_unit: float):
+    """
+    Stores the smoothed seconds-per-unit estimate for a progress counter.
+
+    Args:
+        sistema: Sistema identifier
+        unit: Progress unit (fundos, datas, ...)
+        seconds_per_unit: Updated estimate (already smoothed by the caller)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    now = datetime.now().isoformat()
+    cursor.execute('''
+        INSERT INTO unit_timings (sistema, unit, samples, seconds_per_unit, updated_at)
+        VALUES (?, ?, 1, ?, ?)
+        ON CONFLICT(sistema, unit) DO UPDATE SET
+            samples = samples + 1,
+            seconds_per_unit = excluded.seconds_per_unit,
+            updated_at = excluded.updated_at
+    ''', (sistema, unit, seconds_per_unit, now))
+
+    conn.commit()
+
+
+def save_job_spans(job_id: int, breakdown: str):
+    """
+    Stores the timing tree of a finished job.
+
+    Args:
+        job_id: The job ID
+        breakdown: JSON snapshot produced by services.spans.JobSpans
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        INSERT INTO job_spans (job_id, breakdown, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(job_id) DO UPDATE SET
+            breakdown = excluded.breakdown,
+            updated_at = excluded.updated_at
+    ''', (job_id, breakdown, datetime.now().isoformat()))
+
+    conn.commit()
+
+
+def get_job_spans(job_id: int) -> Optional[str]:
+    """Returns the stored timing tree (JSON) of a job, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT breakdown FROM job_spans WHERE job_id = ?', (job_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
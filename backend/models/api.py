@@ -19,6 +19,7 @@ class JobStatus(str, Enum):
     completed = "completed"
     error = "error"
     cancelled = "cancelled"
+    sharded = "sharded"
 
 
 class SistemaStatus(str, Enum):
@@ -58,6 +59,10 @@ class ExecuteRequest(BaseModel):
         False,
         description="Se True, simula execução sem fazer alterações"
     )
+    force: bool = Field(
+        False,
+        description="Se True, ignora o ledger e baixa novamente unidades ja concluidas"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -120,6 +125,10 @@ class ExecuteResponse(BaseModel):
     status: str = Field(..., example="queued")
     message: str = Field(..., example="Pipeline enfileirado com sucesso")
     job_id: int = Field(..., description="ID do job criado", example=1)
+    shards: Optional[List[int]] = Field(
+        None,
+        description="IDs dos jobs de cada shard (quando shard_days divide o periodo)"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -20,6 +20,7 @@ class JobParams(BaseModel):
     sistemas: List[str] = []
     dry_run: bool = False
     limpar: bool = False
+    force: bool = False
     data_inicial: Optional[str] = None
     data_final: Optional[str] = None
     opcoes: Dict[str, Dict[str, bool]] = {}
@@ -4,8 +4,9 @@ Execution Router - Endpoints para execucao de pipelines ETL
 Execute and cancel require admin, list/get jobs available for viewers.
 """
 from fastapi import APIRouter, HTTPException, Query, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
+import json
 import logging
 import sys
 import os
@@ -14,8 +15,19 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core import database
+from core.database import SHARDED_STATUS
 from services.sistemas import get_sistema_service
 from services.worker import get_worker
+from services import log_spool, planner
+from services.log_spool import db_log_line
+from services.spans import JobSpans, load_spans
+from services.sharding import (
+    PARENT_JOB_TYPE,
+    parse_portal_limits,
+    plan_shards,
+    portal_concurrency,
+    shard_params,
+)
 from models.sistema import SistemaStatus
 from models.api import (
     ExecuteResponse,
@@ -36,15 +48,18 @@ class ExecuteRequest(BaseModel):
     sistemas: List[str]
     dry_run: bool = False
     limpar: bool = False
+    force: bool = False
     data_inicial: Optional[str] = None
     data_final: Optional[str] = None
     opcoes: Dict[str, Dict[str, bool]] = {}
+    shard_days: Optional[int] = Field(None, ge=1)
 
 
 class ExecuteSingleRequest(BaseModel):
     """Request para executar sistema individual"""
     dry_run: bool = False
     limpar: bool = False
+    force: bool = False
     data_inicial: Optional[str] = None
     data_final: Optional[str] = None
     opcoes: Dict[str, bool] = {}
@@ -72,6 +87,8 @@ async def execute_pipeline(
     - **data_inicial**: Data inicial (YYYY-MM-DD)
     - **data_final**: Data final (YYYY-MM-DD)
     - **dry_run**: Se True, simula execução
+    - **force**: Se True, ignora o ledger e baixa novamente unidades ja concluidas
+    - **shard_days**: Divide o periodo em jobs irmaos de ate N dias uteis
     """
     try:
         # Validar que pelo menos um sistema foi selecionado
@@ -103,6 +120,27 @@ async def execute_pipeline(
                     "job_id": -1  # Will be set after creation
                 }
 
+        # Sharding: periodo longo vira jobs irmaos sob um job pai
+        shards = []
+        if request.shard_days:
+            if not request.data_inicial or not request.data_final:
+                raise HTTPException(
+                    status_code=400,
+                    detail="shard_days requer data_inicial e data_final"
+                )
+            try:
+                shards = plan_shards(request.data_inicial, request.data_final, request.shard_days)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if len(shards) > settings.SHARD_MAX_SHARDS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{len(shards)} shards excede o limite de {settings.SHARD_MAX_SHARDS}"
+                )
+
+        if len(shards) > 1:
+            return await _enqueue_shards(request, shards)
+
         # Criar job no banco
         job_id = database.add_job("etl_pipeline", request.model_dump())
 
@@ -126,6 +164,97 @@ async def execute_pipeline(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _clean_for_parent(parent_id: int):
+    """
+    Limpa as pastas de saida uma vez, antes dos shards (nenhum shard leva
+    `limpar`). Roda main.py --limpar sem sistemas; os logs vao para o job pai.
+    Se falhar, os shards seguem mesmo assim.
+    """
+    from config import settings
+    from services.executor import ETLExecutor
+
+    async def log_callback(log_entry: dict):
+        line = db_log_line(log_entry)
+        if line:
+            database.append_log(parent_id, line, settings.JOB_LOG_DB_MAX_CHARS)
+
+    ok = await ETLExecutor().execute({"sistemas": [], "limpar": True}, log_callback)
+    if not ok:
+        logger.warning(f"Limpeza das pastas falhou para o job {parent_id}; shards seguem")
+
+
+async def _enqueue_shards(request: ExecuteRequest, shards) -> dict:
+    """Cria o job pai e um job por shard (mesmos parametros, datas menores)"""
+    from config import settings
+
+    params = request.model_dump()
+    parent_id = database.add_job(PARENT_JOB_TYPE, params, status=SHARDED_STATUS)
+    if request.limpar and not request.dry_run:
+        await _clean_for_parent(parent_id)
+    shard_ids = [
+        database.add_job("etl_pipeline", child, parent_id=parent_id)
+        for child in shard_params(params, shards, parent_id, settings.SHARD_STAGING_DIR)
+    ]
+
+    logger.info(
+        f"Pipeline enfileirado em {len(shard_ids)} shards: job_id={parent_id}, "
+        f"shards={shard_ids}, sistemas={request.sistemas}"
+    )
+
+    service = get_sistema_service()
+    for sistema_id in request.sistemas:
+        service.update_status(sistema_id, SistemaStatus.RUNNING, 0, "Aguardando execucao...")
+
+    return {
+        "status": "started",
+        "message": f"Pipeline ETL dividido em {len(shard_ids)} shards",
+        "job_id": parent_id,
+        "shards": shard_ids
+    }
+
+
+@router.post("/api/plan")
+async def plan_pipeline(
+    request: ExecuteRequest,
+    current_user: UserInDB = Depends(require_viewer)
+):
+    """
+    Estima a duracao de um pipeline antes de enfileirar.
+
+    Recebe o mesmo body de /api/execute, expande em unidades
+    (fundos x dias uteis x tipos de relatorio) e aplica os tempos por
+    unidade aprendidos em execucoes anteriores.
+    """
+    from config import settings
+    from services.credentials import get_config_service
+    from services.progress import get_unit_history
+
+    if not request.sistemas:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhum sistema selecionado para execucao"
+        )
+
+    try:
+        result = planner.build_plan(
+            request.model_dump(),
+            get_config_service(),
+            get_unit_history(),
+            settings.ADMISSION_STEP_PARALLELISM
+        )
+        if request.shard_days:
+            shards = plan_shards(result["data_inicial"], result["data_final"], request.shard_days)
+            concurrency = portal_concurrency(
+                request.sistemas, settings.MAX_CONCURRENT_JOBS,
+                parse_portal_limits(settings.PORTAL_LIMITS), settings.PORTAL_DEFAULT_LIMIT
+            )
+            result["sharding"] = planner.predict_sharded(result, len(shards), concurrency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return result
+
+
 @router.post("/api/execute/{sistema_id}")
 async def execute_single_system(
     sistema_id: str,
@@ -170,6 +299,7 @@ async def execute_single_system(
             "sistemas": [sistema_id],
             "dry_run": request.dry_run,
             "limpar": request.limpar,
+            "force": request.force,
             "data_inicial": request.data_inicial,
             "data_final": request.data_final,
             "opcoes": {sistema_id: request.opcoes}
@@ -221,26 +351,28 @@ async def cancel_execution(
             )
 
         # Verificar se pode ser cancelado
-        if job["status"] not in ["pending", "running"]:
+        if job["status"] not in ["pending", "running", SHARDED_STATUS]:
             return {
                 "status": "error",
                 "message": f"Job {job_id} nao pode ser cancelado (status: {job['status']})"
             }
 
-        # Cancelar processo em execucao via worker
-        worker = get_worker()
-        cancelled = worker.cancel_job(job_id)
-
-        if not cancelled:
-            # Job might not be running yet (still pending)
-            if job["status"] == "pending":
-                database.update_job_status(job_id, "cancelled", "Cancelado antes de iniciar")
-            else:
-                # Job not found in worker - update status anyway
-                database.update_job_status(job_id, "cancelled", "Cancelado pelo usuario")
-        else:
-            # Worker handled the cancellation
-            database.update_job_status(job_id, "cancelled", "Cancelado pelo usuario")
+        # Job pai: cancela os shards que ainda nao terminaram
+        if job.get("type") == PARENT_JOB_TYPE:
+            cancelled_shards = [
+                child for child in database.list_child_jobs(job_id)
+                if child["status"] in ("pending", "running")
+            ]
+            for child in cancelled_shards:
+                _cancel_job(child)
+            get_sistema_service().reset_all_status()
+            logger.info(f"Job {job_id} cancelado pelo usuario ({len(cancelled_shards)} shards)")
+            return {
+                "status": "success",
+                "message": f"Job {job_id} cancelado com sucesso ({len(cancelled_shards)} shards)"
+            }
+
+        _cancel_job(job)
 
         # Atualizar status dos sistemas
         service = get_sistema_service()
@@ -260,6 +392,95 @@ async def cancel_execution(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _cancel_job(job: dict):
+    """Cancela um job pendente ou em execucao e marca como cancelled"""
+    job_id = job["id"]
+
+    # Cancelar processo em execucao via worker
+    worker = get_worker()
+    cancelled = worker.cancel_job(job_id)
+
+    if not cancelled:
+        # Job might not be running yet (still pending)
+        if job["status"] == "pending":
+            database.update_job_status(job_id, "cancelled", "Cancelado antes de iniciar")
+        else:
+            # Job not found in worker - update status anyway
+            database.update_job_status(job_id, "cancelled", "Cancelado pelo usuario")
+    else:
+        # Worker handled the cancellation
+        database.update_job_status(job_id, "cancelled", "Cancelado pelo usuario")
+
+
+@router.post("/api/jobs/{job_id}/resume")
+async def resume_job(
+    job_id: int,
+    current_user: UserInDB = Depends(require_admin)
+):
+    """
+    Retoma um job que falhou ou foi cancelado (ADMIN ONLY).
+
+    Enfileira um novo job com os mesmos parametros que reutiliza o checkpoint
+    do job original: unidades (sistema, fundo, data) ja concluidas sao puladas.
+
+    Args:
+        job_id: ID do job a retomar
+
+    Returns:
+        Status e job_id do novo job
+    """
+    try:
+        job = database.get_job(job_id)
+
+        if not job:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Job {job_id} nao encontrado"
+            )
+
+        if job["status"] not in ["error", "cancelled"]:
+            return {
+                "status": "error",
+                "message": f"Job {job_id} nao pode ser retomado (status: {job['status']})"
+            }
+
+        if job.get("type") == PARENT_JOB_TYPE:
+            return {
+                "status": "error",
+                "message": f"Job {job_id} e dividido em shards: retome os shards com erro individualmente"
+            }
+
+        try:
+            params = json.loads(job["params"]) if job["params"] else {}
+        except json.JSONDecodeError:
+            params = {}
+
+        # Encadeamento: resume de um resume continua no checkpoint original
+        params["checkpoint_id"] = params.get("checkpoint_id") or job_id
+        params["resume"] = True
+
+        new_job_id = database.add_job(job["type"], params)
+
+        logger.info(f"Job {job_id} retomado como job_id={new_job_id} (checkpoint {params['checkpoint_id']})")
+
+        service = get_sistema_service()
+        for sistema_id in params.get("sistemas", []):
+            service.update_status(sistema_id, SistemaStatus.RUNNING, 0, "Aguardando execucao...")
+
+        return {
+            "status": "started",
+            "message": f"Job {job_id} retomado",
+            "job_id": new_job_id,
+            "resumed_from": job_id
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao retomar job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== JOBS ====================
 
 @router.get(
@@ -313,9 +534,139 @@ async def get_job_status(
             detail=f"Job {job_id} nao encontrado"
         )
 
+    if job.get("type") == PARENT_JOB_TYPE:
+        job["shards"] = database.list_child_jobs(job_id)
+
     return job
 
 
+@router.get("/api/jobs/{job_id}/progress")
+async def get_job_progress(
+    job_id: int,
+    current_user: UserInDB = Depends(require_viewer)
+):
+    """
+    Retorna progresso de um job (ADMIN e VIEWER).
+
+    Para jobs em execucao inclui percentual concluido, ETA em segundos
+    e os contadores reportados pelos modulos ETL (fundos, datas...).
+
+    Raises:
+        404: Job nao encontrado
+    """
+    job = database.get_job(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} nao encontrado"
+        )
+
+    if job.get("type") == PARENT_JOB_TYPE:
+        return _sharded_progress(job)
+
+    progress = None
+    if job["status"] == "running":
+        progress = get_worker().get_job_progress(job_id)
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "percent": progress["percent"] if progress else (100.0 if job["status"] == "completed" else None),
+        "eta_seconds": progress["eta_seconds"] if progress else None,
+        "counters": progress["counters"] if progress else []
+    }
+
+
+@router.get("/api/jobs/{job_id}/timings")
+async def get_job_timings(
+    job_id: int,
+    current_user: UserInDB = Depends(require_viewer)
+):
+    """
+    Retorna a arvore de tempos por etapa de um job (ADMIN e VIEWER).
+
+    Soma as linhas SPAN emitidas pelos modulos ETL (login, cliques de
+    exportacao, wait_for_downloads, read_excel, uploads...): por caminho,
+    quantas vezes rodou, tempo total, tempo proprio e erros. Ao vivo para
+    jobs em execucao; para jobs divididos soma os shards.
+
+    Raises:
+        404: Job nao encontrado
+    """
+    job = database.get_job(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} nao encontrado"
+        )
+
+    if job.get("type") == PARENT_JOB_TYPE:
+        spans = JobSpans()
+        for shard in database.list_child_jobs(job_id):
+            snapshot = _job_spans(shard)
+            if snapshot:
+                spans.merge(snapshot)
+        timings = spans.snapshot()
+    else:
+        timings = _job_spans(job) or JobSpans().snapshot()
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        **timings
+    }
+
+
+def _job_spans(job: dict) -> Optional[dict]:
+    """Arvore ao vivo (job rodando neste worker) ou a gravada no banco"""
+    if job["status"] == "running":
+        live = get_worker().get_job_spans(job["id"])
+        if live is not None:
+            return live
+    return load_spans(job["id"])
+
+
+@router.get("/api/jobs/{job_id}/output")
+async def get_job_output(
+    job_id: int,
+    start: int = Query(0, ge=0, description="Primeira linha (0-based)"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximo de linhas"),
+    tail: Optional[int] = Query(None, ge=1, le=5000, description="Ultimas N linhas (ignora start/limit)"),
+    current_user: UserInDB = Depends(require_viewer)
+):
+    """
+    Retorna um intervalo de linhas da saida bruta do job (ADMIN e VIEWER).
+
+    Le o arquivo logs/jobs/job_<id>.log via indice de offsets, sem carregar
+    o log inteiro em memoria. Funciona com o job ainda em execucao.
+
+    Raises:
+        404: Job nao encontrado
+    """
+    job = database.get_job(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} nao encontrado"
+        )
+
+    path = log_spool.job_log_path(job_id)
+    total = log_spool.count_lines(path)
+    if tail is not None:
+        start, limit = max(0, total - tail), tail
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "start": start,
+        "lines": log_spool.read_lines(path, start, limit),
+        "total_lines": total
+    }
+
+
 # ==================== POOL/WORKER STATUS ====================
 
 @router.get("/api/pool/status")
@@ -359,5 +710,33 @@ async def get_pool_metrics(current_user: UserInDB = Depends(require_viewer)):
         metrics["slots_active"] = worker_status.get("active_count", 0)
         metrics["slots_idle"] = worker_status.get("idle_count", 0)
         metrics["slots"] = worker_status.get("slots", [])
+        metrics["admission"] = worker_status.get("admission")
 
     return metrics
+
+
+def _sharded_progress(job: dict) -> dict:
+    """Progresso do job pai: media dos shards (terminados contam 100%)"""
+    worker = get_worker()
+    shards = database.list_child_jobs(job["id"])
+    percents = []
+    etas = []
+    for shard in shards:
+        if shard["status"] in ("completed", "error", "cancelled"):
+            percents.append(100.0)
+        elif shard["status"] == "running":
+            progress = worker.get_job_progress(shard["id"])
+            percents.append((progress or {}).get("percent") or 0.0)
+            if progress and progress.get("eta_seconds") is not None:
+                etas.append(progress["eta_seconds"])
+        else:
+            percents.append(0.0)
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "percent": round(sum(percents) / len(percents), 1) if percents else None,
+        "eta_seconds": max(etas) if etas else None,
+        "counters": [],
+        "shards": [{"job_id": shard["id"], "status": shard["status"]} for shard in shards]
+    }
@@ -0,0 +1,282 @@
+"""
+Admission Control - Memory/load aware dispatch for the job pool
+
+Before the pool starts a job it asks the AdmissionController whether the host
+can afford it. The decision uses:
+- MemAvailable from /proc/meminfo
+- 1-minute load average from /proc/loadavg
+- Per-sistema peak RSS learned from past runs (table sistema_costs)
+
+Jobs already running but still ramping up (Chrome starting, etc.) keep their
+not-yet-used estimate reserved, so two jobs admitted in the same tick cannot
+both count on the same free memory.
+
+On hosts without /proc (Windows) admission control is a no-op.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMINFO_PATH = "/proc/meminfo"
+LOADAVG_PATH = "/proc/loadavg"
+PROC_DIR = "/proc"
+
+# Weight of the newest sample in the learned estimate (EWMA)
+COST_SMOOTHING = 0.3
+
+
+def read_meminfo(path: str = MEMINFO_PATH) -> Optional[Dict[str, float]]:
+    """
+    Reads total and available memory in MB.
+
+    Returns:
+        {"total_mb": ..., "available_mb": ...} or None if unavailable
+    """
+    try:
+        values = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("MemTotal", "MemAvailable"):
+                    values[key] = int(rest.split()[0]) / 1024.0
+        if "MemAvailable" not in values:
+            return None
+        return {
+            "total_mb": values.get("MemTotal", 0.0),
+            "available_mb": values["MemAvailable"],
+        }
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_loadavg(path: str = LOADAVG_PATH) -> Optional[float]:
+    """Reads the 1-minute load average, or None if unavailable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _read_rss_mb(pid: int, proc_dir: str) -> float:
+    """Resident set size of a single process in MB (0 if gone)"""
+    try:
+        with open(os.path.join(proc_dir, str(pid), "status"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def _child_map(proc_dir: str) -> Dict[int, List[int]]:
+    """Builds {ppid: [pid, ...]} from /proc/<pid>/stat"""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir(proc_dir)
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc_dir, entry, "stat"), "r", encoding="utf-8") as f:
+                stat = f.read()
+            # comm (field 2) may contain spaces/parens - split after the last ')'
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree_rss_mb(pid: int, proc_dir: str = PROC_DIR) -> float:
+    """
+    Sums RSS of a process and all its descendants (Chrome, chromedriver...).
+
+    Args:
+        pid: Root process id (the ETL subprocess)
+        proc_dir: procfs mount point
+
+    Returns:
+        Total RSS in MB (0 if the process does not exist)
+    """
+    children = _child_map(proc_dir)
+    total = 0.0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += _read_rss_mb(current, proc_dir)
+        stack.extend(children.get(current, []))
+    return total
+
+
+@dataclass
+class AdmissionDecision:
+    """Result of an admission check"""
+    admitted: bool
+    reason: str
+    estimated_mb: float = 0.0
+    available_mb: Optional[float] = None
+    load: Optional[float] = None
+
+
+class AdmissionController:
+    """
+    Decides whether the host can start another job.
+
+    Rules (evaluated in order):
+    1. Disabled or no /proc -> admit
+    2. No job running -> admit (never starve the queue)
+    3. available - reserved - estimate < min_free_mb -> defer
+    4. load / cpus > max_load_per_cpu -> defer
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_free_mb: float = 512.0,
+        default_job_mb: float = 1500.0,
+        max_load_per_cpu: float = 2.0,
+        step_parallelism: int = 1,
+        meminfo_path: str = MEMINFO_PATH,
+        loadavg_path: str = LOADAVG_PATH,
+    ):
+        self.enabled = enabled
+        self.min_free_mb = min_free_mb
+        self.default_job_mb = default_job_mb
+        self.max_load_per_cpu = max_load_per_cpu
+        self.step_parallelism = max(1, int(step_parallelism))
+        self.meminfo_path = meminfo_path
+        self.loadavg_path = loadavg_path
+        self.cpu_count = os.cpu_count() or 1
+
+        self._costs: Dict[str, float] = {}
+        self._deferred_count = 0
+        self._last_decision: Optional[AdmissionDecision] = None
+
+    # === Cost estimates ===
+
+    def load_costs(self, costs: Dict[str, float]):
+        """Loads learned peak RSS per sistema (MB)"""
+        self._costs = dict(costs)
+
+    def concurrent_steps(self, sistema_count: int) -> int:
+        """How many sistemas of a job can be running at the same time"""
+        return max(1, min(sistema_count, self.step_parallelism))
+
+    def estimate_mb(self, sistemas: Iterable[str]) -> float:
+        """
+        Estimated peak RSS for a job.
+
+        main.py runs up to step_parallelism sistemas of a job at once, so the
+        job peak is the sum of the largest step_parallelism estimates.
+        """
+        estimates = sorted(
+            (self._costs.get(str(s).lower(), self.default_job_mb) for s in sistemas),
+            reverse=True
+        )
+        if not estimates:
+            return self.default_job_mb
+        return sum(estimates[:self.concurrent_steps(len(estimates))])
+
+    def record_cost(self, sistema: str, peak_mb: float) -> float:
+        """Updates the in-memory estimate with a new sample (EWMA)"""
+        key = str(sistema).lower()
+        previous = self._costs.get(key)
+        if previous is None:
+            updated = peak_mb
+        else:
+            updated = COST_SMOOTHING * peak_mb + (1 - COST_SMOOTHING) * previous
+        self._costs[key] = updated
+        return updated
+
+    # === Decision ===
+
+    def check(
+        self,
+        sistemas: Iterable[str],
+        running_count: int,
+        reserved_mb: float = 0.0,
+    ) -> AdmissionDecision:
+        """
+        Checks whether a job with the given sistemas can start now.
+
+        Args:
+            sistemas: Sistemas of the candidate job
+            running_count: Number of jobs currently running
+            reserved_mb: Memory promised to running jobs but not yet in use
+        """
+        estimate = self.estimate_mb(sistemas)
+
+        if not self.enabled:
+            return self._remember(AdmissionDecision(True, "disabled", estimate))
+
+        meminfo = read_meminfo(self.meminfo_path)
+        load = read_loadavg(self.loadavg_path)
+
+        if meminfo is None and load is None:
+            return self._remember(AdmissionDecision(True, "no procfs", estimate))
+
+        available = meminfo["available_mb"] if meminfo else None
+
+        if running_count == 0:
+            return self._remember(
+                AdmissionDecision(True, "idle host", estimate, available, load)
+            )
+
+        if available is not None:
+            headroom = available - reserved_mb - estimate
+            if headroom < self.min_free_mb:
+                return self._remember(AdmissionDecision(
+                    False,
+                    f"memory: {available:.0f}MB free, {reserved_mb:.0f}MB reserved, "
+                    f"job needs ~{estimate:.0f}MB (min free {self.min_free_mb:.0f}MB)",
+                    estimate, available, load
+                ))
+
+        if load is not None:
+            load_per_cpu = load / self.cpu_count
+            if load_per_cpu > self.max_load_per_cpu:
+                return self._remember(AdmissionDecision(
+                    False,
+                    f"load: {load:.2f} on {self.cpu_count} cpus "
+                    f"(max {self.max_load_per_cpu:.2f}/cpu)",
+                    estimate, available, load
+                ))
+
+        return self._remember(AdmissionDecision(True, "ok", estimate, available, load))
+
+    def _remember(self, decision: AdmissionDecision) -> AdmissionDecision:
+        if not decision.admitted:
+            self._deferred_count += 1
+        self._last_decision = decision
+        return decision
+
+    def get_stats(self) -> dict:
+        """Returns admission controller statistics"""
+        last = self._last_decision
+        return {
+            "enabled": self.enabled,
+            "min_free_mb": self.min_free_mb,
+            "default_job_mb": self.default_job_mb,
+            "max_load_per_cpu": self.max_load_per_cpu,
+            "deferred_count": self._deferred_count,
+            "costs_mb": {k: round(v, 1) for k, v in self._costs.items()},
+            "last_decision": {
+                "admitted": last.admitted,
+                "reason": last.reason,
+                "estimated_mb": round(last.estimated_mb, 1),
+                "available_mb": round(last.available_mb, 1) if last.available_mb is not None else None,
+                "load": last.load,
+            } if last else None,
+        }
@@ -0,0 +1,450 @@
+"""
+Browser Pool - Pre-launched headless Chrome instances shared across jobs
+
+Every ETL step used to start its own Chrome (module setup_driver), paying
+the browser launch on the critical path of every job. The worker now keeps
+a pool of headless Chrome processes started in the background:
+
+- isolation: each instance has its own profile (user-data-dir) and default
+  download dir under BROWSER_POOL_DIR/browser_<n>/
+- leasing: before spawning main.py the executor leases idle instances for
+  the job's browser steps and passes them in ETL_BROWSER_POOL; the ETL
+  modules attach to them over the DevTools port (debuggerAddress) instead
+  of launching Chrome (python/utils/browser_lease.py)
+- health: idle instances are probed (GET /json/version) every
+  BROWSER_POOL_HEALTH_INTERVAL seconds; dead ones are replaced
+- recycle: after BROWSER_POOL_MAX_USES leases an instance is relaunched
+  with a fresh profile (bounded memory growth, no stale cookies)
+- crash replacement: an instance that fails the probe when returned is
+  relaunched by the maintenance thread, off the job's critical path
+
+Leasing never blocks: a job that finds no idle instance gets fewer (or no)
+browsers and its steps launch their own Chrome as before.
+"""
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.process_tree import signal_tree, spawn_kwargs
+
+logger = logging.getLogger(__name__)
+
+# Chrome writes the port chosen for --remote-debugging-port=0 here
+DEVTOOLS_PORT_FILE = "DevToolsActivePort"
+
+PROBE_TIMEOUT = 2.0
+
+# Preferences written into each fresh profile (same as the modules' setup_driver)
+PROFILE_PREFS = {
+    "download": {"prompt_for_download": False, "directory_upgrade": True},
+    "plugins": {"always_open_pdf_externally": True},
+    "profile": {"default_content_setting_values": {"automatic_downloads": 1}},
+}
+
+
+class BrowserState:
+    STARTING = "starting"
+    IDLE = "idle"
+    LEASED = "leased"
+    DEAD = "dead"
+
+
+@dataclass
+class BrowserInstance:
+    """One pooled Chrome process"""
+    browser_id: int
+    profile_dir: str
+    download_dir: str
+    state: str = BrowserState.STARTING
+    process: Optional[subprocess.Popen] = None
+    port: int = 0
+    uses: int = 0
+    launches: int = 0
+    job_id: Optional[int] = None
+    recycle: bool = False
+
+    @property
+    def address(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def lease_info(self) -> dict:
+        """What the ETL process needs to attach (ETL_BROWSER_POOL entry)"""
+        return {"id": self.browser_id, "address": self.address, "download_dir": self.download_dir}
+
+
+def default_binary() -> str:
+    """Chrome binary: system chromium on Linux (as base_driver), else chrome"""
+    binary = os.getenv("ETL_BROWSER_POOL_BINARY", "")
+    if binary:
+        return binary
+    if sys.platform.startswith("linux"):
+        return "/usr/bin/chromium"
+    return "chrome"
+
+
+def probe(address: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """True if the DevTools endpoint answers (browser alive and responsive)"""
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            return resp.status == 200 and "Browser" in json.loads(resp.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return False
+
+
+def reset_tabs(address: str, timeout: float = PROBE_TIMEOUT):
+    """Leaves a single blank tab (pages left open by the previous job are closed)"""
+    base = f"http://{address}/json"
+    with urllib.request.urlopen(f"{base}/list", timeout=timeout) as resp:
+        pages = [t for t in json.loads(resp.read().decode("utf-8")) if t.get("type") == "page"]
+    request = urllib.request.Request(f"{base}/new?about:blank", method="PUT")
+    with urllib.request.urlopen(request, timeout=timeout):
+        pass
+    for page in pages:
+        with urllib.request.urlopen(f"{base}/close/{page['id']}", timeout=timeout):
+            pass
+
+
+class BrowserPool:
+    """
+    Pool of headless Chrome instances leased by jobs.
+
+    Thread-safe; lease/release are quick (HTTP calls to the local DevTools
+    port) and launches happen in the maintenance thread.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        base_dir: str,
+        max_uses: int = 20,
+        health_interval: float = 30.0,
+        binary: Optional[str] = None,
+        startup_timeout: float = 20.0,
+        launcher: Optional[Callable[[BrowserInstance], Tuple[subprocess.Popen, int]]] = None,
+        prober: Callable[[str], bool] = probe,
+        resetter: Callable[[str], None] = reset_tabs,
+    ):
+        """
+        Args:
+            size: Number of Chrome instances
+            base_dir: Root of the per-instance profile/download dirs
+            max_uses: Leases before an instance is relaunched (0 = never)
+            health_interval: Seconds between probes of idle instances
+            binary: Chrome executable (default: default_binary())
+            startup_timeout: Seconds to wait for the DevTools port of a launch
+            launcher: Starts an instance, returns (process, port) - tests
+            prober: Liveness check of an address - tests
+            resetter: Tab cleanup between jobs - tests
+        """
+        self.size = size
+        self.base_dir = Path(base_dir)
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.binary = binary or default_binary()
+        self.startup_timeout = startup_timeout
+        self._launcher = launcher or self._launch_chrome
+        self._probe = prober
+        self._reset = resetter
+
+        self.browsers: Dict[int, BrowserInstance] = {}
+        for i in range(size):
+            root = self.base_dir / f"browser_{i}"
+            self.browsers[i] = BrowserInstance(
+                browser_id=i,
+                profile_dir=str(root / "profile"),
+                download_dir=str(root / "downloads"),
+            )
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        self.replaced = 0
+        self.recycled = 0
+
+    # === Lifecycle ===
+
+    def start(self):
+        """Starts the maintenance thread, which launches every instance"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._maintenance_loop, name="browser_pool", daemon=True)
+        self._thread.start()
+        logger.info(f"BrowserPool started: {self.size} instance(s) in {self.base_dir}")
+
+    def stop(self):
+        """Stops maintenance and kills every instance"""
+        self.running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        with self._lock:
+            browsers = list(self.browsers.values())
+        for browser in browsers:
+            self._kill(browser)
+            browser.state = BrowserState.DEAD
+        logger.info("BrowserPool stopped")
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """Blocks until no instance is starting (startup/tests)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                pending = [b for b in self.browsers.values() if b.state in (BrowserState.STARTING, BrowserState.DEAD)]
+            if not pending:
+                return True
+            time.sleep(0.05)
+        return False
+
+    # === Leasing ===
+
+    def lease(self, job_id: int, count: int) -> List[BrowserInstance]:
+        """
+        Leases up to `count` idle instances to a job (never blocks).
+
+        Instances that fail the probe are marked for replacement and skipped.
+        """
+        leased: List[BrowserInstance] = []
+        with self._lock:
+            candidates = [b for b in self.browsers.values() if b.state == BrowserState.IDLE]
+            for browser in candidates:
+                if len(leased) >= count:
+                    break
+                browser.state = BrowserState.LEASED
+                browser.job_id = job_id
+                leased.append(browser)
+
+        healthy = []
+        for browser in leased:
+            if self._probe(browser.address):
+                healthy.append(browser)
+            else:
+                logger.warning(f"Browser {browser.browser_id} failed health check on lease; replacing")
+                self._mark_dead(browser)
+        if healthy:
+            logger.info(f"Job #{job_id}: leased browser(s) {[b.browser_id for b in healthy]}")
+        return healthy
+
+    def release(self, browsers: List[BrowserInstance]):
+        """
+        Returns leased instances. Crashed ones and those past max_uses are
+        relaunched by the maintenance thread; the others get their tabs and
+        download dir cleaned and go back to idle.
+        """
+        for browser in browsers:
+            browser.uses += 1
+            browser.job_id = None
+            if not self._probe(browser.address):
+                logger.warning(f"Browser {browser.browser_id} crashed during the job; replacing")
+                self._mark_dead(browser)
+                continue
+            if self.max_uses and browser.uses >= self.max_uses:
+                logger.info(f"Browser {browser.browser_id} reached {browser.uses} uses; recycling")
+                browser.recycle = True
+                self._mark_dead(browser)
+                continue
+            try:
+                self._reset(browser.address)
+                self._clear_downloads(browser)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Browser {browser.browser_id} reset failed ({e}); replacing")
+                self._mark_dead(browser)
+                continue
+            with self._lock:
+                browser.state = BrowserState.IDLE
+
+    def _mark_dead(self, browser: BrowserInstance):
+        with self._lock:
+            browser.state = BrowserState.DEAD
+        self._wake.set()
+
+    # === Maintenance ===
+
+    def _maintenance_loop(self):
+        while self.running:
+            self.check()
+            self._wake.wait(self.health_interval)
+            self._wake.clear()
+
+    def check(self):
+        """One maintenance pass: probe idle instances, (re)launch dead ones"""
+        with self._lock:
+            browsers = list(self.browsers.values())
+        for browser in browsers:
+            if not self.running and self._thread is not None:
+                return
+            if browser.state == BrowserState.IDLE and not self._probe(browser.address):
+                logger.warning(f"Browser {browser.browser_id} failed health check; replacing")
+                with self._lock:
+                    browser.state = BrowserState.DEAD
+            if browser.state in (BrowserState.DEAD, BrowserState.STARTING):
+                self._relaunch(browser)
+
+    def _relaunch(self, browser: BrowserInstance):
+        replacing = browser.launches > 0
+        self._kill(browser)
+        # First launch and recycles start from an empty profile
+        if browser.recycle or not replacing:
+            shutil.rmtree(browser.profile_dir, ignore_errors=True)
+        self._prepare_dirs(browser)
+        try:
+            process, port = self._launcher(browser)
+        except Exception as e:
+            logger.error(f"Browser {browser.browser_id} failed to launch: {e}")
+            with self._lock:
+                browser.state = BrowserState.DEAD
+            return
+
+        with self._lock:
+            browser.process = process
+            browser.port = port
+            browser.launches += 1
+            if browser.recycle:
+                self.recycled += 1
+                browser.uses = 0
+            elif replacing:
+                self.replaced += 1
+            browser.recycle = False
+            browser.state = BrowserState.IDLE
+        logger.info(f"Browser {browser.browser_id} ready at {browser.address}")
+
+    def _prepare_dirs(self, browser: BrowserInstance):
+        os.makedirs(browser.download_dir, exist_ok=True)
+        default_dir = Path(browser.profile_dir) / "Default"
+        default_dir.mkdir(parents=True, exist_ok=True)
+        prefs_path = default_dir / "Preferences"
+        if not prefs_path.exists():
+            prefs = json.loads(json.dumps(PROFILE_PREFS))
+            prefs["download"]["default_directory"] = os.path.abspath(browser.download_dir)
+            prefs_path.write_text(json.dumps(prefs), encoding="utf-8")
+        port_file = Path(browser.profile_dir) / DEVTOOLS_PORT_FILE
+        if port_file.exists():
+            port_file.unlink()
+
+    def _clear_downloads(self, browser: BrowserInstance):
+        for entry in os.scandir(browser.download_dir):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.unlink(entry.path)
+
+    def _launch_chrome(self, browser: BrowserInstance) -> Tuple[subprocess.Popen, int]:
+        """Starts headless Chrome and waits for its DevTools port"""
+        cmd = [
+            self.binary,
+            "--headless=new",
+            "--remote-debugging-port=0",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={os.path.abspath(browser.profile_dir)}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--no-sandbox",
+            "--disable-gpu",
+            "--disable-dev-shm-usage",
+            "--window-size=1920,1080",
+            # Lean profile: no background traffic between jobs
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-extensions",
+            "--disable-sync",
+            "--mute-audio",
+            "about:blank",
+        ]
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **spawn_kwargs()
+        )
+        port_file = Path(browser.profile_dir) / DEVTOOLS_PORT_FILE
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Chrome exited with code {process.returncode}")
+            try:
+                first_line = port_file.read_text(encoding="utf-8").splitlines()[0]
+                return process, int(first_line)
+            except (OSError, IndexError, ValueError):
+                time.sleep(0.05)
+        self._kill_process(process)
+        raise TimeoutError(f"Chrome did not open the DevTools port in {self.startup_timeout}s")
+
+    def _kill(self, browser: BrowserInstance):
+        if browser.process is not None:
+            self._kill_process(browser.process)
+            browser.process = None
+
+    @staticmethod
+    def _kill_process(process):
+        if process.poll() is not None:
+            return
+        signal_tree(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            signal_tree(process.pid, getattr(signal, "SIGKILL", signal.SIGTERM), force=True)
+
+    # === Status ===
+
+    def get_status(self) -> dict:
+        with self._lock:
+            browsers = [
+                {
+                    "browser_id": b.browser_id,
+                    "state": b.state,
+                    "address": b.address if b.port else None,
+                    "uses": b.uses,
+                    "launches": b.launches,
+                    "job_id": b.job_id,
+                }
+                for b in self.browsers.values()
+            ]
+        return {
+            "size": self.size,
+            "max_uses": self.max_uses,
+            "idle": sum(1 for b in browsers if b["state"] == BrowserState.IDLE),
+            "leased": sum(1 for b in browsers if b["state"] == BrowserState.LEASED),
+            "replaced": self.replaced,
+            "recycled": self.recycled,
+            "browsers": browsers,
+        }
+
+
+# Singleton (None if ETL_BROWSER_POOL_SIZE=0)
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """Returns the browser pool if enabled"""
+    return _browser_pool
+
+
+def create_browser_pool(**kwargs) -> BrowserPool:
+    """Creates the browser pool from settings (kwargs override)"""
+    global _browser_pool
+    from config import settings
+
+    options = {
+        "size": settings.BROWSER_POOL_SIZE,
+        "base_dir": str(settings.BROWSER_POOL_DIR),
+        "max_uses": settings.BROWSER_POOL_MAX_USES,
+        "health_interval": settings.BROWSER_POOL_HEALTH_INTERVAL,
+    }
+    options.update(kwargs)
+    _browser_pool = BrowserPool(**options)
+    return _browser_pool
+
+
+def clear_browser_pool():
+    global _browser_pool
+    _browser_pool = None
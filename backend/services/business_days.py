@@ -0,0 +1,79 @@
+"""
+Business Days - Brazilian (Sao Paulo) business-day calendar for the backend
+
+Same calendars the ETL modules use (python/utils/business_calendar): Sao
+Paulo by default, national holidays only with state=None, weekends only
+with with_holidays=False. The `holidays` package is optional here: without
+it only weekends are skipped and a warning is logged once.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import holidays
+    HOLIDAYS_AVAILABLE = True
+except ImportError:
+    HOLIDAYS_AVAILABLE = False
+    holidays = None
+
+DateLike = Union[date, str]
+
+_warned = False
+
+
+def parse_date(value: DateLike) -> date:
+    """
+    Parses YYYY-MM-DD or DD/MM/YYYY (the formats accepted by the API).
+
+    Raises:
+        ValueError: Unknown format
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data invalida: {value}")
+
+
+@lru_cache(maxsize=64)
+def holidays_for_year(year: int, state: Optional[str] = "SP") -> FrozenSet[date]:
+    """Holidays of one year: national, plus the state's when `state` is set"""
+    global _warned
+    if not HOLIDAYS_AVAILABLE:
+        if not _warned:
+            logger.warning("holidays package not installed: business days skip weekends only")
+            _warned = True
+        return frozenset()
+    return frozenset(holidays.Brazil(state=state, years=year).keys())
+
+
+def is_business_day(day: date, state: Optional[str] = "SP", with_holidays: bool = True) -> bool:
+    if day.weekday() >= 5:
+        return False
+    return not with_holidays or day not in holidays_for_year(day.year, state)
+
+
+def business_days(
+    start: DateLike,
+    end: DateLike,
+    state: Optional[str] = "SP",
+    with_holidays: bool = True
+) -> List[date]:
+    """Business days in [start, end] (inclusive), in order"""
+    start, end = parse_date(start), parse_date(end)
+    days = []
+    current = start
+    while current <= end:
+        if is_business_day(current, state, with_holidays):
+            days.append(current)
+        current += timedelta(days=1)
+    return days
@@ -5,12 +5,15 @@ This module provides secure encryption/decryption of sensitive credential fields
 using industry-standard AES-256-GCM authenticated encryption.
 
 Key derivation uses PBKDF2-HMAC-SHA256 with 600,000 iterations (OWASP 2023 recommendation).
+Derived keys are cached per salt: every save still draws a fresh salt, and the
+key derived for it is kept, so reloading the saved file skips the KDF. ETL subprocesses receive the derived key through an
+inherited pipe (see services/key_handoff.py) instead of re-deriving it.
 """
 import os
 import base64
 import json
 import logging
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, Optional, Set, Tuple
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -31,6 +34,9 @@ class CryptoService:
     # Fields that should be encrypted
     SENSITIVE_FIELDS: Set[str] = {"password", "senha", "secret", "token", "api_key"}
 
+    # Derived keys kept in memory (one per salt)
+    KEY_CACHE_SIZE = 4
+
     def __init__(self, master_key: Optional[str] = None):
         """
         Initialize crypto service.
@@ -49,9 +55,11 @@ class CryptoService:
                 "or pass master_key parameter."
             )
 
+        self._key_cache: Dict[bytes, bytes] = {}
+
     def _derive_key(self, salt: bytes) -> bytes:
         """
-        Derive encryption key from master passphrase using PBKDF2.
+        Derive encryption key from master passphrase (cached per salt).
 
         Args:
             salt: Random salt for key derivation.
@@ -59,6 +67,16 @@ class CryptoService:
         Returns:
             32-byte derived key.
         """
+        key = self._key_cache.get(salt)
+        if key is None:
+            key = self._kdf(salt)
+            if len(self._key_cache) >= self.KEY_CACHE_SIZE:
+                self._key_cache.pop(next(iter(self._key_cache)))
+            self._key_cache[salt] = key
+        return key
+
+    def _kdf(self, salt: bytes) -> bytes:
+        """Runs PBKDF2-HMAC-SHA256 (the expensive part)"""
         from cryptography.hazmat.primitives import hashes
         from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
@@ -151,6 +169,9 @@ class CryptoService:
         Only fields matching SENSITIVE_FIELDS are encrypted.
         Other fields (URLs, usernames, paths) remain in plaintext.
 
+        Every save uses a new random salt; the key derived for it is cached,
+        so loading the saved file does not pay the KDF again.
+
         Args:
             credentials: Plain credentials dictionary.
 
@@ -270,6 +291,24 @@ class CryptoService:
         else:
             return obj
 
+    def data_key_for(self, encrypted: Dict[str, Any]) -> Optional[Tuple[bytes, bytes]]:
+        """
+        Returns (salt, derived key) for an encrypted credentials file.
+
+        Used to hand the derived key to ETL subprocesses so they skip the KDF.
+
+        Args:
+            encrypted: Encrypted credentials dictionary.
+
+        Returns:
+            (salt, key) or None if the data has no salt.
+        """
+        salt_b64 = encrypted.get("encryption", {}).get("salt", "")
+        if not salt_b64:
+            return None
+        salt = base64.b64decode(salt_b64)
+        return salt, self._derive_key(salt)
+
     def is_encrypted(self, data: Dict[str, Any]) -> bool:
         """
         Check if credentials data is in encrypted format.
@@ -168,6 +168,21 @@ class DistributedConnectionManager:
                 )
             )
 
+    async def broadcast_progress(self, job_id: int, progress: dict):
+        """
+        Broadcasts job progress (percent complete, ETA, counters).
+        In distributed mode, also publishes to Redis.
+        """
+        payload = {"job_id": job_id, **progress}
+        message = {"type": "progress", "payload": payload}
+
+        await self._broadcast_local(message)
+
+        if self._redis_enabled and self._redis_client:
+            await self._publish_with_fallback(
+                lambda: self._redis_client.publish_progress(job_id, progress)
+            )
+
     async def _broadcast_local(self, message: dict):
         """Broadcasts message to local WebSocket connections only"""
         disconnect_list = []
@@ -2,14 +2,31 @@
 ETL Executor - Executa scripts Python ETL via subprocess
 """
 import asyncio
+import json
 import os
+import shutil
+import tempfile
 import sys
 import re
+import signal
 import logging
 from datetime import datetime
 from typing import Callable, Optional, List, Dict, Any
 import traceback
 
+from services.progress import JobProgress, PROGRESS_LEVEL, parse_progress, get_unit_history
+from services.spans import JobSpans, SPAN_LEVEL, parse_span
+from services.log_spool import LogSpool, job_log_path
+from services import key_handoff
+from services.process_tree import (
+    IS_WINDOWS,
+    TeardownResult,
+    group_pids,
+    signal_tree,
+    spawn_kwargs,
+    terminate_tree,
+)
+
 logger = logging.getLogger(__name__)
 
 # Whitelist of valid system identifiers
@@ -20,6 +37,8 @@ VALID_SISTEMAS = frozenset({
     "fidc",
     "qore",
     "britech",
+    "jcot",
+    "trustee",
     # Add other valid systems as needed
 })
 
@@ -90,6 +109,11 @@ class ETLExecutor:
         self.slot_id = slot_id
         self.process: Optional[asyncio.subprocess.Process] = None
         self._cancelled = False
+        self.progress: Optional[JobProgress] = None
+        self.spans: Optional[JobSpans] = None
+        self.spool: Optional[LogSpool] = None
+        self.last_teardown: Optional[TeardownResult] = None
+        self._teardown: Optional[asyncio.Task] = None
 
         # Caminhos relativos ao backend
         # __file__ -> services/executor.py
@@ -177,6 +201,20 @@ class ETLExecutor:
         if params.get("dry_run"):
             cmd.append("--dry-run")
 
+        # Shard: pasta de staging propria (movida para as pastas configuradas ao final)
+        if params.get("staging_dir"):
+            cmd.extend(["--staging-dir", str(params["staging_dir"])])
+
+        # Ignorar o ledger de unidades ja baixadas
+        if params.get("force"):
+            cmd.append("--force")
+
+        # Checkpoint: chave do job (o job original, em caso de resume)
+        if params.get("checkpoint_id") is not None:
+            cmd.extend(["--job-id", str(int(params["checkpoint_id"]))])
+            if params.get("resume"):
+                cmd.append("--resume")
+
         # Opcoes por sistema
         opcoes = params.get("opcoes", {})
 
@@ -215,7 +253,8 @@ class ETLExecutor:
         self,
         params: Dict[str, Any],
         log_callback: Callable[[dict], Any],
-        timeout_seconds: int = 3600
+        timeout_seconds: int = 3600,
+        job_id: Optional[int] = None
     ) -> bool:
         """
         Executa o pipeline ETL
@@ -224,6 +263,7 @@ class ETLExecutor:
             params: Parametros do job
             log_callback: Funcao para receber logs (sync ou async)
             timeout_seconds: Timeout em segundos (padrao 1 hora)
+            job_id: Se informado, a saida bruta vai para logs/jobs/job_<id>.log
 
         Returns:
             True se sucesso, False se erro
@@ -236,6 +276,10 @@ class ETLExecutor:
                 raise Exception("Ja existe um processo em execucao")
 
         self._cancelled = False
+        self._teardown = None
+        self.last_teardown = None
+        self.progress = JobProgress(history=get_unit_history(), paths=self._output_paths(params))
+        self.spans = JobSpans()
         cmd = self.build_command(params)
 
         logger.info(f"Executando: {' '.join(cmd)}")
@@ -248,6 +292,12 @@ class ETLExecutor:
         env = os.environ.copy()
         env["PYTHONIOENCODING"] = "utf-8"
         env["PYTHONUNBUFFERED"] = "1"
+        env["ETL_CHECKPOINT_DIR"] = str(settings.CHECKPOINT_DIR)
+        env["ETL_LEDGER_PATH"] = str(settings.LEDGER_PATH)
+        env["ETL_SESSION_DIR"] = str(settings.SESSION_DIR)
+
+        # Chrome do pool (se ativo): os steps anexam em vez de abrir outro
+        browsers = await self._lease_browsers(params, job_id, env)
 
         try:
             # Verificar se o script existe
@@ -257,6 +307,24 @@ class ETLExecutor:
                 await self._send_log(log_callback, "ERROR", "SISTEMA", error_msg)
                 return False
 
+            if job_id is not None:
+                try:
+                    self.spool = LogSpool(job_log_path(job_id))
+                except OSError as e:
+                    logger.warning(f"Spool de log indisponivel para job {job_id}: {e}")
+
+            # Chave derivada das credenciais via pipe herdado (evita KDF no filho)
+            key_fd = None
+            extra_kwargs = {}
+            if settings.CREDENTIALS_KEY_HANDOFF:
+                data_key = await asyncio.to_thread(key_handoff.prepare_data_key, self.config_path)
+                if data_key:
+                    key_fd = key_handoff.open_key_pipe(
+                        key_handoff.build_payload(*data_key, ttl_seconds=settings.DATA_KEY_TTL_SECONDS)
+                    )
+                    extra_kwargs, key_arg = key_handoff.inherit_kwargs(key_fd)
+                    cmd = cmd + ["--key-fd", str(key_arg)]
+
             # Criar processo
             try:
                 self.process = await asyncio.create_subprocess_exec(
@@ -264,7 +332,9 @@ class ETLExecutor:
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE,  # Capturar stderr separadamente
                     cwd=self.python_dir,
-                    env=env
+                    env=env,
+                    **spawn_kwargs(),  # grupo proprio: cancel alcanca Chrome/chromedriver
+                    **extra_kwargs
                 )
             except Exception as e:
                 error_msg = f"Erro ao criar processo: {str(e)}\nTraceback: {traceback.format_exc()}"
@@ -272,6 +342,9 @@ class ETLExecutor:
                 await self._send_log(log_callback, "ERROR", "SISTEMA", 
                                      f"Erro ao iniciar processo: {str(e)}")
                 return False
+            finally:
+                if key_fd is not None:
+                    os.close(key_fd)
 
             # Ler output e stderr com timeout
             try:
@@ -283,12 +356,20 @@ class ETLExecutor:
                 await self._send_log(log_callback, "ERROR", "SISTEMA",
                                      f"Timeout apos {timeout_seconds} segundos")
                 self.cancel()
+                await self._finish_teardown(log_callback)
                 return False
 
             # Aguardar finalizacao
             await self.process.wait()
             return_code = self.process.returncode
 
+            # Encerrar netos que sobreviveram ao processo principal
+            if self._teardown is None and not IS_WINDOWS and group_pids(self.process.pid):
+                self._teardown = asyncio.ensure_future(
+                    terminate_tree(self.process, settings.CANCEL_GRACE_SECONDS)
+                )
+            await self._finish_teardown(log_callback)
+
             # Ler stderr se houver
             if self.process.stderr:
                 try:
@@ -323,6 +404,59 @@ class ETLExecutor:
             return False
         finally:
             self.process = None
+            if self.spool:
+                self.spool.close()
+                self.spool = None
+            if browsers:
+                await self._release_browsers(browsers, env)
+
+    def _output_paths(self, params: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        Configured output folders, used to group sistemas for the ETA.
+        None for shards (each one downloads into its own staging folders)
+        or when the credentials cannot be read.
+        """
+        if params.get("staging_dir"):
+            return None
+        try:
+            from services.credentials import get_config_service
+            return get_config_service().get_paths()
+        except Exception as e:
+            logger.warning(f"Paths indisponiveis para o ETA: {e}")
+            return None
+
+    async def _lease_browsers(self, params: Dict[str, Any], job_id: Optional[int], env: dict) -> list:
+        """
+        Leases pooled Chrome instances for the job's browser steps.
+
+        One per step main.py may run at once; ETL_BROWSER_POOL lists them
+        and ETL_BROWSER_LEASE_DIR holds the claims of the steps (see
+        python/utils/browser_lease.py). Empty when the pool is disabled or busy.
+        """
+        from config import settings
+        from services.browser_pool import get_browser_pool
+
+        pool = get_browser_pool()
+        if pool is None:
+            return []
+        sistemas = params.get("sistemas") or []
+        count = min(len(sistemas) or settings.ADMISSION_STEP_PARALLELISM, settings.ADMISSION_STEP_PARALLELISM)
+        browsers = await asyncio.to_thread(pool.lease, job_id or 0, count)
+        if browsers:
+            env["ETL_BROWSER_POOL"] = json.dumps([b.lease_info() for b in browsers])
+            env["ETL_BROWSER_LEASE_DIR"] = tempfile.mkdtemp(prefix="etl_lease_")
+        return browsers
+
+    async def _release_browsers(self, browsers: list, env: dict):
+        """Returns the leased instances to the pool"""
+        from services.browser_pool import get_browser_pool
+
+        pool = get_browser_pool()
+        if pool is not None:
+            await asyncio.to_thread(pool.release, browsers)
+        lease_dir = env.get("ETL_BROWSER_LEASE_DIR")
+        if lease_dir:
+            shutil.rmtree(lease_dir, ignore_errors=True)
 
     async def _stream_output(self, log_callback: Callable):
         """Processa output do processo linha a linha"""
@@ -340,9 +474,15 @@ class ETLExecutor:
                     line = await self.process.stdout.readline()
                     if not line:
                         break
+                    self._spool_line(line)
                     decoded = line.decode("utf-8", errors="replace").strip()
                     if decoded:
                         parsed = self._parse_log_line(decoded)
+                        if "span" in parsed:
+                            # Agregado no job, nao vai para o log (fica no spool)
+                            self._track_span(parsed)
+                            continue
+                        self._track_progress(parsed)
                         await self._send_log_dict(log_callback, parsed)
                 except Exception as e:
                     logger.error(f"Erro ao ler stdout: {e}")
@@ -359,6 +499,7 @@ class ETLExecutor:
                     line = await self.process.stderr.readline()
                     if not line:
                         break
+                    self._spool_line(line, prefix="[STDERR] ")
                     decoded = line.decode("utf-8", errors="replace").strip()
                     if decoded:
                         # Log de stderr como erro
@@ -376,6 +517,16 @@ class ETLExecutor:
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
+    def _spool_line(self, line: bytes, prefix: str = ""):
+        """Grava linha bruta no arquivo do job (se houver)"""
+        if self.spool:
+            try:
+                self.spool.write_line(prefix + line.decode("utf-8", errors="replace"))
+            except OSError as e:
+                logger.warning(f"Falha ao gravar spool de log: {e}")
+                self.spool.close()
+                self.spool = None
+
     async def _send_log(self, callback: Callable, level: str, sistema: str, mensagem: str):
         """Envia log formatado"""
         log_entry = {
@@ -420,17 +571,86 @@ class ETLExecutor:
             log_entry["sistema"] = match.group(2)
             log_entry["mensagem"] = match.group(3)
 
+            if log_entry["level"] == PROGRESS_LEVEL:
+                progress = parse_progress(log_entry["mensagem"])
+                if progress:
+                    log_entry["progress"] = progress
+            elif log_entry["level"] == SPAN_LEVEL:
+                span = parse_span(log_entry["mensagem"])
+                if span:
+                    log_entry["span"] = span
+
         return log_entry
 
+    def _track_progress(self, log_entry: dict):
+        """Atualiza contadores de progresso a partir de uma linha PROGRESS"""
+        progress = log_entry.get("progress")
+        if progress and self.progress is not None:
+            self.progress.update(
+                log_entry["sistema"],
+                progress["done"],
+                progress["total"],
+                progress["unit"],
+                progress.get("skipped", 0)
+            )
+
+    def _track_span(self, log_entry: dict):
+        """Soma um SPAN na arvore de tempos do job"""
+        span = log_entry["span"]
+        if self.spans is not None:
+            self.spans.add(span["path"], span["seconds"], span["ok"])
+
+    async def _finish_teardown(self, log_callback: Callable):
+        """Aguarda encerramento da arvore de processos e reporta a latencia"""
+        task, self._teardown = self._teardown, None
+        if task is None:
+            return
+
+        try:
+            result = await task
+        except Exception as e:
+            logger.error(f"Erro ao encerrar arvore de processos: {e}")
+            return
+
+        self.last_teardown = result
+        mensagem = f"Arvore de processos encerrada em {result.seconds:.2f}s"
+        if result.escalated:
+            mensagem += " (SIGKILL apos prazo)"
+        if result.survivors:
+            mensagem += f" - {result.survivors} processo(s) ainda ativos"
+        level = "WARN" if result.escalated or result.survivors else "INFO"
+        await self._send_log(log_callback, level, "SISTEMA", mensagem)
+
     def cancel(self):
-        """Cancela execucao em andamento"""
+        """
+        Cancela execucao em andamento.
+
+        Envia SIGTERM ao grupo de processos do job (main.py, Chrome,
+        chromedriver) e agenda o SIGKILL apos CANCEL_GRACE_SECONDS.
+        """
+        from config import settings
+
         self._cancelled = True
-        if self.process and self.process.returncode is None:
+        if not self.process or self.process.returncode is not None:
+            return
+        if self._teardown is not None:
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Sem event loop (chamada sincrona): apenas SIGTERM no grupo
             try:
-                self.process.terminate()
-                logger.info("Processo terminado")
+                signal_tree(self.process.pid, signal.SIGTERM)
+                logger.info("Grupo de processos terminado")
             except Exception as e:
                 logger.error(f"Erro ao terminar processo: {e}")
+            return
+
+        self._teardown = asyncio.ensure_future(
+            terminate_tree(self.process, settings.CANCEL_GRACE_SECONDS)
+        )
+        logger.info("Encerrando grupo de processos do job")
 
     @property
     def is_running(self) -> bool:
@@ -0,0 +1,93 @@
+"""
+Key Handoff - Passes the derived credentials key to ETL subprocesses
+
+Decrypting credentials.encrypted.json needs PBKDF2 with 600,000 iterations.
+Instead of every python/main.py run repeating it, the backend derives the key
+once (CryptoService caches it per salt) and writes a short-lived payload into
+a pipe whose read end is inherited by the child:
+
+    {"salt": <b64>, "key": <b64>, "expires_at": <epoch seconds>}
+
+The child receives only the descriptor number (--key-fd N), reads the pipe
+once and closes it. The key never appears in argv, the environment or on
+disk, is bound to the file's salt, and is refused after expires_at. If it
+does not match, the child falls back to deriving from ETL_MASTER_KEY.
+"""
+import base64
+import json
+import logging
+import os
+import subprocess
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == "nt"
+
+# Validity of a handed-off key (the child reads it right at startup)
+DATA_KEY_TTL_SECONDS = 60
+
+
+def build_payload(salt: bytes, key: bytes, ttl_seconds: float = DATA_KEY_TTL_SECONDS) -> bytes:
+    return json.dumps({
+        "salt": base64.b64encode(salt).decode("ascii"),
+        "key": base64.b64encode(key).decode("ascii"),
+        "expires_at": time.time() + ttl_seconds,
+    }).encode("ascii")
+
+
+def open_key_pipe(payload: bytes) -> int:
+    """
+    Creates a pipe holding `payload` and returns its read end.
+
+    The write end is closed before returning, so the child sees EOF after
+    the payload. The payload (~150 bytes) fits in any pipe buffer.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, payload)
+    finally:
+        os.close(write_fd)
+    return read_fd
+
+
+def inherit_kwargs(read_fd: int) -> Tuple[Dict, int]:
+    """
+    Subprocess kwargs that make only `read_fd` inheritable by the child.
+
+    Returns:
+        (kwargs, value for --key-fd) - a fd on POSIX, a handle on Windows
+    """
+    if IS_WINDOWS:
+        import msvcrt
+        handle = msvcrt.get_osfhandle(read_fd)
+        os.set_handle_inheritable(handle, True)
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.lpAttributeList = {"handle_list": [handle]}
+        return {"startupinfo": startupinfo}, handle
+    return {"pass_fds": (read_fd,)}, read_fd
+
+
+def prepare_data_key(config_path: str) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Returns (salt, key) for the credentials file the child will read.
+
+    None when the file is missing, plaintext or no master key is configured.
+    Runs the KDF on the first call per salt - call it off the event loop.
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if "encryption" not in data:
+        return None
+
+    try:
+        from services.crypto import get_crypto_service
+        return get_crypto_service().data_key_for(data)
+    except Exception as e:
+        logger.warning(f"Key handoff unavailable: {e}")
+        return None
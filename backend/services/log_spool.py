@@ -0,0 +1,181 @@
+"""
+Log Spool - Per-job raw output files with a sparse line index
+
+The executor streams every stdout/stderr line of the ETL subprocess into an
+append-only file. Only parsed entries of level INFO and above are also kept
+in jobs.logs (see db_log_line), capped at JOB_LOG_DB_MAX_CHARS:
+
+    <JOB_LOG_DIR>/job_<id>.log      raw lines, newline terminated
+    <JOB_LOG_DIR>/job_<id>.log.idx  sparse line-offset index
+
+The index is a little-endian uint64 header with the stride, followed by one
+uint64 byte offset for every `stride`-th line (line 0, stride, 2*stride...).
+Reading line N seeks to the nearest indexed offset and skips at most
+stride-1 lines, so ranges and tails never load the whole file.
+
+Readers may run while the job is still writing: the log is flushed before
+an offset is appended to the index, and a trailing partial line is ignored.
+"""
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Lines between index entries
+INDEX_STRIDE = 256
+
+INDEX_SUFFIX = ".idx"
+
+_U64 = struct.Struct("<Q")
+
+# Levels of parsed entries kept in jobs.logs (DEBUG/PROGRESS stay in the spool)
+DB_LOG_LEVELS = frozenset({"INFO", "SUCCESS", "WARN", "WARNING", "ERROR"})
+
+# Lines without the [LEVEL] [SISTEMA] prefix: spool only
+RAW_SOURCES = frozenset({"STDOUT", "STDERR"})
+
+PathLike = Union[str, Path]
+
+
+def index_path(log_path: PathLike) -> str:
+    return str(log_path) + INDEX_SUFFIX
+
+
+class LogSpool:
+    """
+    Append-only writer for one job's raw output.
+
+    Args:
+        path: Log file path (index is written next to it)
+        stride: Lines between index entries
+    """
+
+    def __init__(self, path: PathLike, stride: int = INDEX_STRIDE):
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+
+        self.path = str(path)
+        self.stride = stride
+        self.lines = 0
+        self._offset = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._log = open(self.path, "wb")
+        self._index = open(index_path(self.path), "wb")
+        self._index.write(_U64.pack(stride))
+        self._index.write(_U64.pack(0))
+        self._index.flush()
+
+    def write_line(self, line: str):
+        """Append one line (trailing newline is added)"""
+        if self._log.closed:
+            return
+
+        data = line.rstrip("\r\n").encode("utf-8", errors="replace") + b"\n"
+        self._log.write(data)
+        self._log.flush()
+        self._offset += len(data)
+        self.lines += 1
+
+        if self.lines % self.stride == 0:
+            self._index.write(_U64.pack(self._offset))
+            self._index.flush()
+
+    def close(self):
+        if not self._log.closed:
+            self._log.close()
+        if not self._index.closed:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_index(log_path: PathLike) -> tuple:
+    """Returns (stride, entry_count) - missing index means a single entry at 0"""
+    try:
+        with open(index_path(log_path), "rb") as f:
+            header = f.read(_U64.size)
+            if len(header) < _U64.size:
+                return INDEX_STRIDE, 1
+            size = os.fstat(f.fileno()).st_size
+    except FileNotFoundError:
+        return INDEX_STRIDE, 1
+
+    stride = _U64.unpack(header)[0] or INDEX_STRIDE
+    entries = max(1, (size - _U64.size) // _U64.size)
+    return stride, entries
+
+
+def _index_entry(log_path: PathLike, entry: int) -> int:
+    if entry == 0:
+        return 0
+    with open(index_path(log_path), "rb") as f:
+        f.seek(_U64.size * (entry + 1))
+        return _U64.unpack(f.read(_U64.size))[0]
+
+
+def count_lines(log_path: PathLike) -> int:
+    """Complete lines in the log (reads at most one stride from disk)"""
+    if not os.path.exists(log_path):
+        return 0
+
+    stride, entries = _read_index(log_path)
+    last = entries - 1
+
+    with open(log_path, "rb") as f:
+        f.seek(_index_entry(log_path, last))
+        tail_lines = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(65536), b""))
+
+    return last * stride + tail_lines
+
+
+def read_lines(log_path: PathLike, start: int = 0, limit: int = 100) -> List[str]:
+    """
+    Returns up to `limit` complete lines beginning at line `start` (0-based).
+    """
+    if limit <= 0 or start < 0 or not os.path.exists(log_path):
+        return []
+
+    stride, entries = _read_index(log_path)
+    entry = min(start // stride, entries - 1)
+    skip = start - entry * stride
+
+    lines: List[str] = []
+    with open(log_path, "rb") as f:
+        f.seek(_index_entry(log_path, entry))
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # Partial line still being written
+                break
+            if skip:
+                skip -= 1
+                continue
+            lines.append(raw[:-1].decode("utf-8", errors="replace"))
+            if len(lines) >= limit:
+                break
+
+    return lines
+
+
+def db_log_line(log_entry: dict) -> Optional[str]:
+    """Line to append to jobs.logs for a log entry, or None if spool only"""
+    if str(log_entry.get("sistema", "")).upper() in RAW_SOURCES:
+        return None
+    if str(log_entry.get("level", "")).upper() not in DB_LOG_LEVELS:
+        return None
+    return f"[{log_entry['level']}] [{log_entry['sistema']}] {log_entry['mensagem']}"
+
+
+def job_log_path(job_id: int, log_dir: Optional[PathLike] = None) -> Path:
+    """Raw output path for a job"""
+    if log_dir is None:
+        from config import settings
+        log_dir = settings.JOB_LOG_DIR
+    return Path(log_dir) / f"job_{int(job_id)}.log"
@@ -0,0 +1,289 @@
+"""
+Run-cost Planner - Predicts how long a pipeline request will take
+
+A request (same body as POST /api/execute) is expanded into the units the
+ETL modules count in their PROGRESS lines:
+
+    amplis_reag / amplis_master   datas      business days (PDF download)
+    maps                          ativos     business days x funds
+    maps                          passivos   business days x funds
+    fidc                          fundos     business days x funds
+    qore                          fundos     funds of BD.xlsx (one date)
+
+Business days follow the calendar each module iterates (SISTEMA_CALENDARS).
+
+Fund lists come from the same sources main.py hands to the modules: the
+selection saved in the credentials, or for QORE the BD.xlsx sheet read by
+ler_lista_fundos. Each unit count is multiplied by the historical
+seconds-per-unit learned by the progress tracker (table unit_timings).
+
+Sistemas of one job run concurrently (see ETL_MAX_STEP_WORKERS), so the wall
+time is the larger of the longest dependency chain and the total work spread
+over the step parallelism.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from services.business_days import business_days, parse_date
+
+logger = logging.getLogger(__name__)
+
+# Steps that wait for another one (python/main.py STEPS)
+STEP_DEPENDENCIES = {
+    "amplis_master": "amplis_reag",
+}
+
+# Calendar each module iterates, as (state, with_holidays) for
+# business_days: AMPLIS get_calendar(None), MAPS get_calendar(None,
+# feriados=False), FIDC get_calendar("SP")
+SISTEMA_CALENDARS = {
+    "amplis_reag": (None, True),
+    "amplis_master": (None, True),
+    "maps": (None, False),
+    "fidc": ("SP", True),
+}
+
+# Column layout of BD.xlsx, sheet BD (see automacao_qore_v5.ler_lista_fundos)
+BD_SHEET = "BD"
+BD_COL_APELIDO = 1
+BD_COL_CAMINHO = 2
+BD_COL_PORTAL = 9
+
+TimingKey = Tuple[str, str]
+
+
+@dataclass
+class PlanUnit:
+    """One progress counter a sistema will report"""
+    sistema: str
+    unit: str
+    count: int
+    seconds_per_unit: Optional[float] = None
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.seconds_per_unit is None:
+            return None
+        return self.count * self.seconds_per_unit
+
+
+@dataclass
+class Plan:
+    """Expanded request with its predicted duration"""
+    data_inicial: date
+    data_final: date
+    business_days: int
+    units: List[PlanUnit] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+def read_qore_funds(path: str) -> List[str]:
+    """
+    Funds with portal QORE in BD.xlsx (same filter and BLOKO naming as
+    ler_lista_fundos).
+
+    Raises:
+        OSError/ValueError/KeyError: Missing or malformed sheet
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[BD_SHEET].iter_rows(min_row=2, values_only=True)
+        fundos = {}
+        for row in rows:
+            if len(row) <= BD_COL_PORTAL or str(row[BD_COL_PORTAL]).strip().upper() != "QORE":
+                continue
+            apelido = str(row[BD_COL_APELIDO] or "").strip()
+            caminho = str(row[BD_COL_CAMINHO] or "").strip()
+            if not apelido or not caminho:
+                continue
+            partes = apelido.split()
+            if len(partes) > 1 and partes[1] == "BLOKO":
+                apelido = "BLOKO URBANISMO" if partes[0] == "FIP" else "BLOKO FIM"
+            fundos[apelido] = caminho
+        return list(fundos)
+    finally:
+        workbook.close()
+
+
+def selected_funds(creds: Optional[dict]) -> List[str]:
+    """Fund selection saved for a sistema (main.py _selected_funds)"""
+    creds = creds or {}
+    if not creds.get("usar_todos", True):
+        return list(creds.get("fundos_selecionados", []))
+    return []
+
+
+def load_fund_lists(sistemas: List[str], config_service) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Fund lists the modules will iterate for each fund-based sistema.
+
+    Returns:
+        ({sistema: [fundos]}, warnings)
+    """
+    fund_lists: Dict[str, List[str]] = {}
+    warnings: List[str] = []
+
+    for sistema in ("maps", "fidc"):
+        if sistema in sistemas:
+            fund_lists[sistema] = selected_funds(config_service.get_system_credentials(sistema))
+            if not fund_lists[sistema]:
+                warnings.append(f"{sistema}: nenhum fundo selecionado nas credenciais")
+
+    if "qore" in sistemas:
+        fundos = selected_funds(config_service.get_system_credentials("qore"))
+        bd_path = config_service.get_paths().get("bd_xlsx", "")
+        try:
+            bd_funds = read_qore_funds(bd_path) if bd_path else []
+        except Exception as e:
+            logger.warning(f"Could not read BD.xlsx for the planner: {e}")
+            bd_funds = []
+            warnings.append(f"qore: erro ao ler BD.xlsx ({e})")
+        # Sem selecao o modulo usa todos os fundos QORE do BD.xlsx
+        fund_lists["qore"] = [f for f in bd_funds if f in fundos] if fundos else bd_funds
+        if not fund_lists["qore"]:
+            warnings.append("qore: nenhum fundo QORE encontrado no BD.xlsx")
+
+    return fund_lists, warnings
+
+
+def _enabled(opcoes: dict, sistema: str, opcao: str) -> bool:
+    """Options default to enabled; only an explicit False disables"""
+    return (opcoes.get(sistema) or {}).get(opcao) is not False
+
+
+def expand_units(
+    params: dict,
+    fund_lists: Dict[str, List[str]],
+    today: Optional[date] = None
+) -> Plan:
+    """
+    Expands request params into progress units.
+
+    Args:
+        params: Execute request body (sistemas, datas, opcoes)
+        fund_lists: Output of load_fund_lists
+        today: Reference date for the default period (yesterday, as main.py)
+
+    Raises:
+        ValueError: Invalid dates
+    """
+    today = today or date.today()
+    inicio = parse_date(params["data_inicial"]) if params.get("data_inicial") else today - timedelta(days=1)
+    fim = parse_date(params["data_final"]) if params.get("data_final") else inicio
+    if fim < inicio:
+        raise ValueError("data_final anterior a data_inicial")
+
+    plan = Plan(data_inicial=inicio, data_final=fim, business_days=len(business_days(inicio, fim)))
+    opcoes = params.get("opcoes") or {}
+
+    for sistema in params.get("sistemas", []):
+        dias = len(business_days(inicio, fim, *SISTEMA_CALENDARS.get(sistema, ("SP", True))))
+        if sistema in ("amplis_reag", "amplis_master"):
+            if _enabled(opcoes, sistema, "pdf"):
+                plan.units.append(PlanUnit(sistema, "datas", dias))
+        elif sistema == "maps":
+            fundos = len(fund_lists.get("maps", []))
+            for relatorio in ("ativo", "passivo"):
+                if _enabled(opcoes, "maps", relatorio):
+                    plan.units.append(PlanUnit("maps", f"{relatorio}s", dias * fundos))
+        elif sistema == "fidc":
+            plan.units.append(PlanUnit("fidc", "fundos", dias * len(fund_lists.get("fidc", []))))
+        elif sistema == "qore":
+            if _enabled(opcoes, "qore", "pdf") or _enabled(opcoes, "qore", "excel"):
+                plan.units.append(PlanUnit("qore", "fundos", len(fund_lists.get("qore", []))))
+        else:
+            plan.warnings.append(f"{sistema}: sem contador de progresso, duracao nao estimada")
+
+    return plan
+
+
+def predict(plan: Plan, history: Dict[TimingKey, float], parallelism: int) -> dict:
+    """
+    Applies historical timings to a plan.
+
+    Args:
+        plan: Output of expand_units
+        history: Seconds-per-unit by (sistema, unit)
+        parallelism: Sistemas of one job that run at once
+
+    Returns:
+        Serializable prediction (per sistema and total wall time)
+    """
+    for unit in plan.units:
+        unit.seconds_per_unit = history.get((unit.sistema, unit.unit))
+
+    per_sistema: Dict[str, float] = {}
+    unknown = []
+    for unit in plan.units:
+        if unit.seconds is None:
+            if unit.count:
+                unknown.append(f"{unit.sistema}/{unit.unit}")
+            continue
+        per_sistema[unit.sistema] = per_sistema.get(unit.sistema, 0.0) + unit.seconds
+
+    # Cadeia mais longa: um step mais o step de que depende
+    longest_chain = max(
+        (seconds + per_sistema.get(STEP_DEPENDENCIES.get(sistema), 0.0)
+         for sistema, seconds in per_sistema.items()),
+        default=0.0
+    )
+    total = sum(per_sistema.values())
+    wall = max(longest_chain, total / max(1, parallelism))
+
+    return {
+        "data_inicial": plan.data_inicial.isoformat(),
+        "data_final": plan.data_final.isoformat(),
+        "business_days": plan.business_days,
+        "units": [
+            {
+                "sistema": unit.sistema,
+                "unit": unit.unit,
+                "count": unit.count,
+                "seconds_per_unit": round(unit.seconds_per_unit, 2) if unit.seconds_per_unit is not None else None,
+                "seconds": round(unit.seconds) if unit.seconds is not None else None,
+            }
+            for unit in plan.units
+        ],
+        "total_units": sum(unit.count for unit in plan.units),
+        "work_seconds": round(total),
+        "wall_seconds": round(wall),
+        "complete": not unknown,
+        "unknown": unknown,
+        "warnings": list(plan.warnings),
+    }
+
+
+def predict_sharded(prediction: dict, shard_count: int, concurrency: int) -> dict:
+    """
+    Wall time when the period is split into `shard_count` shards of which
+    `concurrency` run at once (sharding.portal_concurrency: pool slots
+    capped by the portal limits; each shard has its own staging folders).
+    Shards are assumed to be of similar size.
+    """
+    if shard_count <= 1:
+        return {"shards": shard_count, "wall_seconds": prediction["wall_seconds"]}
+    concurrency = max(1, concurrency)
+    per_shard = prediction["wall_seconds"] / shard_count
+    waves = math.ceil(shard_count / concurrency)
+    return {
+        "shards": shard_count,
+        "concurrency": concurrency,
+        "shard_wall_seconds": round(per_shard),
+        "wall_seconds": round(per_shard * waves),
+    }
+
+
+def build_plan(params: dict, config_service, history: Dict[TimingKey, float],
+               parallelism: int, today: Optional[date] = None) -> dict:
+    """Loads fund lists, expands and predicts (used by the API)"""
+    fund_lists, warnings = load_fund_lists(params.get("sistemas", []), config_service)
+    plan = expand_units(params, fund_lists, today=today)
+    plan.warnings[:0] = warnings
+    result = predict(plan, history, parallelism)
+    result["planned_at"] = datetime.now().isoformat()
+    return result
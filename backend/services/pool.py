@@ -5,6 +5,9 @@ Provides slot-based job execution with:
 - Configurable number of concurrent workers (slots)
 - Isolated executor instances per slot
 - Automatic cleanup of orphan jobs
+- Memory/load aware admission control
+- Per-portal concurrency limits (shards of one backfill share a portal)
+- Progress/ETA reporting per job
 - WebSocket broadcast integration
 """
 import asyncio
@@ -17,6 +20,11 @@ from datetime import datetime
 
 from core import database
 from services.executor import ETLExecutor
+from services.log_spool import db_log_line
+from services.admission import AdmissionController, process_tree_rss_mb
+from services.progress import JobProgress, record_timings
+from services.sharding import parse_portal_limits, portal_gate
+from services.spans import record_spans
 from services.sistemas import get_sistema_service
 from models.sistema import SistemaStatus
 import services.state as state_service
@@ -40,6 +48,8 @@ class WorkerSlot:
     executor: Optional[ETLExecutor] = None
     task: Optional[asyncio.Task] = None
     started_at: Optional[datetime] = None
+    estimated_mb: float = 0.0
+    peak_rss_mb: float = 0.0
 
 
 class JobPoolManager:
@@ -50,20 +60,45 @@ class JobPoolManager:
     - Configurable slots (1 to N)
     - Process isolation per slot
     - Automatic cleanup of orphan jobs
+    - Admission control (defers dispatch when the host is short on memory)
     - WebSocket event broadcasting
     - Thread-safe state management via asyncio.Lock
     """
 
-    def __init__(self, max_workers: int = 4, poll_interval: float = 2.0):
+    def __init__(
+        self,
+        max_workers: int = 4,
+        poll_interval: float = 2.0,
+        admission: Optional[AdmissionController] = None
+    ):
         """
         Args:
             max_workers: Maximum number of concurrent jobs
             poll_interval: Polling interval in seconds
+            admission: Admission controller (default: built from settings)
         """
         self.max_workers = max_workers
         self.poll_interval = poll_interval
         self.running = False
 
+        if admission is None:
+            from config import settings
+            admission = AdmissionController(
+                enabled=settings.ADMISSION_ENABLED,
+                min_free_mb=settings.ADMISSION_MIN_FREE_MB,
+                default_job_mb=settings.ADMISSION_DEFAULT_JOB_MB,
+                max_load_per_cpu=settings.ADMISSION_MAX_LOAD_PER_CPU,
+                step_parallelism=settings.ADMISSION_STEP_PARALLELISM
+            )
+        self.admission = admission
+        self._deferred_params: Optional[str] = None
+
+        from config import settings
+        self._can_start = portal_gate(
+            parse_portal_limits(settings.PORTAL_LIMITS),
+            settings.PORTAL_DEFAULT_LIMIT
+        )
+
         # Execution slots
         self.slots: Dict[int, WorkerSlot] = {
             i: WorkerSlot(slot_id=i) for i in range(max_workers)
@@ -86,6 +121,12 @@ class JobPoolManager:
 
         self.running = True
 
+        # Load per-sistema cost estimates learned from past runs
+        try:
+            self.admission.load_costs(database.get_sistema_costs())
+        except Exception as e:
+            logger.warning(f"Could not load sistema costs: {e}")
+
         # Main coordinator task - assigns jobs to available slots
         self._coordinator_task = asyncio.create_task(
             self._coordinator_loop(),
@@ -142,19 +183,25 @@ class JobPoolManager:
                         if slot.status == SlotStatus.IDLE
                     ]
 
+                self._sample_running_slots()
+
                 # Try to assign jobs to free slots
                 for slot in idle_slots:
-                    job = database.acquire_job_for_slot(slot.slot_id)
-
-                    if job:
-                        logger.info(f"Job #{job['id']} assigned to slot {slot.slot_id}")
-
-                        # Start execution in separate task
-                        async with self._lock:
-                            slot.task = asyncio.create_task(
-                                self._execute_job_in_slot(slot, job),
-                                name=f"job_{job['id']}_slot_{slot.slot_id}"
-                            )
+                    job = database.acquire_job_for_slot(slot.slot_id, self._admission_gate())
+                    if not job:
+                        break
+
+                    logger.info(f"Job #{job['id']} assigned to slot {slot.slot_id}")
+
+                    # Start execution in separate task
+                    async with self._lock:
+                        slot.estimated_mb = self.admission.estimate_mb(
+                            self._job_sistemas(job)
+                        )
+                        slot.task = asyncio.create_task(
+                            self._execute_job_in_slot(slot, job),
+                            name=f"job_{job['id']}_slot_{slot.slot_id}"
+                        )
 
                 # Wait before checking again
                 await asyncio.sleep(self.poll_interval)
@@ -165,6 +212,93 @@ class JobPoolManager:
                 logger.error(f"Error in coordinator loop: {e}")
                 await asyncio.sleep(self.poll_interval * 2)
 
+    @staticmethod
+    def _params_sistemas(params_json: Optional[str]) -> List[str]:
+        """Extracts the sistemas list from a job's params JSON"""
+        try:
+            params = json.loads(params_json) if params_json else {}
+        except (json.JSONDecodeError, TypeError):
+            params = {}
+        return params.get("sistemas", []) or []
+
+    @classmethod
+    def _job_sistemas(cls, job: dict) -> List[str]:
+        """Extracts the sistemas list from a job row"""
+        return cls._params_sistemas(job.get("params"))
+
+    def _admission_gate(self) -> Callable[[str, List[str]], bool]:
+        """
+        Gate for acquire_job_for_slot: portal limits, then admission control
+        on that same job, so the memory decision applies to the job that
+        actually starts.
+
+        The queue stays FIFO: the oldest job within portal limits is the one
+        admission decides on; if it does not fit, no later job is tried this
+        tick (smaller jobs cannot starve it).
+        """
+        # Slots dispatched this tick have a task but may not be RUNNING yet
+        running = [
+            s for s in self.slots.values()
+            if s.status == SlotStatus.RUNNING or s.task is not None
+        ]
+        reserved = sum(max(0.0, s.estimated_mb - s.peak_rss_mb) for s in running)
+        deferred = False
+
+        def can_start(params_json: str, running_params: List[str]) -> bool:
+            nonlocal deferred
+            if deferred or not self._can_start(params_json, running_params):
+                return False
+
+            decision = self.admission.check(
+                self._params_sistemas(params_json),
+                running_count=len(running),
+                reserved_mb=reserved
+            )
+            if decision.admitted:
+                self._deferred_params = None
+                return True
+
+            deferred = True
+            # Log once per deferred job to avoid flooding the log every tick
+            if self._deferred_params != params_json:
+                logger.warning(
+                    f"Job {self._params_sistemas(params_json)} deferred by admission control: {decision.reason}"
+                )
+                self._deferred_params = params_json
+            return False
+
+        return can_start
+
+    def _sample_running_slots(self):
+        """Updates peak RSS of the process tree of each running job"""
+        for slot in self.slots.values():
+            if slot.status != SlotStatus.RUNNING or not slot.executor:
+                continue
+            process = getattr(slot.executor, "process", None)
+            pid = getattr(process, "pid", None)
+            if not isinstance(pid, int):
+                continue
+            rss = process_tree_rss_mb(pid)
+            if rss > slot.peak_rss_mb:
+                slot.peak_rss_mb = rss
+
+    def _record_job_cost(self, slot: WorkerSlot, sistemas: List[str]):
+        """
+        Feeds the observed peak RSS back into the per-sistema estimates.
+
+        Sistemas of one job may run concurrently; the job peak is split
+        evenly among the sistemas that could be running at the same time.
+        """
+        if slot.peak_rss_mb <= 0:
+            return
+        sample_mb = slot.peak_rss_mb / self.admission.concurrent_steps(len(sistemas))
+        for sistema_id in sistemas:
+            try:
+                updated = self.admission.record_cost(sistema_id, sample_mb)
+                database.save_sistema_cost(str(sistema_id).lower(), updated)
+            except Exception as e:
+                logger.warning(f"Could not record cost for {sistema_id}: {e}")
+
     async def _execute_job_in_slot(self, slot: WorkerSlot, job: dict):
         """
         Executes a job in a specific slot.
@@ -180,6 +314,7 @@ class JobPoolManager:
             slot.status = SlotStatus.RUNNING
             slot.current_job_id = job_id
             slot.started_at = datetime.now()
+            slot.peak_rss_mb = 0.0
             slot.executor = ETLExecutor(slot_id=slot.slot_id)
 
         logger.info(f"Slot {slot.slot_id}: Starting job #{job_id}")
@@ -192,6 +327,9 @@ class JobPoolManager:
 
         sistemas = params.get("sistemas", [])
 
+        # Checkpoint key: own id, or the original job's id when resuming
+        params.setdefault("checkpoint_id", job_id)
+
         # Update system status
         sistema_service = get_sistema_service()
         for sistema_id in sistemas:
@@ -200,9 +338,13 @@ class JobPoolManager:
 
         start_time = datetime.now()
 
+        from config import settings
+
         # Log callback (includes slot_id)
         async def log_callback(log_entry: dict):
-            database.append_log(job_id, f"[{log_entry['level']}] [{log_entry['sistema']}] {log_entry['mensagem']}")
+            line = db_log_line(log_entry)
+            if line:
+                database.append_log(job_id, line, settings.JOB_LOG_DB_MAX_CHARS)
             log_entry["job_id"] = job_id
             log_entry["slot_id"] = slot.slot_id
             await self._broadcast_log(log_entry)
@@ -215,15 +357,20 @@ class JobPoolManager:
                     await self._broadcast_status(sistema, "SUCCESS", 100, log_entry["mensagem"])
                 elif level == "ERROR":
                     await self._broadcast_status(sistema, "ERROR", 0, log_entry["mensagem"])
+                elif log_entry.get("progress") and slot.executor and slot.executor.progress is not None:
+                    await self._report_progress(job_id, sistema, slot.executor.progress, log_entry["mensagem"])
 
         try:
-            success = await slot.executor.execute(params, log_callback)
+            success = await slot.executor.execute(params, log_callback, job_id=job_id)
 
             duration = int((datetime.now() - start_time).total_seconds())
             final_status = "completed" if success else "error"
 
             database.update_job_status(job_id, final_status)
             database.release_job_slot(job_id)
+            self._record_job_cost(slot, sistemas)
+            self._record_progress_timings(slot)
+            record_spans(job_id, slot.executor.spans)
 
             # Update system status
             for sistema_id in sistemas:
@@ -266,6 +413,8 @@ class JobPoolManager:
                 slot.executor = None
                 slot.task = None
                 slot.started_at = None
+                slot.estimated_mb = 0.0
+                slot.peak_rss_mb = 0.0
 
     async def _cleanup_loop(self, interval: int):
         """Loop for cleaning up orphan jobs"""
@@ -305,6 +454,35 @@ class JobPoolManager:
                 return True
         return False
 
+    def get_job_progress(self, job_id: int) -> Optional[dict]:
+        """Returns the progress snapshot of a job running in this pool"""
+        for slot in self.slots.values():
+            if slot.current_job_id == job_id:
+                return self._slot_progress(slot)
+        return None
+
+    def get_job_spans(self, job_id: int) -> Optional[dict]:
+        """Returns the live timing tree of a job running in this pool"""
+        for slot in self.slots.values():
+            if slot.current_job_id == job_id and slot.executor is not None and slot.executor.spans is not None:
+                return slot.executor.spans.snapshot()
+        return None
+
+    @staticmethod
+    def _slot_progress(slot: WorkerSlot) -> Optional[dict]:
+        if slot.executor is None or slot.executor.progress is None:
+            return None
+        return slot.executor.progress.snapshot()
+
+    def _record_progress_timings(self, slot: WorkerSlot):
+        """Folds per-unit durations observed in the slot's job into history"""
+        if slot.executor is None or slot.executor.progress is None:
+            return
+        try:
+            record_timings(slot.executor.progress)
+        except Exception as e:
+            logger.warning(f"Slot {slot.slot_id}: could not record unit timings: {e}")
+
     def get_status(self) -> dict:
         """Returns status of all slots"""
         return {
@@ -315,16 +493,34 @@ class JobPoolManager:
                     "slot_id": slot.slot_id,
                     "status": slot.status.value,
                     "job_id": slot.current_job_id,
-                    "started_at": slot.started_at.isoformat() if slot.started_at else None
+                    "started_at": slot.started_at.isoformat() if slot.started_at else None,
+                    "estimated_mb": round(slot.estimated_mb, 1),
+                    "peak_rss_mb": round(slot.peak_rss_mb, 1),
+                    "progress": self._slot_progress(slot)
                 }
                 for slot in self.slots.values()
             ],
             "active_count": len([s for s in self.slots.values() if s.status == SlotStatus.RUNNING]),
-            "idle_count": len([s for s in self.slots.values() if s.status == SlotStatus.IDLE])
+            "idle_count": len([s for s in self.slots.values() if s.status == SlotStatus.IDLE]),
+            "admission": self.admission.get_stats()
         }
 
     # === Broadcast helpers ===
 
+    async def _report_progress(self, job_id: int, sistema_id: str, progress: JobProgress, mensagem: str):
+        """Updates sistema progress and broadcasts the job snapshot (percent/ETA)"""
+        percent = progress.sistema_percent(sistema_id)
+        if percent is not None:
+            get_sistema_service().update_status(sistema_id, SistemaStatus.RUNNING, percent, mensagem)
+            await self._broadcast_status(sistema_id, "RUNNING", percent, mensagem)
+
+        ws_manager = state_service.ws_manager
+        if ws_manager:
+            try:
+                await ws_manager.broadcast_progress(job_id, progress.snapshot())
+            except Exception as e:
+                logger.error(f"Error broadcasting progress: {e}")
+
     async def _broadcast_log(self, log_entry: dict):
         ws_manager = state_service.ws_manager
         if ws_manager:
@@ -0,0 +1,146 @@
+"""
+Process Tree - Launch jobs in their own process group and tear them down
+
+The ETL child (python main.py) starts Chrome and chromedriver, which start
+their own helpers. Terminating only the direct child leaves those
+grandchildren running, holding RAM and the download directories.
+
+Jobs are therefore started as leaders of a new session (POSIX) or process
+group (Windows). Teardown signals the whole group with SIGTERM, waits up to
+a grace deadline and escalates to SIGKILL for anything still alive. The
+elapsed time is reported so slow shutdowns show up in the job log.
+
+Liveness on Linux is read from /proc (zombies count as gone, since an
+orphan's zombie is the init process' business). Elsewhere on POSIX it falls
+back to killpg(pgid, 0). On Windows the tree is killed with taskkill /T.
+"""
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+PROC_DIR = "/proc"
+
+IS_WINDOWS = os.name == "nt"
+
+# Interval between liveness checks while waiting for the group to exit
+POLL_INTERVAL = 0.05
+
+
+@dataclass
+class TeardownResult:
+    """Outcome of terminate_tree()"""
+    seconds: float
+    escalated: bool
+    survivors: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 3),
+            "escalated": self.escalated,
+            "survivors": self.survivors,
+        }
+
+
+def spawn_kwargs() -> Dict:
+    """Extra arguments for create_subprocess_exec/Popen to start a new group"""
+    if IS_WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def group_pids(pgid: int, proc_dir: str = PROC_DIR) -> List[int]:
+    """
+    Live (non-zombie) members of a process group.
+
+    Falls back to [pgid] / [] via killpg(pgid, 0) when /proc is unavailable.
+    """
+    try:
+        entries = os.listdir(proc_dir)
+    except OSError:
+        try:
+            os.killpg(pgid, 0)
+            return [pgid]
+        except (ProcessLookupError, PermissionError, AttributeError):
+            return []
+
+    pids = []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc_dir, entry, "stat"), "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "pid (comm) state ppid pgrp ..." - comm may contain spaces/parens
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) < 3:
+            continue
+        if fields[0] != "Z" and int(fields[2]) == pgid:
+            pids.append(int(entry))
+    return pids
+
+
+def signal_tree(pid: int, sig: int, force: bool = False):
+    """Sends `sig` to the whole group led by `pid` (missing group is ignored)"""
+    if IS_WINDOWS:
+        cmd = ["taskkill", "/T", "/PID", str(pid)]
+        if force:
+            cmd.insert(1, "/F")
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _tree_alive(process, pgid: int) -> bool:
+    if IS_WINDOWS:
+        return process.returncode is None
+    return bool(group_pids(pgid))
+
+
+async def terminate_tree(process, grace_seconds: float = 10.0) -> TeardownResult:
+    """
+    Terminates the process group led by `process` (SIGTERM -> SIGKILL).
+
+    Args:
+        process: asyncio subprocess started with spawn_kwargs()
+        grace_seconds: Deadline between SIGTERM and SIGKILL
+
+    Returns:
+        TeardownResult with elapsed seconds and whether SIGKILL was needed
+    """
+    pgid = process.pid
+    started = time.monotonic()
+    escalated = False
+
+    signal_tree(pgid, signal.SIGTERM)
+
+    deadline = started + grace_seconds
+    while _tree_alive(process, pgid) and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+
+    if _tree_alive(process, pgid):
+        escalated = True
+        logger.warning(f"Process group {pgid} still alive after {grace_seconds}s, sending SIGKILL")
+        signal_tree(pgid, getattr(signal, "SIGKILL", signal.SIGTERM), force=True)
+
+        kill_deadline = time.monotonic() + 5.0
+        while _tree_alive(process, pgid) and time.monotonic() < kill_deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+
+    survivors = 0 if IS_WINDOWS else len(group_pids(pgid))
+    result = TeardownResult(time.monotonic() - started, escalated, survivors)
+    logger.info(f"Process group {pgid} torn down in {result.seconds:.2f}s "
+                f"(escalated={escalated}, survivors={survivors})")
+    return result
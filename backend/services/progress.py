@@ -0,0 +1,287 @@
+"""
+Job Progress - Progress counters and ETA for running jobs
+
+ETL modules report progress through the log protocol:
+
+    [PROGRESS] [maps] 3/20 ativos pulados=2
+
+Each (sistema, unit) pair is an independent counter. `pulados` (optional)
+is how many of the done units were skipped by the checkpoint or ledger:
+they advance the counter at almost no cost, so they are left out of the
+observed rate and of the timings saved as history. The executor feeds
+PROGRESS lines into a JobProgress, which computes percent complete and an
+ETA from:
+- Historical seconds-per-unit (table unit_timings, learned from past runs)
+- The rate observed so far in the current run
+
+When both exist they are blended, with history weighted as HISTORY_WEIGHT
+pseudo-samples so a few fast/slow units don't swing the estimate.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from services.sharding import folder_groups
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_LEVEL = "PROGRESS"
+
+# "<done>/<total> [unit]" - anything after the unit is free text
+PROGRESS_PATTERN = re.compile(r'^(\d+)\s*/\s*(\d+)(?:\s+(\w+))?')
+
+# "pulados=<n>" anywhere after the counter: done units skipped without work
+SKIPPED_PATTERN = re.compile(r'\bpulados=(\d+)')
+
+# Number of pseudo-samples given to the historical rate when blending
+HISTORY_WEIGHT = 3
+
+# Weight of the newest run in the stored seconds-per-unit (EWMA)
+TIMING_SMOOTHING = 0.3
+
+TimingKey = Tuple[str, str]
+
+
+def parse_progress(mensagem: str) -> Optional[dict]:
+    """
+    Parses the message of a PROGRESS line.
+
+    Args:
+        mensagem: Message part, e.g. "3/20 fundos"
+
+    Returns:
+        {"done": 3, "total": 20, "unit": "fundos", "skipped": 0} or None if malformed
+    """
+    match = PROGRESS_PATTERN.match(mensagem.strip())
+    if not match:
+        return None
+
+    done, total = int(match.group(1)), int(match.group(2))
+    if total <= 0:
+        return None
+    done = min(done, total)
+    skipped = SKIPPED_PATTERN.search(mensagem[match.end():])
+
+    return {
+        "done": done,
+        "total": total,
+        "unit": (match.group(3) or "itens").lower(),
+        "skipped": min(int(skipped.group(1)), done) if skipped else 0,
+    }
+
+
+@dataclass
+class ProgressCounter:
+    """One (sistema, unit) counter inside a job"""
+    sistema: str
+    unit: str
+    done: int
+    total: int
+    baseline: int
+    started_at: float
+    updated_at: float
+    skipped: int = 0
+    baseline_skipped: int = 0
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.done / self.total
+
+    @property
+    def observed_units(self) -> int:
+        """Units actually worked since the first event of this run (skipped ones excluded)"""
+        return (self.done - self.baseline) - (self.skipped - self.baseline_skipped)
+
+    @property
+    def observed_seconds_per_unit(self) -> Optional[float]:
+        if self.observed_units <= 0:
+            return None
+        return (self.updated_at - self.started_at) / self.observed_units
+
+
+class JobProgress:
+    """
+    Tracks the progress counters of a single job.
+
+    Args:
+        history: Historical seconds-per-unit by (sistema, unit)
+        clock: Monotonic time source (injectable for tests)
+        paths: Configured output folders (credentials `paths`); sistemas
+            are grouped by the resolved directories instead of the keys
+    """
+
+    def __init__(
+        self,
+        history: Optional[Dict[TimingKey, float]] = None,
+        clock=time.monotonic,
+        paths: Optional[Dict[str, str]] = None
+    ):
+        self.history = history or {}
+        self._clock = clock
+        self.paths = paths
+        self.counters: Dict[TimingKey, ProgressCounter] = {}
+
+    def update(self, sistema: str, done: int, total: int, unit: str, skipped: int = 0) -> ProgressCounter:
+        """Applies a progress event (skipped: done units skipped by checkpoint/ledger)"""
+        key = (sistema.lower(), unit.lower())
+        now = self._clock()
+        counter = self.counters.get(key)
+
+        if counter is None or done < counter.done or total != counter.total:
+            # First event, or the module restarted the counter (new pass)
+            counter = ProgressCounter(
+                sistema=key[0], unit=key[1],
+                done=done, total=total, baseline=done,
+                started_at=now, updated_at=now,
+                skipped=skipped, baseline_skipped=skipped
+            )
+            self.counters[key] = counter
+        else:
+            counter.done = done
+            counter.skipped = max(counter.skipped, skipped)
+            counter.updated_at = now
+
+        return counter
+
+    def seconds_per_unit(self, counter: ProgressCounter) -> Optional[float]:
+        """Blends historical and observed rates for a counter"""
+        historical = self.history.get((counter.sistema, counter.unit))
+        observed = counter.observed_seconds_per_unit
+
+        if historical is None:
+            return observed
+        if observed is None:
+            return historical
+
+        n = counter.observed_units
+        return (historical * HISTORY_WEIGHT + observed * n) / (HISTORY_WEIGHT + n)
+
+    def counter_eta(self, counter: ProgressCounter) -> Optional[float]:
+        """Seconds left for a counter, or None if no rate is known yet"""
+        remaining = counter.total - counter.done
+        if remaining <= 0:
+            return 0.0
+
+        spu = self.seconds_per_unit(counter)
+        if spu is None:
+            return None
+
+        # Time already spent on the unit in progress counts against the estimate
+        in_flight = self._clock() - counter.updated_at
+        return max(0.0, remaining * spu - in_flight)
+
+    def sistema_percent(self, sistema: str) -> Optional[int]:
+        """Average percent of all counters of a sistema (None if none)"""
+        percents = [c.percent for c in self.counters.values() if c.sistema == sistema.lower()]
+        if not percents:
+            return None
+        return int(sum(percents) / len(percents))
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current progress as a serializable dict.
+
+        Counters of one sistema run one after another, and so do sistemas
+        that share an output folder (services.sharding.folder_groups); the
+        groups themselves run in parallel. The job ETA is the sum of counter
+        ETAs inside each group and the max across groups (None while any
+        unfinished counter has no known rate).
+        """
+        counters = []
+        eta_by_sistema: Dict[str, float] = {}
+        eta_known = True
+
+        for counter in self.counters.values():
+            spu = self.seconds_per_unit(counter)
+            eta = self.counter_eta(counter)
+            if eta is None:
+                eta_known = False
+            else:
+                eta_by_sistema[counter.sistema] = eta_by_sistema.get(counter.sistema, 0.0) + eta
+
+            counters.append({
+                "sistema": counter.sistema,
+                "unit": counter.unit,
+                "done": counter.done,
+                "total": counter.total,
+                "percent": round(counter.percent, 1),
+                "seconds_per_unit": round(spu, 2) if spu is not None else None,
+                "eta_seconds": round(eta) if eta is not None else None,
+            })
+
+        percent = (
+            round(sum(c["percent"] for c in counters) / len(counters), 1)
+            if counters else None
+        )
+
+        eta_total = None
+        if eta_known and counters:
+            eta_total = max(
+                (sum(eta_by_sistema.get(sistema, 0.0) for sistema in group)
+                 for group in folder_groups(eta_by_sistema, self.paths)),
+                default=0.0
+            )
+
+        return {
+            "percent": percent,
+            "eta_seconds": round(eta_total) if eta_total is not None else None,
+            "counters": counters,
+        }
+
+    def observed_timings(self) -> Dict[TimingKey, float]:
+        """Seconds-per-unit measured in this run, for counters that advanced"""
+        return {
+            key: counter.observed_seconds_per_unit
+            for key, counter in self.counters.items()
+            if counter.observed_seconds_per_unit is not None
+        }
+
+
+# === Historical timings (persisted in unit_timings) ===
+
+_history_cache: Optional[Dict[TimingKey, float]] = None
+
+
+def get_unit_history() -> Dict[TimingKey, float]:
+    """Returns historical seconds-per-unit, loading from the database once"""
+    global _history_cache
+    if _history_cache is None:
+        try:
+            from core import database
+            _history_cache = database.get_unit_timings()
+        except Exception as e:
+            logger.warning(f"Could not load unit timings: {e}")
+            return {}
+    return _history_cache
+
+
+def record_timings(progress: JobProgress):
+    """
+    Folds the rates observed in a finished job into the stored history.
+
+    Args:
+        progress: JobProgress of the finished job
+    """
+    from core import database
+
+    history = get_unit_history()
+    for (sistema, unit), observed in progress.observed_timings().items():
+        previous = history.get((sistema, unit))
+        if previous is None:
+            updated = observed
+        else:
+            updated = TIMING_SMOOTHING * observed + (1 - TIMING_SMOOTHING) * previous
+
+        try:
+            database.save_unit_timing(sistema, unit, updated)
+            history[(sistema, unit)] = updated
+        except Exception as e:
+            logger.warning(f"Could not save unit timing for {sistema}/{unit}: {e}")
+
+
+def reset_unit_history():
+    """Drops the in-memory history cache (next access reloads from DB)"""
+    global _history_cache
+    _history_cache = None
@@ -39,6 +39,7 @@ class MessageType(str, Enum):
     LOG = "log"
     STATUS = "status"
     JOB_COMPLETE = "job_complete"
+    PROGRESS = "progress"
 
 
 @dataclass
@@ -265,6 +266,15 @@ class RedisStreamClient:
         )
         return await self.publish(message)
 
+    async def publish_progress(self, job_id: int, progress: dict) -> bool:
+        """Publishes a job progress update"""
+        message = StreamMessage(
+            type=MessageType.PROGRESS,
+            payload={"job_id": job_id, **progress},
+            source_instance=self.instance_id
+        )
+        return await self.publish(message)
+
     async def subscribe(self, handler: Callable[[StreamMessage], Any]):
         """
         Subscribes to the stream and processes messages.
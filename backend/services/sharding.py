@@ -0,0 +1,209 @@
+"""
+Sharding - Splits long date ranges into sibling jobs
+
+A backfill of many business days submitted as one job occupies a single
+pool slot for hours. With `shard_days` the range is split into shards of at
+most N business days; each shard is a regular job (parent_id = parent job)
+that any free slot can pick up. The parent job (type etl_sharded) never runs
+itself: its status is aggregated from the shards
+(core.database.aggregate_status).
+
+Shards of the same sistema hit the same portal, so the pool only starts a
+job while every portal it needs is below its concurrency limit.
+
+The modules detect downloads by what appears in their output folders
+(credentials `paths`), so each shard downloads into its own staging folder
+(`staging_dir`, main.py --staging-dir) and main.py moves the finished files
+into the configured folders when the shard ends. Siblings never share a
+folder and run in parallel. `limpar` stays on the parent: the configured
+folders are cleaned once, before the shards are enqueued.
+"""
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.business_days import business_days
+
+logger = logging.getLogger(__name__)
+
+PARENT_JOB_TYPE = "etl_sharded"
+
+# Sistemas that share a portal (same login/site)
+PORTAL_OF = {
+    "amplis_reag": "amplis",
+    "amplis_master": "amplis",
+}
+
+
+# Output folders (credentials `paths` keys) each sistema downloads into
+# (python/main.py STEPS)
+OUTPUT_FOLDERS = {
+    "amplis_reag": ("csv", "pdf"),
+    "amplis_master": ("csv", "pdf"),
+    "maps": ("maps", "pdf"),
+    "fidc": ("fidc",),
+    "jcot": ("jcot",),
+    "britech": ("britech",),
+    "qore": ("pdf", "qore_excel", "selenium_temp"),
+    "trustee": ("trustee",),
+}
+
+
+def portal_for(sistema: str) -> str:
+    sistema = str(sistema).lower()
+    return PORTAL_OF.get(sistema, sistema)
+
+
+def plan_shards(data_inicial, data_final, shard_days: int) -> List[Tuple[date, date]]:
+    """
+    Splits [data_inicial, data_final] into ranges of at most `shard_days`
+    Sao Paulo business days. The ranges are cut on business days but cover
+    every weekday of the period: modules with another calendar (MAPS skips
+    weekends only) still get the SP holidays between two shards.
+
+    Returns:
+        [(inicio, fim), ...] in chronological order (empty if no business day)
+
+    Raises:
+        ValueError: Invalid dates or shard_days < 1
+    """
+    if shard_days < 1:
+        raise ValueError("shard_days deve ser >= 1")
+    days = business_days(data_inicial, data_final)
+    if not days:
+        return []
+    weekdays = business_days(data_inicial, data_final, with_holidays=False)
+    ends = [days[min(i + shard_days, len(days)) - 1] for i in range(0, len(days), shard_days)]
+    ends[-1] = weekdays[-1]
+    starts = [weekdays[0]] + [min(d for d in weekdays if d > end) for end in ends[:-1]]
+    return list(zip(starts, ends))
+
+
+def output_folders(sistemas: Iterable[str], paths: Optional[Dict[str, str]] = None) -> set:
+    """
+    Output folders written by the given sistemas: the normalized directories
+    of `paths` (credentials) when given, as main.py compares them; otherwise
+    the paths keys.
+    """
+    folders = set()
+    for sistema in sistemas or []:
+        sistema = str(sistema).lower()
+        for key in OUTPUT_FOLDERS.get(sistema, (sistema,)):
+            if paths is None:
+                folders.add(key)
+            elif paths.get(key):
+                folders.add(os.path.normcase(os.path.abspath(paths[key])))
+    return folders
+
+
+def folder_groups(sistemas: Iterable[str], paths: Optional[Dict[str, str]] = None) -> List[List[str]]:
+    """
+    Splits sistemas into groups that cannot run at the same time: two
+    sistemas sharing an output folder (directly or through a third one) are
+    serialized by the step scheduler, so they land in the same group.
+    """
+    groups: List[Tuple[set, List[str]]] = []
+    for sistema in dict.fromkeys(str(s).lower() for s in sistemas or []):
+        folders = output_folders([sistema], paths)
+        members = [sistema]
+        for group in [g for g in groups if g[0] & folders]:
+            groups.remove(group)
+            folders |= group[0]
+            members = group[1] + members
+        groups.append((folders, members))
+    return [members for _, members in groups]
+
+
+def portal_concurrency(sistemas: Iterable[str], slots: int, limits: Dict[str, int], default_limit: int) -> int:
+    """Jobs of these sistemas that can run at once: pool slots capped by the portal limits"""
+    concurrency = max(1, slots)
+    for portal in {portal_for(s) for s in sistemas or []}:
+        limit = limits.get(portal, default_limit)
+        if limit > 0:
+            concurrency = min(concurrency, limit)
+    return concurrency
+
+
+def shard_params(
+    params: dict,
+    shards: List[Tuple[date, date]],
+    parent_id: Optional[int] = None,
+    staging_root: Optional[str] = None
+) -> List[dict]:
+    """
+    Job params for each shard (same request, narrower dates).
+
+    Shards never carry `limpar` (the parent cleans once). With
+    `staging_root` each shard gets its own staging folder under it; the
+    name is fixed at creation, so a resumed shard promotes what its failed
+    run left there.
+    """
+    result = []
+    for index, (inicio, fim) in enumerate(shards):
+        child = dict(params)
+        child.pop("shard_days", None)
+        child.pop("limpar", None)
+        child["data_inicial"] = inicio.isoformat()
+        child["data_final"] = fim.isoformat()
+        child["shard"] = {"index": index, "total": len(shards), "parent": parent_id}
+        if staging_root is not None:
+            child["staging_dir"] = os.path.join(str(staging_root), f"job_{parent_id}_{index}")
+        result.append(child)
+    return result
+
+
+def parse_portal_limits(spec: str) -> Dict[str, int]:
+    """Parses "maps=1,qore=2" (invalid entries are ignored with a warning)"""
+    limits = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        try:
+            limits[name.strip().lower()] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid portal limit: {item!r}")
+    return limits
+
+
+def _job_params(params_json: Optional[str]) -> dict:
+    try:
+        params = json.loads(params_json) if params_json else {}
+    except (json.JSONDecodeError, TypeError):
+        params = {}
+    return params if isinstance(params, dict) else {}
+
+
+def _job_portals(params_json: Optional[str]) -> set:
+    return {portal_for(s) for s in _job_params(params_json).get("sistemas", []) or []}
+
+
+def portal_gate(limits: Dict[str, int], default_limit: int) -> Callable[[str, List[str]], bool]:
+    """
+    Builds the check used when acquiring a job for a slot: a job starts only
+    while every portal it needs is below its limit.
+
+    Args:
+        limits: Max concurrent jobs per portal
+        default_limit: Limit for portals not in `limits` (0 = unlimited)
+
+    Returns:
+        can_start(params_json, running_params_json) -> bool
+    """
+    def can_start(params_json: str, running_params: List[str]) -> bool:
+        wanted = _job_portals(params_json)
+        if not wanted:
+            return True
+        in_use = Counter()
+        for running in running_params:
+            in_use.update(_job_portals(running))
+        for portal in wanted:
+            limit = limits.get(portal, default_limit)
+            if limit > 0 and in_use[portal] >= limit:
+                return False
+        return True
+
+    return can_start
@@ -0,0 +1,157 @@
+"""
+Job Spans - Per-step timing breakdown of a job
+
+ETL modules time their steps (login, export clicks, wait_for_downloads,
+read_excel, Access uploads...) and emit one log line per finished span:
+
+    [SPAN] [maps] maps;exportar_ativos;wait_for_downloads 1520.0ms
+
+The path lists the open spans from the step (root) down, separated by ';'
+(the collapsed-stack format used by flame graphs). JobSpans folds these
+lines into a tree per job: for each path, how many times it ran, the total
+and self time (total minus children) and how many ended in error.
+
+Live trees come from the running executor; finished jobs keep theirs in the
+job_spans table.
+"""
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SPAN_LEVEL = "SPAN"
+
+# "<path> <ms>ms [erro]"
+SPAN_PATTERN = re.compile(r'^(\S+)\s+(\d+(?:\.\d+)?)ms(?:\s+(\w+))?\s*$')
+
+
+def parse_span(mensagem: str) -> Optional[dict]:
+    """
+    Parses the message of a SPAN line.
+
+    Args:
+        mensagem: Message part, e.g. "maps;login 812.4ms"
+
+    Returns:
+        {"path": ["maps", "login"], "seconds": 0.8124, "ok": True} or None if malformed
+    """
+    match = SPAN_PATTERN.match(mensagem.strip())
+    if not match:
+        return None
+
+    path = [name for name in match.group(1).split(";") if name]
+    if not path:
+        return None
+
+    return {
+        "path": path,
+        "seconds": float(match.group(2)) / 1000,
+        "ok": (match.group(3) or "").lower() != "erro",
+    }
+
+
+class SpanNode:
+    """One path of the tree (aggregated over every span with that path)"""
+
+    __slots__ = ("name", "count", "total", "errors", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.children: Dict[str, "SpanNode"] = {}
+
+    def child(self, name: str) -> "SpanNode":
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = SpanNode(name)
+        return node
+
+    def to_dict(self) -> dict:
+        children = sorted(self.children.values(), key=lambda n: n.total, reverse=True)
+        # Children may overlap (threads), so self time never goes below zero
+        self_seconds = max(0.0, self.total - sum(c.total for c in children))
+        return {
+            "name": self.name,
+            "count": self.count,
+            "total_seconds": round(self.total, 3),
+            "self_seconds": round(self_seconds, 3),
+            "errors": self.errors,
+            "children": [c.to_dict() for c in children],
+        }
+
+
+class JobSpans:
+    """Aggregates the SPAN lines of a single job into a timing tree"""
+
+    def __init__(self):
+        self.root = SpanNode("")
+
+    def add(self, path: List[str], seconds: float, ok: bool = True):
+        """Applies one finished span"""
+        node = self.root
+        for name in path:
+            node = node.child(name)
+        node.count += 1
+        node.total += seconds
+        if not ok:
+            node.errors += 1
+
+    def merge(self, snapshot: dict):
+        """Adds a stored snapshot (e.g. of a shard) to this tree"""
+        def walk(parent: SpanNode, entries: List[dict]):
+            for entry in entries:
+                node = parent.child(entry["name"])
+                node.count += entry.get("count", 0)
+                node.total += entry.get("total_seconds", 0.0)
+                node.errors += entry.get("errors", 0)
+                walk(node, entry.get("children", []))
+
+        walk(self.root, snapshot.get("spans", []))
+
+    @property
+    def empty(self) -> bool:
+        return not self.root.children
+
+    def snapshot(self) -> dict:
+        """
+        Returns the tree as a serializable dict.
+
+        Top-level entries are the steps (one per sistema); total_seconds is
+        their sum, i.e. the time spent in steps, not wall-clock time when
+        steps run in parallel.
+        """
+        spans = self.root.to_dict()["children"]
+        return {
+            "total_seconds": round(sum(s["total_seconds"] for s in spans), 3),
+            "spans": spans,
+        }
+
+
+def record_spans(job_id: int, spans: Optional[JobSpans]):
+    """Stores the timing tree of a finished job (skipped when empty)"""
+    if spans is None or spans.empty:
+        return
+    from core import database
+
+    try:
+        database.save_job_spans(job_id, json.dumps(spans.snapshot()))
+    except Exception as e:
+        logger.warning(f"Could not save span timings for job {job_id}: {e}")
+
+
+def load_spans(job_id: int) -> Optional[dict]:
+    """Stored timing tree of a job, or None"""
+    from core import database
+
+    raw = database.get_job_spans(job_id)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        logger.warning(f"Invalid span timings stored for job {job_id}")
+        return None
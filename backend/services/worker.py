@@ -21,6 +21,9 @@ if _backend_dir not in sys.path:
 
 from core import database
 from services.executor import get_executor
+from services.log_spool import db_log_line
+from services.progress import JobProgress, record_timings
+from services.spans import record_spans
 from services.sistemas import get_sistema_service
 from models.sistema import SistemaStatus
 import services.state as state_service
@@ -62,6 +65,12 @@ class BackgroundWorker:
         self.running = True
         self._use_pool = settings.MAX_CONCURRENT_JOBS > 1
 
+        if settings.BROWSER_POOL_SIZE > 0:
+            # Chrome instances launched in background, leased per job
+            from services.browser_pool import create_browser_pool
+
+            create_browser_pool().start()
+
         if self._use_pool:
             # Pool mode - concurrent execution
             from services.pool import create_pool_manager
@@ -90,6 +99,13 @@ class BackgroundWorker:
             except asyncio.CancelledError:
                 pass
 
+        from services.browser_pool import clear_browser_pool, get_browser_pool
+
+        browser_pool = get_browser_pool()
+        if browser_pool:
+            await asyncio.to_thread(browser_pool.stop)
+            clear_browser_pool()
+
         logger.info("BackgroundWorker parado")
 
     async def _run_loop(self):
@@ -134,6 +150,9 @@ class BackgroundWorker:
 
         sistemas = params.get("sistemas", [])
 
+        # Checkpoint key: own id, or the original job's id when resuming
+        params.setdefault("checkpoint_id", job_id)
+
         # Job is already marked as running by get_next_pending_job() atomically
         start_time = datetime.now()
 
@@ -149,11 +168,14 @@ class BackgroundWorker:
             # Broadcast status via WebSocket
             await self._broadcast_status(sistema_id, "RUNNING", 0, "Executando...")
 
+        from config import settings
+
         # Callback para logs
         async def log_callback(log_entry: dict):
-            # Salvar no banco
-            msg = f"[{log_entry['level']}] [{log_entry['sistema']}] {log_entry['mensagem']}"
-            database.append_log(job_id, msg)
+            # Salvar no banco (so entradas INFO+; a saida completa fica no spool)
+            msg = db_log_line(log_entry)
+            if msg:
+                database.append_log(job_id, msg, settings.JOB_LOG_DB_MAX_CHARS)
 
             # Adicionar job_id ao log
             log_entry["job_id"] = job_id
@@ -170,11 +192,15 @@ class BackgroundWorker:
                     await self._broadcast_status(sistema, "SUCCESS", 100, log_entry["mensagem"])
                 elif level == "ERROR":
                     await self._broadcast_status(sistema, "ERROR", 0, log_entry["mensagem"])
+                elif log_entry.get("progress") and executor.progress is not None:
+                    await self._report_progress(job_id, sistema, executor.progress, log_entry["mensagem"])
 
         # Executar
         executor = get_executor()
         try:
-            success = await executor.execute(params, log_callback)
+            success = await executor.execute(params, log_callback, job_id=job_id)
+            self._record_progress_timings(executor.progress)
+            record_spans(job_id, executor.spans)
 
             # Calcular duracao
             duration = int((datetime.now() - start_time).total_seconds())
@@ -220,6 +246,29 @@ class BackgroundWorker:
         finally:
             self.current_job_id = None
 
+    async def _report_progress(self, job_id: int, sistema_id: str, progress: JobProgress, mensagem: str):
+        """Atualiza progresso do sistema e envia snapshot (percent/ETA) via WebSocket"""
+        percent = progress.sistema_percent(sistema_id)
+        if percent is not None:
+            get_sistema_service().update_status(sistema_id, SistemaStatus.RUNNING, percent, mensagem)
+            await self._broadcast_status(sistema_id, "RUNNING", percent, mensagem)
+
+        ws_manager = state_service.ws_manager
+        if ws_manager:
+            try:
+                await ws_manager.broadcast_progress(job_id, progress.snapshot())
+            except Exception as e:
+                logger.error(f"Erro ao broadcast progress: {e}")
+
+    def _record_progress_timings(self, progress: Optional[JobProgress]):
+        """Salva duracao por unidade observada no job (base do ETA)"""
+        if progress is None:
+            return
+        try:
+            record_timings(progress)
+        except Exception as e:
+            logger.warning(f"Erro ao salvar tempos por unidade: {e}")
+
     async def _broadcast_log(self, log_entry: dict):
         """Envia log via WebSocket"""
         ws_manager = state_service.ws_manager
@@ -290,6 +339,44 @@ class BackgroundWorker:
             return self._pool_manager.get_status()
         return None
 
+    def get_job_progress(self, job_id: int) -> Optional[dict]:
+        """
+        Returns the progress snapshot of a running job.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            Snapshot dict (percent, eta_seconds, counters) or None if not running here
+        """
+        if self._use_pool and self._pool_manager:
+            return self._pool_manager.get_job_progress(job_id)
+
+        if self.current_job_id == job_id:
+            executor = get_executor()
+            if executor.progress is not None:
+                return executor.progress.snapshot()
+        return None
+
+    def get_job_spans(self, job_id: int) -> Optional[dict]:
+        """
+        Returns the live timing tree (SPAN lines) of a running job.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            Snapshot dict (total_seconds, spans) or None if not running here
+        """
+        if self._use_pool and self._pool_manager:
+            return self._pool_manager.get_job_spans(job_id)
+
+        if self.current_job_id == job_id:
+            executor = get_executor()
+            if executor.spans is not None:
+                return executor.spans.snapshot()
+        return None
+
     def get_status(self) -> dict:
         """
         Returns worker status (works in both modes).
@@ -297,18 +384,29 @@ class BackgroundWorker:
         Returns:
             Status dict with mode info and current state
         """
+        from services.browser_pool import get_browser_pool
+
+        browser_pool = get_browser_pool()
+        browsers = browser_pool.get_status() if browser_pool else None
+
         if self._use_pool and self._pool_manager:
             pool_status = self._pool_manager.get_status()
             return {
                 "mode": "pool",
                 "running": self.running,
+                "browser_pool": browsers,
                 **pool_status
             }
         else:
             return {
                 "mode": "single",
                 "running": self.running,
-                "current_job_id": self.current_job_id
+                "current_job_id": self.current_job_id,
+                "browser_pool": browsers,
+                "progress": (
+                    self.get_job_progress(self.current_job_id)
+                    if self.current_job_id else None
+                )
             }
 
 
@@ -135,6 +135,133 @@ class TestExecutionEndpoints:
             assert data["id"] == 1
             assert data["status"] == "pending"
 
+    async def test_get_job_progress_running(self, mock_database, disable_auth):
+        """GET /api/jobs/{id}/progress retorna percentual e ETA do job em execucao"""
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value["status"] = "running"
+        mock_worker = MagicMock()
+        mock_worker.get_job_progress.return_value = {
+            "percent": 40.0,
+            "eta_seconds": 90,
+            "counters": [{"sistema": "maps", "unit": "ativos", "done": 4, "total": 10}]
+        }
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.get_worker", return_value=mock_worker):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/1/progress")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["percent"] == 40.0
+            assert data["eta_seconds"] == 90
+            assert data["counters"][0]["done"] == 4
+            mock_worker.get_job_progress.assert_called_once_with(1)
+
+    async def test_get_job_progress_not_found(self, mock_database, disable_auth):
+        """GET /api/jobs/{id}/progress retorna 404 para inexistente"""
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value = None
+
+        with patch("routers.execution.database", mock_database):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/999/progress")
+
+            assert response.status_code == 404
+
+    async def test_get_job_timings_running(self, mock_database, disable_auth):
+        """GET /api/jobs/{id}/timings retorna a arvore ao vivo do job em execucao"""
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value["status"] = "running"
+        mock_worker = MagicMock()
+        mock_worker.get_job_spans.return_value = {
+            "total_seconds": 12.0,
+            "spans": [{"name": "maps", "count": 1, "total_seconds": 12.0, "self_seconds": 2.0,
+                       "errors": 0, "children": []}]
+        }
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.get_worker", return_value=mock_worker):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/1/timings")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["status"] == "running"
+            assert data["spans"][0]["name"] == "maps"
+            mock_worker.get_job_spans.assert_called_once_with(1)
+
+    async def test_get_job_timings_finished(self, mock_database, disable_auth):
+        """Job finalizado usa a arvore gravada (vazia se nao houver)"""
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value["status"] = "completed"
+
+        with patch("routers.execution.database", mock_database), \
+             patch("core.database.get_job_spans", return_value=None):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/1/timings")
+
+            assert response.status_code == 200
+            assert response.json() == {"job_id": 1, "status": "completed", "total_seconds": 0, "spans": []}
+
+    async def test_get_job_output_range(self, mock_database, disable_auth, temp_dir):
+        """GET /api/jobs/{id}/output retorna intervalo de linhas do spool"""
+        from httpx import AsyncClient, ASGITransport
+        from services.log_spool import LogSpool
+
+        log_path = Path(temp_dir) / "job_1.log"
+        with LogSpool(log_path, stride=4) as spool:
+            for i in range(10):
+                spool.write_line(f"[INFO] [MAPS] linha {i}")
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.log_spool.job_log_path", return_value=log_path):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/1/output?start=5&limit=2")
+                tail = await client.get("/api/jobs/1/output?tail=3")
+
+            data = response.json()
+            assert data["lines"] == ["[INFO] [MAPS] linha 5", "[INFO] [MAPS] linha 6"]
+            assert data["total_lines"] == 10
+            assert tail.json()["start"] == 7
+            assert len(tail.json()["lines"]) == 3
+
+    async def test_get_job_output_without_spool(self, mock_database, disable_auth, temp_dir):
+        """Job sem arquivo de saida retorna lista vazia"""
+        from httpx import AsyncClient, ASGITransport
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.log_spool.job_log_path",
+                   return_value=Path(temp_dir) / "job_1.log"):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs/1/output")
+
+            assert response.status_code == 200
+            assert response.json()["lines"] == []
+            assert response.json()["total_lines"] == 0
+
     async def test_get_job_not_found(self, mock_database, disable_auth):
         """GET /api/jobs/{id} retorna 404 para inexistente"""
         from httpx import AsyncClient, ASGITransport
@@ -209,6 +336,260 @@ class TestExecutionEndpoints:
 
             assert response.status_code == 200
 
+    async def test_resume_failed_job(self, mock_database, mock_sistema_service, disable_auth):
+        """POST /api/jobs/{id}/resume cria job com checkpoint do original"""
+        import json
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value["status"] = "error"
+        mock_database.add_job.return_value = 2
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.get_sistema_service", return_value=mock_sistema_service):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/jobs/1/resume")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["job_id"] == 2
+            assert data["resumed_from"] == 1
+
+            job_type, params = mock_database.add_job.call_args[0]
+            if isinstance(params, str):
+                params = json.loads(params)
+            assert job_type == "etl_pipeline"
+            assert params["checkpoint_id"] == 1
+            assert params["resume"] is True
+            assert params["sistemas"] == ["maps"]
+
+    async def test_resume_rejects_pending_job(self, mock_database, disable_auth):
+        """POST /api/jobs/{id}/resume so aceita jobs com erro ou cancelados"""
+        from httpx import AsyncClient, ASGITransport
+
+        with patch("routers.execution.database", mock_database):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/jobs/1/resume")
+
+            assert response.json()["status"] == "error"
+            mock_database.add_job.assert_not_called()
+
+    async def test_resume_not_found(self, mock_database, disable_auth):
+        """POST /api/jobs/{id}/resume retorna 404 para inexistente"""
+        from httpx import AsyncClient, ASGITransport
+
+        mock_database.get_job.return_value = None
+
+        with patch("routers.execution.database", mock_database):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/jobs/999/resume")
+
+            assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestShardedExecution:
+    """Testes para divisao do periodo em shards (shard_days)"""
+
+    async def test_execute_with_shard_days_creates_shards(self, test_db, mock_sistema_service, disable_auth):
+        """POST /api/execute com shard_days cria job pai e um job por shard"""
+        import json
+        from httpx import AsyncClient, ASGITransport
+
+        with patch("routers.execution.database", test_db), \
+             patch("routers.execution.get_sistema_service", return_value=mock_sistema_service):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/api/execute",
+                    json={
+                        "sistemas": ["maps"],
+                        "data_inicial": "2024-03-04",
+                        "data_final": "2024-03-22",
+                        "shard_days": 5
+                    }
+                )
+                data = response.json()
+                status = (await client.get(f"/api/jobs/{data['job_id']}")).json()
+
+        assert response.status_code == 200
+        assert len(data["shards"]) == 3
+
+        parent = test_db.get_job(data["job_id"])
+        assert parent["type"] == "etl_sharded"
+        assert parent["status"] == "sharded"
+
+        shards = [test_db.get_job(job_id) for job_id in data["shards"]]
+        assert all(s["parent_id"] == data["job_id"] and s["status"] == "pending" for s in shards)
+        assert json.loads(shards[1]["params"])["data_inicial"] == "2024-03-11"
+        assert json.loads(shards[1]["params"])["staging_dir"].endswith(f"job_{data['job_id']}_1")
+        assert [s["id"] for s in status["shards"]] == data["shards"]
+
+    async def test_limpar_runs_once_for_parent(self, test_db, mock_sistema_service, disable_auth):
+        """limpar roda uma vez (sem sistemas) antes dos shards, que nao o recebem"""
+        import json
+        from unittest.mock import AsyncMock
+        from httpx import AsyncClient, ASGITransport
+
+        executor = MagicMock()
+        executor.execute = AsyncMock(return_value=True)
+
+        with patch("routers.execution.database", test_db), \
+             patch("routers.execution.get_sistema_service", return_value=mock_sistema_service), \
+             patch("services.executor.ETLExecutor", return_value=executor):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/api/execute",
+                    json={
+                        "sistemas": ["maps"],
+                        "data_inicial": "2024-03-04",
+                        "data_final": "2024-03-22",
+                        "shard_days": 5,
+                        "limpar": True
+                    }
+                )
+                data = response.json()
+
+        assert response.status_code == 200
+        executor.execute.assert_awaited_once()
+        assert executor.execute.await_args.args[0] == {"sistemas": [], "limpar": True}
+        shards = [json.loads(test_db.get_job(job_id)["params"]) for job_id in data["shards"]]
+        assert not any("limpar" in s for s in shards)
+
+    async def test_shard_days_requires_dates(self, mock_database, mock_sistema_service, disable_auth):
+        """shard_days sem periodo retorna 400"""
+        from httpx import AsyncClient, ASGITransport
+
+        with patch("routers.execution.database", mock_database), \
+             patch("routers.execution.get_sistema_service", return_value=mock_sistema_service):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/api/execute",
+                    json={"sistemas": ["maps"], "shard_days": 5}
+                )
+
+            assert response.status_code == 400
+            mock_database.add_job.assert_not_called()
+
+    async def test_list_jobs_includes_parent(self, test_db, disable_auth):
+        """GET /api/jobs aceita o status sharded do job pai"""
+        from httpx import AsyncClient, ASGITransport
+
+        parent_id = test_db.add_job("etl_sharded", {"sistemas": ["maps"]}, status="sharded")
+
+        with patch("routers.execution.database", test_db):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/jobs")
+
+        assert response.status_code == 200
+        assert response.json()["jobs"][0]["id"] == parent_id
+
+    async def test_cancel_parent_cancels_pending_shards(self, test_db, mock_sistema_service, disable_auth):
+        """POST /api/cancel/{id} no job pai cancela os shards pendentes"""
+        from httpx import AsyncClient, ASGITransport
+
+        parent_id = test_db.add_job("etl_sharded", {"sistemas": ["maps"]}, status="sharded")
+        done_id = test_db.add_job("etl_pipeline", {"sistemas": ["maps"]}, parent_id=parent_id)
+        pending_id = test_db.add_job("etl_pipeline", {"sistemas": ["maps"]}, parent_id=parent_id)
+        test_db.update_job_status(done_id, "completed")
+
+        with patch("routers.execution.database", test_db), \
+             patch("routers.execution.get_sistema_service", return_value=mock_sistema_service), \
+             patch("routers.execution.get_worker") as mock_worker:
+            mock_worker.return_value.cancel_job.return_value = False
+
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(f"/api/cancel/{parent_id}")
+
+        assert response.json()["status"] == "success"
+        assert test_db.get_job(pending_id)["status"] == "cancelled"
+        assert test_db.get_job(parent_id)["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+class TestPlanEndpoint:
+    """Testes para o planner (POST /api/plan)"""
+
+    async def test_plan_predicts_duration(self, mock_database, disable_auth):
+        """POST /api/plan estima a duracao sem criar job"""
+        from httpx import AsyncClient, ASGITransport
+
+        config_service = MagicMock()
+        config_service.get_system_credentials.return_value = {
+            "usar_todos": False, "fundos_selecionados": ["FUNDO A", "FUNDO B"]
+        }
+        history = {("maps", "ativos"): 30.0, ("maps", "passivos"): 15.0}
+
+        from config import settings
+
+        with patch("routers.execution.database", mock_database), \
+             patch("services.credentials.get_config_service", return_value=config_service), \
+             patch("services.progress.get_unit_history", return_value=history), \
+             patch.object(settings, "MAX_CONCURRENT_JOBS", 4), \
+             patch.object(settings, "PORTAL_LIMITS", "maps=2"):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/api/plan",
+                    json={
+                        "sistemas": ["maps"],
+                        "data_inicial": "2024-03-04",
+                        "data_final": "2024-03-08",
+                        "shard_days": 2
+                    }
+                )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_units"] == 20
+        assert data["work_seconds"] == 10 * 30 + 10 * 15
+        assert data["sharding"]["shards"] == 3
+        # Cada shard baixa no proprio staging: so o limite do portal vale
+        assert data["sharding"]["concurrency"] == 2
+        assert data["sharding"]["wall_seconds"] < data["wall_seconds"]
+        mock_database.add_job.assert_not_called()
+
+    async def test_plan_invalid_dates(self, mock_database, disable_auth):
+        """POST /api/plan com data invalida retorna 400"""
+        from httpx import AsyncClient, ASGITransport
+
+        with patch("routers.execution.database", mock_database), \
+             patch("services.credentials.get_config_service", return_value=MagicMock()):
+            from app import app
+            transport = ASGITransport(app=app)
+
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/api/plan",
+                    json={"sistemas": ["amplis_reag"], "data_inicial": "31/02/2024"}
+                )
+
+        assert response.status_code == 400
+
 
 @pytest.mark.asyncio
 class TestExecuteSingleEndpoint:
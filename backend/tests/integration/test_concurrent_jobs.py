@@ -364,6 +364,70 @@ class TestCleanupStaleJobs:
         assert job2["status"] == "running"
 
 
+class TestShardedJobs:
+    """Tests for parent/shard jobs and per-portal limits"""
+
+    def _parent_with_shards(self, db, count=2):
+        parent_id = db.add_job("etl_sharded", {"sistemas": ["maps"]}, status="sharded")
+        shard_ids = [
+            db.add_job("etl_pipeline", {"sistemas": ["maps"]}, parent_id=parent_id)
+            for _ in range(count)
+        ]
+        return parent_id, shard_ids
+
+    def test_parent_is_never_acquired(self, test_db):
+        """Only shards are picked up by slots"""
+        parent_id, shard_ids = self._parent_with_shards(test_db)
+
+        acquired = test_db.acquire_job_for_slot(0)
+
+        assert acquired["id"] == shard_ids[0]
+        assert test_db.get_job(parent_id)["status"] == "sharded"
+
+    def test_parent_status_follows_shards(self, test_db):
+        """Parent completes only after every shard finished"""
+        parent_id, shard_ids = self._parent_with_shards(test_db)
+
+        test_db.update_job_status(shard_ids[0], "completed")
+        assert test_db.get_job(parent_id)["status"] == "sharded"
+
+        test_db.update_job_status(shard_ids[1], "completed")
+        parent = test_db.get_job(parent_id)
+        assert parent["status"] == "completed"
+        assert parent["finished_at"] is not None
+
+    def test_parent_error_when_a_shard_fails(self, test_db):
+        parent_id, shard_ids = self._parent_with_shards(test_db)
+
+        test_db.update_job_status(shard_ids[0], "error", "timeout")
+        test_db.update_job_status(shard_ids[1], "completed")
+
+        parent = test_db.get_job(parent_id)
+        assert parent["status"] == "error"
+        assert parent["error_message"] == "1 de 2 shard(s) sem sucesso"
+
+    def test_list_child_jobs(self, test_db):
+        parent_id, shard_ids = self._parent_with_shards(test_db, count=3)
+        test_db.add_job("etl_pipeline", {})
+
+        assert [c["id"] for c in test_db.list_child_jobs(parent_id)] == shard_ids
+
+    def test_portal_gate_skips_blocked_job(self, test_db):
+        """A job whose portal is at its limit is passed over"""
+        from services.sharding import portal_gate
+
+        can_start = portal_gate({"maps": 1}, default_limit=0)
+        test_db.add_job("etl_pipeline", {"sistemas": ["maps"]})
+        test_db.add_job("etl_pipeline", {"sistemas": ["maps"]})
+        qore_id = test_db.add_job("etl_pipeline", {"sistemas": ["qore"]})
+
+        test_db.acquire_job_for_slot(0, can_start)
+        acquired = test_db.acquire_job_for_slot(1, can_start)
+
+        assert acquired["id"] == qore_id
+        assert test_db.acquire_job_for_slot(2, can_start) is None
+
+
 class TestMigration:
     """Tests for database migration"""
 
@@ -379,6 +443,7 @@ class TestMigration:
 
         assert "worker_slot" in columns
         assert "locked_at" in columns
+        assert "parent_id" in columns
 
     def test_migrate_is_idempotent(self, test_db):
         """Running migration twice doesn't error"""
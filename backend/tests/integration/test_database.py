@@ -186,6 +186,17 @@ class TestAppendLog:
         job = test_db.get_job(job_id)
         assert "\n" in job["logs"]
 
+    def test_append_keeps_newest_chars(self, test_db):
+        """Com max_chars o valor nao cresce alem do limite"""
+        job_id = test_db.add_job("etl_pipeline", {})
+        for i in range(50):
+            test_db.append_log(job_id, f"[INFO] Linha {i:02d}", max_chars=60)
+
+        logs = test_db.get_job(job_id)["logs"]
+        assert len(logs) == 60
+        assert logs.endswith("[INFO] Linha 49\n")
+        assert "Linha 00" not in logs
+
 
 class TestGetPendingJob:
     """Testes para get_pending_job"""
@@ -0,0 +1,221 @@
+"""
+Testes unitarios para admission control do pool
+"""
+import os
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services.admission import (
+    AdmissionController,
+    read_meminfo,
+    read_loadavg,
+    process_tree_rss_mb,
+)
+
+
+def _write_meminfo(path, available_kb, total_kb=16 * 1024 * 1024):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"MemTotal:       {total_kb} kB\n")
+        f.write("MemFree:          100000 kB\n")
+        f.write(f"MemAvailable:   {available_kb} kB\n")
+
+
+def _write_loadavg(path, load):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{load} 0.50 0.40 1/200 12345\n")
+
+
+def _make_proc(proc_dir, pid, ppid, rss_kb, comm="python"):
+    pid_dir = os.path.join(proc_dir, str(pid))
+    os.makedirs(pid_dir, exist_ok=True)
+    with open(os.path.join(pid_dir, "stat"), "w", encoding="utf-8") as f:
+        f.write(f"{pid} ({comm}) S {ppid} 1 1 0 -1\n")
+    with open(os.path.join(pid_dir, "status"), "w", encoding="utf-8") as f:
+        f.write(f"Name:\t{comm}\nVmRSS:\t{rss_kb} kB\n")
+
+
+class TestProcReaders:
+    """Testes para leitura de /proc"""
+
+    def test_read_meminfo(self, temp_dir):
+        path = os.path.join(temp_dir, "meminfo")
+        _write_meminfo(path, available_kb=2048 * 1024)
+
+        info = read_meminfo(path)
+
+        assert info["available_mb"] == 2048
+        assert info["total_mb"] == 16 * 1024
+
+    def test_read_meminfo_missing_file(self, temp_dir):
+        assert read_meminfo(os.path.join(temp_dir, "nope")) is None
+
+    def test_read_loadavg(self, temp_dir):
+        path = os.path.join(temp_dir, "loadavg")
+        _write_loadavg(path, 3.25)
+        assert read_loadavg(path) == 3.25
+
+    def test_read_loadavg_missing_file(self, temp_dir):
+        assert read_loadavg(os.path.join(temp_dir, "nope")) is None
+
+    def test_process_tree_rss_includes_descendants(self, temp_dir):
+        """Soma RSS do processo e netos (chrome, chromedriver)"""
+        _make_proc(temp_dir, 100, 1, 100 * 1024)
+        _make_proc(temp_dir, 101, 100, 200 * 1024, comm="chromedriver")
+        _make_proc(temp_dir, 102, 101, 300 * 1024, comm="chrome (renderer)")
+        _make_proc(temp_dir, 200, 1, 999 * 1024, comm="other")
+
+        assert process_tree_rss_mb(100, proc_dir=temp_dir) == 600
+
+    def test_process_tree_rss_missing_pid(self, temp_dir):
+        assert process_tree_rss_mb(4242, proc_dir=temp_dir) == 0
+
+
+class TestAdmissionController:
+    """Testes para decisoes de admissao"""
+
+    @pytest.fixture
+    def proc_files(self, temp_dir):
+        meminfo = os.path.join(temp_dir, "meminfo")
+        loadavg = os.path.join(temp_dir, "loadavg")
+        _write_meminfo(meminfo, available_kb=4096 * 1024)
+        _write_loadavg(loadavg, 0.5)
+        return meminfo, loadavg
+
+    def _controller(self, proc_files, **kwargs):
+        meminfo, loadavg = proc_files
+        params = {"min_free_mb": 512, "default_job_mb": 1500, "max_load_per_cpu": 2.0}
+        params.update(kwargs)
+        controller = AdmissionController(meminfo_path=meminfo, loadavg_path=loadavg, **params)
+        controller.cpu_count = 4
+        return controller
+
+    def test_admits_when_memory_available(self, proc_files):
+        controller = self._controller(proc_files)
+        decision = controller.check(["maps"], running_count=1)
+        assert decision.admitted
+
+    def test_defers_when_memory_short(self, proc_files):
+        """4096 livre - 1500 reservado - 1500 estimado < 1500 minimo"""
+        controller = self._controller(proc_files, min_free_mb=1500)
+        decision = controller.check(["maps"], running_count=1, reserved_mb=1500)
+        assert not decision.admitted
+        assert "memory" in decision.reason
+
+    def test_always_admits_when_idle(self, proc_files):
+        """Nunca bloqueia a fila se nada esta rodando"""
+        controller = self._controller(proc_files, min_free_mb=100000)
+        decision = controller.check(["maps"], running_count=0)
+        assert decision.admitted
+
+    def test_defers_on_high_load(self, proc_files):
+        meminfo, loadavg = proc_files
+        _write_loadavg(loadavg, 12.0)
+        controller = self._controller(proc_files)
+        decision = controller.check(["maps"], running_count=1)
+        assert not decision.admitted
+        assert "load" in decision.reason
+
+    def test_disabled_always_admits(self, proc_files):
+        controller = self._controller(proc_files, enabled=False, min_free_mb=100000)
+        assert controller.check(["maps"], running_count=3).admitted
+
+    def test_no_procfs_admits(self, temp_dir):
+        controller = AdmissionController(
+            meminfo_path=os.path.join(temp_dir, "x"),
+            loadavg_path=os.path.join(temp_dir, "y"),
+            min_free_mb=100000
+        )
+        assert controller.check(["maps"], running_count=3).admitted
+
+    def test_estimate_uses_learned_costs(self, proc_files):
+        controller = self._controller(proc_files)
+        controller.load_costs({"maps": 800.0, "qore": 2200.0})
+
+        assert controller.estimate_mb(["maps"]) == 800.0
+        assert controller.estimate_mb(["maps", "qore"]) == 2200.0
+        assert controller.estimate_mb(["fidc"]) == 1500.0
+
+    def test_estimate_sums_concurrent_sistemas(self, proc_files):
+        """Com sistemas em paralelo o pico e a soma dos maiores"""
+        controller = self._controller(proc_files, step_parallelism=2)
+        controller.load_costs({"maps": 800.0, "qore": 2200.0, "jcot": 300.0})
+
+        assert controller.estimate_mb(["maps", "qore", "jcot"]) == 3000.0
+        assert controller.estimate_mb(["jcot"]) == 300.0
+
+    def test_learned_cost_changes_decision(self, proc_files):
+        """Sistema leve cabe onde o default nao caberia"""
+        controller = self._controller(proc_files, min_free_mb=3000)
+        assert not controller.check(["jcot"], running_count=1).admitted
+
+        controller.load_costs({"jcot": 300.0})
+        assert controller.check(["jcot"], running_count=1).admitted
+
+    def test_record_cost_ewma(self, proc_files):
+        controller = self._controller(proc_files)
+        assert controller.record_cost("MAPS", 1000.0) == 1000.0
+        assert controller.record_cost("maps", 2000.0) == pytest.approx(1300.0)
+
+    def test_stats(self, proc_files):
+        controller = self._controller(proc_files, min_free_mb=1500)
+        controller.check(["maps"], running_count=1, reserved_mb=3000)
+
+        stats = controller.get_stats()
+
+        assert stats["deferred_count"] == 1
+        assert stats["last_decision"]["admitted"] is False
+
+
+class TestSistemaCostsDatabase:
+    """Testes para persistencia dos custos aprendidos"""
+
+    def test_save_and_get(self, test_db):
+        test_db.save_sistema_cost("maps", 1200.0)
+        test_db.save_sistema_cost("maps", 1300.0)
+        test_db.save_sistema_cost("qore", 900.0)
+
+        costs = test_db.get_sistema_costs()
+
+        assert costs == {"maps": 1300.0, "qore": 900.0}
+
+    def test_empty(self, test_db):
+        assert test_db.get_sistema_costs() == {}
+
+
+class TestPoolAdmissionGate:
+    """Admissao decidida sobre o job que o slot realmente adquire"""
+
+    def test_admission_checks_the_acquired_job(self, test_db, temp_dir):
+        from services.pool import JobPoolManager, SlotStatus
+        from services.sharding import portal_gate
+
+        meminfo = os.path.join(temp_dir, "meminfo")
+        loadavg = os.path.join(temp_dir, "loadavg")
+        _write_meminfo(meminfo, available_kb=4096 * 1024)
+        _write_loadavg(loadavg, 0.5)
+        controller = AdmissionController(
+            min_free_mb=512, default_job_mb=500, meminfo_path=meminfo, loadavg_path=loadavg
+        )
+        controller.load_costs({"qore": 5000.0})
+
+        pool = JobPoolManager(max_workers=2, admission=controller)
+        pool._can_start = portal_gate({"maps": 1}, default_limit=0)
+
+        test_db.add_job("etl_pipeline", {"sistemas": ["maps"]})
+        test_db.acquire_job_for_slot(0)
+        pool.slots[0].status = SlotStatus.RUNNING
+
+        # Cabeca da fila bloqueada pelo portal; o proximo (qore) e o que seria
+        # adquirido e nao cabe na memoria -> nada sai, nem o fidc atras dele
+        test_db.add_job("etl_pipeline", {"sistemas": ["maps"]})
+        qore_id = test_db.add_job("etl_pipeline", {"sistemas": ["qore"]})
+        test_db.add_job("etl_pipeline", {"sistemas": ["fidc"]})
+
+        assert test_db.acquire_job_for_slot(1, pool._admission_gate()) is None
+
+        controller.load_costs({"qore": 1000.0})
+        job = test_db.acquire_job_for_slot(1, pool._admission_gate())
+        assert job["id"] == qore_id
@@ -0,0 +1,157 @@
+"""
+Testes para a sessao AMPLIS reutilizada entre exportacoes (python/modules/amplis_V02.py)
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+PYTHON_DIR = Path(__file__).parent.parent.parent.parent / "python"
+sys.path.insert(0, str(PYTHON_DIR / "utils"))
+sys.path.insert(0, str(PYTHON_DIR / "modules"))
+
+import amplis_V02  # noqa: E402
+from amplis_V02 import AmplisSession  # noqa: E402
+
+
+def _driver():
+    driver = MagicMock()
+    driver.window_handles = ["principal"]
+    driver.find_elements.return_value = ["menu"]
+    return driver
+
+
+@pytest.fixture
+def portal():
+    """setup_driver/login falsos e passos do portal sem efeito"""
+    drivers = []
+
+    def setup_driver(download_path, url):
+        driver = _driver()
+        driver.download_path = download_path
+        drivers.append(driver)
+        return driver
+
+    helpers = ["click_button", "set_date", "select_all_funds", "click_ok_button",
+               "wait_for_downloads", "set_output_type_to_csv", "rename_file",
+               "wait_network_idle", "_aguardar_download"]
+    with patch.object(amplis_V02, "setup_driver", side_effect=setup_driver) as setup, \
+         patch.object(amplis_V02, "login", return_value=True) as login, \
+         patch.multiple(amplis_V02, **{name: MagicMock() for name in helpers}):
+        yield setup, login, drivers
+
+
+class TestAmplisSession:
+    """Login unico por portal"""
+
+    def test_logs_in_once_and_switches_download_path(self, portal, temp_dir):
+        setup, login, drivers = portal
+
+        with AmplisSession("https://reag", "user", "senha", "/dados/csv") as sessao:
+            assert sessao.login()
+            sessao.use_download_path("/dados/pdf")
+            assert sessao.login()
+
+        assert setup.call_count == 1 and login.call_count == 1
+        drivers[0].execute_cdp_cmd.assert_called_once_with(
+            "Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": "/dados/pdf"}
+        )
+        drivers[0].quit.assert_called_once()
+
+    def test_browser_opens_lazily(self, portal):
+        setup, _, _ = portal
+
+        with AmplisSession("https://reag", "user", "senha", "/dados/csv") as sessao:
+            sessao.use_download_path("/dados/pdf")
+
+        assert setup.call_count == 0
+
+    def test_relogin_when_session_dropped(self, portal):
+        setup, login, drivers = portal
+
+        with AmplisSession("https://reag", "user", "senha", "/dados/csv") as sessao:
+            sessao.login()
+            drivers[0].find_elements.return_value = []  # voltou para a tela de login
+            assert sessao.login()
+            assert sessao.driver is drivers[1]
+
+        assert login.call_count == 2
+        drivers[0].quit.assert_called_once()
+
+    def test_extra_tabs_closed_between_exports(self, portal):
+        _, _, drivers = portal
+
+        with AmplisSession("https://reag", "user", "senha", "/dados/pdf") as sessao:
+            sessao.login()
+            drivers[0].window_handles = ["principal", "pdf"]
+            sessao.login()
+
+        drivers[0].close.assert_called_once()
+        drivers[0].switch_to.window.assert_called_with("principal")
+
+    def test_missing_credentials_skip_browser(self, portal):
+        setup, _, _ = portal
+
+        assert not AmplisSession("https://master", None, None, "/dados/csv").login()
+        assert setup.call_count == 0
+
+    def test_page_download_behavior_fallback(self):
+        driver = _driver()
+        driver.execute_cdp_cmd.side_effect = [WebDriverException("nao suportado"), None]
+
+        amplis_V02._set_download_path(driver, "/dados/pdf")
+
+        assert driver.execute_cdp_cmd.call_args[0][0] == "Page.setDownloadBehavior"
+
+
+class TestRunAmplis:
+    """run_amplis: um Chrome e um login por portal"""
+
+    def test_four_exports_two_logins(self, portal, temp_dir):
+        setup, login, drivers = portal
+        csv_path = str(Path(temp_dir) / "csv")
+        pdf_path = str(Path(temp_dir) / "pdf")
+
+        amplis_V02.run_amplis(
+            "reag", "s1", "https://reag", "master", "s2", "https://master",
+            csv_path, pdf_path, "02/01/2024", "03/01/2024", True, True
+        )
+
+        assert [c.args[1] for c in setup.call_args_list] == ["https://reag", "https://master"]
+        assert login.call_count == 2
+        for driver in drivers:
+            # CSV abre na pasta csv; PDF troca a pasta na mesma sessao
+            assert driver.download_path == csv_path
+            driver.execute_cdp_cmd.assert_any_call(
+                "Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": pdf_path}
+            )
+            driver.quit.assert_called_once()
+
+    def test_standalone_flow_still_owns_its_browser(self, portal, temp_dir):
+        setup, _, drivers = portal
+
+        amplis_V02.run_reag_process_csv("02/01/2024", "02/01/2024", "reag", "s1", "https://reag", temp_dir)
+
+        assert setup.call_count == 1
+        drivers[0].quit.assert_called_once()
+
+    def test_master_step_keys_units_by_master(self, portal, temp_dir):
+        """Step amplis_master: credenciais do MASTER no primeiro par, sem segunda sessao"""
+        setup, _, _ = portal
+        chaves = MagicMock()
+        with patch.multiple(
+            amplis_V02,
+            ledger_done=MagicMock(return_value=False), unit_done=MagicMock(return_value=False),
+            record_done=chaves.record_done, mark_unit_done=chaves.mark_unit_done,
+            report_progress=chaves.report_progress, new_files=MagicMock(return_value=["a.pdf"]),
+        ):
+            amplis_V02.run_amplis(
+                "master", "s2", "https://master", None, None, None,
+                temp_dir, temp_dir, "02/01/2024", "02/01/2024", True, False, sistema="amplis_master"
+            )
+
+        assert [c.args[1] for c in setup.call_args_list] == ["https://master"]
+        assert {c.args[0] for c in chaves.mock_calls} == {"amplis_master"}
+        chaves.record_done.assert_called_once()
@@ -0,0 +1,260 @@
+"""
+Testes para o pool de navegadores (services/browser_pool.py) e o emprestimo
+do lado do ETL (python/utils/browser_lease.py)
+"""
+import asyncio
+import json
+import os
+import stat
+import sys
+import textwrap
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "python" / "utils"))
+
+import browser_lease  # noqa: E402
+from services.browser_pool import BrowserPool, BrowserState  # noqa: E402
+from services.executor import ETLExecutor  # noqa: E402
+
+
+class FakeChrome:
+    """Launcher/prober falsos: portas sequenciais, 'vivo' por endereco"""
+
+    def __init__(self):
+        self.next_port = 9300
+        self.alive = set()
+        self.launched = []
+        self.resets = []
+
+    def launch(self, browser):
+        self.next_port += 1
+        self.alive.add(f"127.0.0.1:{self.next_port}")
+        self.launched.append(browser.browser_id)
+        process = MagicMock()
+        process.poll.return_value = 0
+        return process, self.next_port
+
+    def probe(self, address):
+        return address in self.alive
+
+    def reset(self, address):
+        self.resets.append(address)
+
+
+@pytest.fixture
+def chrome():
+    return FakeChrome()
+
+
+@pytest.fixture
+def pool(chrome, temp_dir):
+    pool = BrowserPool(
+        size=2, base_dir=temp_dir, max_uses=3,
+        launcher=chrome.launch, prober=chrome.probe, resetter=chrome.reset,
+    )
+    pool.check()
+    yield pool
+    pool.stop()
+
+
+class TestBrowserPool:
+    """Emprestimo, reciclagem e substituicao"""
+
+    def test_instances_get_isolated_dirs(self, pool, chrome):
+        assert chrome.launched == [0, 1]
+        dirs = {b.profile_dir for b in pool.browsers.values()} | {b.download_dir for b in pool.browsers.values()}
+        assert len(dirs) == 4
+        prefs = json.loads(Path(pool.browsers[0].profile_dir, "Default", "Preferences").read_text())
+        assert prefs["download"]["default_directory"] == os.path.abspath(pool.browsers[0].download_dir)
+
+    def test_lease_never_blocks(self, pool):
+        primeiro = pool.lease(job_id=1, count=5)
+        segundo = pool.lease(job_id=2, count=1)
+
+        assert len(primeiro) == 2 and segundo == []
+        assert pool.get_status()["leased"] == 2
+
+        pool.release(primeiro)
+        assert pool.get_status()["idle"] == 2
+
+    def test_release_cleans_tabs_and_downloads(self, pool, chrome):
+        [browser] = pool.lease(job_id=1, count=1)
+        Path(browser.download_dir, "carteira.pdf").touch()
+
+        pool.release([browser])
+
+        assert chrome.resets == [browser.address]
+        assert os.listdir(browser.download_dir) == []
+        assert browser.state == BrowserState.IDLE and browser.uses == 1
+
+    def test_recycled_after_max_uses(self, pool, chrome):
+        for job_id in range(3):
+            pool.release(pool.lease(job_id=job_id, count=2))
+
+        assert all(b.state == BrowserState.DEAD for b in pool.browsers.values())
+        pool.check()
+
+        status = pool.get_status()
+        assert (status["idle"], status["recycled"]) == (2, 2)
+        assert all(b.uses == 0 for b in pool.browsers.values())
+
+    def test_crash_during_job_is_replaced(self, pool, chrome):
+        [browser] = pool.lease(job_id=1, count=1)
+        antigo = browser.address
+        chrome.alive.discard(antigo)
+
+        pool.release([browser])
+        pool.check()
+
+        assert browser.state == BrowserState.IDLE and browser.address != antigo
+        assert pool.get_status()["replaced"] == 1
+
+    def test_health_check_replaces_idle_instance(self, pool, chrome):
+        chrome.alive.discard(pool.browsers[1].address)
+
+        # Morto no emprestimo: pulado e marcado para substituicao
+        assert [b.browser_id for b in pool.lease(job_id=1, count=2)] == [0]
+        pool.check()
+
+        assert pool.browsers[1].state == BrowserState.IDLE
+        assert chrome.launched == [0, 1, 1]
+
+    def test_launch_failure_retried_by_maintenance(self, chrome, temp_dir):
+        falhas = iter([RuntimeError("chrome ausente")])
+
+        def launch(browser):
+            erro = next(falhas, None)
+            if erro:
+                raise erro
+            return chrome.launch(browser)
+
+        pool = BrowserPool(size=1, base_dir=temp_dir, launcher=launch, prober=chrome.probe, resetter=chrome.reset)
+        pool.check()
+        assert pool.browsers[0].state == BrowserState.DEAD
+        pool.check()
+        assert pool.browsers[0].state == BrowserState.IDLE
+
+    def test_maintenance_thread_starts_instances(self, chrome, temp_dir):
+        pool = BrowserPool(size=2, base_dir=temp_dir, launcher=chrome.launch, prober=chrome.probe,
+                           resetter=chrome.reset, health_interval=0.05)
+        pool.start()
+        try:
+            assert pool.wait_ready(timeout=5)
+        finally:
+            pool.stop()
+        assert pool.get_status()["idle"] == 0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="binario falso em shell POSIX")
+def test_default_launcher_reads_devtools_port(temp_dir):
+    """Chrome falso: grava DevToolsActivePort no perfil e fica rodando"""
+    binary = Path(temp_dir, "chrome")
+    binary.write_text(textwrap.dedent(f"""\
+        #!{sys.executable}
+        import sys, time
+        perfil = [a.split("=", 1)[1] for a in sys.argv if a.startswith("--user-data-dir=")][0]
+        open(perfil + "/DevToolsActivePort", "w").write("9555\\n/devtools/browser/x\\n")
+        time.sleep(60)
+    """))
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+
+    pool = BrowserPool(size=1, base_dir=str(Path(temp_dir, "pool")), binary=str(binary),
+                       prober=lambda address: True)
+    pool.check()
+    process = pool.browsers[0].process
+    try:
+        assert pool.browsers[0].address == "127.0.0.1:9555"
+    finally:
+        pool.stop()
+    assert process.poll() is not None
+
+
+class TestBrowserLease:
+    """Reivindicacao de um Chrome do pool pelos steps"""
+
+    @pytest.fixture
+    def lease_env(self, temp_dir, monkeypatch):
+        entradas = [
+            {"id": 0, "address": "127.0.0.1:9301", "download_dir": "/pool/0"},
+            {"id": 1, "address": "127.0.0.1:9302", "download_dir": "/pool/1"},
+        ]
+        monkeypatch.setenv(browser_lease.POOL_ENV, json.dumps(entradas))
+        monkeypatch.setenv(browser_lease.LEASE_DIR_ENV, temp_dir)
+        yield temp_dir
+        browser_lease._release_all()
+
+    def test_each_step_gets_its_own_browser(self, lease_env):
+        primeiro = browser_lease.claim()
+        segundo = browser_lease.claim()
+
+        assert (primeiro["id"], segundo["id"]) == (0, 1)
+        assert browser_lease.claim() is None
+
+        browser_lease.release(primeiro)
+        assert browser_lease.claim()["id"] == 0
+
+    def test_lock_of_dead_process_is_reclaimed(self, lease_env):
+        Path(lease_env, "0.lock").write_text("999999999")
+        Path(lease_env, "1.lock").write_text(str(os.getpid()))
+
+        assert browser_lease.claim()["id"] == 0
+
+    def test_pooled_driver_attaches_and_quit_returns_browser(self, lease_env):
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "python" / "modules"))
+        import base_driver
+
+        with patch.object(base_driver.webdriver, "Chrome") as chrome_cls:
+            driver = chrome_cls.return_value
+            driver.window_handles = ["principal", "pdf"]
+            pooled = base_driver.pooled_driver("/dados/maps")
+
+            options = chrome_cls.call_args.kwargs["options"]
+            assert options.debugger_address == "127.0.0.1:9301"
+            driver.execute_cdp_cmd.assert_any_call(
+                "Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": "/dados/maps"}
+            )
+            assert os.path.exists(Path(lease_env, "0.lock"))
+
+            pooled.quit()
+
+        driver.close.assert_called_once()
+        driver.execute_cdp_cmd.assert_called_with("Network.clearBrowserCookies", {})
+        assert not os.path.exists(Path(lease_env, "0.lock"))
+
+    def test_without_pool(self, monkeypatch):
+        monkeypatch.delenv(browser_lease.POOL_ENV, raising=False)
+
+        assert browser_lease.claim() is None
+
+
+class TestExecutorLease:
+    """Executor empresta navegadores antes do main.py e devolve ao final"""
+
+    def test_env_lists_leased_browsers(self, temp_dir):
+        pool = MagicMock()
+        browser = MagicMock()
+        browser.lease_info.return_value = {"id": 0, "address": "127.0.0.1:9301", "download_dir": "/pool/0"}
+        pool.lease.return_value = [browser]
+        env = {}
+
+        with patch("services.browser_pool.get_browser_pool", return_value=pool):
+            executor = ETLExecutor()
+            browsers = asyncio.run(executor._lease_browsers({"sistemas": ["maps", "qore"]}, 7, env))
+            assert pool.lease.call_args[0] == (7, 2)
+            assert json.loads(env["ETL_BROWSER_POOL"])[0]["address"] == "127.0.0.1:9301"
+            assert os.path.isdir(env["ETL_BROWSER_LEASE_DIR"])
+
+            asyncio.run(executor._release_browsers(browsers, env))
+
+        pool.release.assert_called_once_with([browser])
+        assert not os.path.exists(env["ETL_BROWSER_LEASE_DIR"])
+
+    def test_no_pool_no_env(self):
+        env = {}
+        with patch("services.browser_pool.get_browser_pool", return_value=None):
+            assert asyncio.run(ETLExecutor()._lease_browsers({"sistemas": ["maps"]}, 1, env)) == []
+        assert env == {}
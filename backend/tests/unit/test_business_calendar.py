@@ -0,0 +1,91 @@
+"""
+Testes para o calendario de dias uteis compartilhado (python/utils/business_calendar.py)
+"""
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+PYTHON_DIR = Path(__file__).parent.parent.parent.parent / "python"
+sys.path.insert(0, str(PYTHON_DIR / "utils"))
+sys.path.insert(0, str(PYTHON_DIR / "modules"))
+
+import business_calendar  # noqa: E402
+from business_calendar import BusinessCalendar  # noqa: E402
+
+# Aniversario de SP, Tiradentes, Consciencia Negra
+FERIADOS = {date(2024, 1, 25), date(2024, 4, 21), date(2024, 11, 20)}
+
+
+def _util(dia):
+    return dia.weekday() < 5 and dia not in FERIADOS
+
+
+def _anterior_dia_a_dia(dia, n):
+    """Implementacao antiga: anda dia a dia para tras"""
+    while n > 0:
+        dia -= timedelta(days=1)
+        if _util(dia):
+            n -= 1
+    return dia
+
+
+@pytest.fixture
+def calendario():
+    return BusinessCalendar(datas_feriado=FERIADOS, anos=(2024, 2024))
+
+
+class TestBusinessCalendar:
+    """Consultas sobre as tabelas pre-computadas"""
+
+    def test_previous_business_day(self, calendario):
+        assert calendario.previous_business_day("26/01/2024") == date(2024, 1, 24)
+        assert calendario.previous_business_day(date(2024, 1, 29), 2) == date(2024, 1, 24)
+
+    def test_next_business_day(self, calendario):
+        assert calendario.next_business_day("2024-01-24") == date(2024, 1, 26)
+
+    def test_range_and_count(self, calendario):
+        dias = calendario.range("22/01/2024", "28/01/2024")
+
+        assert dias == [date(2024, 1, 22), date(2024, 1, 23), date(2024, 1, 24), date(2024, 1, 26)]
+        assert calendario.business_days_between("2024-01-22", "2024-01-28") == 4
+        assert calendario.range("2024-02-01", "2024-01-01") == []
+
+    def test_extends_beyond_initial_years(self, calendario):
+        assert calendario.previous_business_day(date(2024, 1, 1)) == date(2023, 12, 29)
+        assert calendario.next_business_day(date(2024, 12, 31)) == date(2025, 1, 1)
+        assert calendario.anos[0] < 2024 and calendario.anos[1] > 2024
+
+    def test_matches_day_by_day_walk(self, calendario):
+        rng = random.Random(7)
+        for _ in range(500):
+            dia = date(2023, 1, 1) + timedelta(days=rng.randint(0, 900))
+            n = rng.randint(1, 40)
+            assert calendario.previous_business_day(dia, n) == _anterior_dia_a_dia(dia, n)
+
+            fim = dia + timedelta(days=rng.randint(0, 60))
+            esperado = [dia + timedelta(days=i) for i in range((fim - dia).days + 1) if _util(dia + timedelta(days=i))]
+            assert calendario.range(dia, fim) == esperado
+
+    def test_weekends_only(self):
+        calendario = BusinessCalendar(feriados=False, anos=(2024, 2024))
+        assert calendario.is_business_day(date(2024, 1, 25))
+        assert not calendario.is_business_day(date(2024, 1, 27))
+
+
+class TestSharedCalendars:
+    """get_calendar e os helpers dos modulos"""
+
+    def test_get_calendar_is_cached(self):
+        assert business_calendar.get_calendar("SP") is business_calendar.get_calendar("SP")
+        assert business_calendar.get_calendar(None) is not business_calendar.get_calendar("SP")
+
+    def test_maps_gera_datas_uteis(self):
+        from maps_downloads import gera_datas_uteis
+
+        assert gera_datas_uteis("26/01/2024", "30/01/2024") == ["26/01/2024", "29/01/2024", "30/01/2024"]
+        # Data unica vale mesmo no fim de semana (comportamento legado)
+        assert gera_datas_uteis("27/01/2024", "27/01/2024") == ["27/01/2024"]
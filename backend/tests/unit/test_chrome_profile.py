@@ -0,0 +1,90 @@
+"""
+Testes para o perfil enxuto do Chrome (python/modules/base_driver.py)
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+import base_driver  # noqa: E402
+
+
+class TestLeanProfile:
+    """Flags, page load eager e bloqueio de recursos por CDP"""
+
+    def test_lean_options(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", True)
+        options = base_driver.lean_options(Options())
+
+        assert options.page_load_strategy == "eager"
+        assert "--disable-background-networking" in options.arguments
+        assert "--disable-extensions" in options.arguments
+
+    def test_disabled_keeps_stock_chrome(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", False)
+        driver = MagicMock()
+
+        assert base_driver.lean_options(Options()).page_load_strategy == "normal"
+        assert not base_driver.block_resources(driver)
+        driver.execute_cdp_cmd.assert_not_called()
+
+    def test_block_resources_spares_downloads(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", True)
+        monkeypatch.delenv("ETL_CHROME_BLOCKED_URLS", raising=False)
+        driver = MagicMock()
+
+        assert base_driver.block_resources(driver)
+
+        driver.execute_cdp_cmd.assert_called_with("Network.setBlockedURLs", {"urls": list(base_driver.BLOCKED_URL_PATTERNS)})
+        padroes = " ".join(base_driver.BLOCKED_URL_PATTERNS)
+        assert "*.png" in padroes and "*.woff2" in padroes
+        for extensao in (".pdf", ".xlsx", ".csv", ".zip"):
+            assert extensao not in padroes
+
+    def test_env_overrides_patterns(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", True)
+        monkeypatch.setenv("ETL_CHROME_BLOCKED_URLS", "*.png, *tracker.example*")
+        assert base_driver.blocked_url_patterns() == ["*.png", "*tracker.example*"]
+
+        monkeypatch.setenv("ETL_CHROME_BLOCKED_URLS", "")
+        driver = MagicMock()
+        assert not base_driver.block_resources(driver)
+        driver.execute_cdp_cmd.assert_not_called()
+
+    def test_cdp_refusal_is_not_fatal(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", True)
+        driver = MagicMock()
+        driver.execute_cdp_cmd.side_effect = WebDriverException("cdp indisponivel")
+
+        assert not base_driver.block_resources(driver)
+
+    def test_create_driver_uses_lean_profile(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", True)
+        monkeypatch.setattr(base_driver, "pooled_driver", lambda *args: None)
+
+        with patch.object(base_driver.webdriver, "Chrome") as chrome_cls, \
+                patch.object(base_driver, "_chromedriver_service", return_value=None):
+            driver = base_driver.create_driver("/tmp/downloads", headless=True)
+
+        options = chrome_cls.call_args.kwargs["options"]
+        assert options.page_load_strategy == "eager"
+        assert "--disable-background-networking" in options.arguments
+        assert driver.execute_cdp_cmd.call_args.args[0] == "Network.setBlockedURLs"
+
+    def test_headless_env_applies_without_lean_profile(self, monkeypatch):
+        monkeypatch.setattr(base_driver, "LEAN_PROFILE", False)
+        monkeypatch.setattr(base_driver, "HEADLESS", True)
+        options = Options()
+        options.add_argument("--headless=new")
+
+        base_driver.lean_options(options)
+
+        assert options.arguments.count("--headless=new") == 1
+        assert "--no-sandbox" in options.arguments
+        assert options.page_load_strategy == "normal"
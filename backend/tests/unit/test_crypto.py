@@ -500,3 +500,42 @@ class TestCryptoServiceIntegration:
 
         with pytest.raises(InvalidTag):
             crypto2.decrypt_credentials(encrypted)
+
+
+class TestCryptoServiceKeyCache:
+    """Testes para cache da chave derivada"""
+
+    @pytest.fixture
+    def crypto(self):
+        from services.crypto import CryptoService
+        key = base64.b64encode(b"test_master_key_32_bytes!!!!!!!!").decode()
+        return CryptoService(master_key=key)
+
+    def test_kdf_runs_once_per_salt(self, crypto):
+        """Load repetido e load do arquivo recem-salvo nao repetem o PBKDF2"""
+        encrypted = crypto.encrypt_credentials({"s": {"password": "x"}})
+
+        with patch.object(crypto, "_kdf", wraps=crypto._kdf) as kdf:
+            crypto.decrypt_credentials(encrypted)
+            crypto.decrypt_credentials(encrypted)
+            saved = crypto.encrypt_credentials({"s": {"password": "y"}})
+            assert kdf.call_count == 1
+            assert crypto.decrypt_credentials(saved)["s"]["password"] == "y"
+
+        assert kdf.call_count == 1
+
+    def test_every_save_uses_a_new_salt(self, crypto):
+        first = crypto.encrypt_credentials({"s": {"password": "x"}})
+        second = crypto.encrypt_credentials({"s": {"password": "x"}})
+
+        assert first["encryption"]["salt"] != second["encryption"]["salt"]
+        assert first["s"]["password"]["ciphertext"] != second["s"]["password"]["ciphertext"]
+        assert crypto.decrypt_credentials(first)["s"]["password"] == "x"
+
+    def test_data_key_for(self, crypto):
+        encrypted = crypto.encrypt_credentials({"s": {"password": "x"}})
+        salt, key = crypto.data_key_for(encrypted)
+
+        assert salt == base64.b64decode(encrypted["encryption"]["salt"])
+        assert key == crypto._derive_key(salt)
+        assert crypto.data_key_for({"version": "1.0"}) is None
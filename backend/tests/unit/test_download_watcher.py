@@ -0,0 +1,119 @@
+"""
+Testes para o watcher de downloads (python/modules/download_watcher.py)
+"""
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+import base_driver  # noqa: E402
+import download_watcher  # noqa: E402
+from download_watcher import DownloadWatcher  # noqa: E402
+
+requires_inotify = pytest.mark.skipif(
+    download_watcher._load_libc() is None, reason="requer inotify (Linux)"
+)
+
+
+def _baixar(pasta, nome, atraso=0.2, conteudo=b"%PDF-1.4"):
+    """Simula o Chrome: grava <nome>.crdownload e renomeia ao terminar"""
+    def run():
+        temp = Path(pasta, nome + ".crdownload")
+        temp.write_bytes(conteudo)
+        time.sleep(atraso)
+        os.rename(temp, Path(pasta, nome))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def use_inotify(request):
+    if request.param and download_watcher._load_libc() is None:
+        pytest.skip("requer inotify (Linux)")
+    return request.param
+
+
+class TestDownloadWatcher:
+    """Mesmo comportamento com inotify e com polling"""
+
+    def test_resolves_on_rename(self, temp_dir, use_inotify):
+        with DownloadWatcher(temp_dir, use_inotify=use_inotify) as watcher:
+            thread = _baixar(temp_dir, "carteira.pdf")
+            assert watcher.wait_started(timeout=5)
+            assert watcher.wait_for_files(timeout=5) == ["carteira.pdf"]
+            thread.join()
+
+    def test_count_and_pattern(self, temp_dir, use_inotify):
+        Path(temp_dir, "antigo.zip").touch()
+        with DownloadWatcher(temp_dir, use_inotify=use_inotify) as watcher:
+            threads = [
+                _baixar(temp_dir, "ativos.xlsx", 0.1),
+                _baixar(temp_dir, "lote_1.zip", 0.2),
+                _baixar(temp_dir, "lote_2.zip", 0.3),
+            ]
+            nomes = watcher.wait_for_files(count=2, pattern="LOTE_*.zip", timeout=5)
+            for thread in threads:
+                thread.join()
+
+        assert nomes == ["lote_1.zip", "lote_2.zip"]
+
+    def test_temp_sibling_means_still_downloading(self, temp_dir, use_inotify):
+        with DownloadWatcher(temp_dir, use_inotify=use_inotify) as watcher:
+            Path(temp_dir, "relatorio.xlsx").write_bytes(b"")
+            Path(temp_dir, "relatorio.xlsx.part").write_bytes(b"...")
+
+            assert watcher.wait_for_files(timeout=0.5) == []
+            assert not watcher.wait_idle(timeout=0.2)
+
+            os.unlink(Path(temp_dir, "relatorio.xlsx.part"))
+            assert watcher.wait_for_files(timeout=2) == ["relatorio.xlsx"]
+            assert watcher.wait_idle(timeout=1)
+
+    def test_existing_files_count_with_empty_before(self, temp_dir, use_inotify):
+        Path(temp_dir, "QORE_abc_carteira.pdf").write_bytes(b"pdf")
+
+        with DownloadWatcher(temp_dir, before=(), use_inotify=use_inotify) as watcher:
+            padrao = re.compile(r"abc.*\.pdf$", re.IGNORECASE)
+            assert watcher.wait_for_files(pattern=padrao, timeout=2) == ["QORE_abc_carteira.pdf"]
+
+    def test_timeout(self, temp_dir, use_inotify):
+        with DownloadWatcher(temp_dir, use_inotify=use_inotify) as watcher:
+            assert watcher.wait_for_files(timeout=0.2) == []
+            assert watcher.wait_started(timeout=0.2) == []
+
+
+@requires_inotify
+def test_inotify_wakes_without_polling(temp_dir, monkeypatch):
+    """Com inotify o rename acorda a espera: sem reavaliar a cada poll"""
+    with DownloadWatcher(temp_dir) as watcher:
+        assert watcher.backend == "inotify"
+        chamadas = []
+        finished = watcher.finished
+        monkeypatch.setattr(watcher, "finished", lambda: chamadas.append(1) or finished())
+
+        thread = _baixar(temp_dir, "carteira.pdf", atraso=1.0)
+        inicio = time.monotonic()
+        assert watcher.wait_for_files(timeout=5) == ["carteira.pdf"]
+        thread.join()
+
+    assert time.monotonic() - inicio < 1.5
+    # Uma avaliacao inicial + uma por lote de eventos (criacao, rename)
+    assert len(chamadas) <= 4
+
+
+def test_base_driver_wait_download_complete(temp_dir):
+    antes = base_driver.download_snapshot(temp_dir)
+    thread = _baixar(temp_dir, "lote.zip")
+
+    assert base_driver.wait_download_complete(temp_dir, antes, pattern="*.zip", timeout=5) == ["lote.zip"]
+    thread.join()
@@ -2,6 +2,7 @@
 Testes unitarios para ETLExecutor
 """
 import pytest
+import signal
 import sys
 from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock
@@ -71,6 +72,38 @@ class TestParseLogLine:
         assert result["mensagem"] == "Iniciando download"
         assert "timestamp" in result
 
+    def test_progress_line(self, executor):
+        """Linha PROGRESS inclui contador parseado"""
+        result = executor._parse_log_line("[PROGRESS] [maps] 3/20 ativos")
+        assert result["level"] == "PROGRESS"
+        assert result["sistema"] == "maps"
+        assert result["progress"] == {"done": 3, "total": 20, "unit": "ativos", "skipped": 0}
+
+    def test_progress_line_tracked(self, executor):
+        """Executor acumula contadores das linhas PROGRESS"""
+        from services.progress import JobProgress
+
+        executor.progress = JobProgress()
+        executor._track_progress(executor._parse_log_line("[PROGRESS] [qore] 2/8 fundos"))
+
+        assert executor.progress.snapshot()["percent"] == 25.0
+
+    def test_span_line_tracked(self, executor):
+        """Linhas SPAN entram na arvore de tempos do job"""
+        from services.spans import JobSpans
+
+        executor.spans = JobSpans()
+        result = executor._parse_log_line("[SPAN] [maps] maps;login 812.5ms")
+        executor._track_span(result)
+
+        assert result["span"] == {"path": ["maps", "login"], "seconds": 0.8125, "ok": True}
+        assert executor.spans.snapshot()["spans"][0]["children"][0]["name"] == "login"
+
+    def test_non_progress_line_has_no_counter(self, executor):
+        """Linhas comuns nao carregam progresso"""
+        result = executor._parse_log_line("[INFO] [maps] 3/20 arquivos movidos")
+        assert "progress" not in result
+
     def test_success_level(self, executor):
         """Parseia nivel SUCCESS"""
         result = executor._parse_log_line("[SUCCESS] [MAPS] Processamento concluido")
@@ -138,6 +171,17 @@ class TestBuildCommand:
         assert cmd[sistemas_idx + 1] == "amplis_reag"
         assert cmd[sistemas_idx + 2] == "maps"
 
+    def test_with_jcot_and_trustee(self, executor):
+        """JCOT e TRUSTEE passam pela whitelist"""
+        cmd = executor.build_command({"sistemas": ["jcot", "TRUSTEE"]})
+        sistemas_idx = cmd.index("--sistemas")
+        assert cmd[sistemas_idx + 1:sistemas_idx + 3] == ["jcot", "trustee"]
+
+    def test_rejects_unknown_sistema(self, executor):
+        """Sistema fora da whitelist nao vira argumento"""
+        with pytest.raises(ValueError, match="Invalid sistemas"):
+            executor.build_command({"sistemas": ["maps", "rm -rf"]})
+
     def test_with_dates_iso(self, executor):
         """Comando com datas em formato ISO (convertidas)"""
         cmd = executor.build_command({
@@ -236,6 +280,22 @@ class TestBuildCommand:
         assert "--no-pdf" in cmd
         assert "--qore-lote-pdf" in cmd
 
+    def test_checkpoint_flags(self, executor):
+        """checkpoint_id e resume viram --job-id e --resume"""
+        cmd = executor.build_command({"sistemas": ["maps"], "checkpoint_id": 7, "resume": True})
+        assert cmd[cmd.index("--job-id") + 1] == "7"
+        assert "--resume" in cmd
+
+    def test_no_checkpoint_flags_by_default(self, executor):
+        cmd = executor.build_command({"sistemas": ["maps"], "resume": True})
+        assert "--job-id" not in cmd
+        assert "--resume" not in cmd
+
+    def test_force_flag(self, executor):
+        """force ignora o ledger de unidades concluidas"""
+        assert "--force" in executor.build_command({"sistemas": ["qore"], "force": True})
+        assert "--force" not in executor.build_command({"sistemas": ["qore"]})
+
 
 class TestExecutorProperties:
     """Testes para propriedades do executor"""
@@ -264,15 +324,17 @@ class TestExecutorCancel:
         assert executor._cancelled is True
 
     def test_cancel_terminates_process(self):
-        """Cancel termina processo se existir"""
+        """Cancel envia SIGTERM ao grupo do processo se existir"""
         executor = ETLExecutor()
         mock_process = MagicMock()
         mock_process.returncode = None  # Processo ainda rodando
+        mock_process.pid = 4321
         executor.process = mock_process
 
-        executor.cancel()
+        with patch("services.executor.signal_tree") as mock_signal:
+            executor.cancel()
 
-        mock_process.terminate.assert_called_once()
+        mock_signal.assert_called_once_with(4321, signal.SIGTERM)
         assert executor._cancelled is True
 
     def test_cancel_no_process(self):
@@ -290,10 +352,10 @@ class TestExecutorCancel:
         mock_process.returncode = 0  # Processo ja terminou
         executor.process = mock_process
 
-        executor.cancel()
-
-        # terminate nao deve ser chamado se processo ja terminou
-        mock_process.terminate.assert_not_called()
+        # nenhum sinal se processo ja terminou
+        with patch("services.executor.signal_tree") as mock_signal:
+            executor.cancel()
+        mock_signal.assert_not_called()
         assert executor._cancelled is True
 
 
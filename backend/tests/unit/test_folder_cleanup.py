@@ -0,0 +1,97 @@
+"""
+Testes para a limpeza de pastas (python/utils/folder_cleanup.py)
+"""
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+UTILS_DIR = Path(__file__).parent.parent.parent.parent / "python" / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+import folder_cleanup  # noqa: E402
+from folder_cleanup import clean_folder, clean_folders, purge_trash, trash_dirs  # noqa: E402
+
+
+def _populate(folder: Path, files: int = 20) -> Path:
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(files):
+        (folder / f"carteira_{i}.pdf").write_bytes(b"x")
+    sub = folder / "antigo"
+    sub.mkdir()
+    (sub / "relatorio.xlsx").write_bytes(b"y")
+    return folder
+
+
+class TestParallelDelete:
+    """Remocao item a item com pool de threads"""
+
+    def test_empties_folder_and_reports(self, temp_dir):
+        pasta = _populate(Path(temp_dir) / "pdf")
+
+        result = clean_folder(str(pasta), workers=4)
+
+        assert pasta.is_dir()
+        assert list(pasta.iterdir()) == []
+        assert result.removed == 21
+        assert result.errors == []
+        assert result.seconds >= 0
+        assert not result.trashed
+
+    def test_missing_folder_is_ignored(self, temp_dir):
+        assert clean_folder(str(Path(temp_dir) / "nao_existe")) is None
+        assert clean_folder("") is None
+
+    def test_errors_are_collected(self, temp_dir):
+        pasta = _populate(Path(temp_dir) / "pdf", files=3)
+        real_unlink = os.unlink
+
+        def flaky_unlink(path, *args, **kwargs):
+            if path.endswith("carteira_1.pdf"):
+                raise PermissionError("em uso")
+            return real_unlink(path, *args, **kwargs)
+
+        with patch.object(folder_cleanup.os, "unlink", flaky_unlink):
+            result = clean_folder(str(pasta))
+
+        assert result.removed == 3
+        assert len(result.errors) == 1 and "carteira_1.pdf" in result.errors[0]
+
+    def test_clean_folders_skips_duplicates_and_missing(self, temp_dir):
+        a = _populate(Path(temp_dir) / "a", files=2)
+        b = _populate(Path(temp_dir) / "b", files=5)
+
+        results = clean_folders([str(a), "", str(b), str(a), str(Path(temp_dir) / "x")], workers=2)
+
+        assert [r.folder for r in results] == [str(a), str(b)]
+        assert [r.removed for r in results] == [3, 6]
+
+
+class TestTrash:
+    """Lixeira por rename"""
+
+    def test_rename_to_trash(self, temp_dir):
+        pasta = _populate(Path(temp_dir) / "maps")
+
+        with patch.object(folder_cleanup, "purge_trash"):  # sem purge em segundo plano
+            result = clean_folder(str(pasta), trash=True)
+
+        assert result.trashed
+        assert result.removed == 21
+        assert pasta.is_dir() and list(pasta.iterdir()) == []
+        lixeiras = trash_dirs(str(pasta))
+        assert len(lixeiras) == 1
+        assert len(os.listdir(lixeiras[0])) == 21
+
+        assert purge_trash([str(pasta)]) == 1
+        assert trash_dirs(str(pasta)) == []
+
+    def test_falls_back_when_rename_fails(self, temp_dir):
+        pasta = _populate(Path(temp_dir) / "fidc", files=4)
+
+        with patch.object(folder_cleanup.os, "rename", side_effect=PermissionError("em uso")):
+            result = clean_folder(str(pasta), trash=True)
+
+        assert not result.trashed
+        assert result.removed == 5
+        assert list(pasta.iterdir()) == []
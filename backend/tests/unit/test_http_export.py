@@ -0,0 +1,183 @@
+"""
+Testes para a exportacao hibrida por HTTP (python/modules/http_export.py)
+
+Um servidor HTTP local serve respostas gravadas dos portais: sem o cookie
+de login devolve a tela de login (HTML), como o portal real.
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib.parse import parse_qsl
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+import http_export  # noqa: E402
+from http_export import ExportError, ExportRequest  # noqa: E402
+
+XLSX = b"PK\x03\x04" + b"\0" * 2048
+
+# Respostas gravadas: caminho -> (status, headers, corpo)
+RESPOSTAS = {
+    "/reports/arquivo/1": (200, {"Content-Type": "application/octet-stream",
+                                 "Content-Disposition": 'attachment; filename="estoque_1.xlsx"'}, XLSX),
+    "/reports/arquivo/2": (200, {"Content-Type": "application/octet-stream",
+                                 "Content-Disposition": "attachment; filename*=UTF-8''estoque%20fundo%202.xlsx"}, XLSX),
+    "/reports/arquivo/3": (200, {"Content-Type": "application/octet-stream"}, XLSX),
+    "/reports/quebrado": (200, {"Content-Type": "application/octet-stream"}, b"erro interno"),
+    "/reports/sumiu": (404, {"Content-Type": "text/plain"}, b"not found"),
+}
+LOGIN = (200, {"Content-Type": "text/html; charset=utf-8"}, b"<html><form id='login'></form></html>")
+
+
+@pytest.fixture
+def portal():
+    """Servidor local com as respostas gravadas; mede requests simultaneos"""
+    estado = {"ativos": 0, "max_ativos": 0, "pedidos": []}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = self.rfile.read(tamanho).decode() if tamanho else ""
+            with lock:
+                estado["ativos"] += 1
+                estado["max_ativos"] = max(estado["max_ativos"], estado["ativos"])
+                estado["pedidos"].append((self.command, self.path, parse_qsl(corpo), self.headers.get("Referer")))
+            try:
+                time.sleep(0.2)
+                logado = "sessao=abc" in (self.headers.get("Cookie") or "")
+                status, headers, dados = RESPOSTAS.get(self.path.split("?")[0], LOGIN) if logado else LOGIN
+                self.send_response(status)
+                for nome, valor in headers.items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+            finally:
+                with lock:
+                    estado["ativos"] -= 1
+
+        do_GET = _responder
+        do_POST = _responder
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    estado["url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield estado
+    server.shutdown()
+    server.server_close()
+
+
+def _driver(cookies=({"name": "sessao", "value": "abc", "domain": "127.0.0.1", "path": "/"},), form=None):
+    driver = MagicMock()
+    driver.get_cookies.return_value = list(cookies)
+
+    def execute_script(script, *args):
+        if "userAgent" in script:
+            return "Mozilla/5.0 HeadlessChrome"
+        return form(*args) if form else None
+
+    driver.execute_script.side_effect = execute_script
+    return driver
+
+
+class TestHttpExport:
+    """Sessao a partir do Selenium e download direto"""
+
+    def test_session_copies_browser_cookies(self, portal, temp_dir):
+        with http_export.session_from_driver(_driver()) as sessao:
+            assert sessao.headers["User-Agent"] == "Mozilla/5.0 HeadlessChrome"
+            caminho = http_export.fetch(sessao, ExportRequest(f"{portal['url']}/reports/arquivo/1"), temp_dir)
+
+        assert Path(caminho).name == "estoque_1.xlsx"
+        assert Path(caminho).read_bytes() == XLSX
+        assert not [nome for nome in os.listdir(temp_dir) if nome.endswith(".part")]
+
+    def test_login_page_is_export_error(self, portal, temp_dir):
+        with http_export.session_from_driver(_driver(cookies=())) as sessao:
+            with pytest.raises(ExportError, match="HTML"):
+                http_export.fetch(sessao, ExportRequest(f"{portal['url']}/reports/arquivo/1"), temp_dir)
+
+        assert os.listdir(temp_dir) == []
+
+    def test_unexpected_content_and_status(self, portal, temp_dir):
+        with http_export.session_from_driver(_driver()) as sessao:
+            with pytest.raises(ExportError, match="inesperado"):
+                http_export.fetch(sessao, ExportRequest(f"{portal['url']}/reports/quebrado", magic=b"PK"), temp_dir)
+            with pytest.raises(ExportError, match="404"):
+                http_export.fetch(sessao, ExportRequest(f"{portal['url']}/reports/sumiu"), temp_dir)
+
+        assert os.listdir(temp_dir) == []
+
+    def test_fetch_all_is_concurrent_and_ordered(self, portal, temp_dir):
+        pedidos = [
+            ExportRequest(f"{portal['url']}/reports/arquivo/1"),
+            ExportRequest(f"{portal['url']}/reports/arquivo/2"),
+            ExportRequest(f"{portal['url']}/reports/arquivo/3", filename="sc.xlsx"),
+            ExportRequest(f"{portal['url']}/reports/arquivo/3", filename="sc.xlsx"),
+            ExportRequest(f"{portal['url']}/reports/sumiu"),
+        ]
+        inicio = time.monotonic()
+        with http_export.session_from_driver(_driver()) as sessao:
+            resultados = http_export.fetch_all(sessao, pedidos, temp_dir, max_workers=5)
+
+        assert time.monotonic() - inicio < 0.2 * len(pedidos)
+        assert portal["max_ativos"] > 1
+        assert [pedido for pedido, _ in resultados] == pedidos
+        nomes = [Path(r).name if isinstance(r, str) else type(r) for _, r in resultados]
+        assert nomes[:2] == ["estoque_1.xlsx", "estoque fundo 2.xlsx"]
+        assert sorted(nomes[2:4]) == ["sc (1).xlsx", "sc.xlsx"]
+        assert nomes[4] is ExportError
+
+    def test_form_request_posts_form_fields(self, portal, temp_dir):
+        form = {
+            "action": f"{portal['url']}/reports/arquivo/3",
+            "method": "POST",
+            "fields": [["__VIEWSTATE", "xyz"], ["btnExportExcel", "Excel"]],
+            "page": f"{portal['url']}/Consulta.aspx",
+        }
+        driver = _driver(form=lambda elemento: form)
+
+        pedido = http_export.form_request(driver, MagicMock(), filename="hc.xlsx", magic=b"PK")
+        with http_export.session_from_driver(driver) as sessao:
+            caminho = http_export.fetch(sessao, pedido, temp_dir)
+
+        assert Path(caminho).name == "hc.xlsx"
+        metodo, caminho_url, campos, referer = portal["pedidos"][-1]
+        assert (metodo, caminho_url) == ("POST", "/reports/arquivo/3")
+        assert campos == [("__VIEWSTATE", "xyz"), ("btnExportExcel", "Excel")]
+        assert referer == f"{portal['url']}/Consulta.aspx"
+
+    def test_element_outside_form(self):
+        with pytest.raises(ExportError):
+            http_export.form_request(_driver(), MagicMock())
+
+
+def test_fidc_falls_back_to_click_for_failed_downloads(portal, temp_dir, monkeypatch):
+    import FIDC_ESTOQUE_V02 as fidc
+
+    botoes = [MagicMock(name=f"arquivo_{i}") for i in (1, 2, 3)]
+    caminhos = {botoes[0]: "/reports/arquivo/1", botoes[1]: "/reports/sumiu", botoes[2]: "/reports/arquivo/2"}
+    driver = _driver(form=lambda botao: {
+        "action": portal["url"] + caminhos[botao], "method": "GET", "fields": [], "page": portal["url"],
+    })
+    driver.find_elements.return_value = botoes
+    for nome in ("WebDriverWait", "atualizar_relatorios", "wait_network_idle", "wait_download_started"):
+        monkeypatch.setattr(fidc, nome, MagicMock())
+
+    fidc.baixar_relatorios(driver, temp_dir)
+
+    assert sorted(os.listdir(temp_dir)) == ["estoque fundo 2.xlsx", "estoque_1.xlsx"]
+    assert [b.click.call_count for b in botoes] == [0, 1, 0]
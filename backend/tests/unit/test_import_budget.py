@@ -0,0 +1,88 @@
+"""
+Testes de orcamento de importacao do python/main.py
+
+Todo job paga o import de main.py antes do primeiro sistema. Dependencias
+pesadas (pandas, selenium, tkinter...) devem ser carregadas apenas pelo step
+que as usa. Perfil detalhado: scripts/importtime_harness.py
+"""
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent.parent
+PYTHON_DIR = ROOT / "python"
+MAIN = PYTHON_DIR / "main.py"
+
+# Nao podem aparecer no import de main.py
+HEAVY_MODULES = ("pandas", "numpy", "selenium", "openpyxl", "fitz", "holidays", "tkinter", "pyodbc")
+
+# Usadas em um unico ponto dos modulos: import dentro da funcao.
+# maps_upload_access (pyodbc + pandas) e carregado so no upload do Access.
+FUNCTION_LEVEL_ONLY = ("tkinter", "fitz", "pyodbc", "holidays", "maps_upload_access")
+
+# Modulos cuja funcao e a propria dependencia
+DEPENDENCY_OWNERS = {"maps_upload_access.py": {"pyodbc"}}
+
+# Soma do tempo proprio de todos os imports (inclui site/stdlib). Generoso:
+# hoje fica em torno de 70 ms; o objetivo e pegar regressoes grosseiras.
+STARTUP_BUDGET_MS = 400
+
+
+def importtime(temp_dir: str) -> dict:
+    """Roda main.py --dry-run sob -X importtime e retorna {modulo: self_us}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN),
+         "--config", str(Path(temp_dir) / "credentials.json"), "--dry-run"],
+        capture_output=True, text=True, cwd=str(PYTHON_DIR), timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            modules.setdefault(name.strip(), int(self_us))
+    return modules
+
+
+def top_level_imports(path: Path) -> set:
+    """Modulos importados no nivel do modulo (fora de funcoes)"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    names = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+class TestMainImportBudget:
+    """Startup do main.py"""
+
+    def test_no_heavy_modules_at_startup(self, temp_dir):
+        modules = importtime(temp_dir)
+
+        loaded = sorted(name for name in HEAVY_MODULES if name in modules)
+        assert loaded == []
+        assert "multiprocessing" not in modules
+
+    def test_startup_within_budget(self, temp_dir):
+        # Mediana de 3 execucoes para reduzir ruido
+        totals = sorted(sum(importtime(temp_dir).values()) / 1000 for _ in range(3))
+        assert totals[1] < STARTUP_BUDGET_MS
+
+
+@pytest.mark.parametrize(
+    "path",
+    sorted((PYTHON_DIR / "modules").glob("*.py")) + sorted((PYTHON_DIR / "utils").glob("*.py")),
+    ids=lambda p: p.name
+)
+def test_optional_dependencies_imported_lazily(path):
+    allowed = DEPENDENCY_OWNERS.get(path.name, set())
+    assert (top_level_imports(path) - allowed).isdisjoint(FUNCTION_LEVEL_ONLY)
@@ -0,0 +1,105 @@
+"""
+Testes para entrega da chave derivada ao subprocesso ETL
+"""
+import base64
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services import key_handoff
+from services.crypto import CryptoService
+
+UTILS_DIR = Path(__file__).parent.parent.parent.parent / "python" / "utils"
+MASTER_KEY = base64.b64encode(b"test_master_key_32_bytes!!!!!!!!").decode()
+
+# Processo filho: le a chave do fd herdado e decifra sem ETL_MASTER_KEY
+CHILD = textwrap.dedent("""
+    import json, sys
+    sys.path.insert(0, sys.argv[1])
+    from crypto import ETLCrypto, read_data_key
+
+    data_key = read_data_key(int(sys.argv[3]))
+    with open(sys.argv[2], encoding="utf-8") as f:
+        encrypted = json.load(f)
+    print(ETLCrypto(data_key=data_key).decrypt_credentials(encrypted)["maps"]["password"])
+""")
+
+
+@pytest.fixture
+def encrypted():
+    return CryptoService(MASTER_KEY).encrypt_credentials({"maps": {"username": "u", "password": "segredo"}})
+
+
+class TestPayload:
+    """Testes para o conteudo do pipe"""
+
+    def test_pipe_roundtrip(self):
+        read_fd = key_handoff.open_key_pipe(key_handoff.build_payload(b"salt", b"key", ttl_seconds=30))
+        with os.fdopen(read_fd, "rb") as pipe:
+            payload = json.loads(pipe.read())
+
+        assert base64.b64decode(payload["key"]) == b"key"
+        assert base64.b64decode(payload["salt"]) == b"salt"
+        assert payload["expires_at"] > time.time()
+
+    def test_prepare_data_key_plaintext_file(self, temp_dir):
+        path = Path(temp_dir) / "credentials.json"
+        path.write_text(json.dumps({"maps": {"password": "x"}}))
+
+        assert key_handoff.prepare_data_key(str(path)) is None
+
+    def test_prepare_data_key_missing_file(self, temp_dir):
+        assert key_handoff.prepare_data_key(str(Path(temp_dir) / "nao_existe.json")) is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pass_fds e POSIX")
+class TestChildHandoff:
+    """Filho decifra com a chave herdada, sem master key no ambiente"""
+
+    def run_child(self, temp_dir, encrypted, payload):
+        config = Path(temp_dir) / "credentials.encrypted.json"
+        config.write_text(json.dumps(encrypted))
+
+        read_fd = key_handoff.open_key_pipe(payload)
+        kwargs, key_arg = key_handoff.inherit_kwargs(read_fd)
+        env = {k: v for k, v in os.environ.items() if k != "ETL_MASTER_KEY"}
+        try:
+            return subprocess.run(
+                [sys.executable, "-c", CHILD, str(UTILS_DIR), str(config), str(key_arg)],
+                env=env, capture_output=True, text=True, timeout=30, **kwargs
+            )
+        finally:
+            os.close(read_fd)
+
+    def test_child_decrypts_with_inherited_key(self, temp_dir, encrypted):
+        data_key = CryptoService(MASTER_KEY).data_key_for(encrypted)
+
+        result = self.run_child(temp_dir, encrypted, key_handoff.build_payload(*data_key))
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "segredo"
+
+    def test_expired_key_refused(self, temp_dir, encrypted):
+        data_key = CryptoService(MASTER_KEY).data_key_for(encrypted)
+
+        result = self.run_child(temp_dir, encrypted, key_handoff.build_payload(*data_key, ttl_seconds=-1))
+
+        # Sem chave valida e sem ETL_MASTER_KEY o filho nao consegue decifrar
+        assert result.returncode != 0
+        assert "segredo" not in result.stdout
+
+    def test_key_for_other_salt_refused(self, temp_dir, encrypted):
+        other = CryptoService(MASTER_KEY).encrypt_credentials({"x": {"password": "y"}})
+        data_key = CryptoService(MASTER_KEY).data_key_for(other)
+
+        result = self.run_child(temp_dir, encrypted, key_handoff.build_payload(*data_key))
+
+        assert result.returncode != 0
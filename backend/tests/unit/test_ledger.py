@@ -0,0 +1,190 @@
+"""
+Testes para o ledger de unidades concluidas (python/utils/ledger.py)
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+UTILS_DIR = Path(__file__).parent.parent.parent.parent / "python" / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+import ledger  # noqa: E402
+from ledger import CompletionLedger, content_hash, new_files, snapshot  # noqa: E402
+
+
+@pytest.fixture
+def ledger_path(temp_dir):
+    return str(Path(temp_dir) / "data" / "ledger.db")
+
+
+@pytest.fixture
+def arquivo(temp_dir):
+    caminho = Path(temp_dir) / "relatorio.pdf"
+    caminho.write_bytes(b"%PDF relatorio")
+    return str(caminho)
+
+
+@pytest.fixture(autouse=True)
+def reset_module_ledger():
+    yield
+    if ledger._ledger is not None:
+        ledger._ledger.close()
+    ledger._ledger = None
+
+
+class TestCompletionLedger:
+    """Registro e consulta de unidades"""
+
+    def test_records_and_skips(self, ledger_path, temp_dir):
+        arquivo = Path(temp_dir) / "carteira.pdf"
+        arquivo.write_bytes(b"%PDF conteudo")
+        store = CompletionLedger(ledger_path)
+
+        assert not store.is_done("maps", "FUNDO A", "ativos_xlsx", "02/01/2024")
+        digest = store.record("maps", "FUNDO A", "ativos_xlsx", "02/01/2024", [str(arquivo)])
+
+        assert store.is_done("MAPS", "fundo a", "ativos_xlsx", date(2024, 1, 2))
+        assert store.skipped == 1
+        row = store.get("maps", "FUNDO A", "ativos_xlsx", "2024-01-02")
+        assert row["content_hash"] == digest
+        assert row["files"] == 1
+        assert row["bytes"] == len(b"%PDF conteudo")
+
+    def test_report_type_is_part_of_key(self, ledger_path, arquivo):
+        store = CompletionLedger(ledger_path)
+        store.record("maps", "FUNDO A", "ativos_pdf", "02/01/2024", [arquivo])
+
+        assert not store.is_done("maps", "FUNDO A", "ativos_xlsx", "02/01/2024")
+        assert not store.is_done("maps", "FUNDO A", "passivos_pdf", "02/01/2024")
+
+    def test_force_ignores_but_keeps_recording(self, ledger_path, arquivo):
+        CompletionLedger(ledger_path).record("qore", "FUNDO B", "pdf", "02/01/2024", [arquivo])
+
+        forced = CompletionLedger(ledger_path, force=True)
+        assert not forced.is_done("qore", "FUNDO B", "pdf", "02/01/2024")
+        forced.record("qore", "FUNDO B", "excel", "02/01/2024", [arquivo])
+
+        assert CompletionLedger(ledger_path).is_done("qore", "FUNDO B", "excel", "02/01/2024")
+
+    def test_persists_across_instances(self, ledger_path, arquivo):
+        CompletionLedger(ledger_path).record("amplis_reag", None, "pdf", date(2024, 1, 2), [arquivo])
+        assert CompletionLedger(ledger_path).is_done("amplis_reag", None, "pdf", "02/01/2024")
+
+    def test_concurrent_writers(self, ledger_path, arquivo):
+        """Steps paralelos (processos distintos) gravam no mesmo arquivo"""
+        code = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(UTILS_DIR)!r})
+            from ledger import CompletionLedger
+            store = CompletionLedger({ledger_path!r})
+            for i in range(50):
+                store.record(sys.argv[1], "F" + str(i), "pdf", "02/01/2024", [{arquivo!r}])
+        """)
+        CompletionLedger(ledger_path)  # cria o schema antes
+        procs = [subprocess.Popen([sys.executable, "-c", code, name]) for name in ("maps", "qore")]
+        assert all(p.wait(timeout=60) == 0 for p in procs)
+
+        store = CompletionLedger(ledger_path)
+        assert store.is_done("maps", "F49", "pdf", "02/01/2024")
+        assert store.is_done("qore", "F0", "pdf", "02/01/2024")
+
+    def test_missing_or_changed_files_are_not_done(self, ledger_path, temp_dir):
+        """--limpar ou arquivo alterado: a unidade volta a ser baixada"""
+        pdf = Path(temp_dir) / "carteira.pdf"
+        xlsx = Path(temp_dir) / "carteira.xlsx"
+        pdf.write_bytes(b"%PDF 1")
+        xlsx.write_bytes(b"PK 1")
+        store = CompletionLedger(ledger_path)
+        store.record("maps", "F", "ativos_pdf", "02/01/2024", [str(pdf)])
+        store.record("maps", "F", "ativos_xlsx", "02/01/2024", [str(xlsx)])
+        assert store.is_done("maps", "F", "ativos_pdf", "02/01/2024")
+
+        pdf.unlink()
+        xlsx.write_bytes(b"PK 2 alterado")
+
+        assert not store.is_done("maps", "F", "ativos_pdf", "02/01/2024")
+        assert not store.is_done("maps", "F", "ativos_xlsx", "02/01/2024")
+        assert store.skipped == 1
+
+    def test_refuses_unit_without_files(self, ledger_path, temp_dir):
+        """Download que nao chegou nao vira pulo permanente"""
+        store = CompletionLedger(ledger_path)
+
+        assert store.record("amplis_reag", None, "pdf", "02/01/2024") is None
+        assert store.record("amplis_reag", None, "pdf", "02/01/2024", [str(Path(temp_dir) / "nao_existe.pdf")]) is None
+        assert store.get("amplis_reag", None, "pdf", "02/01/2024") is None
+        assert store.recorded == 0
+
+    def test_rows_from_previous_schema_are_redownloaded(self, ledger_path, arquivo):
+        """Ledger antigo (sem caminhos) ganha a coluna e as linhas deixam de valer"""
+        os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+        conn = sqlite3.connect(ledger_path)
+        conn.execute(
+            "CREATE TABLE completed_units (sistema TEXT NOT NULL, fundo TEXT NOT NULL, tipo TEXT NOT NULL, "
+            "data TEXT NOT NULL, content_hash TEXT, files INTEGER NOT NULL DEFAULT 0, "
+            "bytes INTEGER NOT NULL DEFAULT 0, completed_at TEXT NOT NULL, PRIMARY KEY (sistema, fundo, tipo, data))"
+        )
+        conn.execute("INSERT INTO completed_units VALUES ('fidc', 'F', 'estoque', '2024-01-02', 'abc', 1, 1, 'x')")
+        conn.commit()
+        conn.close()
+
+        store = CompletionLedger(ledger_path)
+        assert not store.is_done("fidc", "F", "estoque", "02/01/2024")
+        store.record("fidc", "F", "estoque", "02/01/2024", [arquivo])
+        assert store.is_done("fidc", "F", "estoque", "02/01/2024")
+
+    def test_relocate_follows_moved_files(self, ledger_path, temp_dir):
+        """Arquivo movido do staging do shard continua valendo na pasta final"""
+        staging = Path(temp_dir) / "staging" / "pdf"
+        staging.mkdir(parents=True)
+        origem = staging / "carteira.pdf"
+        origem.write_bytes(b"%PDF carteira")
+        store = CompletionLedger(ledger_path)
+        store.record("maps", "F", "pdf", "02/01/2024", [str(origem)])
+
+        destino = Path(temp_dir) / "pdf" / "carteira.pdf"
+        destino.parent.mkdir()
+        os.replace(origem, destino)
+        assert not store.is_done("maps", "F", "pdf", "02/01/2024")
+
+        assert store.relocate({str(origem): str(destino)}) == 1
+        assert store.is_done("maps", "F", "pdf", "02/01/2024")
+        assert store.relocate({str(origem): str(destino)}) == 0
+
+
+class TestModuleHelpers:
+    """Funcoes usadas pelos modulos ETL"""
+
+    def test_noop_without_configure(self):
+        assert ledger.ledger_done("maps", "F", "ativos_pdf", "02/01/2024") is False
+        ledger.record_done("maps", "F", "ativos_pdf", "02/01/2024")
+
+    def test_configure_and_record(self, ledger_path, arquivo):
+        ledger.configure(ledger_path)
+        ledger.record_done("fidc", "F", "estoque", "02/01/2024", [arquivo])
+        assert ledger.ledger_done("fidc", "F", "estoque", "02/01/2024")
+
+    def test_new_files_ignores_partial_downloads(self, temp_dir):
+        pasta = Path(temp_dir)
+        (pasta / "antigo.pdf").write_text("x")
+        antes = snapshot(str(pasta))
+        (pasta / "novo.pdf").write_text("y")
+        (pasta / "parcial.pdf.crdownload").write_text("z")
+
+        assert new_files(str(pasta), antes) == [str(pasta / "novo.pdf")]
+        assert snapshot(None) == set()
+
+    def test_content_hash_depends_on_content(self, temp_dir):
+        a = Path(temp_dir) / "a.csv"
+        a.write_text("1;2")
+        first = content_hash([str(a)])
+        a.write_text("1;3")
+
+        assert content_hash([str(a)]) != first
+        assert content_hash([str(Path(temp_dir) / "inexistente.csv")]) is None
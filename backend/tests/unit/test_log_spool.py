@@ -0,0 +1,85 @@
+"""
+Testes unitarios para o spool de saida bruta dos jobs
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services.log_spool import LogSpool, count_lines, db_log_line, read_lines, index_path, job_log_path
+
+
+def write_log(path, n, stride=4):
+    with LogSpool(path, stride=stride) as spool:
+        for i in range(n):
+            spool.write_line(f"linha {i}\n")
+    return path
+
+
+class TestLogSpool:
+    """Testes para escrita e leitura por intervalo"""
+
+    def test_count_lines(self, temp_dir):
+        path = write_log(Path(temp_dir) / "job_1.log", 10)
+        assert count_lines(path) == 10
+
+    def test_sparse_index(self, temp_dir):
+        """Um offset a cada `stride` linhas, alem da linha 0"""
+        path = write_log(Path(temp_dir) / "job_1.log", 10, stride=4)
+        # header + linhas 0, 4, 8
+        assert Path(index_path(path)).stat().st_size == 8 * 4
+
+    def test_read_range_across_index_entries(self, temp_dir):
+        path = write_log(Path(temp_dir) / "job_1.log", 20)
+        assert read_lines(path, 6, 5) == [f"linha {i}" for i in range(6, 11)]
+
+    def test_read_past_end(self, temp_dir):
+        path = write_log(Path(temp_dir) / "job_1.log", 5)
+        assert read_lines(path, 3, 10) == ["linha 3", "linha 4"]
+        assert read_lines(path, 50, 10) == []
+
+    def test_tail(self, temp_dir):
+        path = write_log(Path(temp_dir) / "job_1.log", 9)
+        total = count_lines(path)
+        assert read_lines(path, total - 2, 2) == ["linha 7", "linha 8"]
+
+    def test_partial_line_ignored(self, temp_dir):
+        """Linha ainda sendo escrita nao aparece para leitores"""
+        path = write_log(Path(temp_dir) / "job_1.log", 3)
+        with open(path, "ab") as f:
+            f.write(b"incomplet")
+
+        assert count_lines(path) == 3
+        assert read_lines(path, 0, 10)[-1] == "linha 2"
+
+    def test_read_while_writing(self, temp_dir):
+        path = Path(temp_dir) / "job_1.log"
+        spool = LogSpool(path, stride=2)
+        try:
+            for i in range(5):
+                spool.write_line(f"linha {i}")
+            assert count_lines(path) == 5
+            assert read_lines(path, 4, 1) == ["linha 4"]
+        finally:
+            spool.close()
+
+    def test_missing_file(self, temp_dir):
+        assert count_lines(Path(temp_dir) / "nao_existe.log") == 0
+        assert read_lines(Path(temp_dir) / "nao_existe.log") == []
+
+    def test_job_log_path(self, temp_dir):
+        assert job_log_path(7, temp_dir) == Path(temp_dir) / "job_7.log"
+
+
+class TestDbLogLine:
+    """Entradas que tambem vao para jobs.logs"""
+
+    def test_parsed_info_and_above_are_kept(self):
+        entry = {"level": "WARN", "sistema": "MAPS", "mensagem": "fundo sem dados"}
+        assert db_log_line(entry) == "[WARN] [MAPS] fundo sem dados"
+
+    def test_debug_progress_and_raw_lines_stay_in_spool(self):
+        assert db_log_line({"level": "DEBUG", "sistema": "MAPS", "mensagem": "x"}) is None
+        assert db_log_line({"level": "PROGRESS", "sistema": "MAPS", "mensagem": "1/2 ativos"}) is None
+        assert db_log_line({"level": "INFO", "sistema": "STDOUT", "mensagem": "print solto"}) is None
+        assert db_log_line({"level": "ERROR", "sistema": "STDERR", "mensagem": "Traceback"}) is None
@@ -0,0 +1,155 @@
+"""
+Testes para os portais simulados do benchmark (scripts/mock_portals)
+
+Sem Chrome: os fluxos sao percorridos por HTTP, como o navegador faria, e
+cada pagina e conferida contra os ids que os modulos procuram.
+"""
+import io
+import sys
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+import requests
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import http_export  # noqa: E402
+from http_export import ExportError, ExportRequest  # noqa: E402
+from mock_portals import PORTALS, PortalServer  # noqa: E402
+
+
+@contextmanager
+def portal(nome, **kwargs):
+    with PortalServer(PORTALS[nome](**kwargs)) as servidor:
+        yield servidor
+
+
+def _logar(sessao, servidor, caminho, **campos):
+    resposta = sessao.post(servidor.url + caminho, data=campos or {"usuario": "x", "senha": "y"})
+    assert resposta.ok
+    return resposta
+
+
+# (portal, POST de login, pagina da area logada, ids/trechos que o modulo usa)
+CONTRATOS = [
+    ("fidc", "/login", "/reports/estoque", [
+        "a href='/reports/meusRelatorios'", "id='data'", "id='fundoSelecionado_chzn'", "chzn-search",
+        "fundoSelecionado_chzn_o_0", "id='csv'",
+    ]),
+    ("britech", "/", "/", [
+        "gridQuery", "gridQuery_DXFREditorcol2_I", "gridQuery_DXCBtn0", "gridQuery_DXCBtn9", "btnExportExcel",
+    ]),
+    ("jcot", "/login", "/main", [
+        "ui-dialog-buttonset", "id='menutree'", "hitarea closed-hitarea expandable-hitarea", "Por Período",
+        "name='dt_posicao_inicio'", "name='dt_posicao_fim'", "id='tb-confirm'", "<span>Sim</span>", "id='xpl6'",
+    ]),
+    ("amplis_reag", "/login", "/report/0", [
+        "mainForm_menu1_label", "mainForm:listaDeFavoritosRelatorios:2:j_id_9m",
+        "mainForm:calendarDateBegin:campoInputDate", "mainForm:calendarDateEnd:campoInputDate",
+        "mainForm:portfolioPickList:includeAll", "mainForm:portfolioPickList:secondSelect",
+        "mainForm:saida:campo", "mainForm:confirmButton",
+    ]),
+    ("maps", "/auth/login", "/pegasusgestores", [
+        "kc-content", "stop-redirect", "class='sub-menu'", "class='sub-menu-container'", "class='unstyled'",
+        "Posição por Fundo", "select2-choice", "select2-input", "class='date'", "value='Pesquisar'",
+        "title='PDF'", "title='XLSX'",
+    ]),
+    ("qore", "/login", "/fundos/0", [
+        "Carteira PDF", "Carteira Excel", "Voltar", "data-kt-menu-trigger='click'", "ellipsis-h",
+        "Download em Lote", "id='dataInicial'", "id='dataFinal'",
+    ]),
+]
+
+
+class TestMockPortals:
+    """Fluxos, sessao e respostas de download dos portais simulados"""
+
+    @pytest.mark.parametrize("nome,login,pagina,trechos", CONTRATOS, ids=[c[0] for c in CONTRATOS])
+    def test_logged_area_has_module_ids(self, nome, login, pagina, trechos):
+        with portal(nome) as servidor, requests.Session() as sessao:
+            anonimo = sessao.get(servidor.url + pagina)
+            assert not any(trecho in anonimo.text for trecho in trechos[-2:])
+
+            _logar(sessao, servidor, login)
+            html = sessao.get(servidor.url + pagina).text
+
+        faltando = [trecho for trecho in trechos if trecho not in html]
+        assert not faltando
+        assert servidor.portal.stats["logins"] == 1
+
+    def test_latency_on_every_response(self):
+        with portal("jcot", latency=0.2) as servidor:
+            inicio = time.monotonic()
+            for _ in range(3):
+                assert requests.get(servidor.url + "/").ok
+        assert time.monotonic() - inicio >= 0.6
+
+    def test_fidc_report_waits_then_downloads(self, temp_dir):
+        with portal("fidc", work=0.3) as servidor, requests.Session() as sessao:
+            _logar(sessao, servidor, "/login")
+            gerado = sessao.post(servidor.url + "/reports/gerar", data={"data": "15/03/2024", "fundo": "FIDC ALFA"})
+            assert gerado.json() == {"id": 1}
+
+            assert "AGUARDANDO" in sessao.get(servidor.url + "/reports/meusRelatorios").text
+            time.sleep(0.6)
+            pronto = sessao.get(servidor.url + "/reports/meusRelatorios").text
+            assert "AGUARDANDO" not in pronto and "name='arquivo'" in pronto
+
+            # Mesmo request que http_export.form_request monta a partir do botao
+            pedido = ExportRequest(servidor.url + "/reports/arquivo", "POST", [("id", "1"), ("arquivo", "1")], magic=b"PK")
+            caminho = http_export.fetch(sessao, pedido, temp_dir)
+
+        assert Path(caminho).name == "estoque_fidc_alfa_15032024.xlsx"
+        import openpyxl
+        planilha = openpyxl.load_workbook(caminho).active
+        assert planilha["A2"].value == "FIDC ALFA"
+        assert servidor.portal.stats["downloads"] == 1
+
+    def test_expired_session_gets_login_page(self, temp_dir):
+        with portal("britech") as servidor, requests.Session() as sessao:
+            pedido = ExportRequest(servidor.url + "/Consulta.aspx", "POST", [("consulta", "3")], magic=b"PK")
+            with pytest.raises(ExportError, match="HTML"):
+                http_export.fetch(sessao, pedido, temp_dir)
+
+            _logar(sessao, servidor, "/")
+            with pytest.raises(ExportError, match="HTML"):
+                http_export.fetch(sessao, ExportRequest(servidor.url + "/Consulta.aspx", "POST", []), temp_dir)
+            caminho = http_export.fetch(sessao, pedido, temp_dir)
+
+        assert Path(caminho).name == "Consulta_3.xlsx"
+
+    def test_amplis_output_and_no_data_message(self):
+        with portal("amplis_master") as servidor, requests.Session() as sessao:
+            _logar(sessao, servidor, "/login")
+            vazio = sessao.get(servidor.url + "/confirm", params={"favorito": "0", "inicio": "15/03/2024"})
+            assert "detailMessageListBoxId" in vazio.text
+
+            params = {"favorito": "1", "inicio": "15/03/2024", "fundos": ["FIP ALFA", "FIM GAMA"], "saida": "3"}
+            csv = sessao.get(servidor.url + "/confirm", params=params)
+            pdf = sessao.get(servidor.url + "/confirm", params={**params, "saida": "1"})
+
+        assert 'filename="amplis_master_rentabilidade_15032024.csv"' in csv.headers["Content-Disposition"]
+        assert "FIM GAMA" in csv.text
+        assert pdf.content.startswith(b"%PDF")
+
+    def test_qore_documents_and_batch_zip(self):
+        from datetime import date
+
+        with portal("qore", reference=date(2024, 3, 15)) as servidor, requests.Session() as sessao:
+            login = _logar(sessao, servidor, "/login", email="a@b.c", password="x")
+            assert login.url.endswith("/dashboard") and "FIP BETA MULTIESTRATEGIA" in login.text
+
+            documentos = sessao.get(servidor.url + "/fundos/1/documentos", params={"tipo": "pdf"}).json()
+            lote = sessao.get(servidor.url + "/fundos/1/lote", params={"tipo": "excel", "inicio": "2024-03-08", "fim": "2024-03-15"})
+
+        assert documentos[0] == {"fundo": "BETA", "data": "15/03/2024"}
+        assert "16/03/2024" not in {linha["data"] for linha in documentos}
+        with zipfile.ZipFile(io.BytesIO(lote.content)) as arquivo:
+            nomes = sorted(arquivo.namelist())
+        assert nomes == [f"carteira_beta_202403{dia:02d}.xlsx" for dia in (8, 11, 12, 13, 14, 15)]
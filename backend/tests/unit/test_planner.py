@@ -0,0 +1,211 @@
+"""
+Testes para o planner de custo de execucao
+"""
+import sys
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services import business_days
+from services.planner import (
+    build_plan,
+    expand_units,
+    load_fund_lists,
+    predict,
+    predict_sharded,
+    read_qore_funds,
+)
+from services.sharding import parse_portal_limits, plan_shards, portal_concurrency, shard_params
+
+
+@pytest.fixture(autouse=True)
+def no_holidays(monkeypatch):
+    monkeypatch.setattr(business_days, "HOLIDAYS_AVAILABLE", False)
+    business_days.holidays_for_year.cache_clear()
+    yield
+    business_days.holidays_for_year.cache_clear()
+
+
+class _Feriados:
+    """Substitui o pacote holidays: 15/11 nacional, 09/07 so em SP"""
+
+    @staticmethod
+    def Brazil(state=None, years=None):
+        feriados = {date(2024, 11, 15): "Republica"}
+        if state == "SP":
+            feriados[date(2024, 7, 9)] = "Revolucao Constitucionalista"
+        return feriados
+
+
+@pytest.fixture
+def feriados(monkeypatch):
+    monkeypatch.setattr(business_days, "HOLIDAYS_AVAILABLE", True)
+    monkeypatch.setattr(business_days, "holidays", _Feriados)
+    business_days.holidays_for_year.cache_clear()
+
+
+@pytest.fixture
+def bd_xlsx(temp_dir):
+    """BD.xlsx minimo: apelido na coluna B, caminho na C, portal na J"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "BD"
+    sheet.append(["id", "apelido", "caminho"] + [""] * 6 + ["portal"])
+    for apelido, portal in [("FUNDO A", "QORE"), ("FIP BLOKO X", "qore "), ("FUNDO C", "MAPS"), ("FUNDO D", "QORE")]:
+        sheet.append([1, apelido, f"C:/fundos/{apelido}"] + [""] * 6 + [portal])
+    sheet.append([1, None, "C:/sem_apelido"] + [""] * 6 + ["QORE"])
+    path = str(Path(temp_dir) / "BD.xlsx")
+    workbook.save(path)
+    return path
+
+
+def _config_service(creds, paths=None):
+    service = MagicMock()
+    service.get_system_credentials.side_effect = lambda sistema: creds.get(sistema)
+    service.get_paths.return_value = paths or {}
+    return service
+
+
+class TestFundLists:
+    """Listas de fundos usadas pelos modulos"""
+
+    def test_read_qore_funds(self, bd_xlsx):
+        assert read_qore_funds(bd_xlsx) == ["FUNDO A", "BLOKO URBANISMO", "FUNDO D"]
+
+    def test_qore_selection_filters_bd(self, bd_xlsx):
+        service = _config_service(
+            {"qore": {"usar_todos": False, "fundos_selecionados": ["FUNDO D", "OUTRO"]}},
+            {"bd_xlsx": bd_xlsx}
+        )
+        fund_lists, warnings = load_fund_lists(["qore"], service)
+
+        assert fund_lists["qore"] == ["FUNDO D"]
+        assert warnings == []
+
+    def test_maps_without_selection_warns(self):
+        service = _config_service({"maps": {"usar_todos": True, "fundos_selecionados": ["X"]}})
+        fund_lists, warnings = load_fund_lists(["maps"], service)
+
+        assert fund_lists["maps"] == []
+        assert warnings and warnings[0].startswith("maps")
+
+    def test_missing_bd_is_a_warning(self, temp_dir):
+        service = _config_service({}, {"bd_xlsx": str(Path(temp_dir) / "nao_existe.xlsx")})
+        fund_lists, warnings = load_fund_lists(["qore"], service)
+
+        assert fund_lists["qore"] == []
+        assert any("BD.xlsx" in w for w in warnings)
+
+
+class TestExpandUnits:
+    """Expansao do request em unidades de progresso"""
+
+    def test_units_per_sistema(self):
+        params = {
+            "sistemas": ["maps", "fidc", "qore", "amplis_reag", "jcot"],
+            "data_inicial": "2024-03-04",
+            "data_final": "2024-03-08",
+            "opcoes": {"maps": {"passivo": False}},
+        }
+        plan = expand_units(params, {"maps": ["A", "B"], "fidc": ["F"], "qore": ["Q1", "Q2", "Q3"]})
+
+        assert plan.business_days == 5
+        assert [(u.sistema, u.unit, u.count) for u in plan.units] == [
+            ("maps", "ativos", 10),
+            ("fidc", "fundos", 5),
+            ("qore", "fundos", 3),
+            ("amplis_reag", "datas", 5),
+        ]
+        assert any(w.startswith("jcot") for w in plan.warnings)
+
+    def test_days_follow_each_module_calendar(self, feriados):
+        """AMPLIS pula feriados nacionais, FIDC os de SP, MAPS so fins de semana"""
+        fundos = {"maps": ["A"], "fidc": ["F"]}
+        sistemas = ["amplis_reag", "maps", "fidc"]
+
+        julho = expand_units({"sistemas": sistemas, "data_inicial": "2024-07-08", "data_final": "2024-07-12"}, fundos)
+        novembro = expand_units({"sistemas": sistemas, "data_inicial": "2024-11-11", "data_final": "2024-11-15"}, fundos)
+
+        assert [u.count for u in julho.units] == [5, 5, 5, 4]
+        assert [u.count for u in novembro.units] == [4, 5, 5, 4]
+
+    def test_default_period_is_yesterday(self):
+        plan = expand_units({"sistemas": ["amplis_reag"]}, {}, today=date(2024, 3, 6))
+
+        assert plan.data_inicial == plan.data_final == date(2024, 3, 5)
+        assert plan.units[0].count == 1
+
+    def test_rejects_inverted_period(self):
+        with pytest.raises(ValueError):
+            expand_units({"sistemas": ["maps"], "data_inicial": "2024-03-08", "data_final": "2024-03-04"}, {})
+
+
+class TestPredict:
+    """Previsao a partir dos tempos historicos"""
+
+    def test_wall_time_uses_parallelism_and_dependencies(self):
+        params = {"sistemas": ["amplis_reag", "amplis_master", "fidc"],
+                  "data_inicial": "2024-03-04", "data_final": "2024-03-08"}
+        plan = expand_units(params, {"fidc": ["F"]})
+        history = {("amplis_reag", "datas"): 60.0, ("amplis_master", "datas"): 30.0, ("fidc", "fundos"): 10.0}
+
+        result = predict(plan, history, parallelism=3)
+
+        assert result["work_seconds"] == 300 + 150 + 50
+        # amplis_master espera amplis_reag: a cadeia domina
+        assert result["wall_seconds"] == 450
+        assert result["complete"] is True
+
+        sequential = predict(plan, history, parallelism=1)
+        assert sequential["wall_seconds"] == 500
+
+    def test_unknown_units_are_reported(self):
+        plan = expand_units({"sistemas": ["qore"], "data_inicial": "2024-03-04"}, {"qore": ["Q"]})
+
+        result = predict(plan, {}, parallelism=3)
+
+        assert result["complete"] is False
+        assert result["unknown"] == ["qore/fundos"]
+        assert result["units"][0]["seconds"] is None
+
+    def test_predict_sharded(self):
+        assert predict_sharded({"wall_seconds": 1200}, 4, concurrency=2) == {
+            "shards": 4, "concurrency": 2, "shard_wall_seconds": 300, "wall_seconds": 600
+        }
+        assert predict_sharded({"wall_seconds": 1200}, 4, concurrency=1)["wall_seconds"] == 1200
+        assert predict_sharded({"wall_seconds": 1200}, 1, concurrency=2)["wall_seconds"] == 1200
+
+    def test_shards_without_shared_folders_run_in_parallel(self, temp_dir):
+        """Shards com staging proprio nao dividem pasta: a previsao cai pela metade"""
+        params = {"sistemas": ["maps"], "data_inicial": "2024-03-04", "data_final": "2024-03-15"}
+        plan = expand_units(params, {"maps": ["FUNDO A"]})
+        prediction = predict(plan, {("maps", "ativos"): 30.0, ("maps", "passivos"): 30.0}, parallelism=1)
+
+        shards = plan_shards(params["data_inicial"], params["data_final"], 5)
+        children = shard_params(params, shards, parent_id=1, staging_root=temp_dir)
+        assert len({c["staging_dir"] for c in children}) == len(children) == 2
+
+        concurrency = portal_concurrency(params["sistemas"], 4, parse_portal_limits("maps=2"), 2)
+        sharded = predict_sharded(prediction, len(shards), concurrency)
+
+        assert concurrency == 2
+        assert prediction["wall_seconds"] == 600
+        assert sharded["wall_seconds"] == 300
+        assert sharded["wall_seconds"] < predict_sharded(prediction, len(shards), 1)["wall_seconds"]
+
+    def test_build_plan(self, bd_xlsx):
+        service = _config_service({}, {"bd_xlsx": bd_xlsx})
+
+        result = build_plan(
+            {"sistemas": ["qore"], "data_inicial": "2024-03-04"},
+            service, {("qore", "fundos"): 20.0}, parallelism=3
+        )
+
+        assert result["total_units"] == 3
+        assert result["wall_seconds"] == 60
@@ -0,0 +1,150 @@
+"""
+Testes para encerramento da arvore de processos do job
+"""
+import asyncio
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services.process_tree import group_pids, spawn_kwargs, terminate_tree
+from services.executor import ETLExecutor
+
+requires_proc = pytest.mark.skipif(
+    not os.path.isdir("/proc") or os.name == "nt",
+    reason="requer /proc e grupos de processos POSIX"
+)
+
+# Processo filho falso: cria dois netos (como Chrome/chromedriver) e dorme.
+# Com STUBBORN=1 um dos netos ignora SIGTERM.
+FAKE_CHILD = textwrap.dedent("""
+    import os, subprocess, sys, time
+
+    polite = "import time; time.sleep(60)"
+    stubborn = (
+        "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+        "print('ready', flush=True); time.sleep(60)"
+    )
+
+    kids = [subprocess.Popen([sys.executable, "-c", polite])]
+    if os.environ.get("STUBBORN") == "1":
+        kid = subprocess.Popen([sys.executable, "-c", stubborn], stdout=subprocess.PIPE)
+        kid.stdout.readline()
+        kids.append(kid)
+    else:
+        kids.append(subprocess.Popen([sys.executable, "-c", polite]))
+
+    print("[INFO] [SISTEMA] netos " + " ".join(str(k.pid) for k in kids), flush=True)
+    time.sleep(60)
+""")
+
+
+def is_alive(pid: int) -> bool:
+    """Processo existe e nao e zumbi"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return False
+    return stat[stat.rfind(")") + 2] != "Z"
+
+
+@pytest.fixture
+def fake_child(temp_dir):
+    path = Path(temp_dir) / "fake_main.py"
+    path.write_text(FAKE_CHILD)
+    return str(path)
+
+
+async def spawn(script: str, stubborn: bool = False):
+    env = dict(os.environ, STUBBORN="1" if stubborn else "0")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, script,
+        stdout=asyncio.subprocess.PIPE,
+        env=env,
+        **spawn_kwargs()
+    )
+    line = (await process.stdout.readline()).decode()
+    grandchildren = [int(pid) for pid in line.split("netos")[1].split()]
+    return process, grandchildren
+
+
+class TestGroupPids:
+    """Testes para leitura do grupo via /proc"""
+
+    def write_stat(self, proc_dir: Path, pid: int, comm: str, state: str, pgrp: int):
+        (proc_dir / str(pid)).mkdir()
+        (proc_dir / str(pid) / "stat").write_text(f"{pid} ({comm}) {state} 1 {pgrp} {pgrp} 0")
+
+    def test_filters_group_and_zombies(self, temp_dir):
+        proc_dir = Path(temp_dir)
+        self.write_stat(proc_dir, 100, "python", "S", 100)
+        self.write_stat(proc_dir, 101, "chrome (renderer)", "R", 100)
+        self.write_stat(proc_dir, 102, "chromedriver", "Z", 100)
+        self.write_stat(proc_dir, 200, "bash", "S", 200)
+        (proc_dir / "self").mkdir()
+
+        assert sorted(group_pids(100, proc_dir=str(proc_dir))) == [100, 101]
+
+
+@requires_proc
+@pytest.mark.asyncio
+class TestTerminateTree:
+    """Testes com processo real que cria netos"""
+
+    async def test_sigterm_kills_grandchildren(self, fake_child):
+        process, grandchildren = await spawn(fake_child)
+
+        result = await terminate_tree(process, grace_seconds=5)
+        await process.wait()
+
+        assert not result.escalated
+        assert result.survivors == 0
+        assert result.seconds < 5
+        assert not any(is_alive(pid) for pid in grandchildren)
+
+    async def test_escalates_to_sigkill(self, fake_child):
+        process, grandchildren = await spawn(fake_child, stubborn=True)
+
+        result = await terminate_tree(process, grace_seconds=0.3)
+        await process.wait()
+
+        assert result.escalated
+        assert result.seconds >= 0.3
+        assert result.survivors == 0
+        assert not any(is_alive(pid) for pid in grandchildren)
+
+
+@requires_proc
+@pytest.mark.asyncio
+class TestExecutorCancelTree:
+    """Cancelamento pelo executor encerra netos e reporta latencia"""
+
+    async def test_cancel_kills_whole_tree(self, fake_child, monkeypatch):
+        from config import settings
+        monkeypatch.setattr(settings, "CANCEL_GRACE_SECONDS", 0.5)
+        monkeypatch.setenv("STUBBORN", "1")
+
+        executor = ETLExecutor()
+        executor.main_script = fake_child
+        grandchildren = []
+        logs = []
+
+        def log_callback(entry):
+            logs.append(entry)
+            if "netos" in entry["mensagem"]:
+                grandchildren.extend(int(pid) for pid in entry["mensagem"].split("netos")[1].split())
+                executor.cancel()
+
+        success = await asyncio.wait_for(executor.execute({}, log_callback), timeout=30)
+
+        assert success is False
+        assert executor.last_teardown is not None
+        assert executor.last_teardown.escalated
+        assert len(grandchildren) == 2
+        assert not any(is_alive(pid) for pid in grandchildren)
+        assert any("Arvore de processos encerrada" in log["mensagem"] for log in logs)
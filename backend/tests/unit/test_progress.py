@@ -0,0 +1,239 @@
+"""
+Testes unitarios para eventos de progresso e ETA
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services.progress import (
+    JobProgress,
+    parse_progress,
+    record_timings,
+    get_unit_history,
+    reset_unit_history,
+)
+
+
+class FakeClock:
+    """Relogio controlado manualmente"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class TestParseProgress:
+    """Testes para parse_progress"""
+
+    def test_with_unit(self):
+        assert parse_progress("3/20 fundos") == {"done": 3, "total": 20, "unit": "fundos", "skipped": 0}
+
+    def test_without_unit(self):
+        assert parse_progress("1/4") == {"done": 1, "total": 4, "unit": "itens", "skipped": 0}
+
+    def test_skipped_units(self):
+        assert parse_progress("5/20 ativos pulados=3")["skipped"] == 3
+        assert parse_progress("2/20 ativos pulados=9")["skipped"] == 2
+
+    def test_trailing_text_ignored(self):
+        result = parse_progress("2/10 datas - 05/06/2025")
+        assert result["done"] == 2
+        assert result["unit"] == "datas"
+
+    def test_done_clamped_to_total(self):
+        assert parse_progress("12/10 fundos")["done"] == 10
+
+    def test_zero_total_rejected(self):
+        assert parse_progress("0/0 fundos") is None
+
+    def test_malformed(self):
+        assert parse_progress("Processando fundo X") is None
+
+
+class TestJobProgress:
+    """Testes para calculo de percentual e ETA"""
+
+    def test_percent(self):
+        progress = JobProgress(clock=FakeClock())
+        progress.update("maps", 5, 20, "ativos")
+
+        snapshot = progress.snapshot()
+
+        assert snapshot["percent"] == 25.0
+        assert snapshot["counters"][0]["done"] == 5
+
+    def test_eta_unknown_without_rate(self):
+        """Sem historico e sem unidades concluidas nao ha ETA"""
+        progress = JobProgress(clock=FakeClock())
+        progress.update("maps", 0, 10, "ativos")
+
+        assert progress.snapshot()["eta_seconds"] is None
+
+    def test_eta_from_observed_rate(self):
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+
+        progress.update("fidc", 0, 10, "fundos")
+        clock.advance(40)
+        progress.update("fidc", 4, 10, "fundos")
+
+        # 10s por fundo, 6 restantes
+        assert progress.snapshot()["eta_seconds"] == 60
+
+    def test_eta_from_history_before_first_unit(self):
+        progress = JobProgress(history={("qore", "fundos"): 30.0}, clock=FakeClock())
+        progress.update("qore", 0, 5, "fundos")
+
+        assert progress.snapshot()["eta_seconds"] == 150
+
+    def test_history_blended_with_observed(self):
+        clock = FakeClock()
+        progress = JobProgress(history={("qore", "fundos"): 30.0}, clock=clock)
+
+        progress.update("qore", 0, 10, "fundos")
+        clock.advance(10)
+        progress.update("qore", 1, 10, "fundos")
+
+        counter = progress.counters[("qore", "fundos")]
+        # (30 * 3 + 10 * 1) / 4
+        assert progress.seconds_per_unit(counter) == pytest.approx(25.0)
+
+    def test_eta_discounts_time_in_flight(self):
+        progress = JobProgress(history={("qore", "fundos"): 30.0}, clock=FakeClock())
+        progress.update("qore", 0, 2, "fundos")
+        progress._clock.advance(20)
+
+        assert progress.snapshot()["eta_seconds"] == 40
+
+    def test_job_eta_sums_counters(self):
+        history = {("maps", "ativos"): 10.0, ("maps", "passivos"): 5.0}
+        progress = JobProgress(history=history, clock=FakeClock())
+
+        progress.update("maps", 2, 4, "ativos")
+        progress.update("maps", 0, 4, "passivos")
+
+        snapshot = progress.snapshot()
+
+        assert snapshot["eta_seconds"] == 2 * 10 + 4 * 5
+        assert snapshot["percent"] == 25.0
+
+    def test_job_eta_max_across_parallel_sistemas(self):
+        """MAPS e FIDC rodam em paralelo: o ETA do job e o do mais lento"""
+        history = {("maps", "ativos"): 10.0, ("fidc", "fundos"): 5.0}
+        progress = JobProgress(history=history, clock=FakeClock())
+
+        progress.update("maps", 0, 4, "ativos")
+        progress.update("fidc", 0, 6, "fundos")
+
+        assert progress.snapshot()["eta_seconds"] == 40
+
+    def test_job_eta_sums_sistemas_sharing_a_folder(self):
+        """MAPS e QORE baixam em pdf: rodam um depois do outro"""
+        history = {("maps", "ativos"): 10.0, ("qore", "fundos"): 5.0, ("fidc", "fundos"): 1.0}
+        progress = JobProgress(history=history, clock=FakeClock())
+
+        progress.update("maps", 0, 4, "ativos")
+        progress.update("qore", 0, 6, "fundos")
+        progress.update("fidc", 0, 6, "fundos")
+
+        assert progress.snapshot()["eta_seconds"] == 4 * 10 + 6 * 5
+
+    def test_skipped_units_left_out_of_observed_rate(self):
+        """Unidades puladas pelo ledger avancam o contador sem custo"""
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+
+        progress.update("maps", 0, 10, "ativos")
+        progress.update("maps", 6, 10, "ativos", skipped=6)
+        clock.advance(40)
+        progress.update("maps", 8, 10, "ativos", skipped=6)
+
+        counter = progress.counters[("maps", "ativos")]
+        assert counter.observed_units == 2
+        assert counter.observed_seconds_per_unit == 20.0
+        assert progress.snapshot()["eta_seconds"] == 40
+
+    def test_counter_restart_resets_baseline(self):
+        """Modulo que recomeca a contagem inicia novo contador"""
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+
+        progress.update("maps", 0, 3, "ativos")
+        clock.advance(30)
+        progress.update("maps", 3, 3, "ativos")
+        progress.update("maps", 0, 3, "ativos")
+
+        counter = progress.counters[("maps", "ativos")]
+        assert counter.done == 0
+        assert counter.observed_seconds_per_unit is None
+
+    def test_sistema_percent(self):
+        progress = JobProgress(clock=FakeClock())
+        progress.update("amplis_reag", 1, 4, "datas")
+
+        assert progress.sistema_percent("AMPLIS_REAG") == 25
+        assert progress.sistema_percent("maps") is None
+
+
+class TestUnitTimingsHistory:
+    """Testes para persistencia dos tempos por unidade"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_history(self, test_db):
+        reset_unit_history()
+        yield
+        reset_unit_history()
+
+    def test_record_and_reload(self, test_db):
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+        progress.update("fidc", 0, 5, "fundos")
+        clock.advance(50)
+        progress.update("fidc", 5, 5, "fundos")
+
+        record_timings(progress)
+        reset_unit_history()
+
+        assert get_unit_history() == {("fidc", "fundos"): 10.0}
+        assert test_db.get_unit_timings() == {("fidc", "fundos"): 10.0}
+
+    def test_record_smooths_with_previous(self, test_db):
+        test_db.save_unit_timing("fidc", "fundos", 20.0)
+        reset_unit_history()
+
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+        progress.update("fidc", 0, 1, "fundos")
+        clock.advance(10)
+        progress.update("fidc", 1, 1, "fundos")
+
+        record_timings(progress)
+
+        assert test_db.get_unit_timings()[("fidc", "fundos")] == pytest.approx(17.0)
+
+    def test_skipped_units_not_recorded(self, test_db):
+        """Execucao so com unidades do ledger nao deflaciona o historico"""
+        clock = FakeClock()
+        progress = JobProgress(clock=clock)
+        progress.update("qore", 0, 5, "fundos")
+        clock.advance(1)
+        progress.update("qore", 5, 5, "fundos", skipped=5)
+
+        record_timings(progress)
+
+        assert test_db.get_unit_timings() == {}
+
+    def test_counters_without_units_not_recorded(self, test_db):
+        progress = JobProgress(clock=FakeClock())
+        progress.update("maps", 0, 5, "ativos")
+
+        record_timings(progress)
+
+        assert test_db.get_unit_timings() == {}
@@ -0,0 +1,120 @@
+"""
+Testes para o processamento paralelo de fundos do QORE
+(python/modules/automacao_qore_v5.py)
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+import automacao_qore_v5 as qore  # noqa: E402
+
+FUNDOS = {f"FIP F{i}": f"descricao {i}" for i in range(6)}
+
+
+@pytest.fixture
+def portal(temp_dir):
+    """Portal falso: cada fundo 'baixa' um Excel com a sigla no nome"""
+    chamadas = {"sessoes": 0, "tentativas": {}, "threads": set()}
+    falhar_uma_vez = {"FIP F2"}
+    ledger = []
+
+    def abrir_sessao(job, download_dir):
+        chamadas["sessoes"] += 1
+        return MagicMock()
+
+    def process_document_type(fundo, data_exibicao, data_obj, lote, di, df, tipo, botao, driver,
+                              siglas, download_dir, fundos_dict, pdf_path, excel_path):
+        chamadas["threads"].add(threading.current_thread().name)
+        tentativa = chamadas["tentativas"].get(fundo, 0) + 1
+        chamadas["tentativas"][fundo] = tentativa
+        if fundo in falhar_uma_vez and tentativa == 1:
+            raise RuntimeError("sessao expirada")
+        # Fundos iniciais demoram mais: terminam fora de ordem
+        time.sleep(0.05 * (len(FUNDOS) - int(fundo[-1])))
+        Path(download_dir, f"carteira_{siglas[fundo].lower()}.xlsx").write_bytes(fundo.encode())
+        return qore.handle_downloaded_file(fundo, data_obj, False, tipo, siglas, download_dir,
+                                           fundos_dict, pdf_path, excel_path)
+
+    excel_path = os.path.join(temp_dir, "excel")
+    with patch.multiple(
+        qore,
+        _abrir_sessao=MagicMock(side_effect=abrir_sessao),
+        _fechar_sessao=MagicMock(),
+        _abrir_fundo=MagicMock(),
+        process_document_type=MagicMock(side_effect=process_document_type),
+        ler_parametros_planilha=MagicMock(),
+        ler_lista_fundos=MagicMock(return_value=dict(FUNDOS)),
+        unit_done=MagicMock(return_value=False),
+        ledger_done=MagicMock(return_value=False),
+        mark_unit_done=MagicMock(),
+        record_done=MagicMock(side_effect=lambda *args: ledger.append(args)),
+    ):
+        yield chamadas, ledger, excel_path
+
+
+def _run(temp_dir, excel_path, workers):
+    with pytest.raises(SystemExit) as saida:
+        qore.run_qore(
+            "bd.xlsx", "", excel_path, "aux.xlsx", "https://qore/dashboard", "senha", "email", None,
+            True, False, False, True, False, datetime(2024, 1, 2), datetime(2024, 1, 2),
+            os.path.join(temp_dir, "tmp"), workers=workers,
+        )
+    return saida.value.code
+
+
+class TestQoreParallel:
+    """Fila de fundos, workers com retry e consolidacao ordenada"""
+
+    def test_funds_fan_out_and_consolidate_in_order(self, portal, temp_dir):
+        chamadas, ledger, excel_path = portal
+
+        assert _run(temp_dir, excel_path, workers=3) == 0
+
+        assert chamadas["sessoes"] == 3 + 1  # um login por worker + relogin apos a falha
+        assert len(chamadas["threads"]) == 3
+        # Ledger na ordem dos fundos, apesar de terminarem fora de ordem
+        assert [args[1] for args in ledger] == list(FUNDOS)
+        for args in ledger:
+            [destino] = args[4]
+            assert Path(destino).parent == Path(excel_path)
+            assert Path(destino).read_bytes() == args[1].encode()
+        assert qore.mark_unit_done.call_count == len(FUNDOS)
+        assert not os.path.exists(os.path.join(temp_dir, "tmp", "staging"))
+
+    def test_failed_fund_retried_in_same_worker(self, portal, temp_dir):
+        chamadas, ledger, excel_path = portal
+
+        assert _run(temp_dir, excel_path, workers=1) == 0
+
+        assert chamadas["tentativas"]["FIP F2"] == 2
+        assert chamadas["sessoes"] == 2
+        assert len(ledger) == len(FUNDOS)
+
+    def test_retry_exhausted_reports_failure(self, portal, temp_dir, monkeypatch):
+        _, ledger, excel_path = portal
+        monkeypatch.setattr(qore, "QORE_RETRIES", 0)
+
+        assert _run(temp_dir, excel_path, workers=2) == 0
+
+        assert "FIP F2" not in [args[1] for args in ledger]
+        fundos_marcados = [c.args[1] for c in qore.mark_unit_done.call_args_list]
+        assert "FIP F2" not in fundos_marcados and len(fundos_marcados) == len(FUNDOS) - 1
+
+    def test_staging_outside_workers_moves_directly(self, temp_dir):
+        origem = Path(temp_dir, "a.pdf")
+        origem.write_bytes(b"pdf")
+        destino = Path(temp_dir, "b.pdf")
+
+        qore._mover_arquivo(str(origem), str(destino))
+
+        assert destino.exists() and qore._ARQUIVOS_MOVIDOS[-1] == str(destino)
@@ -0,0 +1,134 @@
+"""
+Testes para as sessoes de portal persistidas (python/utils/session_store.py)
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+import session_store  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+COOKIES = [
+    {"name": "KEYCLOAK_SESSION", "value": "abc", "domain": "sso.maps.com.br", "path": "/",
+     "secure": True, "httpOnly": True, "expires": -1, "size": 19, "session": True},
+    {"name": "JSESSIONID", "value": "xyz", "domain": "reag-gestores.cloud.maps.com.br", "path": "/",
+     "secure": True, "httpOnly": True, "expires": time.time() + 3600, "size": 13},
+]
+
+
+@pytest.fixture
+def store(temp_dir, monkeypatch):
+    monkeypatch.setenv("ETL_MASTER_KEY", "bWFzdGVyLWtleS1kZS10ZXN0ZQ==")
+    store = SessionStore(temp_dir, session_store.session_key())
+    session_store.configure(store)
+    yield store
+    session_store.configure(None)
+    session_store._store_loaded = False
+
+
+def _driver(cookies=COOKIES, logado=True):
+    driver = MagicMock()
+
+    def cdp(comando, params):
+        if comando == "Network.getAllCookies":
+            return {"cookies": list(cookies)}
+        return {}
+
+    driver.execute_cdp_cmd.side_effect = cdp
+    driver.logado = logado
+    return driver
+
+
+class TestSessionStore:
+    """Arquivo cifrado por portal"""
+
+    def test_roundtrip_is_encrypted(self, store):
+        store.save("maps", [{"name": "JSESSIONID", "value": "segredo-da-sessao", "expires": -1}])
+
+        assert b"segredo-da-sessao" not in Path(store.path("maps")).read_bytes()
+        assert store.load("maps") == [{"name": "JSESSIONID", "value": "segredo-da-sessao", "expires": -1}]
+        if os.name != "nt":
+            assert os.stat(store.path("maps")).st_mode & 0o777 == 0o600
+
+    def test_other_key_or_portal_cannot_read(self, store, temp_dir):
+        store.save("maps", COOKIES)
+        os.replace(store.path("maps"), store.path("fidc"))
+        assert store.load("fidc") is None
+        assert not os.path.exists(store.path("fidc"))
+
+        store.save("maps", COOKIES)
+        outro = SessionStore(temp_dir, os.urandom(32))
+        assert outro.load("maps") is None
+
+    def test_expired_cookies_and_old_sessions(self, store, temp_dir):
+        store.save("maps", [{"name": "a", "value": "1", "expires": time.time() - 10}])
+        assert store.load("maps") is None
+
+        store.save("fidc", COOKIES)
+        velho = SessionStore(temp_dir, store._key, max_age=0)
+        assert velho.load("fidc") is None
+        assert not os.path.exists(store.path("fidc"))
+
+    def test_no_key_disables_store(self, monkeypatch):
+        monkeypatch.delenv("ETL_SESSION_KEY", raising=False)
+        monkeypatch.delenv("ETL_MASTER_KEY", raising=False)
+        session_store._store_loaded = False
+        try:
+            assert session_store.get_store() is None
+            assert session_store.save_session(_driver(), "maps") is False
+        finally:
+            session_store._store_loaded = False
+
+
+class TestRestoreSession:
+    """Checagem barata e fallback para login completo"""
+
+    def test_valid_session_skips_login(self, store):
+        assert session_store.save_session(_driver(), "maps")
+        # Campos que o Network.setCookies nao aceita ficam de fora
+        assert all("size" not in c and "session" not in c for c in store.load("maps"))
+
+        driver = _driver()
+        assert session_store.restore_session(driver, "maps", "https://maps/pegasusgestores", lambda d: d.logado)
+
+        comando, params = driver.execute_cdp_cmd.call_args_list[0].args
+        assert comando == "Network.setCookies"
+        assert [c["name"] for c in params["cookies"]] == ["KEYCLOAK_SESSION", "JSESSIONID"]
+        driver.get.assert_called_once_with("https://maps/pegasusgestores")
+
+    def test_expired_session_is_discarded(self, store):
+        session_store.save_session(_driver(), "maps")
+        driver = _driver(logado=False)
+
+        assert not session_store.restore_session(driver, "maps", "https://maps/pegasusgestores", lambda d: d.logado)
+
+        assert not os.path.exists(store.path("maps"))
+        driver.execute_cdp_cmd.assert_called_with("Network.clearBrowserCookies", {})
+
+    def test_without_saved_session(self, store):
+        driver = _driver()
+        assert not session_store.restore_session(driver, "maps", "https://maps", lambda d: True)
+        driver.get.assert_not_called()
+
+
+def test_maps_login_skips_otp_with_saved_session(store, monkeypatch):
+    import maps_downloads
+
+    session_store.save_session(_driver(), "maps")
+    driver = _driver()
+    driver.current_url = "https://reag-gestores.cloud.maps.com.br/"
+    driver.find_elements.return_value = [MagicMock()]
+    monkeypatch.setattr(maps_downloads, "WebDriverWait", MagicMock())
+
+    assert maps_downloads.login(driver, "usuario", "senha")
+
+    driver.get.assert_called_once_with("https://reag-gestores.cloud.maps.com.br/pegasusgestores")
+    driver.find_element.assert_not_called()
@@ -0,0 +1,177 @@
+"""
+Testes para divisao de periodos em shards e limites por portal
+"""
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services import business_days
+from core.database import SHARDED_STATUS, aggregate_status
+from services.sharding import (
+    folder_groups,
+    parse_portal_limits,
+    plan_shards,
+    portal_concurrency,
+    portal_for,
+    portal_gate,
+    shard_params,
+)
+
+
+@pytest.fixture
+def no_holidays(monkeypatch):
+    """Calendario so com fins de semana (independe do pacote holidays)"""
+    monkeypatch.setattr(business_days, "HOLIDAYS_AVAILABLE", False)
+    business_days.holidays_for_year.cache_clear()
+    yield
+    business_days.holidays_for_year.cache_clear()
+
+
+class TestBusinessDays:
+    """Calendario de dias uteis"""
+
+    def test_skips_weekends(self, no_holidays):
+        days = business_days.business_days("2024-03-01", "2024-03-11")
+        assert [d.day for d in days] == [1, 4, 5, 6, 7, 8, 11]
+
+    def test_accepts_both_formats(self, no_holidays):
+        assert business_days.business_days("01/03/2024", "2024-03-01") == [date(2024, 3, 1)]
+
+    @pytest.mark.skipif(not business_days.HOLIDAYS_AVAILABLE, reason="holidays nao instalado")
+    def test_skips_sao_paulo_holidays(self):
+        # 25/01 aniversario de Sao Paulo
+        assert date(2024, 1, 25) not in business_days.business_days("2024-01-24", "2024-01-26")
+
+
+class TestPlanShards:
+    """Divisao do periodo em shards de N dias uteis"""
+
+    def test_splits_by_business_days(self, no_holidays):
+        shards = plan_shards("2024-03-01", "2024-03-15", 5)
+
+        assert shards == [
+            (date(2024, 3, 1), date(2024, 3, 7)),
+            (date(2024, 3, 8), date(2024, 3, 14)),
+            (date(2024, 3, 15), date(2024, 3, 15)),
+        ]
+
+    def test_sp_holiday_between_shards_stays_covered(self, monkeypatch):
+        """MAPS nao pula feriados: o 09/07 de SP cai dentro de um shard"""
+        monkeypatch.setattr(business_days, "holidays_for_year", lambda year, state="SP": frozenset(
+            {date(2024, 7, 9)} if state == "SP" else ()
+        ))
+
+        shards = plan_shards("2024-07-05", "2024-07-12", 2)
+
+        assert shards == [
+            (date(2024, 7, 5), date(2024, 7, 8)),
+            (date(2024, 7, 9), date(2024, 7, 11)),
+            (date(2024, 7, 12), date(2024, 7, 12)),
+        ]
+
+    def test_single_shard_when_range_fits(self, no_holidays):
+        assert len(plan_shards("2024-03-04", "2024-03-08", 10)) == 1
+
+    def test_weekend_only_range_has_no_shards(self, no_holidays):
+        assert plan_shards("2024-03-09", "2024-03-10", 5) == []
+
+    def test_rejects_invalid_size(self):
+        with pytest.raises(ValueError):
+            plan_shards("2024-03-01", "2024-03-15", 0)
+
+    def test_shard_params(self, no_holidays):
+        params = {"sistemas": ["maps"], "data_inicial": "2024-03-01", "shard_days": 5}
+        children = shard_params(params, plan_shards("2024-03-01", "2024-03-15", 5))
+
+        assert [c["data_inicial"] for c in children] == ["2024-03-01", "2024-03-08", "2024-03-15"]
+        assert children[0]["data_final"] == "2024-03-07"
+        assert children[2]["shard"] == {"index": 2, "total": 3, "parent": None}
+        assert all("shard_days" not in c and c["sistemas"] == ["maps"] for c in children)
+
+    def test_shards_never_clean_folders(self, no_holidays):
+        """--limpar fica com o pai: nenhum shard limpa as pastas de um irmao"""
+        params = {"sistemas": ["maps"], "limpar": True, "shard_days": 5}
+        children = shard_params(params, plan_shards("2024-03-01", "2024-03-15", 5), parent_id=7)
+
+        assert not any("limpar" in c for c in children)
+        assert all(c["shard"]["parent"] == 7 for c in children)
+
+    def test_each_shard_gets_own_staging_dir(self, no_holidays, tmp_path):
+        params = {"sistemas": ["maps"], "shard_days": 5}
+        children = shard_params(params, plan_shards("2024-03-01", "2024-03-15", 5), 7, tmp_path)
+
+        assert [c["staging_dir"] for c in children] == [
+            str(tmp_path / f"job_7_{i}") for i in range(3)
+        ]
+        assert "staging_dir" not in params
+
+
+class TestAggregateStatus:
+    """Status combinado do job pai"""
+
+    @pytest.mark.parametrize("statuses, expected", [
+        (["completed", "running", "pending"], SHARDED_STATUS),
+        (["completed", "error", "pending"], SHARDED_STATUS),
+        (["completed", "completed"], "completed"),
+        (["completed", "error", "cancelled"], "error"),
+        (["completed", "cancelled"], "cancelled"),
+    ])
+    def test_aggregate(self, statuses, expected):
+        assert aggregate_status(statuses) == expected
+
+
+class TestPortalGate:
+    """Limite de jobs simultaneos por portal"""
+
+    def test_parse_limits(self):
+        assert parse_portal_limits("maps=1, QORE=2,,bad") == {"maps": 1, "qore": 2}
+
+    def test_folder_groups_join_sistemas_sharing_folders(self):
+        """pdf une AMPLIS, MAPS e QORE; FIDC e JCOT ficam sozinhos"""
+        groups = folder_groups(["fidc", "amplis_reag", "jcot", "qore", "maps"])
+        assert sorted(map(sorted, groups)) == [["amplis_reag", "maps", "qore"], ["fidc"], ["jcot"]]
+
+    def test_folder_groups_compare_resolved_directories(self, tmp_path):
+        """Chaves diferentes apontando para a mesma pasta conflitam; a mesma chave vazia nao"""
+        paths = {"fidc": str(tmp_path / "out"), "jcot": str(tmp_path / "x" / ".." / "out"),
+                 "maps": str(tmp_path / "maps"), "pdf": ""}
+        groups = folder_groups(["fidc", "jcot", "maps", "qore"], paths)
+        assert sorted(map(sorted, groups)) == [["fidc", "jcot"], ["maps"], ["qore"]]
+
+    def test_portal_concurrency_caps_slots(self):
+        assert portal_concurrency(["maps"], 4, {"maps": 1}, 2) == 1
+        assert portal_concurrency(["fidc"], 4, {}, 2) == 2
+        assert portal_concurrency(["fidc"], 3, {}, 0) == 3
+
+    def test_amplis_sistemas_share_portal(self):
+        assert portal_for("amplis_reag") == portal_for("AMPLIS_MASTER") == "amplis"
+
+    def test_blocks_when_portal_full(self):
+        can_start = portal_gate({"maps": 1}, default_limit=0)
+        running = [json.dumps({"sistemas": ["maps", "qore"]})]
+
+        assert not can_start(json.dumps({"sistemas": ["maps"]}), running)
+        assert can_start(json.dumps({"sistemas": ["qore"]}), running)
+
+    def test_default_limit(self):
+        can_start = portal_gate({}, default_limit=2)
+        running = [json.dumps({"sistemas": ["amplis_reag"]}), json.dumps({"sistemas": ["amplis_master"]})]
+
+        assert not can_start(json.dumps({"sistemas": ["amplis_reag"]}), running)
+        assert can_start(json.dumps({"sistemas": ["fidc"]}), running)
+
+    def test_sibling_shards_follow_portal_limits_only(self):
+        """Cada shard baixa no proprio staging: irmaos rodam juntos ate o limite do portal"""
+        can_start = portal_gate({"maps": 2}, default_limit=0)
+
+        def shard(index):
+            return json.dumps({"sistemas": ["maps"], "shard": {"index": index, "total": 3, "parent": 1},
+                               "staging_dir": f"/tmp/job_1_{index}"})
+
+        assert can_start(shard(1), [shard(0)])
+        assert not can_start(shard(2), [shard(0), shard(1)])
@@ -0,0 +1,129 @@
+"""
+Testes para os spans de tempo por etapa (python/utils/spans.py e services/spans.py)
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "python" / "utils"))
+
+import spans as etl_spans  # noqa: E402
+from step_scheduler import Step, run_sequential  # noqa: E402
+
+from services.spans import JobSpans, load_spans, parse_span, record_spans  # noqa: E402
+
+
+def _linhas(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("[SPAN]")]
+
+
+def _parsed(capsys):
+    entries = []
+    for line in _linhas(capsys):
+        sistema, mensagem = line.split("] ", 1)[1].split(" ", 1)
+        entries.append((sistema.strip("[]"), parse_span(mensagem)))
+    return entries
+
+
+class TestEmitSpans:
+    """API dos modulos ETL"""
+
+    def test_context_manager_and_decorator(self, capsys):
+        @etl_spans.span("read_excel")
+        def ler():
+            return 42
+
+        with etl_spans.span("login", sistema="maps"):
+            assert ler() == 42
+
+        (sistema_a, excel), (sistema_b, login) = _parsed(capsys)
+        assert (sistema_a, excel["path"]) == ("maps", ["login", "read_excel"])
+        assert (sistema_b, login["path"]) == ("maps", ["login"])
+        assert login["seconds"] >= excel["seconds"]
+
+    def test_error_flag(self, capsys):
+        with pytest.raises(ValueError):
+            with etl_spans.span("upload_data_to_access"):
+                raise ValueError("tabela bloqueada")
+
+        [(sistema, span)] = _parsed(capsys)
+        assert sistema == etl_spans.DEFAULT_SISTEMA
+        assert not span["ok"]
+
+    def test_names_are_sanitized(self, capsys):
+        with etl_spans.span("exportar ativos;pdf", sistema="maps"):
+            pass
+
+        [(_, span)] = _parsed(capsys)
+        assert span["path"] == ["exportar_ativos_pdf"]
+
+    def test_step_root_and_worker_threads(self, capsys):
+        def entry():
+            with etl_spans.span("login"):
+                pass
+            thread = threading.Thread(target=etl_spans.span("wait_for_downloads")(lambda: None))
+            thread.start()
+            thread.join()
+            return True
+
+        assert run_sequential([Step("qore", entry)]) == {"qore": True}
+
+        paths = {";".join(span["path"]): sistema for sistema, span in _parsed(capsys)}
+        assert paths == {"qore;login": "qore", "qore;wait_for_downloads": "qore", "qore": "qore"}
+        assert etl_spans._raiz is None
+
+
+class TestJobSpans:
+    """Agregacao no backend"""
+
+    def test_parse_span(self):
+        assert parse_span("maps;login 812.5ms") == {"path": ["maps", "login"], "seconds": 0.8125, "ok": True}
+        assert parse_span("fidc 10ms erro")["ok"] is False
+        assert parse_span("sem duracao") is None
+        assert parse_span("") is None
+
+    def test_tree_with_self_time(self):
+        spans = JobSpans()
+        spans.add(["maps", "login"], 2.0)
+        spans.add(["maps", "exportar_ativos", "wait_for_downloads"], 3.0)
+        spans.add(["maps", "exportar_ativos", "wait_for_downloads"], 1.0, ok=False)
+        spans.add(["maps", "exportar_ativos"], 5.0)
+        spans.add(["maps"], 10.0)
+        spans.add(["fidc"], 4.0)
+
+        snapshot = spans.snapshot()
+
+        assert snapshot["total_seconds"] == 14.0
+        maps = snapshot["spans"][0]
+        assert (maps["name"], maps["self_seconds"]) == ("maps", 3.0)
+        exportar = maps["children"][0]
+        assert (exportar["name"], exportar["self_seconds"]) == ("exportar_ativos", 1.0)
+        wait = exportar["children"][0]
+        assert (wait["count"], wait["total_seconds"], wait["errors"]) == (2, 4.0, 1)
+
+    def test_merge_snapshots(self):
+        shard = JobSpans()
+        shard.add(["amplis_reag", "login"], 1.5)
+        shard.add(["amplis_reag"], 6.0)
+
+        total = JobSpans()
+        total.merge(shard.snapshot())
+        total.merge(shard.snapshot())
+
+        root = total.snapshot()["spans"][0]
+        assert (root["count"], root["total_seconds"]) == (2, 12.0)
+        assert root["children"][0]["total_seconds"] == 3.0
+
+    def test_record_and_load(self, test_db):
+        spans = JobSpans()
+        spans.add(["jcot", "login"], 0.5)
+
+        record_spans(7, spans)
+        record_spans(8, JobSpans())
+
+        assert load_spans(7) == json.loads(json.dumps(spans.snapshot()))
+        assert load_spans(8) is None
@@ -0,0 +1,98 @@
+"""
+Testes para o staging de shards (python/utils/staging.py e main.py)
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PYTHON_DIR = Path(__file__).parent.parent.parent.parent / "python"
+sys.path.insert(0, str(PYTHON_DIR / "utils"))
+sys.path.insert(0, str(PYTHON_DIR))
+
+import main  # noqa: E402
+from staging import discard, promote, stage_paths  # noqa: E402
+from step_scheduler import Step  # noqa: E402
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    final = {"pdf": str(tmp_path / "saida" / "pdf"), "maps": str(tmp_path / "saida" / "maps"), "fidc": ""}
+    staged = stage_paths(final, ["pdf", "maps"], str(tmp_path / "job_1_0"))
+    return tmp_path, final, staged
+
+
+class TestStaging:
+    """Pastas proprias por shard e promocao ao final"""
+
+    def test_stage_paths_redirects_only_given_keys(self, pastas):
+        tmp_path, final, staged = pastas
+
+        assert staged["pdf"] == str(tmp_path / "job_1_0" / "pdf")
+        assert os.path.isdir(staged["maps"])
+        assert staged["fidc"] == ""
+        assert final["pdf"] == str(tmp_path / "saida" / "pdf")
+
+    def test_promote_moves_finished_files(self, pastas):
+        tmp_path, final, staged = pastas
+        Path(staged["pdf"], "sub").mkdir()
+        Path(staged["pdf"], "sub", "carteira.pdf").write_bytes(b"%PDF")
+        Path(staged["maps"], "ativo.xlsx").write_bytes(b"xlsx")
+        Path(staged["maps"], "passivo.xlsx.crdownload").write_bytes(b"parcial")
+
+        movidos, erros = promote(staged, final, ["pdf", "maps"])
+
+        assert erros == []
+        destino = tmp_path / "saida" / "pdf" / "sub" / "carteira.pdf"
+        assert movidos[str(Path(staged["pdf"], "sub", "carteira.pdf"))] == str(destino)
+        assert destino.read_bytes() == b"%PDF"
+        assert (tmp_path / "saida" / "maps" / "ativo.xlsx").exists()
+        assert not (tmp_path / "saida" / "maps" / "passivo.xlsx.crdownload").exists()
+
+        discard(str(tmp_path / "job_1_0"))
+        assert not (tmp_path / "job_1_0").exists()
+
+    def test_promote_overwrites_existing_file(self, pastas):
+        tmp_path, final, staged = pastas
+        Path(final["pdf"]).mkdir(parents=True)
+        Path(final["pdf"], "carteira.pdf").write_bytes(b"antigo")
+        Path(staged["pdf"], "carteira.pdf").write_bytes(b"novo")
+
+        promote(staged, final, ["pdf"])
+
+        assert Path(final["pdf"], "carteira.pdf").read_bytes() == b"novo"
+
+    def test_unconfigured_folder_keeps_files_in_staging(self, tmp_path):
+        staged = stage_paths({"fidc": ""}, ["fidc"], str(tmp_path / "job_1_0"))
+        Path(staged["fidc"], "estoque.csv").write_text("x")
+
+        movidos, erros = promote(staged, {"fidc": ""}, ["fidc"])
+
+        assert movidos == {}
+        assert len(erros) == 1 and "fidc" in erros[0]
+
+
+class TestMainFolders:
+    """Conflito de pastas entre steps pelo diretorio, nao pela chave"""
+
+    def test_keys_pointing_to_same_directory_conflict(self, tmp_path):
+        paths = {"fidc": str(tmp_path / "out"), "jcot": str(tmp_path / "x" / ".." / "out"), "britech": ""}
+        steps = [Step("fidc", print, folders=("fidc",)), Step("jcot", print, folders=("jcot",)),
+                 Step("britech", print, folders=("britech",))]
+
+        resolvidos = main._resolve_folders(steps, paths)
+
+        assert resolvidos[0].folders == resolvidos[1].folders
+        assert resolvidos[0].folders == (os.path.normcase(str(tmp_path / "out")),)
+        assert resolvidos[2].folders == ()
+
+    def test_promote_staging_keeps_staging_on_error(self, tmp_path, capsys):
+        staging_dir = str(tmp_path / "job_1_0")
+        staged = stage_paths({"fidc": ""}, ["fidc"], staging_dir)
+        Path(staged["fidc"], "estoque.csv").write_text("x")
+
+        main._promote_staging(staging_dir, staged, {"fidc": ""}, ["fidc"])
+
+        assert "[WARN] [SISTEMA] Staging:" in capsys.readouterr().out
+        assert Path(staged["fidc"], "estoque.csv").exists()
@@ -0,0 +1,79 @@
+"""
+Testes para o scheduler de steps do pipeline (python/utils/step_scheduler.py)
+
+Os entries ficam no nivel do modulo: com spawn os workers importam este
+arquivo para desserializa-los.
+"""
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "python" / "utils"))
+
+from step_scheduler import Step, run_sequential, run_steps  # noqa: E402
+
+
+def _intervalo(pasta, nome, segundos=0.5):
+    inicio = time.time()
+    time.sleep(segundos)
+    Path(pasta, nome).write_text(f"{inicio} {time.time()}")
+    return True
+
+
+def _amplis(pasta):
+    return _intervalo(pasta, "amplis")
+
+
+def _maps(pasta):
+    return _intervalo(pasta, "maps")
+
+
+def _fidc(pasta):
+    return _intervalo(pasta, "fidc")
+
+
+def _contadores():
+    return {"ledger": 2, "checkpoint": 1}
+
+
+def _periodo(pasta, nome):
+    inicio, fim = Path(pasta, nome).read_text().split()
+    return float(inicio), float(fim)
+
+
+class TestRunSteps:
+    """Execucao em processos worker"""
+
+    def test_steps_sharing_a_folder_never_overlap(self, temp_dir):
+        """AMPLIS e MAPS baixam em pdf: um espera o outro; FIDC roda junto"""
+        steps = [
+            Step("amplis", _amplis, folders=("csv", "pdf")),
+            Step("maps", _maps, folders=("maps", "pdf")),
+            Step("fidc", _fidc, folders=("fidc",)),
+        ]
+
+        results = run_steps(steps, args=(temp_dir,), max_workers=3)
+
+        assert results == {"amplis": True, "maps": True, "fidc": True}
+        amplis, maps, fidc = (_periodo(temp_dir, nome) for nome in ("amplis", "maps", "fidc"))
+        assert amplis[1] <= maps[0]
+        assert fidc[0] < amplis[1]
+
+    def test_counters_come_back_from_workers(self, temp_dir):
+        """Contadores do processo de cada step sao somados no principal"""
+        counters = Counter()
+        steps = [Step("amplis", _amplis), Step("fidc", _fidc)]
+
+        run_steps(steps, args=(temp_dir,), max_workers=2, collect=_contadores, counters=counters)
+
+        assert counters == {"ledger": 4, "checkpoint": 2}
+
+    def test_sequential_collects_once(self, temp_dir):
+        """No mesmo processo os contadores ja sao o total: coleta uma vez so"""
+        counters = Counter()
+        steps = [Step("amplis", lambda pasta: True), Step("fidc", lambda pasta: True)]
+
+        run_sequential(steps, (temp_dir,), collect=_contadores, counters=counters)
+
+        assert counters == {"ledger": 2, "checkpoint": 1}
@@ -0,0 +1,139 @@
+"""
+Testes para o step TRUSTEE nativo (python/modules/trustee.py)
+"""
+import sys
+import textwrap
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+PYTHON_DIR = Path(__file__).parent.parent.parent.parent / "python"
+sys.path.insert(0, str(PYTHON_DIR / "utils"))
+sys.path.insert(0, str(PYTHON_DIR / "modules"))
+
+import ledger  # noqa: E402
+import trustee  # noqa: E402
+from trustee import parse_bat, resolve_entry, run_trustee  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    for var in ("ETL_TRUSTEE_SCRIPT", "ETL_TRUSTEE_BAT"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(trustee, "BAT_LEGADO", "/nao/existe/Rodar_automacao_trustee.bat")
+    yield
+    if ledger._ledger is not None:
+        ledger._ledger.close()
+    ledger._ledger = None
+
+
+def _script(folder: Path, body: str, name: str = "automacao_trustee.py") -> Path:
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_text(textwrap.dedent(body), encoding="utf-8")
+    return path
+
+
+ESCREVE_ARQUIVO = """
+    import os
+    print("Lendo carteiras")
+    pasta = os.environ["ETL_TRUSTEE_AUX_PATH"]
+    with open(os.path.join(pasta, "trustee.xlsx"), "w") as f:
+        f.write(os.environ["ETL_DATA_FINAL"])
+    print("Planilha gerada")
+"""
+
+
+class TestParseBat:
+    """Leitura do .bat legado (sem executa-lo)"""
+
+    def test_cd_and_python_line(self, temp_dir):
+        bat = Path(temp_dir) / "Rodar_automacao_trustee.bat"
+        bat.write_text(
+            "@echo off\r\n"
+            "REM automacao trustee\r\n"
+            "cd /d \"%~dp0scripts\"\r\n"
+            "call python -u automacao_trustee.py --modo diario\r\n"
+            "pause\r\n"
+        )
+
+        entry = parse_bat(str(bat))
+
+        assert Path(entry.cwd) == Path(temp_dir) / "scripts"
+        assert Path(entry.script) == Path(temp_dir) / "scripts" / "automacao_trustee.py"
+        assert entry.args == ["--modo", "diario"]
+
+    def test_python_exe_with_quoted_script(self, temp_dir):
+        bat = Path(temp_dir) / "rodar.bat"
+        bat.write_text('"C:\\Python311\\python.exe" "%~dp0automacao trustee.py"\n')
+
+        entry = parse_bat(str(bat))
+
+        assert entry.script.endswith("automacao trustee.py")
+        assert entry.args == []
+
+    def test_without_python_call(self, temp_dir):
+        bat = Path(temp_dir) / "rodar.bat"
+        bat.write_text("@echo off\nstart excel.exe planilha.xlsx\n")
+        assert parse_bat(str(bat)) is None
+
+
+class TestResolveEntry:
+    def test_env_script_wins(self, temp_dir, monkeypatch):
+        script = _script(Path(temp_dir), "print('ok')")
+        monkeypatch.setenv("ETL_TRUSTEE_SCRIPT", str(script))
+
+        entry = resolve_entry()
+
+        assert entry.script == str(script)
+        assert entry.cwd == str(script.parent)
+
+    def test_reads_bat_from_env(self, temp_dir, monkeypatch):
+        script = _script(Path(temp_dir), "print('ok')")
+        bat = Path(temp_dir) / "rodar.bat"
+        bat.write_text(f'python "{script.name}"\n')
+        monkeypatch.setenv("ETL_TRUSTEE_BAT", str(bat))
+
+        assert Path(resolve_entry().script) == script
+
+    def test_missing_automation(self):
+        with pytest.raises(FileNotFoundError, match="ETL_TRUSTEE_SCRIPT"):
+            resolve_entry()
+
+
+class TestRunTrustee:
+    """Execucao do script com o interpretador atual"""
+
+    def test_streams_output_and_records_ledger(self, temp_dir, capsys):
+        aux = Path(temp_dir) / "aux"
+        aux.mkdir()
+        script = _script(Path(temp_dir) / "automacao", ESCREVE_ARQUIVO)
+        ledger.configure(str(Path(temp_dir) / "ledger.db"))
+        linhas = []
+
+        result = run_trustee(str(aux), "01/02/2024", "02/02/2024", script=str(script), log=linhas.append)
+
+        assert not result["skipped"]
+        assert linhas == ["Lendo carteiras", "Planilha gerada"]
+        assert (aux / "trustee.xlsx").read_text() == "02/02/2024"
+        assert [Path(p).name for p in result["files"]] == ["trustee.xlsx"]
+        assert ledger.get_ledger().get("trustee", None, "execucao", date(2024, 2, 2))["files"] == 1
+        assert "[PROGRESS] [trustee] 1/1 execucoes" in capsys.readouterr().out
+
+        # Segunda execucao do mesmo dia: pulada pelo ledger
+        again = run_trustee(str(aux), "01/02/2024", "02/02/2024", script=str(script), log=linhas.append)
+        assert again["skipped"]
+        assert "[PROGRESS] [trustee] 1/1 execucoes pulados=1" in capsys.readouterr().out
+
+    def test_failure_exit_code(self, temp_dir):
+        script = _script(Path(temp_dir), "import sys\nprint('sem conexao')\nsys.exit(3)\n")
+
+        with pytest.raises(RuntimeError, match="codigo 3"):
+            run_trustee("", "02/02/2024", None, script=str(script), log=lambda _: None)
+
+    def test_timeout_kills_script(self, temp_dir):
+        script = _script(Path(temp_dir), "import time\ntime.sleep(30)\n")
+
+        with pytest.raises(TimeoutError):
+            run_trustee("", "02/02/2024", None, script=str(script), timeout=0.5, log=lambda _: None)
@@ -0,0 +1,236 @@
+"""
+Testes para os waits condicionais (python/modules/base_driver.py) e a
+contagem de sleeps substituidos (python/utils/wait_stats.py)
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.keys import Keys
+
+ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import base_driver  # noqa: E402
+import wait_stats  # noqa: E402
+from count_sleeps import count  # noqa: E402
+from step_scheduler import Step, run_sequential  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def stats():
+    wait_stats.reset()
+    yield
+    wait_stats.reset()
+
+
+def _script_driver(*respostas):
+    """Driver cujo execute_script devolve as respostas em ordem (a ultima se repete)"""
+    driver = MagicMock()
+    fila = list(respostas)
+
+    def execute_script(*args):
+        resposta = fila.pop(0) if len(fila) > 1 else fila[0]
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    driver.execute_script.side_effect = execute_script
+    return driver
+
+
+class TestElementWaits:
+    """Waits de elemento: retornam o elemento ou levantam TimeoutException"""
+
+    def test_clickable_returns_element_and_counts_replaced_sleep(self):
+        driver = MagicMock()
+        elemento = driver.find_element.return_value
+        elemento.is_displayed.return_value = True
+        elemento.is_enabled.return_value = True
+
+        assert base_driver.wait_clickable(driver, ("id", "csv"), replaces=1) is elemento
+
+        stats = wait_stats.summary()
+        assert (stats["waits"], stats["replaced"]) == (1, 1.0)
+        assert stats["saved"] > 0.9
+
+    def test_timeout_raises_or_returns_none(self):
+        driver = MagicMock()
+        driver.find_elements.return_value = []
+
+        with pytest.raises(TimeoutException):
+            base_driver.wait_elements(driver, ("id", "menu"), timeout=0.2)
+        assert base_driver.wait_elements(driver, ("id", "menu"), timeout=0.2, required=False) is None
+
+        assert wait_stats.summary()["timeouts"] == 2
+
+    def test_min_count(self):
+        driver = MagicMock()
+        driver.find_elements.side_effect = [["a"], ["a", "b"], ["a", "b", "c"]]
+
+        assert base_driver.wait_elements(driver, ("id", "menu"), min_count=3) == ["a", "b", "c"]
+
+
+class TestStateWaits:
+    """Waits de estado: False/[] no timeout, sem excecao"""
+
+    def test_network_idle_waits_for_quiet_period(self):
+        driver = _script_driver(
+            ["loading", 0, 3],
+            WebDriverException("navegando"),
+            ["complete", 2, 5],
+            ["complete", 0, 8],
+        )
+
+        assert base_driver.wait_network_idle(driver, quiet=0.2, replaces=3)
+        # Ocioso so depois de repetir a contagem de recursos por `quiet` segundos
+        assert driver.execute_script.call_count >= 5
+        assert wait_stats.summary()["kinds"]["network_idle"]["replaced"] == 3.0
+
+    def test_network_idle_timeout(self):
+        driver = _script_driver(["complete", 1, 4])
+
+        assert not base_driver.wait_network_idle(driver, timeout=0.3)
+        assert wait_stats.summary()["timeouts"] == 1
+
+    def test_spinner_gone(self):
+        driver = _script_driver(True, True, False)
+
+        assert base_driver.wait_spinner_gone(driver, timeout=2)
+        assert driver.execute_script.call_args[0][1] == list(base_driver.SPINNER_SELECTORS)
+
+    def test_download_started(self, temp_dir):
+        Path(temp_dir, "antigo.pdf").touch()
+        antes = base_driver.download_snapshot(temp_dir)
+
+        def baixar():
+            Path(temp_dir, "carteira.pdf.crdownload").touch()
+
+        timer = threading.Timer(0.2, baixar)
+        timer.start()
+        try:
+            novos = base_driver.wait_download_started(temp_dir, antes, timeout=5, replaces=1.5)
+        finally:
+            timer.join()
+
+        assert novos == ["carteira.pdf.crdownload"]
+        assert not base_driver.wait_downloads_done(temp_dir, timeout=0.2)
+        os.rename(Path(temp_dir, "carteira.pdf.crdownload"), Path(temp_dir, "carteira.pdf"))
+        assert base_driver.wait_downloads_done(temp_dir, timeout=1)
+
+    def test_download_not_started(self, temp_dir):
+        assert base_driver.wait_download_started(temp_dir, timeout=0.2) == []
+
+
+class _Campo:
+    """Input com mascara falsa: `aceita` decide o que sobra de cada forma de entrada"""
+
+    def __init__(self, aceita):
+        self.aceita = aceita
+        self.valor = ""
+        self.teclas = []
+
+    def send_keys(self, texto):
+        self.teclas.append(texto)
+        if texto in (Keys.CONTROL + "a", Keys.DELETE):
+            self.valor = ""
+        else:
+            self.valor = self.aceita(self.valor, texto)
+
+    def get_attribute(self, nome):
+        return self.valor
+
+
+class TestFillInput:
+    """JS primeiro, teclas so se o valor nao conferir"""
+
+    def test_js_value_with_events(self):
+        driver = _script_driver("02/01/2024")
+
+        assert base_driver.fill_input(driver, MagicMock(), "02/01/2024") == "js"
+
+        script, _, valor = driver.execute_script.call_args.args
+        assert "dispatchEvent(new Event('input'" in script and "'change'" in script
+        assert valor == "02/01/2024"
+        stats = wait_stats.summary()
+        assert stats["replaced"] == pytest.approx(1.0) and stats["pauses"] == 0
+
+    def test_whole_string_when_mask_rejects_js(self):
+        driver = _script_driver("__/__/____")
+        campo = _Campo(lambda atual, texto: atual + texto)
+
+        assert base_driver.fill_input(driver, campo, "02/01/2024") == "keys"
+        assert campo.teclas[-1] == "02/01/2024"
+
+    def test_keystrokes_only_as_last_resort(self):
+        driver = _script_driver(WebDriverException("js bloqueado"))
+        # Mascara que so aceita um caractere por evento
+        campo = _Campo(lambda atual, texto: atual + texto[0])
+
+        assert base_driver.fill_input(driver, campo, "02/01/2024", key_delay=0.001) == "slow"
+        assert campo.valor == "02/01/2024"
+        assert wait_stats.summary()["pauses"] == len("02/01/2024")
+
+    def test_nothing_confirms_forces_js(self):
+        driver = _script_driver("")
+        campo = _Campo(lambda atual, texto: "")
+
+        assert base_driver.fill_input(driver, campo, "02/01/2024", key_delay=0) == ""
+        assert driver.execute_script.call_count == 2
+        assert wait_stats.summary()["timeouts"] == 1
+
+
+class TestWaitStats:
+    """Resumo por step"""
+
+    def test_pause_counted_separately(self):
+        base_driver.pause(0.01)
+
+        stats = wait_stats.summary()
+        assert (stats["waits"], stats["pauses"]) == (0, 1)
+
+    def test_step_reports_summary(self, capsys):
+        def entry():
+            wait_stats.record("clickable", 0.2, replaces=5)
+            wait_stats.record("network_idle", 0.5, replaces=1, ok=False)
+            return True
+
+        assert run_sequential([Step("fidc", entry)]) == {"fidc": True}
+
+        linhas = [line for line in capsys.readouterr().out.splitlines() if "Waits:" in line]
+        assert linhas == [
+            "[INFO] [fidc] Waits: 2 condicoes em 0.7s (substituem 6.0s de sleep fixo: -5.3s), "
+            "1 timeouts, 0 pausas fixas (0.0s)"
+        ]
+
+    def test_step_without_waits_is_silent(self, capsys):
+        assert run_sequential([Step("trustee", lambda: True)]) == {"trustee": True}
+
+        assert "Waits:" not in capsys.readouterr().out
+
+
+class TestCountSleeps:
+    """Harness estatico (scripts/count_sleeps.py)"""
+
+    def test_counts_literal_sleeps_waits_and_pauses(self):
+        source = (
+            "import time\n"
+            "time.sleep(5)\n"
+            "for fundo in fundos:\n"
+            "    time.sleep(1.5)\n"
+            "    wait_clickable(driver, loc, replaces=2)\n"
+            "    time.sleep(intervalo)\n"
+            "pause(0.5)\n"
+        )
+
+        totals = count(source)
+
+        assert (totals["sleeps"], totals["sleep_seconds"], totals["loop_seconds"]) == (2, 6.5, 1.5)
+        assert (totals["waits"], totals["replaced_seconds"]) == (1, 2.0)
+        assert totals["pause_seconds"] == 0.5
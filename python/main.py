@@ -8,6 +8,7 @@ import argparse
 import json
 import sys
 import os
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -15,6 +16,8 @@ from typing import Optional
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'utils'))
 
+from step_scheduler import Step, plan, run_steps, waves
+
 def log(level: str, sistema: str, mensagem: str):
     """Log formatado para parsing pelo backend"""
     timestamp = datetime.now().strftime("%H:%M:%S")
@@ -54,13 +57,15 @@ def _get_default_credentials() -> dict:
     }
 
 
-def load_credentials(config_path: str) -> dict:
+def load_credentials(config_path: str, data_key: Optional[tuple] = None) -> dict:
     """
     Carrega credenciais do arquivo JSON (criptografado ou plaintext).
 
     Suporta automaticamente:
     - credentials.encrypted.json (formato criptografado AES-256-GCM)
     - credentials.json (formato plaintext legado)
+
+    data_key: (salt, chave) derivada pelo backend - evita o PBKDF2 no filho
     """
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -69,7 +74,7 @@ def load_credentials(config_path: str) -> dict:
         # Verificar se esta criptografado
         if "encryption" in data:
             # Check if ETL_MASTER_KEY is set BEFORE attempting decryption
-            if not os.getenv("ETL_MASTER_KEY"):
+            if not os.getenv("ETL_MASTER_KEY") and data_key is None:
                 log("ERROR", "SISTEMA", "=" * 60)
                 log("ERROR", "SISTEMA", "CREDENCIAIS CRIPTOGRAFADAS - ETL_MASTER_KEY NAO CONFIGURADA!")
                 log("ERROR", "SISTEMA", "=" * 60)
@@ -81,9 +86,10 @@ def load_credentials(config_path: str) -> dict:
 
             try:
                 from crypto import ETLCrypto
-                crypto = ETLCrypto()
+                crypto = ETLCrypto(data_key=data_key)
                 decrypted = crypto.decrypt_credentials(data)
-                log("INFO", "SISTEMA", "Credenciais carregadas (formato criptografado)")
+                origem = "chave do backend" if data_key is not None else "master key"
+                log("INFO", "SISTEMA", f"Credenciais carregadas (formato criptografado, {origem})")
                 return decrypted
             except ValueError as e:
                 log("ERROR", "SISTEMA", f"Erro de criptografia: {e}")
@@ -149,7 +155,8 @@ def run_amplis(credentials: dict, data_inicial: str, data_final: str,
             data_inicial,
             data_final,
             baixar_pdf,
-            baixar_csv
+            baixar_csv,
+            sistema=f"amplis_{tipo}"
         )
         
         log("SUCCESS", sistema_nome, "Execução concluída com sucesso")
@@ -159,38 +166,288 @@ def run_amplis(credentials: dict, data_inicial: str, data_final: str,
         log("ERROR", sistema_nome, f"Erro: {str(e)}")
         return False
 
-def clear_folders(folders: list):
-    """Limpa as pastas especificadas"""
-    import shutil
-    
-    log("INFO", "SISTEMA", f"Limpando {len(folders)} pasta(s)...")
-    
-    for folder in folders:
-        if not folder or not os.path.exists(folder):
-            continue
-        try:
-            for item in os.listdir(folder):
-                item_path = os.path.join(folder, item)
-                if os.path.isfile(item_path):
-                    os.unlink(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-            log("SUCCESS", "SISTEMA", f"Pasta limpa: {folder}")
-        except Exception as e:
-            log("ERROR", "SISTEMA", f"Erro ao limpar {folder}: {e}")
-    
-    log("SUCCESS", "SISTEMA", "Limpeza concluída")
+def clear_folders(folders: list, workers: int = 8, trash: bool = False):
+    """Limpa as pastas especificadas (remocao paralela ou lixeira por rename)"""
+    import time
+    from folder_cleanup import clean_folders
+
+    modo = "lixeira" if trash else f"{workers} threads"
+    log("INFO", "SISTEMA", f"Limpando {len(folders)} pasta(s) ({modo})...")
+
+    inicio = time.perf_counter()
+    for result in clean_folders(folders, workers=workers, trash=trash):
+        detalhe = f"{result.removed} item(ns), {result.seconds:.1f}s"
+        if result.trashed:
+            detalhe += ", movidos para lixeira"
+        for erro in result.errors[:5]:
+            log("ERROR", "SISTEMA", f"Erro ao limpar {erro}")
+        if result.errors:
+            log("WARN", "SISTEMA", f"Pasta limpa com {len(result.errors)} erro(s): {result.folder} ({detalhe})")
+        else:
+            log("SUCCESS", "SISTEMA", f"Pasta limpa: {result.folder} ({detalhe})")
+
+    log("SUCCESS", "SISTEMA", f"Limpeza concluída em {time.perf_counter() - inicio:.1f}s")
+
+
+# ==================== STEPS ====================
+# Cada entry recebe (credentials, args) e retorna True/False
+
+def run_amplis_reag(credentials: dict, args) -> bool:
+    return run_amplis(credentials, args.data_inicial, args.data_final,
+                      args.csv, args.pdf, "reag")
+
+
+def run_amplis_master(credentials: dict, args) -> bool:
+    return run_amplis(credentials, args.data_inicial, args.data_final,
+                      args.csv, args.pdf, "master")
+
+
+def _selected_funds(creds: dict, fundos_json: Optional[str]) -> list:
+    """Fundos do argumento JSON ou da selecao salva nas credenciais"""
+    if fundos_json:
+        return json.loads(fundos_json)
+    if not creds.get("usar_todos", True):
+        return creds.get("fundos_selecionados", [])
+    return []
+
+
+def run_maps(credentials: dict, args) -> bool:
+    log("INFO", "MAPS", "Iniciando execução")
+    try:
+        from maps_download_consolidado import run_maps_completo
+        creds = credentials["maps"]
+        paths = credentials["paths"]
+
+        run_maps_completo(
+            creds["url"],
+            paths.get("maps", ""),
+            paths.get("pdf", ""),
+            paths.get("maps", ""),
+            creds["username"],
+            creds["password"],
+            args.data_inicial,
+            args.data_final,
+            args.maps_excel, args.maps_pdf, args.maps_ativo, args.maps_passivo,
+            _selected_funds(creds, args.maps_fundos)
+        )
+        log("SUCCESS", "MAPS", "Execução concluída com sucesso")
+        return True
+    except Exception as e:
+        log("ERROR", "MAPS", f"Erro: {str(e)}")
+        return False
+
+
+def run_fidc(credentials: dict, args) -> bool:
+    log("INFO", "FIDC ESTOQUE", "Iniciando execução")
+    try:
+        from FIDC_ESTOQUE_V02 import run_fidc_estoque
+        creds = credentials["fidc"]
+        paths = credentials["paths"]
+
+        run_fidc_estoque(
+            creds["username"],
+            creds["password"],
+            paths.get("fidc", ""),
+            creds["url"],
+            args.data_inicial,
+            args.data_final,
+            _selected_funds(creds, args.fidc_fundos)
+        )
+        log("SUCCESS", "FIDC ESTOQUE", "Execução concluída com sucesso")
+        return True
+    except Exception as e:
+        log("ERROR", "FIDC ESTOQUE", f"Erro: {str(e)}")
+        return False
+
+
+def run_jcot(credentials: dict, args) -> bool:
+    log("INFO", "JCOT", "Iniciando execução")
+    try:
+        from Jcot_V02 import run_jcot as jcot_run
+        creds = credentials["jcot"]
+        paths = credentials["paths"]
+        jcot_run(
+            creds["username"],
+            creds["password"],
+            paths.get("jcot", ""),
+            creds["url"],
+            args.data_inicial,
+            args.data_final
+        )
+        log("SUCCESS", "JCOT", "Execução concluída com sucesso")
+        return True
+    except Exception as e:
+        log("ERROR", "JCOT", f"Erro: {str(e)}")
+        return False
+
+
+def run_britech(credentials: dict, args) -> bool:
+    log("INFO", "BRITECH", "Iniciando execução")
+    try:
+        from query_britech_V02 import run_britech as britech_run
+        creds = credentials["britech"]
+        paths = credentials["paths"]
+        britech_run(
+            paths.get("britech", ""),
+            creds["url"],
+            creds["username"],
+            creds["password"],
+            True  # base_total
+        )
+        log("SUCCESS", "BRITECH", "Execução concluída com sucesso")
+        return True
+    except Exception as e:
+        log("ERROR", "BRITECH", f"Erro: {str(e)}")
+        return False
+
+
+def run_qore(credentials: dict, args) -> bool:
+    log("INFO", "QORE", "Iniciando execução")
+    try:
+        from automacao_qore_v5 import run_qore as qore_run
+        creds = credentials["qore"]
+        paths = credentials["paths"]
+
+        # QORE tem muitos parâmetros - usando valores padrão
+        # Parse dates for QORE
+        dt_inicial = datetime.strptime(args.data_inicial, "%d/%m/%Y")
+        dt_final = datetime.strptime(args.data_final, "%d/%m/%Y") if args.data_final else dt_inicial
+
+        qore_run(
+            paths.get("bd_xlsx", ""),  # bd_path
+            paths.get("pdf", ""),         # pdf_path
+            paths.get("qore_excel", ""),  # excel_path
+            "",                            # planilha_aux
+            creds["url"],
+            creds["password"],
+            creds["username"],
+            None,                          # df
+            True,                          # QORE_enabled
+            args.qore_pdf,                 # PDF_enabled
+            args.qore_lote_pdf,            # modo_lote_pdf
+            args.qore_excel,               # Excel_enabled
+            args.qore_lote_excel,          # modo_lote_excel
+            dt_inicial,                    # data_inicial
+            dt_final,                      # data_final
+            paths.get("selenium_temp", ""), # SELENIUM_DOWNLOAD_TEMP_PATH
+            _selected_funds(creds, args.qore_fundos)  # fundos_selecionados
+        )
+        log("SUCCESS", "QORE", "Execução concluída com sucesso")
+        return True
+    except Exception as e:
+        import traceback
+        log("ERROR", "QORE", f"Erro: {str(e)}")
+        log("ERROR", "QORE", f"Traceback: {traceback.format_exc()}")
+        return False
+
+
+def run_trustee(credentials: dict, args) -> bool:
+    log("INFO", "TRUSTEE", "Iniciando execução")
+    try:
+        from trustee import run_trustee as trustee_run
+        paths = credentials["paths"]
+        result = trustee_run(
+            paths.get("trustee", ""),
+            args.data_inicial,
+            args.data_final,
+            timeout=float(os.getenv("ETL_TRUSTEE_TIMEOUT", "300")),
+            log=lambda linha: log("INFO", "TRUSTEE", linha),
+        )
+        if result["skipped"]:
+            log("SUCCESS", "TRUSTEE", "Execução já registrada no ledger")
+        else:
+            log("SUCCESS", "TRUSTEE",
+                f"Execução concluída em {result['seconds']:.1f}s ({len(result['files'])} arquivo(s) novo(s))")
+        return True
+    except Exception as e:
+        log("ERROR", "TRUSTEE", f"Erro: {str(e)}")
+        return False
+
+
+# Registro declarativo: nome -> entry, dependencias, classe de recurso e
+# pastas de saida (chaves de credentials["paths"]). Os modulos detectam
+# downloads pelo conteudo da pasta, entao steps cujas pastas resolvem para o
+# mesmo diretorio (pdf: AMPLIS, MAPS e QORE; ou chaves diferentes apontando
+# para a mesma pasta) nunca rodam juntos - ver _resolve_folders.
+# amplis_master ainda depende de amplis_reag para manter a ordem antiga.
+STEPS = {
+    step.name: step for step in [
+        Step("amplis_reag", run_amplis_reag, resource="browser", folders=("csv", "pdf")),
+        Step("amplis_master", run_amplis_master, deps=("amplis_reag",), resource="browser",
+             folders=("csv", "pdf")),
+        Step("maps", run_maps, resource="browser", folders=("maps", "pdf")),
+        Step("fidc", run_fidc, resource="browser", folders=("fidc",)),
+        Step("jcot", run_jcot, resource="browser", folders=("jcot",)),
+        Step("britech", run_britech, resource="browser", folders=("britech",)),
+        Step("qore", run_qore, resource="browser", folders=("pdf", "qore_excel", "selenium_temp")),
+        Step("trustee", run_trustee, resource="io", folders=("trustee",)),
+    ]
+}
+
+
+def _resolve_folders(steps: list, paths: dict) -> list:
+    """Troca as chaves de pasta de cada step pelos diretorios normalizados de `paths`"""
+    return [
+        step._replace(folders=tuple(sorted({
+            os.path.normcase(os.path.abspath(paths[key]))
+            for key in step.folders if paths.get(key)
+        })))
+        for step in steps
+    ]
+
+
+def _promote_staging(staging_dir: str, staged: dict, final: dict, keys: list):
+    """Move os arquivos do staging do shard para as pastas configuradas"""
+    from ledger import relocate_files
+    from staging import discard, promote
+
+    movidos, erros = promote(staged, final, keys)
+    if movidos:
+        relocate_files(movidos)
+    log("INFO", "SISTEMA", f"Staging: {len(movidos)} arquivo(s) movido(s) para as pastas de saida")
+    for erro in erros:
+        log("WARN", "SISTEMA", f"Staging: {erro}")
+    if not erros:
+        discard(staging_dir)
+
+
+def _init_step_worker(checkpoint_cfg: Optional[tuple], ledger_cfg: Optional[tuple] = None):
+    """Inicializa o processo worker (checkpoint e ledger nao sao herdados com spawn)"""
+    if checkpoint_cfg is not None:
+        from checkpoint import configure as configure_checkpoint
+        configure_checkpoint(*checkpoint_cfg)
+    if ledger_cfg is not None:
+        from ledger import configure as configure_ledger
+        configure_ledger(*ledger_cfg)
+
+
+def _step_counters() -> dict:
+    """Unidades puladas pelo checkpoint/ledger no processo do step (somadas no principal)"""
+    from checkpoint import get_store
+    from ledger import get_ledger
+    store, ledger = get_store(), get_ledger()
+    return {
+        "checkpoint": store.skipped if store is not None else 0,
+        "ledger": ledger.skipped if ledger is not None else 0,
+    }
+
 
 def main():
     parser = argparse.ArgumentParser(description='ETL Pipeline Executor')
     parser.add_argument('--config', default='config/credentials.encrypted.json',
                         help='Caminho para arquivo de credenciais (encrypted ou plaintext)')
     parser.add_argument('--sistemas', nargs='+', 
-                        choices=['amplis_reag', 'amplis_master', 'maps', 'fidc', 'jcot', 'britech', 'qore', 'trustee'],
+                        choices=list(STEPS),
                         help='Sistemas a executar')
     parser.add_argument('--data-inicial', help='Data inicial (DD/MM/YYYY)')
     parser.add_argument('--data-final', help='Data final (DD/MM/YYYY)')
     parser.add_argument('--limpar', action='store_true', help='Limpar pastas antes de executar')
+    parser.add_argument('--limpar-workers', type=int,
+                        default=int(os.getenv("ETL_CLEANUP_WORKERS", "8")),
+                        help='Threads usadas para apagar arquivos na limpeza')
+    parser.add_argument('--limpar-lixeira', action='store_true',
+                        default=os.getenv("ETL_CLEANUP_TRASH", "false").lower() == "true",
+                        help='Limpar renomeando a pasta para uma lixeira (apagada em segundo plano)')
     parser.add_argument('--dry-run', action='store_true', help='Apenas mostrar o que seria executado')
     parser.add_argument('--no-csv', action='store_false', dest='csv', help='Não baixar CSV (AMPLIS)')
     parser.set_defaults(csv=True)
@@ -221,9 +478,36 @@ def main():
     parser.add_argument('--fidc-fundos', help='JSON lista de fundos FIDC')
     parser.add_argument('--maps-fundos', help='JSON lista de fundos MAPS')
     parser.add_argument('--qore-fundos', help='JSON lista de fundos QORE')
+
+    # Checkpoint / resume
+    parser.add_argument('--job-id', type=int, help='ID do job (chave do checkpoint de unidades concluidas)')
+    parser.add_argument('--resume', action='store_true', help='Pular unidades concluidas no checkpoint do job')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignorar o ledger e baixar novamente unidades ja concluidas')
+    parser.add_argument('--staging-dir',
+                        help='Baixar em pastas proprias e mover para as configuradas ao final (shards)')
+    parser.add_argument('--key-fd', type=int, help='Descritor herdado com a chave derivada das credenciais (uso interno do backend)')
+
+    # Paralelismo entre sistemas
+    parser.add_argument('--max-workers', type=int,
+                        default=int(os.getenv("ETL_MAX_STEP_WORKERS", "0")),
+                        help='Maximo de sistemas simultaneos (0 = todos)')
+    parser.add_argument('--max-browsers', type=int,
+                        default=int(os.getenv("ETL_MAX_BROWSERS", "3")),
+                        help='Maximo de navegadores simultaneos')
+    parser.add_argument('--sequencial', action='store_true',
+                        help='Executar sistemas um por vez no processo atual')
     
     args = parser.parse_args()
 
+    # Ler a chave entregue pelo backend o quanto antes (validade curta)
+    data_key = None
+    if args.key_fd is not None:
+        from crypto import read_data_key
+        data_key = read_data_key(args.key_fd)
+        if data_key is None:
+            log("WARN", "SISTEMA", "Chave do backend invalida ou expirada - usando ETL_MASTER_KEY")
+
     # Resolve caminho do config com fallback para plaintext
     script_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(script_dir, '..', args.config)
@@ -246,7 +530,7 @@ def main():
                     config_path = plaintext_path
 
     log("INFO", "SISTEMA", f"Carregando configuracoes de: {config_path}")
-    credentials = load_credentials(config_path)
+    credentials = load_credentials(config_path, data_key)
     
     # Data padrão: D-1
     if not args.data_inicial:
@@ -258,198 +542,100 @@ def main():
     
     if args.dry_run:
         log("INFO", "SISTEMA", f"[DRY-RUN] Sistemas: {args.sistemas}")
+        for i, onda in enumerate(waves(plan(STEPS, args.sistemas or [])), 1):
+            log("INFO", "SISTEMA", f"[DRY-RUN] Onda {i}: {', '.join(onda)}")
         return 0
     
     # Limpar pastas se solicitado
     if args.limpar:
         paths = credentials.get("paths", {})
         folders_to_clean = [v for v in paths.values() if v]
-        clear_folders(folders_to_clean)
+        clear_folders(folders_to_clean, args.limpar_workers, args.limpar_lixeira)
     
+    # Checkpoint de unidades (sistema, fundo, data) do job
+    checkpoint_store = None
+    checkpoint_cfg = None
+    if args.job_id is not None:
+        from checkpoint import configure as configure_checkpoint
+        checkpoint_dir = os.getenv(
+            "ETL_CHECKPOINT_DIR",
+            os.path.join(script_dir, '..', 'data', 'checkpoints')
+        )
+        checkpoint_cfg = (checkpoint_dir, args.job_id, args.resume)
+        checkpoint_store = configure_checkpoint(*checkpoint_cfg)
+        if args.resume:
+            log("INFO", "SISTEMA", f"Retomando job {args.job_id}: {checkpoint_store.completed_count} unidade(s) ja concluida(s)")
+
+    # Ledger permanente de unidades (sistema, fundo, tipo, data) ja baixadas
+    ledger_path = os.getenv("ETL_LEDGER_PATH", os.path.join(script_dir, '..', 'data', 'ledger.db'))
+    ledger_cfg = (ledger_path, args.force)
+    try:
+        from ledger import configure as configure_ledger
+        configure_ledger(*ledger_cfg)
+        if args.force:
+            log("INFO", "SISTEMA", "--force: unidades ja registradas no ledger serao baixadas novamente")
+    except Exception as e:
+        log("WARN", "SISTEMA", f"Ledger indisponivel ({e}) - todas as unidades serao baixadas")
+        ledger_cfg = None
+
     # Executar sistemas
     sistemas = args.sistemas or []
     total = len(sistemas)
-    sucesso = 0
-    erros = 0
-    
+
     log("INFO", "SISTEMA", f"Iniciando pipeline com {total} sistema(s)")
-    
-    for sistema in sistemas:
-        try:
-            if sistema == 'amplis_reag':
-                if run_amplis(credentials, args.data_inicial, args.data_final, 
-                             args.csv, args.pdf, "reag"):
-                    sucesso += 1
-                else:
-                    erros += 1
-            elif sistema == 'amplis_master':
-                if run_amplis(credentials, args.data_inicial, args.data_final,
-                             args.csv, args.pdf, "master"):
-                    sucesso += 1
-                else:
-                    erros += 1
-            elif sistema == 'maps':
-                log("INFO", "MAPS", "Iniciando execução")
-                try:
-                    from maps_download_consolidado import run_maps_completo
-                    creds = credentials["maps"]
-                    paths = credentials["paths"]
-                    
-                    # Determine funds
-                    fundos = []
-                    if args.maps_fundos:
-                        fundos = json.loads(args.maps_fundos)
-                    elif not creds.get("usar_todos", True):
-                        fundos = creds.get("fundos_selecionados", [])
-                        
-                    run_maps_completo(
-                        creds["url"],
-                        paths.get("maps", ""),
-                        paths.get("pdf", ""),
-                        paths.get("maps", ""),
-                        creds["username"],
-                        creds["password"],
-                        args.data_inicial,
-                        args.data_final,
-                        args.maps_excel, args.maps_pdf, args.maps_ativo, args.maps_passivo, fundos
-                    )
-                    log("SUCCESS", "MAPS", "Execução concluída com sucesso")
-                    sucesso += 1
-                except Exception as e:
-                    log("ERROR", "MAPS", f"Erro: {str(e)}")
-                    erros += 1
-            elif sistema == 'fidc':
-                log("INFO", "FIDC ESTOQUE", "Iniciando execução")
-                try:
-                    from FIDC_ESTOQUE_V02 import run_fidc_estoque
-                    creds = credentials["fidc"]
-                    paths = credentials["paths"]
-                    
-                    # Determine funds
-                    fundos = []
-                    if args.fidc_fundos:
-                        fundos = json.loads(args.fidc_fundos)
-                    elif not creds.get("usar_todos", True):
-                        fundos = creds.get("fundos_selecionados", [])
-
-                    run_fidc_estoque(
-                        creds["username"],
-                        creds["password"],
-                        paths.get("fidc", ""),
-                        creds["url"],
-                        args.data_inicial,
-                        args.data_final,
-                        fundos
-                    )
-                    log("SUCCESS", "FIDC ESTOQUE", "Execução concluída com sucesso")
-                    sucesso += 1
-                except Exception as e:
-                    log("ERROR", "FIDC ESTOQUE", f"Erro: {str(e)}")
-                    erros += 1
-            elif sistema == 'jcot':
-                log("INFO", "JCOT", "Iniciando execução")
-                try:
-                    from Jcot_V02 import run_jcot
-                    creds = credentials["jcot"]
-                    paths = credentials["paths"]
-                    run_jcot(
-                        creds["username"],
-                        creds["password"],
-                        paths.get("jcot", ""),
-                        creds["url"],
-                        args.data_inicial,
-                        args.data_final
-                    )
-                    log("SUCCESS", "JCOT", "Execução concluída com sucesso")
-                    sucesso += 1
-                except Exception as e:
-                    log("ERROR", "JCOT", f"Erro: {str(e)}")
-                    erros += 1
-            elif sistema == 'britech':
-                log("INFO", "BRITECH", "Iniciando execução")
-                try:
-                    from query_britech_V02 import run_britech
-                    creds = credentials["britech"]
-                    paths = credentials["paths"]
-                    run_britech(
-                        paths.get("britech", ""),
-                        creds["url"],
-                        creds["username"],
-                        creds["password"],
-                        True  # base_total
-                    )
-                    log("SUCCESS", "BRITECH", "Execução concluída com sucesso")
-                    sucesso += 1
-                except Exception as e:
-                    log("ERROR", "BRITECH", f"Erro: {str(e)}")
-                    erros += 1
-            elif sistema == 'qore':
-                log("INFO", "QORE", "Iniciando execução")
-                try:
-                    from automacao_qore_v5 import run_qore
-                    creds = credentials["qore"]
-                    paths = credentials["paths"]
-                    
-                    # Determine funds
-                    fundos = []
-                    if args.qore_fundos:
-                        fundos = json.loads(args.qore_fundos)
-                    elif not creds.get("usar_todos", True):
-                        fundos = creds.get("fundos_selecionados", [])
-
-                    # QORE tem muitos parâmetros - usando valores padrão
-                    # Parse dates for QORE
-                    dt_inicial = datetime.strptime(args.data_inicial, "%d/%m/%Y")
-                    dt_final = datetime.strptime(args.data_final, "%d/%m/%Y") if args.data_final else dt_inicial
-
-                    run_qore(
-                        paths.get("bd_xlsx", ""),  # bd_path
-                        paths.get("pdf", ""),         # pdf_path
-                        paths.get("qore_excel", ""),  # excel_path
-                        "",                            # planilha_aux
-                        creds["url"],
-                        creds["password"],
-                        creds["username"],
-                        None,                          # df
-                        True,                          # QORE_enabled
-                        args.qore_pdf,                 # PDF_enabled
-                        args.qore_lote_pdf,            # modo_lote_pdf
-                        args.qore_excel,               # Excel_enabled
-                        args.qore_lote_excel,          # modo_lote_excel
-                        dt_inicial,                    # data_inicial
-                        dt_final,                      # data_final
-                        paths.get("selenium_temp", ""), # SELENIUM_DOWNLOAD_TEMP_PATH
-                        fundos                         # fundos_selecionados
-                    )
-                    log("SUCCESS", "QORE", "Execução concluída com sucesso")
-                    sucesso += 1
-                except Exception as e:
-                    import traceback
-                    log("ERROR", "QORE", f"Erro: {str(e)}")
-                    log("ERROR", "QORE", f"Traceback: {traceback.format_exc()}")
-                    erros += 1
-            elif sistema == 'trustee':
-                log("INFO", "TRUSTEE", "Iniciando execução")
-                try:
-                    import subprocess
-                    bat_path = r"C:\bloko\Fundos - Documentos\00. Monitoramento\01. Rotinas\0. Python\TRUSTEE\Rodar_automacao_trustee.bat"
-                    if os.path.exists(bat_path):
-                        subprocess.run([bat_path], check=True, timeout=300, shell=True)
-                        log("SUCCESS", "TRUSTEE", "Execução concluída com sucesso")
-                        sucesso += 1
-                    else:
-                        log("ERROR", "TRUSTEE", f"Arquivo .bat não encontrado: {bat_path}")
-                        erros += 1
-                except Exception as e:
-                    log("ERROR", "TRUSTEE", f"Erro: {str(e)}")
-                    erros += 1
-            else:
-                log("WARN", sistema.upper(), "Sistema desconhecido")
-                erros += 1
-        except Exception as e:
-            log("ERROR", sistema.upper(), f"Erro: {str(e)}")
-            erros += 1
-    
+
+    # Shard: downloads em pastas proprias, movidos para as configuradas ao final
+    planned = plan(STEPS, sistemas)
+    staging = None
+    if args.staging_dir:
+        from staging import stage_paths
+        final_paths = credentials.get("paths", {})
+        staging_keys = sorted({key for step in planned for key in step.folders})
+        credentials["paths"] = stage_paths(final_paths, staging_keys, args.staging_dir)
+        staging = (args.staging_dir, credentials["paths"], final_paths, staging_keys)
+        log("INFO", "SISTEMA", f"Staging do shard: {args.staging_dir}")
+
+    steps = _resolve_folders(planned, credentials.get("paths", {}))
+    max_workers = 1 if args.sequencial else (args.max_workers or len(steps))
+    if max_workers > 1 and len(steps) > 1:
+        log("INFO", "SISTEMA", f"Execucao paralela: ate {max_workers} sistema(s), "
+                               f"{args.max_browsers} navegador(es) simultaneos")
+
+    def on_start(step: Step):
+        log("INFO", "SISTEMA", f"Step {step.name} iniciado ({step.resource})")
+
+    def on_finish(step: Step, ok: bool, elapsed: float):
+        log("INFO" if ok else "WARN", "SISTEMA",
+            f"Step {step.name} {'concluido' if ok else 'com erro'} em {elapsed:.1f}s")
+
+    # Steps rodam em processos proprios: os contadores voltam pelo scheduler
+    pulados = Counter()
+    results = run_steps(
+        steps,
+        args=(credentials, args),
+        max_workers=max_workers,
+        limits={"browser": max(1, args.max_browsers)},
+        initializer=_init_step_worker,
+        initargs=(checkpoint_cfg, ledger_cfg),
+        on_start=on_start,
+        on_finish=on_finish,
+        collect=_step_counters,
+        counters=pulados,
+    )
+    sucesso = sum(1 for ok in results.values() if ok)
+    erros = len(results) - sucesso
+
+    if staging is not None:
+        _promote_staging(*staging)
+
+    if pulados["checkpoint"]:
+        log("INFO", "SISTEMA", f"Checkpoint: {pulados['checkpoint']} unidade(s) pulada(s)")
+    if checkpoint_store is not None and erros == 0:
+        checkpoint_store.discard()
+
+    if pulados["ledger"]:
+        log("INFO", "SISTEMA", f"Ledger: {pulados['ledger']} unidade(s) ja baixada(s) em execucoes anteriores")
+
     log("SUCCESS", "SISTEMA", f"Pipeline finalizado: {sucesso} executados, {erros} erros")
     return 0 if erros == 0 else 1
 
@@ -1,20 +1,69 @@
 import os
-import time
 from selenium import webdriver
-from datetime import datetime, timedelta
+from datetime import datetime
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from amplis_functions import clear_folder, wait_for_downloads 
-import holidays
+from base_driver import (
+    block_resources, download_snapshot, lean_options, pause, pooled_driver, wait_clickable, wait_download_started,
+    wait_network_idle, wait_until,
+)
+from business_calendar import get_calendar
+import http_export
+
+# Eventos de progresso e ledger (utils/) - no-op quando rodando standalone
+try:
+    from progress import report_progress
+    from ledger import ledger_done, record_done, snapshot, new_files
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    def report_progress(*args, **kwargs):
+        pass
+
+    def ledger_done(*args, **kwargs):
+        return False
+
+    def record_done(*args, **kwargs):
+        pass
+
+    def snapshot(*args, **kwargs):
+        return set()
 
+    def new_files(*args, **kwargs):
+        return []
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+# Sessao persistida (utils/) - sem ela, login completo sempre
+try:
+    from session_store import restore_session, save_session
+except ImportError:
+    def restore_session(*args, **kwargs):
+        return False
 
+    def save_session(*args, **kwargs):
+        return False
+
+
+@span("setup_driver")
 def setup_driver(download_path, url):
     """Configura o driver do Selenium com opções do Chrome."""
     try:
+        # Chrome ja aberto pelo backend, se houver pool
+        driver = pooled_driver(download_path)
+        if driver is not None:
+            driver.get(url)
+            return driver
+
         chrome_options = Options()
         prefs = {
             "download.default_directory": os.path.abspath(download_path),
@@ -23,9 +72,11 @@ def setup_driver(download_path, url):
             "profile.content_settings.exceptions.automatic_downloads.*.setting": 1,
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        lean_options(chrome_options)
 
         # Inicializa o driver
         driver = webdriver.Chrome(options=chrome_options)
+        block_resources(driver)
         driver.get(url)
         print(f"Acessando {url}")
         return driver
@@ -33,8 +84,29 @@ def setup_driver(download_path, url):
         print(f"Erro ao configurar o driver: {e}")
         return None
 
+AREA_LOGADA = (By.XPATH, "//a[@href='/reports/meusRelatorios']")
+
+
+def _area_logada(driver, timeout=10):
+    """Menu de relatorios so existe logado (a tela de login tem j_username)"""
+    try:
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_element_located(AREA_LOGADA),
+            EC.presence_of_element_located((By.ID, "j_username")),
+        ))
+    except TimeoutException:
+        return False
+    return bool(driver.find_elements(*AREA_LOGADA))
+
+
+@span("login")
 def login(driver, username, password):
     """Realiza login no sistema utilizando o Selenium."""
+    # Sessao da execucao anterior ainda valida: login pulado
+    if restore_session(driver, "fidc", driver.current_url, _area_logada):
+        print("Sessão anterior restaurada, login pulado.")
+        return True
+
     try:
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "j_username")))
         driver.find_element(By.ID, "j_username").send_keys(username)
@@ -43,72 +115,108 @@ def login(driver, username, password):
         botao.click()
 
         print("Login realizado com sucesso.")
+        if _area_logada(driver):
+            save_session(driver, "fidc")
         return True
     except Exception as e:
         print(f"Erro no login: {e}")
         return False
 
+OPCOES_FUNDO = (By.XPATH, "//*[starts-with(@id, 'fundoSelecionado_chzn_o_')]")
+
+
+def _opcao_fundo(driver, fundo_nome, timeout=5):
+    """
+    Opcao visivel do dropdown (chosen) depois da busca: espera o filtro deixar
+    uma opcao com o nome do fundo; no timeout fica com a primeira visivel,
+    como antes (sleep de 5s + primeira visivel).
+    """
+    termo = fundo_nome.casefold()
+
+    def filtrada(d):
+        visiveis = [el for el in d.find_elements(*OPCOES_FUNDO) if el.is_displayed()]
+        return next((el for el in visiveis if termo in el.text.casefold()), False)
+
+    try:
+        return wait_until(driver, filtrada, timeout, replaces=5, kind="chosen")
+    except TimeoutException:
+        elements = WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located(OPCOES_FUNDO))
+        return next((el for el in elements if el.is_displayed()), None)
+
+
+@span("baixar_estoque")
 def baixar_estoque(driver,initial_date,final_date,lista_fundos):
+    """
+    Gera os documentos de estoque no portal (o download e feito depois em
+    baixar_relatorios). Pula (fundo, dia) ja registrados no ledger.
+
+    Returns:
+        Lista de (fundo, data) cujos documentos foram gerados
+    """
+    gerados = []
     #entrar na aba estoque
     botao = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/reports/estoque']")))
     botao.click()
 
     #selecionar data
-    br_holidays = holidays.Brazil(state='SP')
     initial_date= datetime.strptime(initial_date, '%d/%m/%Y').date()
     final_date = datetime.strptime(final_date, '%d/%m/%Y').date()
-    current_date= initial_date
     num_documentos = 0
-    
-    print(current_date, final_date)
-    while current_date <= final_date:
-        if current_date.weekday() < 5 and current_date.strftime('%Y-%m-%d') not in br_holidays:
-            print(f"📅 Processando dia: {current_date.strftime('%d/%m/%Y')}")
-            current_date_ajustado = current_date.strftime('%d/%m/%Y')
+    pulados = 0
 
-            
-            
-            # Loop para processar cada fundo na lista
-            for fundo_nome in lista_fundos:
-                print(f"➡️ Processando fundo: {fundo_nome}")
-
-                # Preencher a data
-                driver.find_element(By.ID, "data").clear()
-                driver.find_element(By.ID, "data").send_keys(current_date_ajustado)
-                time.sleep(1)
+    dias_uteis = get_calendar("SP").range(initial_date, final_date)
+    total_unidades = len(dias_uteis) * len(lista_fundos)
+    
+    print(initial_date, final_date)
+    for current_date in dias_uteis:
+        print(f"📅 Processando dia: {current_date.strftime('%d/%m/%Y')}")
+        current_date_ajustado = current_date.strftime('%d/%m/%Y')
 
-                # Selecionar fundo
-                fundo = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "fundoSelecionado_chzn")))
-                fundo.click()
-                time.sleep(1)
+        
+        
+        # Loop para processar cada fundo na lista
+        for fundo_nome in lista_fundos:
+            report_progress("fidc", num_documentos, total_unidades, "fundos", pulados=pulados)
+            if ledger_done("fidc", fundo_nome, "estoque", current_date):
+                print(f"⏭️ {fundo_nome} em {current_date_ajustado} já baixado em execução anterior (ledger). Pulando.")
+                num_documentos += 1
+                pulados += 1
+                continue
+            print(f"➡️ Processando fundo: {fundo_nome}")
 
-                fundo_search = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'chzn-search')]//input")))
-                fundo_search.clear()
-                fundo_search.send_keys(fundo_nome)
-                time.sleep(5)
+            # Preencher a data
+            driver.find_element(By.ID, "data").clear()
+            driver.find_element(By.ID, "data").send_keys(current_date_ajustado)
 
-                elements = WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.XPATH, "//*[starts-with(@id, 'fundoSelecionado_chzn_o_')]")))
+            # Selecionar fundo
+            fundo = wait_clickable(driver, (By.ID, "fundoSelecionado_chzn"), replaces=1)
+            fundo.click()
 
-                for element in elements:
-                    if element.is_displayed():  # Verifica se o elemento está visível
-                        element.click()
-                        break  # Para após encontrar o primeiro disponível
+            fundo_search = wait_clickable(driver, (By.XPATH, "//div[contains(@class, 'chzn-search')]//input"), replaces=1)
+            fundo_search.clear()
+            fundo_search.send_keys(fundo_nome)
 
-                time.sleep(1)
+            element = _opcao_fundo(driver, fundo_nome)
+            if element is not None:
+                element.click()
 
-                # Gerar documento
-                gerar_documento = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "csv")))
-                gerar_documento.click()
-                time.sleep(1)
+            # Gerar documento
+            gerar_documento = wait_clickable(driver, (By.ID, "csv"), replaces=1)
+            gerar_documento.click()
+            wait_network_idle(driver, replaces=1)
 
-                num_documentos += 1
-                print(f"✔️ Documento gerado para {fundo_nome} ({num_documentos} no total)")
+            num_documentos += 1
+            gerados.append((fundo_nome, current_date))
+            print(f"✔️ Documento gerado para {fundo_nome} ({num_documentos} no total)")
 
-        # Avança para o próximo dia útil
-        current_date += timedelta(days=1)
+    report_progress("fidc", total_unidades, total_unidades, "fundos", pulados=pulados)
+    return gerados
    
 
-def atualizar_relatorios(driver):
+@span("atualizar_relatorios")
+def atualizar_relatorios(driver, intervalo_max=5):
+    # Intervalo entre refreshes: 1s, 2s, 4s, ... ate intervalo_max (antes 5s fixos)
+    intervalo = 1
     while True:
         try:
             # Aguarda a tabela estar visível
@@ -124,7 +232,8 @@ def atualizar_relatorios(driver):
             # Se encontrou "AGUARDANDO", clica no botão refresh
             if encontrou_palavra:
                 print("Encontrado 'AGUARDANDO', clicando no botão de refresh...")
-                time.sleep(5)
+                pause(intervalo)
+                intervalo = min(intervalo * 2, intervalo_max)
                 botao_refresh = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "refresh")))
                 botao_refresh.click()
 
@@ -140,11 +249,40 @@ def atualizar_relatorios(driver):
             print(f"Ocorreu um erro: {e}")
             break  # Encerra caso haja erro
 
-def baixar_relatorios(driver):
+def _baixar_por_http(driver, download_path):
+    """
+    Baixa os arquivos de meusRelatorios por HTTP, em paralelo, reproduzindo
+    o submit de cada botao "arquivo".
+
+    Returns:
+        Botoes cujo arquivo ja foi salvo em download_path
+    """
+    pedidos = {}
+    for botao in driver.find_elements(By.NAME, "arquivo"):
+        try:
+            pedidos[botao] = http_export.form_request(driver, botao)
+        except Exception as e:
+            print(f"Sem download direto para o botão: {e}")
+    if not pedidos:
+        return set()
+
+    with http_export.session_from_driver(driver) as sessao:
+        resultados = http_export.fetch_all(sessao, pedidos.values(), download_path)
+
+    baixados = {
+        botao for botao, (_, resultado) in zip(pedidos, resultados)
+        if not isinstance(resultado, Exception)
+    }
+    print(f"{len(baixados)}/{len(pedidos)} arquivo(s) baixados por HTTP")
+    return baixados
+
+
+@span("baixar_relatorios")
+def baixar_relatorios(driver, download_path=None):
     #entrar na aba meu estoque
     botao = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//a[@href='/reports/meusRelatorios']")))
     botao.click()
-    time.sleep(1)
+    wait_network_idle(driver, replaces=1)
 
     atualizar_relatorios(driver)
 
@@ -153,6 +291,10 @@ def baixar_relatorios(driver):
     # Lista para armazenar os botões já clicados
     botoes_clicados = set()
 
+    # Download direto por HTTP com os cookies do Selenium; o que falhar cai no clique
+    if download_path and http_export.enabled():
+        botoes_clicados = _baixar_por_http(driver, download_path)
+
     while True:
         # Captura todos os botões com name="arquivo"
         botoes = driver.find_elements(By.NAME, "arquivo")
@@ -167,14 +309,18 @@ def baixar_relatorios(driver):
         for botao in botoes_nao_clicados:
             try:
                 WebDriverWait(driver, 10).until(EC.element_to_be_clickable(botao))
+                antes = download_snapshot(download_path) if download_path else None
                 botao.click()
                 print("Arquivo baixado!")
 
                 # Adiciona o botão à lista de botões já clicados
                 botoes_clicados.add(botao)
 
-                # Aguarda um pouco para garantir que o download iniciou
-                time.sleep(1)
+                # Garante que o download iniciou antes do proximo clique
+                if download_path:
+                    wait_download_started(download_path, antes, timeout=10, replaces=1)
+                else:
+                    pause(1)
 
             except Exception as e:
                 print(f"Erro ao clicar no botão: {e}")
@@ -199,10 +345,19 @@ def run_fidc_estoque (USERNAME_FIDC,PASSWORD_FIDC,FIDC_path,url_FIDC,initial_dat
             else:
                 print("Falha ao realizar login. Verifique suas credenciais.")
             
-            baixar_estoque(driver,initial_date, final_date, lista_fundos)
-            baixar_relatorios(driver)
+            gerados = baixar_estoque(driver,initial_date, final_date, lista_fundos)
+            if not gerados:
+                print("Nenhum documento novo gerado (ledger). Nada a baixar.")
+                return
+
+            antes = snapshot(FIDC_path)
+            baixar_relatorios(driver, FIDC_path)
             wait_for_downloads (FIDC_path)
-            time.sleep(4)
+
+            # Ledger: hash do lote (meusRelatorios baixa todos os documentos juntos)
+            arquivos = new_files(FIDC_path, antes)
+            for fundo_nome, data in gerados:
+                record_done("fidc", fundo_nome, "estoque", data, arquivos)
                 
         finally:
             # Encerrar o driver
@@ -1,5 +1,4 @@
 import os
-import time
 from selenium import webdriver
 from datetime import datetime, timedelta
 from selenium.webdriver.common.by import By
@@ -9,10 +8,24 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from amplis_functions import clear_folder, wait_for_downloads 
+from base_driver import (
+    block_resources, download_snapshot, lean_options, pause, pooled_driver, wait_clickable, wait_download_started,
+    wait_elements, wait_network_idle,
+)
+from spans import span
 
+MENU_HITAREAS = (By.XPATH, "//*[@id='menutree']//div[contains(@class, 'hitarea closed-hitarea expandable-hitarea')]")
+
+@span("setup_driver")
 def setup_driver(download_path, url):
     """Configura o driver do Selenium com opções do Chrome."""
     try:
+        # Chrome ja aberto pelo backend, se houver pool
+        driver = pooled_driver(download_path)
+        if driver is not None:
+            driver.get(url)
+            return driver
+
         chrome_options = Options()
         prefs = {
             "download.default_directory": os.path.abspath(download_path),
@@ -21,9 +34,11 @@ def setup_driver(download_path, url):
             "profile.content_settings.exceptions.automatic_downloads.*.setting": 1,
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        lean_options(chrome_options)
 
         # Inicializa o driver
         driver = webdriver.Chrome(options=chrome_options)
+        block_resources(driver)
         driver.get(url)
         print(f"Acessando {url}")
         return driver
@@ -31,6 +46,7 @@ def setup_driver(download_path, url):
         print(f"Erro ao configurar o driver: {e}")
         return None
 
+@span("login")
 def login(driver, username, password):
     """Realiza login no sistema utilizando o Selenium."""
     try:
@@ -48,25 +64,22 @@ def login(driver, username, password):
         print(f"Erro no login: {e}")
         return False
 
+@span("relatorio_cotista_posicao")
 def relatorio_cotista_posicao(driver):
-    time.sleep(1)
-   # Encontre todos os elementos que correspondem ao XPath
-    elementos = driver.find_elements(By.XPATH, "//*[@id='menutree']//div[contains(@class, 'hitarea closed-hitarea expandable-hitarea')]")
+   # Encontre todos os elementos que correspondem ao XPath (arvore completa do menu)
+    elementos = wait_elements(driver, MENU_HITAREAS, replaces=1, min_count=13)
     
     print(f"Total de elementos: {len(elementos)}")
     for i, el in enumerate(elementos):
         print(f"[{i}] HTML: {el.get_attribute('outerHTML')[:200]}...")
-    time.sleep(0.4)
      #clica em relatorio
-    elementos[9].click()
-    time.sleep(0.4)
-     #clica em cotista
-    elementos[10].click()
-    time.sleep(0.4)
+    wait_clickable(driver, elementos[9], replaces=0.4).click()
+     #clica em cotista (visivel depois que relatorio expande)
+    wait_clickable(driver, elementos[10], replaces=0.4).click()
     #clica em posição
-    elementos[12].click()
-    time.sleep(1)
+    wait_clickable(driver, elementos[12], replaces=0.4).click()
 
+@span("clicar_opcao_por_data")
 def clicar_opcao_por_data(driver):
     try:
             # Localize e clique na opção "Por Data" dentro do submenu "Posição"
@@ -75,23 +88,23 @@ def clicar_opcao_por_data(driver):
             EC.element_to_be_clickable((By.XPATH, "//*[text()='Por Data']"))
         )
         opcao_por_data.click()
-        time.sleep(2)
+        wait_network_idle(driver, replaces=2)
         print("Opção 'Por Data' clicada com sucesso!")
     except Exception as e:
         print(f"Erro ao clicar na opção 'Por Data': {e}")
 
-def clicar_opcao_por_periodo(driver, data_inicio, data_fim):
+@span("clicar_opcao_por_periodo")
+def clicar_opcao_por_periodo(driver, data_inicio, data_fim, download_path=None):
 
      # Localize e clique na opção "Por Período" dentro do submenu "Posição"
     print("Procurando e clicando na opção 'Por Período'...")
-    opcao_por_data = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//*[text()='Por Período']")))
+    opcao_por_data = wait_clickable(driver, (By.XPATH, "//*[text()='Por Período']"), replaces=1)
     opcao_por_data.click()
-    time.sleep(2)
     print("Opção 'Por Período' clicada com sucesso!")
 
-    # Localiza o campo de data pelo atributo 'name'
-    campo_data_inicio = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "dt_posicao_inicio")))
-    campo_data_fim = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "dt_posicao_fim")))
+    # Localiza o campo de data pelo atributo 'name' (formulario carregado)
+    campo_data_inicio = wait_clickable(driver, (By.NAME, "dt_posicao_inicio"), replaces=2)
+    campo_data_fim = wait_clickable(driver, (By.NAME, "dt_posicao_fim"))
 
     # Garante que o campo está visível e editável
    # driver.execute_script("arguments[0].focus();", campo_data_inicio)
@@ -99,40 +112,37 @@ def clicar_opcao_por_periodo(driver, data_inicio, data_fim):
     # Limpa o campo de data
     campo_data_inicio.clear()
     campo_data_fim.clear()
-    time.sleep(1)  # Pequeno delay para evitar problemas
     # Insere a nova data
     campo_data_inicio.send_keys(data_inicio)
     campo_data_fim.send_keys(data_fim)
 
-    time.sleep(0.5)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "tb-confirm"))).click() #confirma em cima da pagina
-    time.sleep(1)
+    wait_clickable(driver, (By.ID, "tb-confirm"), replaces=1.5).click() #confirma em cima da pagina
 
     try:
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//button[span[text()='Sim']]"))).click() #clica ok para periodos longos
-        time.sleep(1)
+        wait_clickable(driver, (By.XPATH, "//button[span[text()='Sim']]"), replaces=1).click() #clica ok para periodos longos
     except:    
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ccf_dwb_buscar"))).click() #setinhado para o lado
-        time.sleep(1)
-        elemento = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, '[id^="slickgrid_"][id$="_col28"]')))
+        wait_clickable(driver, (By.ID, "ccf_dwb_buscar"), replaces=1).click() #setinhado para o lado
+        elemento = wait_clickable(driver, (By.CSS_SELECTOR, '[id^="slickgrid_"][id$="_col28"]'), replaces=1)
         elemento.click() #selecoinada tds os fundos
-        time.sleep(0.5)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "tb-confirm"))).click() #confirma em cima da pagina
-        time.sleep(0.5)
+        wait_clickable(driver, (By.ID, "tb-confirm"), replaces=0.5).click() #confirma em cima da pagina
         #troca para XLSX
-        campo = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "main_cd_tipo_fich_ac")))
+        campo = wait_clickable(driver, (By.ID, "main_cd_tipo_fich_ac"), replaces=0.5)
         campo.click()
         actions = ActionChains(driver)
         actions.double_click(campo).perform()
         campo.clear()
         campo.send_keys(Keys.BACKSPACE * 10)
         campo.send_keys("Arquivo XLSX")
-        time.sleep(0.5)
 
 # CLICA NO OK
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "xpl6"))).click()
-    time.sleep(10)
+    ok = wait_clickable(driver, (By.ID, "xpl6"), replaces=1)
+    antes = download_snapshot(download_path) if download_path else None
+    ok.click()
+    # Espera o download comecar (wait_for_downloads so acompanha os .crdownload)
+    if download_path:
+        wait_download_started(download_path, antes, timeout=60, replaces=10)
+    else:
+        pause(10)
     print("Arquivo JCOT salvo com sucesso.")
 
 
@@ -161,7 +171,7 @@ def run_jcot (USERNAME_JCOT,PASSWORD_JCOT,jcot_path,url_jcot,data_inicio,data_fi
                 print("Falha ao realizar login. Verifique suas credenciais.")
           
             relatorio_cotista_posicao(driver)
-            clicar_opcao_por_periodo(driver,data_inicio, data_fim)
+            clicar_opcao_por_periodo(driver,data_inicio, data_fim, jcot_path)
             wait_for_downloads (jcot_path)
         finally:
             # Encerrar o driver
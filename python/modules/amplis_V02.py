@@ -12,79 +12,214 @@ from amplis_functions import (
     rename_file
 )
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
+from contextlib import contextmanager
 import os
-import time
-from tkinter import messagebox
 import glob
-from tkinter import Tk
 import shutil
 from save_pdfs import save_pdfs
-import holidays
-from datetime import datetime
-from datetime import timedelta
+from base_driver import download_snapshot, set_download_path as _set_download_path, wait_network_idle, wait_until
+from business_calendar import get_calendar
 
+# Progresso, checkpoint e ledger (utils/) - no-op quando rodando standalone
+try:
+    from progress import report_progress
+    from checkpoint import unit_done, mark_unit_done
+    from ledger import ledger_done, record_done, new_files
+    from spans import span
+except ImportError:
+    def report_progress(*args, **kwargs):
+        pass
 
+    def unit_done(*args, **kwargs):
+        return False
 
-def run_reag_process_csv(custom_inical_date=None, custom_final_date=None, USERNAME_REAG=None,PASSWORD_REAG=None, url_reag=None ,csv_path =None):
+    def mark_unit_done(*args, **kwargs):
+        pass
+
+    def ledger_done(*args, **kwargs):
+        return False
+
+    def record_done(*args, **kwargs):
+        pass
+
+    def new_files(*args, **kwargs):
+        return []
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+
+
+# Elemento da tela inicial apos o login (o mesmo que amplis_functions.login espera)
+_HOME_ELEMENT_ID = "mainForm_menu1_label"
+
+
+class AmplisSession:
+    """
+    Chrome autenticado em um portal AMPLIS (REAG ou MASTER).
+
+    O navegador so abre no primeiro login() e o login e feito uma vez; as
+    exportacoes CSV e PDF do mesmo portal reutilizam a sessao trocando apenas
+    a pasta de download. Se a sessao cair (tela inicial sumiu, navegador
+    fechou), o proximo login() abre outro Chrome e autentica de novo.
+
+    As exportacoes rodam em sequencia na mesma aba: o formulario JSF do
+    portal guarda estado por janela e nao aceita abas em paralelo.
+
+    Uso:
+        with AmplisSession(url, usuario, senha, csv_path) as sessao:
+            run_reag_process_csv(..., session=sessao)
+            run_reag_process_pdf(..., session=sessao)
+    """
+
+    def __init__(self, url, username, password, download_path):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.download_path = download_path
+        self.driver = None
+        self.logins = 0
+        self._logged_in = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def use_download_path(self, path):
+        """Direciona os proximos downloads para `path`"""
+        self.download_path = path
+        if self.driver is not None:
+            _set_download_path(self.driver, path)
+
+    def login(self) -> bool:
+        """Garante navegador aberto e autenticado (True se pronto para exportar)"""
+        if not self.username or not self.password:
+            print(f"Credenciais não informadas para {self.url}. Pulando.")
+            return False
+        if self.driver is not None and self._logged_in and self._alive():
+            return True
+
+        self.close()
+        self.driver = setup_driver(self.download_path, self.url)
+        self.logins += 1
+        self._logged_in = login(self.driver, self.username, self.password)
+        return self._logged_in
+
+    def _alive(self) -> bool:
+        """Volta para a janela principal e confere se a tela inicial continua la"""
+        try:
+            handles = self.driver.window_handles
+            for handle in handles[1:]:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(handles[0])
+            return bool(self.driver.find_elements(By.ID, _HOME_ELEMENT_ID))
+        except WebDriverException:
+            return False
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+        self.driver = None
+        self._logged_in = False
+
+
+@contextmanager
+def _sessao(session, url, username, password, download_path):
+    """Sessao recebida (reutilizada, continua aberta) ou uma propria do fluxo"""
+    if session is not None:
+        session.use_download_path(download_path)
+        yield session
+        return
+    with AmplisSession(url, username, password, download_path) as propria:
+        yield propria
+
+
+def _aguardar_download(driver, pasta, antes, replaces):
+    """
+    Espera o download disparado pelo OK comecar (arquivo novo na pasta) ou o
+    portal avisar que nao ha dados (detailMessageListBoxId) - antes era um
+    sleep fixo seguido de wait_for_downloads.
+    """
+    def pronto(d):
+        if download_snapshot(pasta) - set(antes):
+            return True
+        return any(el.is_displayed() for el in d.find_elements(By.ID, "detailMessageListBoxId"))
+
+    wait_until(driver, pronto, timeout=60, replaces=replaces, kind="download_started", required=False)
+
+
+@span("run_reag_process_csv")
+def run_reag_process_csv(custom_inical_date=None, custom_final_date=None, USERNAME_REAG=None,PASSWORD_REAG=None, url_reag=None ,csv_path =None, session=None):
     """Runs the download process for REAG CSV."""
-    driver = setup_driver(csv_path, url_reag)
-    try:
-        if login(driver, USERNAME_REAG, PASSWORD_REAG):
+    with _sessao(session, url_reag, USERNAME_REAG, PASSWORD_REAG, csv_path) as sessao:
+        if sessao.login():
+            driver = sessao.driver
             d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
             d_minus_final = custom_final_date if custom_inical_date else get_previous_working_day_sp()
 
             # BAIXA CARTEIRA DIARIA CSV
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
          
             click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")      
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateBegin:campoInputDate", d_minus_inical) # data inical
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateEnd:campoInputDate", d_minus_final)  #data final
-            time.sleep(3)
+            wait_network_idle(driver, replaces=3)
             select_all_funds(driver)
-            time.sleep(5)
+            wait_network_idle(driver, replaces=5)
             # Set output type to CSV and download
             set_output_type_to_csv(driver, "mainForm:saida:campo")
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
+            antes = download_snapshot(csv_path)
             click_ok_button(driver)
             
-            time.sleep(1)
+            _aguardar_download(driver, csv_path, antes, replaces=1)
            
             wait_for_downloads(csv_path) # Aguardar o download 
 
             # BAIXA COTAS E PATRIMONIO CSV
             click_button(driver, "mainForm:listaDeFavoritosRelatorios:2:j_id_9m")
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateBegin:campoInputDate", d_minus_inical) # data inical
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateEnd:campoInputDate", d_minus_final)  #data final
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             select_all_funds(driver)
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
             set_output_type_to_csv(driver, "mainForm:reportExtension:campo")
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
+            antes = download_snapshot(csv_path)
             click_ok_button(driver)
-            time.sleep(1)
+            _aguardar_download(driver, csv_path, antes, replaces=1)
            
             wait_for_downloads(csv_path) # Aguardar o download 
             rename_file(csv_path, ".csv", "cp1.csv")  # Renomeia o arquivo para "cp1.csv"
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
                
          
             # BAIXA APLICACAO E RESGATE (CSV)
             click_button(driver, "mainForm:listaDeFavoritosRelatorios:1:j_id_9m")
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateBegin:campoInputDate", d_minus_inical) # data inical
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateEnd:campoInputDate", d_minus_final)  #data final
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             select_all_funds(driver)
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
             set_output_type_to_csv(driver, "mainForm:reportExtension:campo")
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
+            antes = download_snapshot(csv_path)
             click_ok_button(driver)
-            time.sleep(1)
+            _aguardar_download(driver, csv_path, antes, replaces=1)
            
             wait_for_downloads(csv_path) # Aguardar o download 
            
@@ -96,170 +231,217 @@ def run_reag_process_csv(custom_inical_date=None, custom_final_date=None, USERNA
                 rename_file(csv_path, ".csv", "ar.csv") 
 
       
-    finally:
-        driver.quit()
 
-def run_master_process_csv(custom_inical_date=None, custom_final_date=None, USERNAME_MASTER=None,PASSWORD_MASTER=None, url_master=None ,csv_path=None):
+@span("run_master_process_csv")
+def run_master_process_csv(custom_inical_date=None, custom_final_date=None, USERNAME_MASTER=None,PASSWORD_MASTER=None, url_master=None ,csv_path=None, session=None):
     """Runs the download process for REAG CSV."""
-    driver = setup_driver(csv_path, url_master)
-    try:
-        if login(driver, USERNAME_MASTER, PASSWORD_MASTER):
+    with _sessao(session, url_master, USERNAME_MASTER, PASSWORD_MASTER, csv_path) as sessao:
+        if sessao.login():
+            driver = sessao.driver
             d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
             d_minus_final = custom_final_date if custom_inical_date else get_previous_working_day_sp()
 
             # BAIXA CARTEIRA DIARIA CSV
 
             click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")        
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateBegin:campoInputDate", d_minus_inical) # data inical
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateEnd:campoInputDate", d_minus_final)  #data final
-            time.sleep(3)
+            wait_network_idle(driver, replaces=3)
             select_all_funds(driver)
-            time.sleep(5)
+            wait_network_idle(driver, replaces=5)
             # Set output type to CSV and download
             set_output_type_to_csv(driver, "mainForm:saida:campo")
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
+            antes = download_snapshot(csv_path)
             click_ok_button(driver)
             
-            time.sleep(1)
+            _aguardar_download(driver, csv_path, antes, replaces=1)
            
             wait_for_downloads(csv_path) # Aguardar o download 
 
             # BAIXA COTAS E PATRIMONIO CSV
             click_button(driver, "mainForm:listaDeFavoritosRelatorios:1:j_id_9m")
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateBegin:campoInputDate", d_minus_inical) # data inical
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             set_date(driver, "mainForm:calendarDateEnd:campoInputDate", d_minus_final)  #data final
-            time.sleep(0.7)
+            wait_network_idle(driver, replaces=0.7)
             select_all_funds(driver)
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
             set_output_type_to_csv(driver, "mainForm:reportExtension:campo")
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
+            antes = download_snapshot(csv_path)
             click_ok_button(driver)
-            time.sleep(1)
+            _aguardar_download(driver, csv_path, antes, replaces=1)
            
             wait_for_downloads(csv_path) # Aguardar o download 
             rename_file(csv_path, ".csv", "cp2.csv")  # Renomeia o arquivo para "cp1.csv"
-            time.sleep(0.5)
+            wait_network_idle(driver, replaces=0.5)
                
-    finally:
-        driver.quit()
-def run_reag_process_pdf(custom_inical_date=None, custom_final_date=None, USERNAME_REAG=None,PASSWORD_REAG=None, url_reag=None ,pdf_path=None):
+@span("run_reag_process_pdf")
+def run_reag_process_pdf(custom_inical_date=None, custom_final_date=None, USERNAME_REAG=None,PASSWORD_REAG=None, url_reag=None ,pdf_path=None, session=None, sistema="amplis_reag"):
     """Runs the download process for REAG PDF."""
-    driver = setup_driver(pdf_path, url_reag)
-    try:
-        if login(driver, USERNAME_REAG, PASSWORD_REAG):
-                        
-            d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
-            d_minus_final = custom_final_date if custom_final_date else get_previous_working_day_sp()
-            print(f"Datas a serem processadas: De {d_minus_inical} até {d_minus_final}")
-            
-            br_holidays = holidays.Brazil()
-            start_date_format = datetime.strptime(d_minus_inical, '%d/%m/%Y').date()
-            end_date_format = datetime.strptime(d_minus_final, '%d/%m/%Y').date()
-
-            current_date = start_date_format
-            while current_date <= end_date_format:
-                if current_date.weekday() < 5 and current_date not in br_holidays:
-                    print(f"Processando dia: {current_date}")
-                    try:
-                        click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")  
-                        time.sleep(0.7)
-                        set_date(driver, "mainForm:calendarDateBegin:campoInputDate", current_date.strftime('%d/%m/%Y'))
-                        print(f"Data definida no campo: {current_date.strftime('%d/%m/%Y')}")
-                        time.sleep(3)
-                        select_all_funds(driver)
-                        time.sleep(3)
-                        click_ok_button(driver)
-                        time.sleep(4)
-                        wait_for_downloads(pdf_path)
-                        print(f"Download concluído para {current_date}")
+    d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
+    d_minus_final = custom_final_date if custom_final_date else get_previous_working_day_sp()
+    print(f"Datas a serem processadas: De {d_minus_inical} até {d_minus_final}")
+
+    # AMPLIS considera so feriados nacionais
+    dias_uteis = get_calendar(None).range(d_minus_inical, d_minus_final)
+
+    # Ledger: dias ja baixados em execucoes anteriores nem abrem o navegador
+    dias_pendentes = {dia for dia in dias_uteis if not ledger_done(sistema, None, "pdf", dia)}
+    if not dias_pendentes:
+        print("Todos os dias já foram baixados em execuções anteriores (ledger). Nada a fazer.")
+        report_progress(sistema, len(dias_uteis), len(dias_uteis), "datas", pulados=len(dias_uteis))
+        return
+
+    with _sessao(session, url_reag, USERNAME_REAG, PASSWORD_REAG, pdf_path) as sessao:
+        if sessao.login():
+            driver = sessao.driver
+            feitos = 0
+            pulados = 0
 
-                        # Fechar abas extras
-                        main_window = driver.window_handles[0]
-                        for handle in driver.window_handles[1:]:
-                            driver.switch_to.window(handle)
-                            driver.close()
-                        driver.switch_to.window(main_window)
+            for current_date in dias_uteis:
+                report_progress(sistema, feitos, len(dias_uteis), "datas", pulados=pulados)
+                feitos += 1
+                if unit_done(sistema, None, current_date):
+                    print(f"Dia {current_date} já baixado em execução anterior (checkpoint). Pulando.")
+                    pulados += 1
+                    continue
+                if current_date not in dias_pendentes:
+                    print(f"Dia {current_date} já baixado em execução anterior (ledger). Pulando.")
+                    pulados += 1
+                    continue
+                print(f"Processando dia: {current_date}")
+                antes = download_snapshot(pdf_path)
+                try:
+                    click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")  
+                    wait_network_idle(driver, replaces=0.7)
+                    set_date(driver, "mainForm:calendarDateBegin:campoInputDate", current_date.strftime('%d/%m/%Y'))
+                    print(f"Data definida no campo: {current_date.strftime('%d/%m/%Y')}")
+                    wait_network_idle(driver, replaces=3)
+                    select_all_funds(driver)
+                    wait_network_idle(driver, replaces=3)
+                    click_ok_button(driver)
+                    _aguardar_download(driver, pdf_path, antes, replaces=4)
+                    wait_for_downloads(pdf_path)
+                    # Sem arquivo novo (portal sem dados ou download que nao chegou) o dia segue pendente
+                    arquivos = new_files(pdf_path, antes)
+                    if arquivos:
+                        print(f"Download concluído para {current_date}")
+                        mark_unit_done(sistema, None, current_date)
+                        record_done(sistema, None, "pdf", current_date, arquivos)
+                    else:
+                        print(f"Nenhum arquivo baixado para {current_date}. Dia fica pendente.")
 
-                    except Exception as e:
-                        print(f"Erro ao processar {current_date}: {e}")
-                else:
-                    print(f"Dia {current_date} não é dia útil ou é feriado.")
+                    # Fechar abas extras
+                    main_window = driver.window_handles[0]
+                    for handle in driver.window_handles[1:]:
+                        driver.switch_to.window(handle)
+                        driver.close()
+                    driver.switch_to.window(main_window)
 
-                current_date += timedelta(days=1)
+                except Exception as e:
+                    print(f"Erro ao processar {current_date}: {e}")
 
+            report_progress(sistema, len(dias_uteis), len(dias_uteis), "datas", pulados=pulados)
             print("Processamento completo. Todos os dias foram processados com sucesso!")
-    finally:
-        driver.quit()
-def run_master_process_pdf(custom_inical_date=None, custom_final_date=None, USERNAME_MASTER=None,PASSWORD_MASTER=None, url_master=None ,pdf_path=None):
+@span("run_master_process_pdf")
+def run_master_process_pdf(custom_inical_date=None, custom_final_date=None, USERNAME_MASTER=None,PASSWORD_MASTER=None, url_master=None ,pdf_path=None, session=None, sistema="amplis_master"):
     """Runs the download process for REAG PDF."""
-    driver = setup_driver(pdf_path, url_master)
-    try:
-        if login(driver, USERNAME_MASTER, PASSWORD_MASTER):
-                        
-            d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
-            d_minus_final = custom_final_date if custom_final_date else get_previous_working_day_sp()
-            print(f"Datas a serem processadas: De {d_minus_inical} até {d_minus_final}")
-            
-            br_holidays = holidays.Brazil()
-            start_date_format = datetime.strptime(d_minus_inical, '%d/%m/%Y').date()
-            end_date_format = datetime.strptime(d_minus_final, '%d/%m/%Y').date()
-
-            current_date = start_date_format
-            while current_date <= end_date_format:
-                if current_date.weekday() < 5 and current_date not in br_holidays:
-                    print(f"Processando dia: {current_date}")
-                    try:
-                        click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")  
-                        time.sleep(0.7)
-                        set_date(driver, "mainForm:calendarDateBegin:campoInputDate", current_date.strftime('%d/%m/%Y'))
-                        print(f"Data definida no campo: {current_date.strftime('%d/%m/%Y')}")
-                        time.sleep(3)
-                        select_all_funds(driver)
-                        time.sleep(5)
-                        click_ok_button(driver)
-                        time.sleep(4)
-                        wait_for_downloads(pdf_path)
-                        print(f"Download concluído para {current_date}")
+    d_minus_inical = custom_inical_date if custom_inical_date else get_previous_working_day_sp()
+    d_minus_final = custom_final_date if custom_final_date else get_previous_working_day_sp()
+    print(f"Datas a serem processadas: De {d_minus_inical} até {d_minus_final}")
 
-                        # Fechar abas extras
-                        main_window = driver.window_handles[0]
-                        for handle in driver.window_handles[1:]:
-                            driver.switch_to.window(handle)
-                            driver.close()
-                        driver.switch_to.window(main_window)
+    # AMPLIS considera so feriados nacionais
+    dias_uteis = get_calendar(None).range(d_minus_inical, d_minus_final)
 
-                    except Exception as e:
-                        print(f"Erro ao processar {current_date}: {e}")
-                else:
-                    print(f"Dia {current_date} não é dia útil ou é feriado.")
+    # Ledger: dias ja baixados em execucoes anteriores nem abrem o navegador
+    dias_pendentes = {dia for dia in dias_uteis if not ledger_done(sistema, None, "pdf", dia)}
+    if not dias_pendentes:
+        print("Todos os dias já foram baixados em execuções anteriores (ledger). Nada a fazer.")
+        report_progress(sistema, len(dias_uteis), len(dias_uteis), "datas", pulados=len(dias_uteis))
+        return
 
-                current_date += timedelta(days=1)
+    with _sessao(session, url_master, USERNAME_MASTER, PASSWORD_MASTER, pdf_path) as sessao:
+        if sessao.login():
+            driver = sessao.driver
+            feitos = 0
+            pulados = 0
 
-            print("Processamento completo. Todos os dias foram processados com sucesso!")
-    finally:
-        driver.quit()
+            for current_date in dias_uteis:
+                report_progress(sistema, feitos, len(dias_uteis), "datas", pulados=pulados)
+                feitos += 1
+                if unit_done(sistema, None, current_date):
+                    print(f"Dia {current_date} já baixado em execução anterior (checkpoint). Pulando.")
+                    pulados += 1
+                    continue
+                if current_date not in dias_pendentes:
+                    print(f"Dia {current_date} já baixado em execução anterior (ledger). Pulando.")
+                    pulados += 1
+                    continue
+                print(f"Processando dia: {current_date}")
+                antes = download_snapshot(pdf_path)
+                try:
+                    click_button(driver, "mainForm:listaDeFavoritosRelatorios:0:j_id_9m")  
+                    wait_network_idle(driver, replaces=0.7)
+                    set_date(driver, "mainForm:calendarDateBegin:campoInputDate", current_date.strftime('%d/%m/%Y'))
+                    print(f"Data definida no campo: {current_date.strftime('%d/%m/%Y')}")
+                    wait_network_idle(driver, replaces=3)
+                    select_all_funds(driver)
+                    wait_network_idle(driver, replaces=5)
+                    click_ok_button(driver)
+                    _aguardar_download(driver, pdf_path, antes, replaces=4)
+                    wait_for_downloads(pdf_path)
+                    # Sem arquivo novo (portal sem dados ou download que nao chegou) o dia segue pendente
+                    arquivos = new_files(pdf_path, antes)
+                    if arquivos:
+                        print(f"Download concluído para {current_date}")
+                        mark_unit_done(sistema, None, current_date)
+                        record_done(sistema, None, "pdf", current_date, arquivos)
+                    else:
+                        print(f"Nenhum arquivo baixado para {current_date}. Dia fica pendente.")
 
+                    # Fechar abas extras
+                    main_window = driver.window_handles[0]
+                    for handle in driver.window_handles[1:]:
+                        driver.switch_to.window(handle)
+                        driver.close()
+                    driver.switch_to.window(main_window)
+
+                except Exception as e:
+                    print(f"Erro ao processar {current_date}: {e}")
+
+            report_progress(sistema, len(dias_uteis), len(dias_uteis), "datas", pulados=pulados)
+            print("Processamento completo. Todos os dias foram processados com sucesso!")
 
 
 
-def run_amplis(USERNAME_REAG,PASSWORD_REAG, url_reag , USERNAME_MASTER, PASSWORD_MASTER, url_master, csv_path, pdf_path, initial_date,final_date,pdf, csv):
 
-    
+def run_amplis(USERNAME_REAG,PASSWORD_REAG, url_reag , USERNAME_MASTER, PASSWORD_MASTER, url_master, csv_path, pdf_path, initial_date,final_date,pdf, csv, sistema="amplis_reag"):
 
     if not final_date:
         final_date = initial_date
 
+    # sistema: portal logado com as credenciais do primeiro par (main.py passa
+    # as do MASTER nele no step amplis_master); chave de ledger, checkpoint e
+    # progresso dos PDFs desse portal
+
+    # Um Chrome e um login por portal: CSV e PDF usam a mesma sessao
+    with AmplisSession(url_reag, USERNAME_REAG, PASSWORD_REAG, csv_path) as reag:
+        if csv:
+            run_reag_process_csv(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_REAG=USERNAME_REAG, PASSWORD_REAG=PASSWORD_REAG, url_reag=url_reag, csv_path=csv_path, session=reag)
+        if pdf:
+            run_reag_process_pdf(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_REAG=USERNAME_REAG, PASSWORD_REAG=PASSWORD_REAG, url_reag=url_reag, pdf_path=pdf_path, session=reag, sistema=sistema)
+
+    # Sem credenciais do MASTER (step amplis_master) nao ha segunda sessao
+    if not USERNAME_MASTER or not PASSWORD_MASTER:
+        return
 
-    if csv :
-        #clear_folder(csv_path)
-        run_reag_process_csv(custom_inical_date=initial_date, custom_final_date=final_date,USERNAME_REAG= USERNAME_REAG,PASSWORD_REAG=PASSWORD_REAG, url_reag=url_reag ,csv_path=csv_path)
-        run_master_process_csv(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_MASTER=USERNAME_MASTER,PASSWORD_MASTER=PASSWORD_MASTER, url_master=url_master ,csv_path=csv_path)
-    
-    if pdf :
-       # clear_folder(pdf_path)
-        run_reag_process_pdf(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_REAG= USERNAME_REAG,PASSWORD_REAG=PASSWORD_REAG, url_reag=url_reag ,pdf_path=pdf_path)
-        run_master_process_pdf(custom_inical_date=initial_date, custom_final_date=final_date,  USERNAME_MASTER=USERNAME_MASTER,PASSWORD_MASTER=PASSWORD_MASTER, url_master=url_master ,pdf_path=pdf_path)
+    with AmplisSession(url_master, USERNAME_MASTER, PASSWORD_MASTER, csv_path) as master:
+        if csv:
+            run_master_process_csv(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_MASTER=USERNAME_MASTER, PASSWORD_MASTER=PASSWORD_MASTER, url_master=url_master, csv_path=csv_path, session=master)
+        if pdf:
+            run_master_process_pdf(custom_inical_date=initial_date, custom_final_date=final_date, USERNAME_MASTER=USERNAME_MASTER, PASSWORD_MASTER=PASSWORD_MASTER, url_master=url_master, pdf_path=pdf_path, session=master)
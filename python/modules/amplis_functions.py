@@ -1,11 +1,8 @@
 
 import os
 import json
-import shutil
-import time
 from pathlib import Path
-from tkinter import messagebox, Tk
-from datetime import date, timedelta
+from datetime import date
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
@@ -13,10 +10,20 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-import holidays
+from base_driver import block_resources, lean_options, pooled_driver
+from download_watcher import DownloadWatcher
+from business_calendar import get_calendar
+from spans import span
 
 # Function to set up the driver with Chrome options
+@span("setup_driver")
 def setup_driver(download_path, url):
+    # Chrome ja aberto pelo backend, se houver pool
+    driver = pooled_driver(download_path)
+    if driver is not None:
+        driver.get(url)
+        return driver
+
     chrome_options = Options()
     prefs = {
         "download.default_directory": os.path.abspath(download_path),  # Set default download directory
@@ -25,11 +32,14 @@ def setup_driver(download_path, url):
         "profile.content_settings.exceptions.automatic_downloads.*.setting": 1  # Allow all downloads
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    lean_options(chrome_options)
     driver = webdriver.Chrome(options=chrome_options)
+    block_resources(driver)
     driver.get(url)
     return driver
 
 # Function to log in
+@span("login")
 def login(driver, username, password):
     try:
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "loginForm:userLoginInput:campo")))
@@ -55,6 +65,7 @@ def safe_click(driver, element_locator):
     return False
 
 # Function to click on a specific link by ID
+@span("click_button")
 def click_button(driver, element_id):
     try:
         link = WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, element_id)))
@@ -105,21 +116,10 @@ def click_ok_button(driver):
     except Exception as e:
         print(f"Failed to click 'Ok' button: {e}")
 
-# Function to get D-2 (closest working day, skipping weekends and holidays)
+# Function to get D-2 (closest working day, skipping weekends and São Paulo holidays)
 def get_previous_working_day_sp(days_before=2):
-    # Set up holidays for São Paulo
-    br_holidays = holidays.Brazil(state='SP')
-    
-    current_date = date.today()
-    delta_days = days_before
-
-    while delta_days > 0:
-        current_date -= timedelta(days=1)
-        # Skip weekends (Saturday=5, Sunday=6) and holidays
-        if current_date.weekday() < 5 and current_date not in br_holidays:
-            delta_days -= 1
-
-    return current_date.strftime("%d/%m/%Y")  # Return date in format "DD/MM/YYYY"
+    previous = get_calendar("SP").previous_business_day(date.today(), days_before)
+    return previous.strftime("%d/%m/%Y")  # Return date in format "DD/MM/YYYY"
 
 # Function to clear folder
 def clear_folder(folder_path):
@@ -131,18 +131,17 @@ def clear_folder(folder_path):
         if folder.exists():
             num_files = len(os.listdir(folder_path))
             if num_files > 0:
-                # Create a simple UI with yes/no prompt
+                # Create a simple UI with yes/no prompt (tkinter only loaded when needed)
+                from tkinter import messagebox, Tk
                 root = Tk()
                 root.withdraw()  # Hide the main window
                 confirm = messagebox.askyesno("Clear folder", f"There are {num_files} files in {parent_folder}/{folder_name}. Do you want to delete them?")
                 if confirm:
-                    for filename in os.listdir(folder_path):
-                        file_path = os.path.join(folder_path, filename)
-                        if os.path.isfile(file_path) or os.path.islink(file_path):
-                            os.unlink(file_path)
-                        elif os.path.isdir(file_path):
-                            shutil.rmtree(file_path)
-                    print(f"Cleared folder: {parent_folder}/{folder_name}")
+                    from folder_cleanup import clean_folder
+                    result = clean_folder(folder_path)
+                    for error in result.errors:
+                        print(f"Failed to delete {error}")
+                    print(f"Cleared folder: {parent_folder}/{folder_name} ({result.removed} items, {result.seconds:.1f}s)")
                 else:
                     print("Folder not cleared. Exiting script.")
                     exit()
@@ -152,11 +151,16 @@ def clear_folder(folder_path):
         print(f"Failed to clear folder {parent_folder}/{folder_name}: {e}")
 
 # Function to wait for all downloads to complete
-def wait_for_downloads(download_path):
-    download_wait_time = 3  # Initial wait time
-    while any([filename.endswith(".crdownload") for filename in os.listdir(download_path)]):
-        print(f"Waiting for downloads to complete... {download_wait_time}s")
-        time.sleep(download_wait_time)
+@span("wait_for_downloads")
+def wait_for_downloads(download_path, timeout=None):
+    # Wakes up on folder events (inotify) instead of polling; returns as soon
+    # as the last .crdownload is renamed. timeout=None waits indefinitely
+    with DownloadWatcher(download_path) as watcher:
+        if watcher.pending():
+            print("Waiting for downloads to complete...")
+            if not watcher.wait_idle(timeout):
+                print(f"Downloads still pending after {timeout}s.")
+                return
     print("Download completed.")
 
 # Function to change the output type to CSV
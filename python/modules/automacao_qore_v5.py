@@ -1,4 +1,3 @@
-import time
 import re
 import pandas as pd
 import openpyxl
@@ -11,11 +10,88 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from datetime import datetime
 import os
+import queue
 import shutil
+import threading
 import zipfile
+from dataclasses import dataclass, field
 from pathlib import Path
 import sys
 
+# Progresso, checkpoint e ledger (utils/) - no-op quando rodando standalone
+try:
+    from progress import report_progress
+    from checkpoint import unit_done, mark_unit_done
+    from ledger import ledger_done, record_done
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    def report_progress(*args, **kwargs):
+        pass
+
+    def unit_done(*args, **kwargs):
+        return False
+
+    def mark_unit_done(*args, **kwargs):
+        pass
+
+    def ledger_done(*args, **kwargs):
+        return False
+
+    def record_done(*args, **kwargs):
+        pass
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+from base_driver import (
+    block_resources, download_snapshot, lean_options, pooled_driver, wait_clickable, wait_download_complete,
+    wait_download_started, wait_network_idle, wait_until,
+)
+
+# Destinos finais dos arquivos movidos (hash do ledger por fundo/tipo)
+_ARQUIVOS_MOVIDOS = []
+
+# Navegadores paralelos do run_qore (fila de fundos compartilhada)
+QORE_WORKERS = int(os.getenv("ETL_QORE_WORKERS", "2"))
+
+# Novas tentativas por fundo no mesmo worker (novo login se o Chrome caiu)
+QORE_RETRIES = int(os.getenv("ETL_QORE_RETRIES", "1"))
+
+# Staging do worker atual: os arquivos so vao para o destino na consolidacao
+_local = threading.local()
+
+
+def _mover_arquivo(origem, destino):
+    """
+    shutil.move registrando o destino para o ledger. Dentro de um worker do
+    run_qore o arquivo vai para o staging do fundo e a thread principal o
+    move para `destino` na ordem dos fundos (_consolidar).
+    """
+    staging = getattr(_local, "staging", None)
+    if staging is None:
+        shutil.move(origem, destino)
+        _ARQUIVOS_MOVIDOS.append(str(destino))
+        return
+    pasta, arquivos = staging
+    staged = os.path.join(pasta, f"{len(arquivos):03d}_{os.path.basename(str(origem))}")
+    shutil.move(origem, staged)
+    arquivos.append((staged, str(destino)))
+
+def _aguardar_arquivo(pasta, trecho, extensao, timeout):
+    """
+    Arquivo completo mais recente com `trecho` no nome e a extensao (None no
+    timeout). Acorda pelo watcher da pasta quando o download e renomeado,
+    sem polling nem checagem de tamanho com sleep.
+    """
+    padrao = re.compile(f"{re.escape(trecho)}.*{re.escape(extensao)}$", re.IGNORECASE)
+    nomes = wait_download_complete(pasta, before=(), pattern=padrao, timeout=timeout)
+    if not nomes:
+        return None
+    return max((Path(pasta) / nome for nome in nomes), key=os.path.getmtime)
+
 def validar_boolean_qore(valor) -> bool:
     """
     Valida valores boolean para compatibilidade com o sistema principal
@@ -64,13 +140,15 @@ def ler_parametros_planilha(df, QORE_enabled, PDF_enabled, modo_lote_pdf, Excel_
         print(f"[ERRO] Erro ao ler parâmetros da planilha DOWNLOADS_AUX: {str(e)}")
         sys.exit(1)
 
+@span("ler_lista_fundos")
 def ler_lista_fundos(caminho_planilha_bd_aux):
     """
     Lê a planilha BD.xlsx, aba BD, filtra fundos com 'QORE' exato na coluna J
     e retorna dicionário {apelido: caminho_descricao} com tratamento especial para BLOKO
     """
     try:
-        df_bd = pd.read_excel(caminho_planilha_bd_aux, sheet_name="BD", engine='openpyxl')
+        with span("read_excel"):
+            df_bd = pd.read_excel(caminho_planilha_bd_aux, sheet_name="BD", engine='openpyxl')
         mask_qore_bd = df_bd.iloc[:, 9].astype(str).str.strip().str.upper() == "QORE"
         fundos_qore_filtered = df_bd[mask_qore_bd]
         fundos_dict_local = {}
@@ -216,6 +294,7 @@ def get_versioned_filepath(directory, base_filename_without_ext, extension):
         
         version_suffix_num += 1
 
+@span("handle_downloaded_file")
 def handle_downloaded_file(fundo_nome, data_referencia, em_lote, report_type, all_siglas_param, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict_param, QORE_PDF_PATH, QORE_EXCEL_PATH):
     """
     Move e renomeia os arquivos baixados do diretório temporário para a pasta de destino final.
@@ -303,7 +382,7 @@ def handle_downloaded_file(fundo_nome, data_referencia, em_lote, report_type, al
                     final_destino, version_num = get_versioned_filepath(destino_dir, current_base_filename_without_ext, cfg['extension'])
                     
                     print(f"[DEBUG] Movendo arquivo '{arquivo.name}' para '{final_destino}'")
-                    shutil.move(str(arquivo), final_destino)
+                    _mover_arquivo(str(arquivo), final_destino)
                     if version_num > 0:
                         print(f"[✔️] {report_type} movido (versão {version_num}) para: {final_destino}")
                     else:
@@ -323,20 +402,13 @@ def handle_downloaded_file(fundo_nome, data_referencia, em_lote, report_type, al
 
             else:
                 print(f"[INFO] Aguardando download do {report_type} na pasta de downloads temporários...")
-                timeout = time.time() + 30 
-                found_file = None
-                
-                while time.time() < timeout:
-                    files_of_type = list(Path(SELENIUM_DOWNLOAD_TEMP_PATH).glob(f"*{cfg['extension']}"))
-                    files_of_type.sort(key=os.path.getmtime, reverse=True)
-                    
+                found_file = _aguardar_arquivo(SELENIUM_DOWNLOAD_TEMP_PATH, sigla, cfg['extension'], 30)
+                if not found_file:
+                    # Nenhum arquivo da sigla: usa o mais recente do tipo (como antes)
+                    files_of_type = sorted(Path(SELENIUM_DOWNLOAD_TEMP_PATH).glob(f"*{cfg['extension']}"), key=os.path.getmtime, reverse=True)
                     if files_of_type:
                         found_file = files_of_type[0]
-                        if sigla.lower() in found_file.name.lower(): 
-                            break
-                        else: 
-                            print(f"[AVISO] Arquivo '{found_file.name}' não corresponde à sigla '{sigla}'. Aguardando mais...")
-                    time.sleep(1)
+                        print(f"[AVISO] Arquivo '{found_file.name}' não corresponde à sigla '{sigla}'.")
 
                 if not found_file:
                     print(f"[!] Timeout: Não foi possível encontrar nenhum arquivo '{cfg['extension']}' para '{sigla}' após 30 segundos em '{SELENIUM_DOWNLOAD_TEMP_PATH}'.")
@@ -346,7 +418,7 @@ def handle_downloaded_file(fundo_nome, data_referencia, em_lote, report_type, al
                 
                 final_destino, version_num = get_versioned_filepath(destino_dir, cfg['name_base'], cfg['extension'])
 
-                shutil.move(str(found_file), final_destino)
+                _mover_arquivo(str(found_file), final_destino)
                 if version_num > 0:
                     print(f"[✔️] {report_type} movido (versão {version_num}) para: {final_destino}")
                 else:
@@ -358,6 +430,7 @@ def handle_downloaded_file(fundo_nome, data_referencia, em_lote, report_type, al
             return False
     
 
+@span("handle_downloaded_file_bloko")
 def handle_downloaded_file_bloko(fundo_nome, data_referencia, em_lote, report_type, all_siglas_param, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict_param, QORE_PDF_PATH, QORE_EXCEL_PATH):
     """
     Versão corrigida que:
@@ -459,7 +532,7 @@ def handle_downloaded_file_bloko(fundo_nome, data_referencia, em_lote, report_ty
                     
                     # Move o arquivo para o destino final
                     try:
-                        shutil.move(str(arquivo), str(final_destino))
+                        _mover_arquivo(str(arquivo), str(final_destino))
                         print(f"[✔️] Arquivo movido para: {final_destino}")
                         arquivos_processados += 1
                     except Exception as move_error:
@@ -490,33 +563,8 @@ def handle_downloaded_file_bloko(fundo_nome, data_referencia, em_lote, report_ty
             # Processamento para modo individual (não em lote)
             print("[INFO] Processando arquivo individual...")
             
-            timeout = time.time() + cfg['timeout']
-            found_file = None
             padrao_busca = "urbanismo" if "URBANISMO" in fundo_nome.upper() else "investimento"
-            
-            while time.time() < timeout:
-                # Lista arquivos ordenados por modificação (mais recente primeiro)
-                arquivos = sorted(
-                    Path(SELENIUM_DOWNLOAD_TEMP_PATH).glob(f"*{cfg['extension']}"),
-                    key=os.path.getmtime,
-                    reverse=True
-                )
-                
-                for arquivo in arquivos:
-                    if padrao_busca.lower() in arquivo.name.lower():
-                        # Verifica se o download foi completado
-                        size1 = arquivo.stat().st_size
-                        time.sleep(1)
-                        size2 = arquivo.stat().st_size
-                        
-                        if size1 == size2:  # Download completo
-                            found_file = arquivo
-                            break
-                
-                if found_file:
-                    break
-                    
-                time.sleep(5)
+            found_file = _aguardar_arquivo(SELENIUM_DOWNLOAD_TEMP_PATH, padrao_busca, cfg['extension'], cfg['timeout'])
             
             if not found_file:
                 print("[ERRO] Timeout - Nenhum arquivo válido encontrado")
@@ -542,7 +590,7 @@ def handle_downloaded_file_bloko(fundo_nome, data_referencia, em_lote, report_ty
             
             # Move o arquivo
             try:
-                shutil.move(str(found_file), str(final_destino))
+                _mover_arquivo(str(found_file), str(final_destino))
                 print(f"[✔️] Arquivo movido para: {final_destino}")
                 return True
             except Exception as move_error:
@@ -564,6 +612,7 @@ def handle_downloaded_file_bloko(fundo_nome, data_referencia, em_lote, report_ty
         return False
 
 
+@span("preencher_data_robusto")
 def preencher_data_robusto(campo, data_dt, driver):
     """
     Preenche um campo de data no navegador de forma robusta usando JavaScript.
@@ -582,10 +631,14 @@ def preencher_data_robusto(campo, data_dt, driver):
                 campo.onchange();
             }}
         ''', campo)
-        time.sleep(1)
+        wait_until(
+            driver, lambda d: campo.get_attribute("value") == data_iso,
+            timeout=1, replaces=1, kind="value", required=False,
+        )
     except Exception as e:
         print(f"[ERRO] Erro ao preencher data: {str(e)}")
 
+@span("process_document_type")
 def process_document_type(fundo_nome_chave, data_exibicao, data_obj, is_batch_mode, data_inicial_dt, data_final_dt, report_type, download_button_text, driver, all_siglas_param, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict_param, QORE_PDF_PATH, QORE_EXCEL_PATH):
     """
     Função genérica para processar o download de PDF ou Excel para um fundo.
@@ -600,7 +653,7 @@ def process_document_type(fundo_nome_chave, data_exibicao, data_obj, is_batch_mo
         WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, f'//button[contains(., "{download_button_text}")]'))
         ).click()
-        time.sleep(3)
+        wait_network_idle(driver, replaces=3)
     except TimeoutException:
         print(f"[ERRO] Botão '{download_button_text}' não encontrado para o fundo '{fundo_nome_chave}'. Pulando {report_type} download.")
         return False
@@ -612,9 +665,10 @@ def process_document_type(fundo_nome_chave, data_exibicao, data_obj, is_batch_mo
             colunas = linha.find_elements(By.TAG_NAME, 'td')
             if len(colunas) >= 3 and colunas[1].text.strip() == data_exibicao:
                 botao = colunas[3].find_element(By.TAG_NAME, 'button')
+                antes = download_snapshot(SELENIUM_DOWNLOAD_TEMP_PATH)
                 botao.click()
                 print(f"[⬇️] Baixando {report_type} do fundo {fundo_nome_chave}")
-                time.sleep(2)
+                wait_download_started(SELENIUM_DOWNLOAD_TEMP_PATH, antes, replaces=2)
                 return handle_downloaded_file(fundo_nome_chave, data_obj, False, report_type, all_siglas_param, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict_param, QORE_PDF_PATH, QORE_EXCEL_PATH)
         
         if not document_found_on_site:
@@ -640,29 +694,265 @@ def process_document_type(fundo_nome_chave, data_exibicao, data_obj, is_batch_mo
             print(f"[ERRO] Não foi encontrado o botão de menu '...' para o fundo {fundo_nome_chave} ({report_type}). Pulando download em lote.")
             return False
 
-        time.sleep(1)
-        download_lote_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, '//a[contains(., "Download em Lote")]'))
-        )
+        download_lote_button = wait_clickable(driver, (By.XPATH, '//a[contains(., "Download em Lote")]'), replaces=1)
         download_lote_button.click()
-        time.sleep(2)
         
-        preencher_data_robusto(WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "dataInicial"))), data_inicial_dt, driver)
-        preencher_data_robusto(WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "dataFinal"))), data_final_dt, driver)
+        preencher_data_robusto(wait_clickable(driver, (By.ID, "dataInicial"), replaces=2), data_inicial_dt, driver)
+        preencher_data_robusto(wait_clickable(driver, (By.ID, "dataFinal")), data_final_dt, driver)
         driver.execute_script("[document.getElementById('dataInicial'), document.getElementById('dataFinal')].forEach(c => c.dispatchEvent(new Event('change')));")
-        time.sleep(2)
         
-        botao_download = WebDriverWait(driver, 15).until(EC.element_to_be_clickable((By.XPATH, '//button[contains(., "Download")]')))
+        botao_download = wait_clickable(driver, (By.XPATH, '//button[contains(., "Download")]'), timeout=15, replaces=2)
+        antes = download_snapshot(SELENIUM_DOWNLOAD_TEMP_PATH)
         botao_download.click()
         print(f"[⬇️] Baixando lote do {report_type} do fundo {fundo_nome_chave}") 
-        time.sleep(4)
+        # O ZIP e lido logo em seguida: acorda quando o .zip e renomeado (completo)
+        wait_download_complete(SELENIUM_DOWNLOAD_TEMP_PATH, antes, pattern="*.zip", timeout=180, replaces=4)
         return handle_downloaded_file(fundo_nome_chave, data_final_dt, True, report_type, all_siglas_param, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict_param, QORE_PDF_PATH, QORE_EXCEL_PATH) 
 
     return False
 
-def run_qore(CAMINHO_PLANILHA_AUX_BD, QORE_PDF_PATH_DEFAULT, QORE_EXCEL_PATH_DEFAULT, CAMINHO_PLANILHA_AUX_DOWNLOAD, link_dashboard, senha, email, df, QORE_enabled, PDF_enabled, modo_lote_pdf, Excel_enabled, modo_lote_excel, data_inicial_dt, data_final_dt, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_selecionados=None):
+@dataclass
+class QoreJob:
+    """Parametros da execucao compartilhados pelos workers"""
+    link_dashboard: str
+    email: str
+    senha: str
+    data_exibicao: str
+    data_obj: datetime
+    data_inicial_dt: datetime
+    data_final_dt: datetime
+    modo_lote_pdf: bool
+    modo_lote_excel: bool
+    all_siglas: dict
+    fundos_dict: dict
+    QORE_PDF_PATH: str
+    QORE_EXCEL_PATH: str
+    download_root: str
+
+    def pasta_worker(self, worker_id):
+        return os.path.join(self.download_root, f"worker_{worker_id}")
+
+    def pasta_staging(self, indice):
+        return os.path.join(self.download_root, "staging", f"{indice:04d}")
+
+
+@dataclass
+class ResultadoFundo:
+    """Resultado de um fundo (arquivos em staging ate a consolidacao)"""
+    indice: int
+    nome: str
+    pulado: bool = False
+    sucesso: bool = False
+    # Tipos ("PDF"/"Excel") baixados e que falharam
+    tipos_ok: list = field(default_factory=list)
+    tipos_falha: list = field(default_factory=list)
+    # tipo -> [(arquivo em staging, destino em get_final_path)]
+    arquivos: dict = field(default_factory=dict)
+
+
+@span("qore_login")
+def _abrir_sessao(job, download_dir):
+    """Chrome (do pool ou proprio) logado no dashboard; levanta excecao na falha"""
+    chrome_options = Options()
+    prefs = {
+        "download.default_directory": os.path.abspath(download_dir),
+        "download.prompt_for_download": False,
+        "plugins.always_open_pdf_externally": True,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    lean_options(chrome_options)
+
+    # Chrome ja aberto pelo backend, se houver pool
+    driver = pooled_driver(download_dir, timeout=10)
+    if driver is None:
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.implicitly_wait(10)
+        block_resources(driver)
+
+    print(f"[INFO] Acessando dashboard: {job.link_dashboard}")
+    try:
+        driver.get(job.link_dashboard)
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.NAME, 'email'))).send_keys(job.email)
+        driver.find_element(By.NAME, 'password').send_keys(job.senha + Keys.RETURN)
+        WebDriverWait(driver, 15).until(EC.url_contains("dashboard"))
+    except Exception:
+        _fechar_sessao(driver)
+        raise
+    print("[INFO] Login realizado com sucesso!")
+    return driver
+
+
+def _fechar_sessao(driver):
+    if driver is None:
+        return
+    try:
+        driver.quit()
+        print("[INFO] Driver Chrome encerrado.")
+    except Exception as e:
+        print(f"[AVISO] Erro ao encerrar o driver Chrome: {e}")
+
+
+def _abrir_fundo(driver, job, sigla):
+    """Dashboard -> pagina do fundo (levanta TimeoutException se o link nao aparece)"""
+    driver.get(job.link_dashboard)
+    # Busca pelo texto completo (para BLOKO) ou pela sigla (para outros)
+    wait_clickable(driver, (By.PARTIAL_LINK_TEXT, sigla), timeout=15, replaces=3).click()
+    wait_network_idle(driver, replaces=4)
+
+
+def _voltar_ao_fundo(driver, job, nome_fundo_chave, sigla):
+    """Clica "Voltar" e re-navega para a pagina do fundo (entre PDF e Excel)"""
+    try:
+        print(f"[INFO] Clicando no botão 'Voltar' para o fundo {nome_fundo_chave} antes de processar Excel.")
+        back_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//button[contains(., "Voltar")]')))
+        back_button.click()
+
+        print(f"[INFO] Navegando novamente para a página do fundo {nome_fundo_chave} para processar Excel.")
+        wait_until(driver, EC.url_contains("dashboard"), timeout=15, replaces=3, kind="url")
+        wait_clickable(driver, (By.PARTIAL_LINK_TEXT, sigla), timeout=15).click()
+        wait_network_idle(driver, replaces=4)
+    except Exception as e:
+        print(f"[AVISO] Falha ao voltar para o fundo {nome_fundo_chave} ({type(e).__name__}). Tentando pelo dashboard.")
+        try:
+            _abrir_fundo(driver, job, sigla)
+        except Exception:
+            print("[AVISO] Falha em nova tentativa de re-navegar para o fundo. Processando Excel sem re-navegação garantida.")
+
+
+@span("qore_fundo")
+def _processar_fundo(driver, job, resultado, tipos, download_dir):
+    """
+    Baixa os `tipos` pendentes de um fundo na sessao do worker. Os arquivos
+    movidos vao para o staging do fundo (resultado.arquivos).
+    """
+    nome_fundo_chave = resultado.nome
+    sigla = job.all_siglas[nome_fundo_chave]
+    print(f"\n➡️ Processando fundo: {nome_fundo_chave} (Busca por: '{sigla}')")
+
+    try:
+        _abrir_fundo(driver, job, sigla)
+    except TimeoutException:
+        print(f"[ERRO] Fundo '{nome_fundo_chave}' não encontrado ou não clicável no site com a sigla '{sigla}'.")
+        resultado.tipos_falha = list(tipos)
+        return resultado
+
+    staging_dir = job.pasta_staging(resultado.indice)
+    os.makedirs(staging_dir, exist_ok=True)
+    falhas = []
+    for n, tipo in enumerate(tipos):
+        if tipo == "Excel" and n > 0:
+            _voltar_ao_fundo(driver, job, nome_fundo_chave, sigla)
+        lote = job.modo_lote_pdf if tipo == "PDF" else job.modo_lote_excel
+        print(f"[INFO] Iniciando processamento de {tipo} para o fundo {nome_fundo_chave}")
+        arquivos = resultado.arquivos.setdefault(tipo, [])
+        _local.staging = (staging_dir, arquivos)
+        try:
+            ok = process_document_type(
+                nome_fundo_chave, job.data_exibicao, job.data_obj, lote, job.data_inicial_dt, job.data_final_dt,
+                tipo, f"Carteira {tipo}", driver, job.all_siglas, download_dir, job.fundos_dict,
+                job.QORE_PDF_PATH, job.QORE_EXCEL_PATH,
+            )
+        finally:
+            _local.staging = None
+        if ok:
+            print(f"[INFO] {tipo} processado com sucesso para {nome_fundo_chave}")
+            resultado.tipos_ok.append(tipo)
+        else:
+            print(f"[AVISO] Falha no processamento {tipo} para {nome_fundo_chave}")
+            falhas.append(tipo)
+    resultado.tipos_falha = falhas
+    resultado.sucesso = bool(resultado.tipos_ok)
+    return resultado
+
+
+def _limpar_pasta(pasta):
+    """Esvazia a pasta de download do worker (restos de um fundo anterior)"""
+    os.makedirs(pasta, exist_ok=True)
+    for entry in os.scandir(pasta):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+def _worker(worker_id, job, fila, resultados):
+    """
+    Atende a fila de fundos com uma sessao propria. Cada fundo tem ate
+    QORE_RETRIES novas tentativas dos tipos que falharam; se o Chrome caiu
+    ou o login falhou, a tentativa seguinte abre outra sessao.
+    """
+    download_dir = job.pasta_worker(worker_id)
+    driver = None
+    try:
+        while True:
+            try:
+                indice, nome_fundo_chave, tipos = fila.get_nowait()
+            except queue.Empty:
+                return
+            resultado = ResultadoFundo(indice, nome_fundo_chave)
+            pendentes = list(tipos)
+            for tentativa in range(QORE_RETRIES + 1):
+                if tentativa:
+                    print(f"[INFO] Nova tentativa ({tentativa}/{QORE_RETRIES}) de {pendentes} para {nome_fundo_chave}")
+                try:
+                    if driver is None:
+                        driver = _abrir_sessao(job, download_dir)
+                    _limpar_pasta(download_dir)
+                    _processar_fundo(driver, job, resultado, pendentes, download_dir)
+                except Exception as e:
+                    print(f"[ERRO] Falha inesperada ao processar fundo {nome_fundo_chave}: {str(e)}")
+                    resultado.tipos_falha = pendentes
+                    _fechar_sessao(driver)
+                    driver = None
+                pendentes = list(resultado.tipos_falha)
+                if not pendentes:
+                    break
+            resultado.sucesso = bool(resultado.tipos_ok)
+            resultados.put(resultado)
+    finally:
+        _fechar_sessao(driver)
+
+
+def _consolidar(resultado, job):
+    """Move os arquivos do fundo do staging para get_final_path e registra ledger/checkpoint"""
+    for tipo, arquivos in resultado.arquivos.items():
+        finais = []
+        for staged, destino in arquivos:
+            if os.path.exists(destino):
+                # Nome ocupado desde o download: proxima versao livre
+                base, ext = os.path.splitext(os.path.basename(destino))
+                destino, _ = get_versioned_filepath(os.path.dirname(destino), base, ext)
+            shutil.move(staged, destino)
+            _ARQUIVOS_MOVIDOS.append(str(destino))
+            finais.append(str(destino))
+        lote = job.modo_lote_pdf if tipo == "PDF" else job.modo_lote_excel
+        if tipo in resultado.tipos_ok and not lote:
+            record_done("qore", resultado.nome, tipo.lower(), job.data_obj, finais)
+    if resultado.sucesso and not resultado.tipos_falha:
+        mark_unit_done("qore", resultado.nome, job.data_exibicao)
+
+
+def _limpar_staging(job):
+    shutil.rmtree(os.path.join(job.download_root, "staging"), ignore_errors=True)
+
+
+def run_qore(CAMINHO_PLANILHA_AUX_BD, QORE_PDF_PATH_DEFAULT, QORE_EXCEL_PATH_DEFAULT, CAMINHO_PLANILHA_AUX_DOWNLOAD, link_dashboard, senha, email, df, QORE_enabled, PDF_enabled, modo_lote_pdf, Excel_enabled, modo_lote_excel, data_inicial_dt, data_final_dt, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_selecionados=None, workers=None):
     """
     Execução principal do script QORE
+
+    Os fundos entram numa fila atendida por `workers` navegadores (padrao
+    ETL_QORE_WORKERS), cada um com sessao, perfil e pasta de download
+    proprios. Os arquivos sao consolidados em get_final_path na ordem dos
+    fundos, pela thread principal.
     """
     print("=" * 50)
     print("INICIANDO AUTOMAÇÃO QORE")
@@ -676,14 +966,13 @@ def run_qore(CAMINHO_PLANILHA_AUX_BD, QORE_PDF_PATH_DEFAULT, QORE_EXCEL_PATH_DEF
 
     # Limpa a pasta temporária de downloads do Selenium antes de iniciar
     try:
-        if os.path.exists(SELENIUM_DOWNLOAD_TEMP_PATH):
-            for item in os.listdir(SELENIUM_DOWNLOAD_TEMP_PATH):
-                item_path = os.path.join(SELENIUM_DOWNLOAD_TEMP_PATH, item)
-                if os.path.isfile(item_path):
-                    os.unlink(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-            print(f"[INFO] Pasta temporária limpa: {SELENIUM_DOWNLOAD_TEMP_PATH}")
+        from folder_cleanup import clean_folder
+        resultado = clean_folder(SELENIUM_DOWNLOAD_TEMP_PATH)
+        if resultado is not None:
+            for erro in resultado.errors:
+                print(f"[AVISO] Erro ao limpar pasta temporária: {erro}")
+            print(f"[INFO] Pasta temporária limpa: {SELENIUM_DOWNLOAD_TEMP_PATH} "
+                  f"({resultado.removed} itens, {resultado.seconds:.1f}s)")
     except Exception as e:
         print(f"[AVISO] Erro ao limpar pasta temporária: {e}")
 
@@ -722,163 +1011,100 @@ def run_qore(CAMINHO_PLANILHA_AUX_BD, QORE_PDF_PATH_DEFAULT, QORE_EXCEL_PATH_DEF
         print("[ERRO] Credenciais ou link do dashboard não encontrados na planilha. Encerrando.")
         sys.exit(1)
 
-    # Configura e inicia o Chrome driver
-    chrome_options = Options()
-    prefs = {
-        "download.default_directory": SELENIUM_DOWNLOAD_TEMP_PATH,
-        "download.prompt_for_download": False,
-        "plugins.always_open_pdf_externally": True,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
-    except Exception as e:
-        print(f"[ERRO] Falha ao inicializar Chrome driver: {e}")
-        sys.exit(1)
-
-    # Realiza o login no sistema QORE
-    print(f"[INFO] Acessando dashboard: {link_dashboard}")
-    try:
-        driver.get(link_dashboard)
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.NAME, 'email'))).send_keys(email)
-        driver.find_element(By.NAME, 'password').send_keys(senha + Keys.RETURN)
-        WebDriverWait(driver, 15).until(EC.url_contains("dashboard"))
-        print("[INFO] Login realizado com sucesso!")
-    except TimeoutException:
-        print("[ERRO] Timeout durante o login - verifique credenciais ou conectividade. Encerrando.")
-        driver.quit()
-        sys.exit(1)
-    except Exception as e:
-        print(f"[ERRO] Falha no login: {e}. Encerrando.")
-        driver.quit()
-        sys.exit(1)
+    # Ledger: tipos ainda nao baixados por fundo. So vale no modo por dia
+    # (o modo lote cobre um periodo, nao uma data de referencia)
+    tipos_pendentes = {}
+    for nome_fundo_chave in fundos_dict:
+        tipos = []
+        if PDF_enabled and (modo_lote_pdf or not ledger_done("qore", nome_fundo_chave, "pdf", data_inicial_dt)):
+            tipos.append("PDF")
+        if Excel_enabled and (modo_lote_excel or not ledger_done("qore", nome_fundo_chave, "excel", data_inicial_dt)):
+            tipos.append("Excel")
+        tipos_pendentes[nome_fundo_chave] = tipos
+
+    if not any(tipos_pendentes.values()):
+        report_progress("qore", len(fundos_dict), len(fundos_dict), "fundos", pulados=len(fundos_dict))
+        print("[INFO] Todos os fundos já foram baixados em execuções anteriores (ledger). Nada a fazer.")
+        return
 
     # Determina a data de exibição para logs e a data objeto para downloads únicos
     data_exibicao = data_final_dt.strftime("%d/%m/%Y") if (modo_lote_pdf or modo_lote_excel) else data_inicial_dt.strftime("%d/%m/%Y")
-    data_obj = data_inicial_dt 
+
+    job = QoreJob(
+        link_dashboard=link_dashboard, email=email, senha=senha,
+        data_exibicao=data_exibicao, data_obj=data_inicial_dt,
+        data_inicial_dt=data_inicial_dt, data_final_dt=data_final_dt,
+        modo_lote_pdf=modo_lote_pdf, modo_lote_excel=modo_lote_excel,
+        all_siglas=all_siglas, fundos_dict=fundos_dict,
+        QORE_PDF_PATH=QORE_PDF_PATH, QORE_EXCEL_PATH=QORE_EXCEL_PATH,
+        download_root=SELENIUM_DOWNLOAD_TEMP_PATH,
+    )
 
     print(f"\n[INFO] Processando {len(fundos_dict)} fundos para {data_exibicao}")
     print(f"[INFO] Tipos habilitados: PDF={PDF_enabled}, Excel={Excel_enabled}")
 
     sucessos_total = 0
+    pulados = 0
     total_fundos = len(fundos_dict)
 
-    # Loop pelos fundos
-    for nome_fundo_chave in fundos_dict: 
-        try:
-            sigla_para_busca = all_siglas.get(nome_fundo_chave)
-            if not sigla_para_busca:
-                print(f"[AVISO] Sigla não encontrada para o fundo: '{nome_fundo_chave}'. Pulando este fundo.")
-                continue
-
-            print(f"\n➡️ Processando fundo: {nome_fundo_chave} (Busca por: '{sigla_para_busca}')")
-            
-            # Navega para o dashboard, depois para a página do fundo
-            driver.get(link_dashboard) 
-            time.sleep(3)
-            
-            fund_link_element = None
-            try:
-                # Busca pelo texto completo (para BLOKO) ou pela sigla (para outros)
-                fund_link_element = WebDriverWait(driver, 15).until(
-                    EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, sigla_para_busca))
-                )
-                
-            except TimeoutException:
-                print(f"[ERRO] Fundo '{nome_fundo_chave}' não encontrado ou não clicável no site com a sigla '{sigla_para_busca}'. Pulando este fundo.")
-                continue 
-
-            fund_link_element.click() 
-            time.sleep(4)
-
-            current_fund_success = False
-
-            # Processa PDF (se habilitado)
-            if PDF_enabled:
-                print(f"[INFO] Iniciando processamento de PDF para o fundo {nome_fundo_chave}")
-                if process_document_type(nome_fundo_chave, data_exibicao, data_obj, modo_lote_pdf, data_inicial_dt, data_final_dt, "PDF", "Carteira PDF", driver, all_siglas, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict, QORE_PDF_PATH, QORE_EXCEL_PATH):
-                    print(f"[INFO] PDF processado com sucesso para {nome_fundo_chave}")
-                    current_fund_success = True
-                else:
-                    print(f"[AVISO] Falha no processamento PDF para {nome_fundo_chave}")
-
-            # Processa Excel (se habilitado)
-            if Excel_enabled:
-                # Clicar "Voltar" e re-navegar para a página do fundo antes de processar Excel
-                try:
-                    print(f"[INFO] Clicando no botão 'Voltar' para o fundo {nome_fundo_chave} antes de processar Excel.")
-                    back_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//button[contains(., "Voltar")]')))
-                    back_button.click()
-                    time.sleep(3)
-
-                    print(f"[INFO] Navegando novamente para a página do fundo {nome_fundo_chave} para processar Excel.")
-                    WebDriverWait(driver, 15).until(EC.url_contains("dashboard"))
-                    
-                    fund_link_element_for_excel = WebDriverWait(driver, 15).until(
-                        EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, sigla_para_busca))
-                    )
-                    fund_link_element_for_excel.click()
-                    time.sleep(4)
-                except TimeoutException:
-                    print(f"[AVISO] Timeout ao tentar clicar no botão 'Voltar' ou re-navegar para o fundo {nome_fundo_chave}. Tentando processar Excel mesmo assim.")
-                    # Fallback: tenta voltar ao dashboard e re-clicar no link
-                    driver.get(link_dashboard) 
-                    time.sleep(3)
-                    try:
-                        WebDriverWait(driver, 15).until(
-                            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, sigla_para_busca))
-                        ).click()
-                        time.sleep(4)
-                    except:
-                        print("[AVISO] Falha em nova tentativa de re-navegar para o fundo. Processando Excel sem re-navegação garantida.")
-                except Exception as e:
-                    print(f"[ERRO] Erro inesperado ao tentar clicar em 'Voltar' ou navegar novamente para {nome_fundo_chave}: {e}. Processando Excel sem re-navegação garantida.")
-                    # Tenta ir para o dashboard e depois para a página do fundo novamente.
-                    driver.get(link_dashboard) 
-                    time.sleep(3)
-                    try:
-                        WebDriverWait(driver, 15).until(
-                            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, sigla_para_busca))
-                        ).click()
-                        time.sleep(4)
-                    except:
-                        print("[AVISO] Falha em nova tentativa de re-navegar para o fundo. Processando Excel sem re-navegação garantida.")
-
-                print(f"[INFO] Iniciando processamento de Excel para o fundo {nome_fundo_chave}")
-                if process_document_type(nome_fundo_chave, data_exibicao, data_obj, modo_lote_excel, data_inicial_dt, data_final_dt, "Excel", "Carteira Excel", driver, all_siglas, SELENIUM_DOWNLOAD_TEMP_PATH, fundos_dict, QORE_PDF_PATH, QORE_EXCEL_PATH):
-                    print(f"[INFO] Excel processado com sucesso para {nome_fundo_chave}")
-                    current_fund_success = True 
-                else:
-                    print(f"[AVISO] Falha no processamento Excel para {nome_fundo_chave}")
-            else:
-                print(f"[INFO] Download de Excel desabilitado para o fundo {nome_fundo_chave}.")
-            
-            if current_fund_success:
+    # Fundos ja resolvidos (checkpoint/ledger/sem sigla) nao entram na fila
+    fila = queue.Queue()
+    prontos = {}
+    for indice_fundo, nome_fundo_chave in enumerate(fundos_dict):
+        if unit_done("qore", nome_fundo_chave, data_exibicao):
+            print(f"[INFO] Fundo {nome_fundo_chave} já processado em execução anterior (checkpoint). Pulando.")
+            prontos[indice_fundo] = ResultadoFundo(indice_fundo, nome_fundo_chave, pulado=True)
+        elif not tipos_pendentes[nome_fundo_chave]:
+            print(f"[INFO] Fundo {nome_fundo_chave} já baixado em execução anterior (ledger). Pulando.")
+            prontos[indice_fundo] = ResultadoFundo(indice_fundo, nome_fundo_chave, pulado=True)
+        elif not all_siglas.get(nome_fundo_chave):
+            print(f"[AVISO] Sigla não encontrada para o fundo: '{nome_fundo_chave}'. Pulando este fundo.")
+            prontos[indice_fundo] = ResultadoFundo(indice_fundo, nome_fundo_chave)
+        else:
+            fila.put((indice_fundo, nome_fundo_chave, tipos_pendentes[nome_fundo_chave]))
+
+    n_workers = max(1, min(workers or QORE_WORKERS, fila.qsize()))
+    resultados = queue.Queue()
+    threads = []
+    if fila.qsize():
+        print(f"[INFO] {fila.qsize()} fundo(s) na fila para {n_workers} navegador(es) QORE")
+        for worker_id in range(n_workers):
+            thread = threading.Thread(target=_worker, args=(worker_id, job, fila, resultados), name=f"qore_{worker_id}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    # Consolidacao em ordem de fundo: cada fundo vai para get_final_path
+    # assim que ele e todos os anteriores terminam
+    proximo = 0
+    while proximo < total_fundos:
+        while proximo in prontos:
+            resultado = prontos.pop(proximo)
+            _consolidar(resultado, job)
+            if resultado.pulado or resultado.sucesso:
                 sucessos_total += 1
-            
-        except Exception as e:
-            print(f"[ERRO] Falha inesperada ao processar fundo {nome_fundo_chave}: {str(e)}")
-            continue
-
+            if resultado.pulado:
+                pulados += 1
+            proximo += 1
+            report_progress("qore", proximo, total_fundos, "fundos", pulados=pulados)
+        if proximo >= total_fundos:
+            break
+        try:
+            resultado = resultados.get(timeout=0.5)
+            prontos[resultado.indice] = resultado
+        except queue.Empty:
+            if not any(thread.is_alive() for thread in threads) and resultados.empty():
+                # Workers encerrados sem resultado (nao devia ocorrer): falha
+                prontos[proximo] = ResultadoFundo(proximo, list(fundos_dict)[proximo])
+
+    for thread in threads:
+        thread.join()
+    _limpar_staging(job)
+
+    report_progress("qore", total_fundos, total_fundos, "fundos", pulados=pulados)
     print(f"\n[INFO] Processamento QORE concluído: {sucessos_total}/{total_fundos} fundos processados com sucesso")
 
     # Finalização
     print("Processo concluído.")
-    time.sleep(2) 
-    if driver:
-        try:
-            driver.quit()
-            print("[INFO] Driver Chrome encerrado.")
-        except Exception as e:
-            print(f"[AVISO] Erro ao encerrar o driver Chrome: {e}")
 
     # Sai do script com o código de status apropriado (0 para sucesso, 1 para falha)
     sys.exit(0 if sucessos_total > 0 else 1)
@@ -931,7 +1157,8 @@ if __name__ == "__main__":
 
     # Lê da planilha os outros caminhos (modo padrão)
     try:
-        df = pd.read_excel(CAMINHO_PLANILHA_AUX_DOWNLOAD, sheet_name="Downloads", engine='openpyxl', header=None)
+        with span("read_excel"):
+            df = pd.read_excel(CAMINHO_PLANILHA_AUX_DOWNLOAD, sheet_name="Downloads", engine='openpyxl', header=None)
         CAMINHO_PLANILHA_AUX_BD = str(df.iloc[18, 8]).strip()
         QORE_PDF_PATH_DEFAULT = str(df.iloc[8, 8]).strip()
         QORE_EXCEL_PATH_DEFAULT = str(df.iloc[12, 8]).strip()   
@@ -1020,7 +1247,8 @@ if __name__ == "__main__":
     
     # Leitura da planilha principal (se ainda não foi lida)
     if 'df' not in locals():
-        df = pd.read_excel(CAMINHO_PLANILHA_AUX_DOWNLOAD, sheet_name="Downloads", engine='openpyxl', header=None)
+        with span("read_excel"):
+            df = pd.read_excel(CAMINHO_PLANILHA_AUX_DOWNLOAD, sheet_name="Downloads", engine='openpyxl', header=None)
 
     # Se os caminhos ainda não foram definidos, lê da planilha
     if 'CAMINHO_PLANILHA_AUX_BD' not in locals():
@@ -3,21 +3,98 @@ Base Driver - Selenium WebDriver centralizado para automacoes
 Suporta Chrome instalado ou Chrome portatil
 """
 import logging
+import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, List, Optional, Tuple
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from download_watcher import DownloadWatcher
+
 # Tentar importar config, mas funcionar mesmo sem
 try:
     from config import settings
 except ImportError:
     settings = None
 
+# Spans de tempo (utils/) - no-op quando rodando standalone
+try:
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+# Contagem dos waits (utils/) - no-op quando rodando standalone
+try:
+    from wait_stats import record as record_wait, record_pause
+except ImportError:
+    def record_wait(*args, **kwargs):
+        pass
+
+    def record_pause(*args, **kwargs):
+        pass
+
+# Chrome emprestado do pool do backend (utils/) - sem pool quando standalone
+try:
+    import browser_lease
+except ImportError:
+    browser_lease = None
+
 logger = logging.getLogger(__name__)
 
+# Perfil enxuto: a automacao so precisa do DOM e dos downloads
+LEAN_PROFILE = os.getenv("ETL_CHROME_LEAN", "true").lower() not in ("0", "false", "no")
+
+# Headless nos setup_driver dos modulos (servidor, CI, benchmark dos portais simulados)
+HEADLESS = os.getenv("ETL_CHROME_HEADLESS", "false").lower() in ("1", "true", "yes")
+
+# Recursos bloqueados por aba (CDP Network.setBlockedURLs); downloads
+# (pdf, xlsx, csv, zip) nunca entram aqui
+BLOCKED_URL_PATTERNS = (
+    # Imagens
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.bmp",
+    # Fontes
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Midia
+    "*.mp4", "*.webm", "*.mp3",
+    # Analytics e rastreamento
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*clarity.ms*", "*connect.facebook.net*", "*newrelic.com*", "*nr-data.net*",
+)
+
+# Sem rede em background nem recursos que a automacao nao usa
+LEAN_ARGUMENTS = (
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+)
+
+HEADLESS_ARGUMENTS = (
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--window-size=1920,1080",
+)
+
 
 def get_chrome_path() -> Optional[Path]:
     """Retorna caminho do Chrome portatil se existir"""
@@ -33,6 +110,140 @@ def get_chromedriver_path() -> Optional[Path]:
     return None
 
 
+def _chromedriver_service(is_linux: bool) -> Optional[Service]:
+    """ChromeDriver portatil (Windows) ou do sistema (Linux/Docker)"""
+    chromedriver_path = get_chromedriver_path()
+    if chromedriver_path and not is_linux:
+        logger.info(f"Usando ChromeDriver portatil: {chromedriver_path}")
+        return Service(str(chromedriver_path))
+    if is_linux:
+        logger.info("Ambiente Linux detectado: Usando /usr/bin/chromedriver")
+        return Service("/usr/bin/chromedriver")
+    return None
+
+
+def set_download_path(driver, path: str):
+    """Troca a pasta de download do Chrome ja aberto (CDP)"""
+    params = {"behavior": "allow", "downloadPath": os.path.abspath(path)}
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", params)
+    except WebDriverException:
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", params)
+
+
+def blocked_url_patterns() -> List[str]:
+    """Padroes bloqueados (ETL_CHROME_BLOCKED_URLS=lista,separada sobrescreve; vazio = nenhum)"""
+    raw = os.getenv("ETL_CHROME_BLOCKED_URLS")
+    if raw is None:
+        return list(BLOCKED_URL_PATTERNS)
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+def lean_options(options: Options) -> Options:
+    """
+    Flags do perfil enxuto e page load eager (DOM pronto, sem esperar imagens).
+    Com ETL_CHROME_HEADLESS tambem roda sem janela, com ou sem perfil enxuto.
+    """
+    if LEAN_PROFILE:
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.page_load_strategy = "eager"
+    if HEADLESS:
+        for argument in HEADLESS_ARGUMENTS:
+            if argument not in options.arguments:
+                options.add_argument(argument)
+    return options
+
+
+def block_resources(driver, patterns: Optional[Iterable[str]] = None) -> bool:
+    """
+    Bloqueia imagens, fontes, midia e analytics na aba atual (CDP).
+
+    Returns:
+        False se o perfil enxuto esta desligado ou o CDP recusou
+    """
+    if not LEAN_PROFILE:
+        return False
+    urls = list(patterns) if patterns is not None else blocked_url_patterns()
+    if not urls:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+        return True
+    except WebDriverException as e:
+        logger.warning(f"Bloqueio de recursos indisponivel: {e}")
+        return False
+
+
+def _limpar_abas(driver):
+    """Deixa uma unica aba em branco e sem cookies para o proximo step"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.get("about:blank")
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+
+@span("pooled_driver")
+def pooled_driver(download_path: Optional[str] = None, timeout: Optional[int] = None) -> Optional[webdriver.Chrome]:
+    """
+    Anexa a um Chrome ja aberto do pool do backend (ETL_BROWSER_POOL).
+
+    O chromedriver conecta pela porta DevTools (debuggerAddress) em vez de
+    abrir outro navegador. driver.quit() limpa abas e cookies, encerra o
+    chromedriver e devolve o Chrome ao pool - o navegador continua aberto.
+
+    Args:
+        download_path: Diretorio para downloads (padrao: pasta da instancia)
+        timeout: Implicit wait (None = sem, como o Chrome dos setup_driver)
+
+    Returns:
+        webdriver.Chrome anexado, ou None sem pool/sem Chrome livre
+    """
+    if browser_lease is None:
+        return None
+    entry = browser_lease.claim()
+    if entry is None:
+        return None
+
+    import sys
+    options = Options()
+    options.debugger_address = entry["address"]
+    if LEAN_PROFILE:
+        options.page_load_strategy = "eager"
+    try:
+        driver = webdriver.Chrome(options=options, service=_chromedriver_service(sys.platform.startswith('linux')))
+        set_download_path(driver, download_path or entry["download_dir"])
+        block_resources(driver)
+    except WebDriverException as e:
+        logger.warning(f"Chrome do pool indisponivel ({entry['address']}): {e}")
+        browser_lease.release(entry)
+        return None
+    if timeout is not None:
+        driver.implicitly_wait(timeout)
+
+    quit_original = driver.quit
+
+    def quit():
+        try:
+            _limpar_abas(driver)
+        except WebDriverException as e:
+            logger.warning(f"Erro ao limpar Chrome do pool: {e}")
+        finally:
+            try:
+                quit_original()
+            finally:
+                browser_lease.release(entry)
+
+    driver.quit = quit
+    logger.info(f"Usando Chrome do pool: {entry['address']}")
+    return driver
+
+
+@span("create_driver")
 def create_driver(
     download_path: Optional[str] = None,
     headless: bool = False,
@@ -50,6 +261,11 @@ def create_driver(
     Returns:
         webdriver.Chrome configurado
     """
+    # Chrome ja aberto pelo backend (lancamento fora do caminho critico)
+    driver = pooled_driver(download_path, timeout)
+    if driver is not None:
+        return driver
+
     options = Options()
     
     # Detectar ambiente Linux/Docker
@@ -95,21 +311,17 @@ def create_driver(
     # Desativar notificacoes e popups
     options.add_argument("--disable-notifications")
     options.add_argument("--disable-popup-blocking")
+
+    # Perfil enxuto (ETL_CHROME_LEAN)
+    lean_options(options)
     
     # Servico com ChromeDriver portatil
-    service = None
-    chromedriver_path = get_chromedriver_path()
-    if chromedriver_path and not is_linux:
-        service = Service(str(chromedriver_path))
-        logger.info(f"Usando ChromeDriver portatil: {chromedriver_path}")
-    elif is_linux:
-         # Docker/Linux: usar system driver
-         service = Service("/usr/bin/chromedriver")
-         logger.info("Ambiente Linux detectado: Usando /usr/bin/chromedriver")
+    service = _chromedriver_service(is_linux)
     
     # Criar driver
     driver = webdriver.Chrome(options=options, service=service)
     driver.implicitly_wait(timeout)
+    block_resources(driver)
     
     logger.info("Chrome WebDriver criado com sucesso")
     return driver
@@ -120,6 +332,409 @@ def create_wait(driver: webdriver.Chrome, timeout: int = 30) -> WebDriverWait:
     return WebDriverWait(driver, timeout)
 
 
+# ---------------------------------------------------------------------------
+# Waits condicionais
+#
+# Substituem os time.sleep fixos dos modulos: retornam assim que a condicao
+# vale em vez de esperar sempre o pior caso. `replaces` informa os segundos
+# do sleep que o wait substituiu (so para o resumo em wait_stats).
+#
+# Waits de elemento (wait_element, wait_elements, wait_clickable, wait_until)
+# levantam TimeoutException, como o WebDriverWait; com required=False
+# retornam None no timeout (para sleeps que nao verificavam nada). Waits de estado
+# (wait_stale, wait_spinner_gone, wait_network_idle, wait_download_started)
+# retornam False/[] no timeout e o fluxo segue, como seguia depois do sleep.
+# ---------------------------------------------------------------------------
+
+Locator = Tuple[str, str]
+
+WAIT_TIMEOUT = 10
+NETWORK_TIMEOUT = 15
+DOWNLOAD_START_TIMEOUT = 30
+POLL_INTERVAL = 0.1
+# Segundos sem requisicao pendente para considerar a rede ociosa
+NETWORK_QUIET = 0.3
+# Arquivos parciais do Chrome/Edge/Firefox: DOWNLOAD_TEMP_SUFFIXES (download_watcher)
+
+# Overlays de carregamento dos portais (PrimeFaces, jQuery blockUI, genericos)
+SPINNER_SELECTORS: Tuple[str, ...] = (
+    ".ui-blockui",
+    ".ui-widget-overlay",
+    ".blockUI",
+    ".loading",
+    ".spinner",
+    "#loading",
+)
+
+# Conta XHR/fetch em voo (instrumenta a pagina na primeira chamada) e soma
+# as filas do jQuery e do PrimeFaces; resources so cresce enquanto carrega
+_NETWORK_JS = """
+var w = window;
+if (!w.__etlRede) {
+    var rede = w.__etlRede = {pendentes: 0};
+    var fim = function () { rede.pendentes = Math.max(0, rede.pendentes - 1); };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        rede.pendentes++;
+        this.addEventListener('loadend', fim);
+        return send.apply(this, arguments);
+    };
+    if (w.fetch) {
+        var fetch = w.fetch;
+        w.fetch = function () {
+            rede.pendentes++;
+            return fetch.apply(this, arguments).finally(fim);
+        };
+    }
+}
+var pendentes = w.__etlRede.pendentes;
+if (w.jQuery && w.jQuery.active) { pendentes += w.jQuery.active; }
+var pf = w.PrimeFaces;
+if (pf && pf.ajax && pf.ajax.Queue && pf.ajax.Queue.isEmpty && !pf.ajax.Queue.isEmpty()) { pendentes += 1; }
+var recursos = w.performance && performance.getEntriesByType ? performance.getEntriesByType('resource').length : 0;
+return [document.readyState, pendentes, recursos];
+"""
+
+# Visivel = tem caixa na pagina (querySelectorAll nao sofre implicit wait)
+_SPINNER_JS = """
+var seletores = arguments[0];
+for (var i = 0; i < seletores.length; i++) {
+    var els = document.querySelectorAll(seletores[i]);
+    for (var j = 0; j < els.length; j++) {
+        var el = els[j];
+        if (el.getClientRects().length && getComputedStyle(el).visibility !== 'hidden') { return true; }
+    }
+}
+return false;
+"""
+
+
+def _done(kind: str, started: float, replaces: float, ok: bool):
+    record_wait(kind, time.monotonic() - started, replaces, ok)
+
+
+def wait_until(
+    driver,
+    condition: Callable,
+    timeout: float = WAIT_TIMEOUT,
+    replaces: float = 0.0,
+    kind: str = "condition",
+    message: str = "",
+    required: bool = True,
+):
+    """
+    Espera condition(driver) retornar valor verdadeiro.
+
+    Returns:
+        O valor retornado pela condicao (None no timeout com required=False)
+
+    Raises:
+        TimeoutException: Condicao nao satisfeita em `timeout` segundos
+    """
+    started = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition, message)
+    except TimeoutException:
+        _done(kind, started, replaces, False)
+        if not required:
+            logger.debug(f"Timeout ({timeout}s) ignorado: {message or kind}")
+            return None
+        raise
+    _done(kind, started, replaces, True)
+    return result
+
+
+def wait_element(
+    driver,
+    locator: Locator,
+    timeout: float = WAIT_TIMEOUT,
+    replaces: float = 0.0,
+    visible: bool = False,
+    required: bool = True,
+):
+    """Espera o elemento existir (ou ficar visivel) e o retorna"""
+    condition = EC.visibility_of_element_located(locator) if visible else EC.presence_of_element_located(locator)
+    return wait_until(
+        driver, condition, timeout, replaces, "element", f"Elemento nao encontrado: {locator}", required,
+    )
+
+
+def wait_elements(
+    driver,
+    locator: Locator,
+    timeout: float = WAIT_TIMEOUT,
+    replaces: float = 0.0,
+    min_count: int = 1,
+    required: bool = True,
+) -> Optional[list]:
+    """Espera pelo menos `min_count` elementos e retorna a lista"""
+    def condition(d):
+        elements = d.find_elements(*locator)
+        return elements if len(elements) >= min_count else False
+
+    return wait_until(
+        driver, condition, timeout, replaces, "elements", f"Elementos nao encontrados: {locator}", required,
+    )
+
+
+def wait_clickable(
+    driver,
+    target,
+    timeout: float = WAIT_TIMEOUT,
+    replaces: float = 0.0,
+    required: bool = True,
+):
+    """Espera o elemento (locator ou WebElement) ficar visivel e habilitado e o retorna"""
+    return wait_until(
+        driver, EC.element_to_be_clickable(target), timeout, replaces, "clickable",
+        f"Elemento nao clicavel: {target}", required,
+    )
+
+
+def wait_stale(driver, element, timeout: float = WAIT_TIMEOUT, replaces: float = 0.0) -> bool:
+    """Espera o elemento sair do DOM (pagina/painel recarregado)"""
+    started = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(EC.staleness_of(element))
+    except TimeoutException:
+        _done("stale", started, replaces, False)
+        return False
+    _done("stale", started, replaces, True)
+    return True
+
+
+def wait_spinner_gone(
+    driver,
+    selectors: Iterable[str] = SPINNER_SELECTORS,
+    timeout: float = NETWORK_TIMEOUT,
+    replaces: float = 0.0,
+) -> bool:
+    """Espera nenhum overlay de carregamento estar visivel"""
+    selectors = list(selectors)
+    started = time.monotonic()
+    deadline = started + timeout
+    while True:
+        try:
+            if not driver.execute_script(_SPINNER_JS, selectors):
+                _done("spinner", started, replaces, True)
+                return True
+        except WebDriverException:
+            pass  # pagina navegando: tenta de novo
+        if time.monotonic() >= deadline:
+            _done("spinner", started, replaces, False)
+            logger.debug(f"Spinner ainda visivel apos {timeout}s")
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_network_idle(
+    driver,
+    timeout: float = NETWORK_TIMEOUT,
+    quiet: float = NETWORK_QUIET,
+    replaces: float = 0.0,
+) -> bool:
+    """
+    Espera a pagina carregar e a rede ficar ociosa por `quiet` segundos.
+
+    Ociosa: document.readyState == "complete", nenhum XHR/fetch em voo (nem
+    nas filas do jQuery/PrimeFaces) e nenhum recurso novo desde a ultima
+    verificacao.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    quiet_since = None
+    last_resources = None
+    while True:
+        now = time.monotonic()
+        try:
+            state, pending, resources = driver.execute_script(_NETWORK_JS)
+            idle = state == "complete" and not pending and resources == last_resources
+            last_resources = resources
+        except (WebDriverException, TypeError, ValueError):
+            idle = False  # pagina navegando: tenta de novo
+        if not idle:
+            quiet_since = None
+        elif quiet_since is None:
+            quiet_since = now
+        if quiet_since is not None and now - quiet_since >= quiet:
+            _done("network_idle", started, replaces, True)
+            return True
+        if now >= deadline:
+            _done("network_idle", started, replaces, False)
+            logger.debug(f"Rede ainda ativa apos {timeout}s")
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def _listdir(folder: str) -> set:
+    try:
+        return set(os.listdir(folder))
+    except OSError:
+        return set()
+
+
+def wait_download_started(
+    folder: str,
+    before: Optional[Iterable[str]] = None,
+    timeout: float = DOWNLOAD_START_TIMEOUT,
+    replaces: float = 0.0,
+) -> List[str]:
+    """
+    Espera surgir arquivo novo na pasta (inclusive .crdownload/.tmp).
+
+    Args:
+        folder: Pasta de download
+        before: Nomes presentes antes do clique; tire o snapshot com
+            download_snapshot() antes de clicar
+        timeout: Segundos ate desistir
+
+    Returns:
+        Nomes novos (ordenados) ou [] no timeout
+    """
+    started = time.monotonic()
+    with DownloadWatcher(folder, before) as watcher:
+        new = watcher.wait_started(timeout)
+    _done("download_started", started, replaces, bool(new))
+    if not new:
+        logger.debug(f"Nenhum download iniciado em {folder} apos {timeout}s")
+    return new
+
+
+def wait_downloads_done(folder: str, timeout: float = 120, replaces: float = 0.0) -> bool:
+    """Espera nao haver download em andamento na pasta (.crdownload/.tmp/.part)"""
+    started = time.monotonic()
+    with DownloadWatcher(folder) as watcher:
+        ok = watcher.wait_idle(timeout)
+    _done("downloads_done", started, replaces, ok)
+    if not ok:
+        logger.debug(f"Downloads ainda em andamento em {folder} apos {timeout}s")
+    return ok
+
+
+def wait_download_complete(
+    folder: str,
+    before: Optional[Iterable[str]] = None,
+    count: int = 1,
+    pattern=None,
+    timeout: float = 120,
+    replaces: float = 0.0,
+) -> List[str]:
+    """
+    Espera `count` arquivos novos completos (renomeados do nome temporario
+    ou fechados) que casem com `pattern` (glob ou regex).
+
+    Args:
+        folder: Pasta de download
+        before: Snapshot antes do clique (None = conteudo atual; () = conta
+            tambem o que ja esta na pasta)
+        count: Quantidade de arquivos
+        pattern: Ex.: "*.zip", "*carteira*.pdf"
+        timeout: Segundos ate desistir
+
+    Returns:
+        Nomes completos (ordenados) ou [] no timeout
+    """
+    started = time.monotonic()
+    with DownloadWatcher(folder, before) as watcher:
+        names = watcher.wait_for_files(count, pattern, timeout)
+    _done("download_complete", started, replaces, bool(names))
+    if not names:
+        logger.debug(f"Download ({pattern or '*'}) nao concluido em {folder} apos {timeout}s")
+    return names
+
+
+def download_snapshot(folder: str) -> set:
+    """Nomes na pasta de download (para wait_download_started)"""
+    return _listdir(folder)
+
+
+def pause(seconds: float):
+    """
+    Pausa fixa que continua necessaria (animacao sem evento, rate limit do
+    portal). Contada em wait_stats para aparecer no resumo do step.
+    """
+    record_pause(seconds)
+    time.sleep(seconds)
+
+
+# ---------------------------------------------------------------------------
+# Entrada de texto
+#
+# fill_input substitui a digitacao tecla a tecla com pausa: o valor vai por
+# JS (setter nativo + eventos input/change, o que mascaras e frameworks
+# escutam) e e conferido; teclas so entram se a conferencia falhar.
+# ---------------------------------------------------------------------------
+
+# Setter nativo (nao o do framework) e eventos que as mascaras escutam
+_SET_VALUE_JS = """
+var el = arguments[0], valor = arguments[1];
+var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+var setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+el.focus();
+setter.call(el, valor);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+return el.value;
+"""
+
+
+def fill_input(
+    driver,
+    element,
+    value: str,
+    key_delay: float = 0.1,
+    matches: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Preenche um campo de texto/data e confere o valor, do mais rapido ao
+    mais lento:
+
+    1. JS: setter nativo + eventos input/change (um round trip)
+    2. send_keys da string inteira, sobre o conteudo selecionado
+    3. Tecla a tecla com `key_delay` (mascara que descarta digitos rapidos)
+
+    Args:
+        value: Valor esperado no campo
+        key_delay: Pausa entre teclas do ultimo recurso (o ritmo antigo)
+        matches: Conferencia do valor lido (padrao: igual a `value`)
+
+    Returns:
+        Metodo que deixou o valor certo ("js", "keys", "slow") ou "" se
+        nenhum confirmou (valor forcado por JS + change, como antes)
+    """
+    confere = matches or (lambda atual: atual == value)
+    started = time.monotonic()
+    replaces = len(value) * key_delay
+
+    try:
+        if confere(driver.execute_script(_SET_VALUE_JS, element, value) or ""):
+            _done("fill_input", started, replaces, True)
+            return "js"
+    except WebDriverException as e:
+        logger.debug(f"Preenchimento por JS falhou: {e}")
+
+    element.send_keys(Keys.CONTROL + "a")
+    element.send_keys(Keys.DELETE)
+    element.send_keys(value)
+    if confere(element.get_attribute("value") or ""):
+        _done("fill_input", started, replaces, True)
+        return "keys"
+
+    element.send_keys(Keys.CONTROL + "a")
+    element.send_keys(Keys.DELETE)
+    for char in value:
+        element.send_keys(char)
+        pause(key_delay)
+    if confere(element.get_attribute("value") or ""):
+        _done("fill_input", started, 0.0, True)
+        return "slow"
+
+    logger.warning(f"Campo nao aceitou {value!r} (atual: {element.get_attribute('value')!r}); forcando por JS")
+    driver.execute_script(_SET_VALUE_JS, element, value)
+    _done("fill_input", started, 0.0, False)
+    return ""
+
+
 class DriverManager:
     """Context manager para gerenciar ciclo de vida do driver"""
     
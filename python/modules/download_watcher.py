@@ -0,0 +1,281 @@
+"""
+Watcher de pasta de download - fim do download por evento (inotify)
+
+Em vez de olhar a pasta a cada N segundos, o watcher dorme no descritor do
+inotify e reavalia a pasta so quando o kernel avisa que algo mudou:
+
+- IN_CLOSE_WRITE: arquivo escrito e fechado (download gravado direto)
+- IN_MOVED_TO:    .crdownload/.part renomeado para o nome final (Chrome)
+- IN_CREATE / IN_DELETE / IN_MOVED_FROM: inicio de download, limpeza
+
+Sem inotify (Windows, macOS, libc sem a chamada, limite de watches) cai
+para polling a cada POLL_INTERVAL, com o mesmo comportamento: um arquivo so
+conta como pronto quando nao tem nome temporario, nao tem irmao temporario
+(ex.: x.pdf + x.pdf.part) e o tamanho parou de mudar.
+
+Uso:
+    antes = download_snapshot(pasta)
+    botao.click()
+    wait_for_files(pasta, before=antes, pattern="*.zip")      # 1 arquivo .zip
+    wait_for_files(pasta, count=2, before=antes)              # 2 arquivos
+    wait_idle(pasta)                                          # sem .crdownload
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Union
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_TEMP_SUFFIXES = (".crdownload", ".tmp", ".part")
+
+# Fallback sem inotify
+POLL_INTERVAL = 0.25
+
+# Reavaliacao de seguranca mesmo sem evento (pasta em rede, evento perdido)
+SAFETY_TICK = 5.0
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    """libc com inotify_init1 (None fora do Linux)"""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def is_temp(name: str) -> bool:
+    return name.endswith(DOWNLOAD_TEMP_SUFFIXES)
+
+
+def _matcher(pattern: Union[str, Pattern, None]) -> Callable[[str], bool]:
+    """Glob sem diferenciar maiusculas ("*qore*.pdf") ou regex compilada"""
+    if pattern is None:
+        return lambda name: True
+    if isinstance(pattern, str):
+        glob = pattern.lower()
+        return lambda name: fnmatch.fnmatch(name.lower(), glob)
+    return lambda name: bool(pattern.search(name))
+
+
+class DownloadWatcher:
+    """
+    Observa uma pasta de download.
+
+    Args:
+        folder: Pasta observada (criada se nao existir)
+        before: Nomes ja presentes que nao contam como download novo.
+            None = tudo que existe ao abrir o watcher; () = nada (arquivos
+            ja na pasta tambem contam)
+        use_inotify: False forca polling (testes)
+    """
+
+    def __init__(self, folder: str, before: Optional[Iterable[str]] = None, use_inotify: bool = True):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._fd = None
+        # Nomes fechados/renomeados desde a abertura (so com inotify)
+        self._closed: set = set()
+        if use_inotify:
+            self._open_inotify()
+        self.before = set(before) if before is not None else set(self._listdir())
+        # Tamanho visto na ultima passada (estabilidade) e arquivos ainda
+        # sem evento de fechamento, que pedem reavaliacao em POLL_INTERVAL
+        self._sizes: Dict[str, int] = {}
+        self._unconfirmed = False
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._fd is not None else "polling"
+
+    def _open_inotify(self):
+        libc = _load_libc()
+        if libc is None:
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        if libc.inotify_add_watch(fd, os.fsencode(self.folder), WATCH_MASK) < 0:
+            logger.debug(f"inotify_add_watch falhou (errno {ctypes.get_errno()}); usando polling")
+            os.close(fd)
+            return
+        self._fd = fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "DownloadWatcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # === Estado da pasta ===
+
+    def _listdir(self) -> List[str]:
+        try:
+            return os.listdir(self.folder)
+        except OSError:
+            return []
+
+    def new_names(self) -> List[str]:
+        """Nomes novos desde `before` (inclusive temporarios)"""
+        return sorted(set(self._listdir()) - self.before)
+
+    def pending(self) -> List[str]:
+        """Downloads em andamento (nomes temporarios)"""
+        return sorted(name for name in self._listdir() if is_temp(name))
+
+    def finished(self) -> List[str]:
+        """Arquivos novos ja completos (nome final, sem irmao temporario)"""
+        names = set(self._listdir())
+        prontos = []
+        sizes = {}
+        for name in sorted(names - self.before):
+            if is_temp(name) or any(name + suffix in names for suffix in DOWNLOAD_TEMP_SUFFIXES):
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            sizes[name] = size
+            if self._fd is not None:
+                # Chrome so cria o nome final ao renomear: renomeado ou fechado = pronto
+                if name in self._closed or self._sizes.get(name) == size:
+                    prontos.append(name)
+            elif self._sizes.get(name) == size:
+                prontos.append(name)
+        self._sizes = sizes
+        self._unconfirmed = len(prontos) < len(sizes)
+        return prontos
+
+    # === Espera ===
+
+    def _drain(self):
+        """Le os eventos pendentes; registra os arquivos fechados/renomeados"""
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError:  # BlockingIOError: fila vazia
+                return
+            if not data:
+                return
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                raw = data[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length]
+                offset += _EVENT_HEADER.size + length
+                name = os.fsdecode(raw.rstrip(b"\0"))
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name:
+                    self._closed.add(name)
+                elif mask & (IN_DELETE | IN_MOVED_FROM) and name:
+                    self._closed.discard(name)
+
+    def _sleep(self, remaining: float):
+        """Dorme ate o proximo evento (inotify) ou o proximo poll"""
+        if self._fd is None:
+            time.sleep(max(0.0, min(POLL_INTERVAL, remaining)))
+            return
+        tick = POLL_INTERVAL if self._unconfirmed else SAFETY_TICK
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, min(tick, remaining)))
+        if ready:
+            self._drain()
+
+    def wait(self, condition: Callable[[], object], timeout: Optional[float]):
+        """
+        Reavalia `condition` a cada mudanca na pasta ate ela ser verdadeira.
+
+        Returns:
+            O valor verdadeiro de condition(), ou None no timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result = condition()
+            if result:
+                return result
+            remaining = SAFETY_TICK if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._sleep(remaining)
+
+    def wait_started(self, timeout: Optional[float] = 30) -> List[str]:
+        """Algum nome novo (download comecou); [] no timeout"""
+        return self.wait(self.new_names, timeout) or []
+
+    def wait_idle(self, timeout: Optional[float] = 120) -> bool:
+        """Nenhum download em andamento"""
+        return self.wait(lambda: not self.pending(), timeout) is not None
+
+    def wait_for_files(
+        self,
+        count: int = 1,
+        pattern: Union[str, Pattern, None] = None,
+        timeout: Optional[float] = 60,
+    ) -> List[str]:
+        """
+        Espera `count` arquivos novos completos que casem com `pattern`.
+
+        Returns:
+            Os nomes (ordenados) ou [] no timeout
+        """
+        match = _matcher(pattern)
+
+        def prontos():
+            names = [name for name in self.finished() if match(name)]
+            return names if len(names) >= count else None
+
+        return self.wait(prontos, timeout) or []
+
+
+def wait_for_files(
+    folder: str,
+    count: int = 1,
+    pattern: Union[str, Pattern, None] = None,
+    before: Optional[Iterable[str]] = None,
+    timeout: Optional[float] = 60,
+) -> List[str]:
+    """Atalho: DownloadWatcher(folder, before).wait_for_files(...)"""
+    with DownloadWatcher(folder, before) as watcher:
+        return watcher.wait_for_files(count, pattern, timeout)
+
+
+def wait_started(folder: str, before: Optional[Iterable[str]] = None, timeout: Optional[float] = 30) -> List[str]:
+    """Atalho: DownloadWatcher(folder, before).wait_started(...)"""
+    with DownloadWatcher(folder, before) as watcher:
+        return watcher.wait_started(timeout)
+
+
+def wait_idle(folder: str, timeout: Optional[float] = 120) -> bool:
+    """Atalho: DownloadWatcher(folder).wait_idle(...)"""
+    with DownloadWatcher(folder) as watcher:
+        return watcher.wait_idle(timeout)
@@ -0,0 +1,232 @@
+"""
+Exportacao hibrida: login no Selenium, download direto por HTTP
+
+O navegador continua fazendo o que so ele faz bem (login, callbacks do
+portal que montam o estado da tela). O download em si e um request HTTP
+autenticado: os cookies do Chrome vao para uma requests.Session e os
+relatorios sao pedidos direto, em paralelo, sem clique, sem dialogo de
+download e sem vigiar .crdownload.
+
+Uso:
+    pedidos = [form_request(driver, botao) for botao in botoes]
+    with session_from_driver(driver) as sessao:
+        for pedido, resultado in fetch_all(sessao, pedidos, pasta):
+            if isinstance(resultado, Exception):
+                ...  # cai para o clique no navegador
+
+form_request() le o <form> do elemento (action, metodo, campos e o proprio
+botao como submitter), o que cobre os postbacks ASP.NET/DevExpress e os
+formularios simples de download. Resposta HTML no lugar do arquivo (tela de
+login, sessao expirada) vira ExportError para o chamador usar o fluxo antigo.
+
+ETL_HTTP_EXPORT=false desliga o modo hibrido (enabled()).
+"""
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+import requests
+
+# Spans de tempo (utils/) - no-op quando rodando standalone
+try:
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TIMEOUT = 300
+MAX_WORKERS = int(os.getenv("ETL_HTTP_EXPORT_WORKERS", "4"))
+CHUNK_SIZE = 1024 * 1024
+
+# Serializa o <form> do elemento (FormData com submitter: inclui o botao)
+_FORM_JS = """
+var el = arguments[0];
+var form = el.form || el.closest('form');
+if (!form) { return null; }
+var data;
+try { data = new FormData(form, el.name ? el : undefined); }
+catch (e) { data = new FormData(form); if (el.name) { data.append(el.name, el.value || ''); } }
+var fields = [];
+data.forEach(function (v, k) { if (typeof v === 'string') { fields.push([k, v]); } });
+return {
+    action: form.getAttribute('action') ? form.action : document.location.href,
+    method: (form.getAttribute('method') || 'get').toUpperCase(),
+    fields: fields,
+    page: document.location.href
+};
+"""
+
+
+class ExportError(Exception):
+    """Download direto falhou (status, HTML no lugar do arquivo, rede)"""
+
+
+@dataclass
+class ExportRequest:
+    """Um relatorio a baixar"""
+    url: str
+    method: str = "GET"
+    # Campos do formulario/query (lista de pares: nomes podem repetir)
+    data: List[Tuple[str, str]] = field(default_factory=list)
+    # Nome do arquivo quando a resposta nao traz Content-Disposition
+    filename: Optional[str] = None
+    referer: Optional[str] = None
+    # Primeiros bytes esperados (ex.: b"PK" para xlsx/zip, b"%PDF")
+    magic: Optional[bytes] = None
+
+
+def enabled() -> bool:
+    return os.getenv("ETL_HTTP_EXPORT", "true").lower() not in ("0", "false", "no")
+
+
+def session_from_driver(driver) -> requests.Session:
+    """requests.Session com os cookies e o User-Agent do Chrome logado"""
+    sessao = requests.Session()
+    for cookie in driver.get_cookies():
+        sessao.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+        )
+    try:
+        user_agent = driver.execute_script("return navigator.userAgent")
+        if user_agent:
+            sessao.headers["User-Agent"] = user_agent
+    except Exception:
+        pass
+    return sessao
+
+
+def form_request(driver, element, filename: Optional[str] = None, magic: Optional[bytes] = None) -> ExportRequest:
+    """
+    Pedido equivalente ao clique em `element` (botao de submit de um form).
+
+    Raises:
+        ExportError: elemento fora de formulario
+    """
+    form = driver.execute_script(_FORM_JS, element)
+    if not form:
+        raise ExportError("Elemento fora de formulario: sem request equivalente")
+    return ExportRequest(
+        url=form["action"],
+        method=form["method"],
+        data=[tuple(par) for par in form["fields"]],
+        filename=filename,
+        referer=form.get("page"),
+        magic=magic,
+    )
+
+
+def _filename(response: requests.Response, request: ExportRequest) -> str:
+    disposition = response.headers.get("Content-Disposition", "")
+    match = re.search(r"filename\*\s*=\s*[^']*'[^']*'([^;]+)", disposition, re.IGNORECASE)
+    if match:
+        nome = unquote(match.group(1).strip().strip('"'))
+    else:
+        match = re.search(r'filename\s*=\s*"?([^";]+)"?', disposition, re.IGNORECASE)
+        nome = match.group(1).strip() if match else (request.filename or os.path.basename(urlparse(response.url).path))
+    # Nunca sai da pasta de destino
+    return os.path.basename(nome.replace("\\", "/")) or "download"
+
+
+def _unique(folder: str, nome: str, lock=threading.Lock()) -> str:
+    """Reserva um caminho livre (dois relatorios com o mesmo nome no lote)"""
+    base, ext = os.path.splitext(nome)
+    with lock:
+        caminho = os.path.join(folder, nome)
+        n = 1
+        while os.path.exists(caminho) or os.path.exists(caminho + ".part"):
+            caminho = os.path.join(folder, f"{base} ({n}){ext}")
+            n += 1
+        open(caminho + ".part", "wb").close()
+    return caminho
+
+
+@span("http_fetch")
+def fetch(session: requests.Session, request: ExportRequest, folder: str, timeout: float = EXPORT_TIMEOUT) -> str:
+    """
+    Baixa um relatorio para `folder` (grava .part e renomeia ao final, como
+    o Chrome: o download_watcher enxerga o arquivo so completo).
+
+    Returns:
+        Caminho do arquivo salvo
+
+    Raises:
+        ExportError: status != 2xx, HTML no lugar do arquivo, erro de rede
+    """
+    headers = {"Referer": request.referer} if request.referer else {}
+    dados = {"data": request.data} if request.method == "POST" else {"params": request.data}
+    inicio = time.monotonic()
+    try:
+        response = session.request(request.method, request.url, headers=headers, stream=True, timeout=timeout, **dados)
+    except requests.RequestException as e:
+        raise ExportError(f"{request.url}: {e}") from e
+
+    with response:
+        if not response.ok:
+            raise ExportError(f"{request.url}: HTTP {response.status_code}")
+        tipo = response.headers.get("Content-Type", "")
+        if "text/html" in tipo and not (request.filename or "").endswith((".htm", ".html")):
+            raise ExportError(f"{request.url}: resposta HTML (sessao expirada?)")
+
+        os.makedirs(folder, exist_ok=True)
+        caminho = _unique(folder, _filename(response, request))
+        parcial = caminho + ".part"
+        try:
+            with open(parcial, "wb") as f:
+                primeiro = True
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if primeiro and request.magic and not chunk.startswith(request.magic):
+                        raise ExportError(f"{request.url}: conteudo inesperado ({chunk[:8]!r})")
+                    primeiro = False
+                    f.write(chunk)
+            os.replace(parcial, caminho)
+        except (OSError, requests.RequestException) as e:
+            os.unlink(parcial)
+            raise ExportError(f"{request.url}: {e}") from e
+        except ExportError:
+            os.unlink(parcial)
+            raise
+
+    logger.info(f"HTTP export: {os.path.basename(caminho)} em {time.monotonic() - inicio:.1f}s")
+    return caminho
+
+
+def fetch_all(
+    session: requests.Session,
+    requests_: Iterable[ExportRequest],
+    folder: str,
+    max_workers: int = MAX_WORKERS,
+    timeout: float = EXPORT_TIMEOUT,
+) -> List[Tuple[ExportRequest, Union[str, Exception]]]:
+    """
+    Baixa os relatorios em paralelo.
+
+    Returns:
+        [(pedido, caminho ou ExportError)] na ordem dos pedidos
+    """
+    pedidos = list(requests_)
+    if not pedidos:
+        return []
+
+    def baixar(pedido):
+        try:
+            return fetch(session, pedido, folder, timeout)
+        except ExportError as e:
+            logger.warning(f"HTTP export falhou: {e}")
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pedidos))), thread_name_prefix="http_export") as pool:
+        return list(zip(pedidos, pool.map(baixar, pedidos)))
+
@@ -1,7 +1,6 @@
 
 from maps_downloads import setup_driver, login, exportar_ativos, exportar_passivos, gera_datas_uteis
 from maps_save_excel_folders import identificar_excels, ler_e_imprimir_conteudo_excels, salvar_subset_excel_ativo, cotas_e_patrimonio, carteira_ativos
-from maps_upload_access import process_all_files_in_folder
 
 url_maps = "https://reag-gestores.cloud.maps.com.br/"
 download_path = r"C:\bloko\Fundos - Documentos\00. Monitoramento\01. Rotinas\03. Arquivos Rotina"
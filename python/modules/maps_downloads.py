@@ -1,41 +1,91 @@
 import os
-import time
 import traceback
 import logging
-import tkinter as tk
-from tkinter import simpledialog
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 import shutil
-from datetime import datetime, timedelta
+from datetime import datetime
+from urllib.parse import urljoin
 from selenium.webdriver.common.keys import Keys
+from business_calendar import get_calendar
+from download_watcher import DownloadWatcher
+from base_driver import (
+    block_resources, download_snapshot, fill_input, lean_options, pause, pooled_driver, wait_clickable,
+    wait_download_started, wait_element, wait_network_idle,
+)
+
+# Progresso, checkpoint e ledger (utils/) - no-op quando rodando standalone
+try:
+    from progress import report_progress
+    from checkpoint import unit_done, mark_unit_done
+    from ledger import ledger_done, record_done, snapshot, new_files
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    def report_progress(*args, **kwargs):
+        pass
+
+    def unit_done(*args, **kwargs):
+        return False
+
+    def mark_unit_done(*args, **kwargs):
+        pass
+
+    def ledger_done(*args, **kwargs):
+        return False
+
+    def record_done(*args, **kwargs):
+        pass
+
+    def snapshot(*args, **kwargs):
+        return set()
+
+    def new_files(*args, **kwargs):
+        return []
 
-TEMP_EXTENSIONS = [".crdownload", ".part", ".tmp"]
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+# Sessao persistida (utils/) - sem ela, login completo (com OTP) sempre
+try:
+    from session_store import restore_session, save_session
+except ImportError:
+    def restore_session(*args, **kwargs):
+        return False
+
+    def save_session(*args, **kwargs):
+        return False
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
 
 
 def gera_datas_uteis(data_inicio, data_fim):
-    datas = []
     dt = datetime.strptime(data_inicio, "%d/%m/%Y")
     dt_fim = datetime.strptime(data_fim, "%d/%m/%Y")
 
+    # Data unica e usada mesmo se cair em fim de semana
     if dt == dt_fim:
-        datas.append(dt.strftime("%d/%m/%Y"))
-
-    else:
-        while dt <= dt_fim:
-            if dt.weekday() < 5:  # segunda a sexta (0=seg, ..., 4=sex)
-                datas.append(dt.strftime("%d/%m/%Y"))
-            dt += timedelta(days=1)
+        return [dt.strftime("%d/%m/%Y")]
 
-    return datas
+    # MAPS pula so fins de semana (segunda a sexta), sem feriados
+    dias = get_calendar(None, feriados=False).range(dt, dt_fim)
+    return [dia.strftime("%d/%m/%Y") for dia in dias]
 
+@span("setup_driver")
 def setup_driver(download_path, url):
     os.makedirs(download_path, exist_ok=True)
+    # Chrome ja aberto pelo backend, se houver pool
+    driver = pooled_driver(download_path)
+    if driver is not None:
+        driver.get(url)
+        logging.info(f"Chrome do pool com pasta de download: {download_path}")
+        return driver
+
     chrome_options = Options()
     prefs = {
         "download.default_directory": os.path.abspath(download_path),
@@ -45,19 +95,40 @@ def setup_driver(download_path, url):
     }
     chrome_options.add_experimental_option("prefs", prefs)
     # chrome_options.add_argument("--headless") # Descomente para rodar sem abrir a janela do Chrome (modo invisível)
+    lean_options(chrome_options)
     driver = webdriver.Chrome(options=chrome_options)
+    block_resources(driver)
     driver.get(url)
     logging.info(f"Navegador aberto com pasta de download: {download_path}")
     return driver
 
+def _area_logada(driver, timeout=10):
+    """Checagem da sessao restaurada: modulos do Pegasus (stop-redirect) e nao a tela do Keycloak"""
+    try:
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_element_located((By.CLASS_NAME, "stop-redirect")),
+            EC.presence_of_element_located((By.CLASS_NAME, "login-pf-page")),
+        ))
+    except Exception:
+        return False
+    return bool(driver.find_elements(By.CLASS_NAME, "stop-redirect"))
+
+
+@span("login")
 def login(driver, username, password):
+    # Sessao da execucao anterior ainda valida: sem login e sem OTP
+    inicio = driver.current_url
+    if restore_session(driver, "maps", urljoin(inicio, "/pegasusgestores"), _area_logada):
+        return True
+    if driver.current_url != inicio:
+        driver.get(inicio)
+
     try:
         wait = WebDriverWait(driver, 10)
         botao = wait.until(EC.element_to_be_clickable((By.XPATH, '//a[contains(@href, "#card-maps-pegasus")]')))
         botao.click()
-        time.sleep(1) # Pequena pausa após o clique
         
-        botao_gestores = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'a[href="/pegasusgestores"]')))
+        botao_gestores = wait_clickable(driver, (By.CSS_SELECTOR, 'a[href="/pegasusgestores"]'), replaces=1)
         botao_gestores.click()
 
         # Espera pela página de login
@@ -78,6 +149,8 @@ def login(driver, username, password):
         try:
             # Verifica se o campo OTP está presente
             otp_field = driver.find_element(By.ID, "otp")
+            import tkinter as tk
+            from tkinter import simpledialog
             root = tk.Tk()
             root.withdraw() # Esconde a janela principal do Tkinter
             codigo = simpledialog.askstring("Entrada de Código", "Digite o código do Authenticator:")
@@ -88,40 +161,74 @@ def login(driver, username, password):
             logging.info("Campo OTP não encontrado, assumindo que não é necessário 2FA ou já foi passado.")
         
         logging.info("Login realizado com sucesso.")
-        time.sleep(2) # Pequena pausa para a página carregar após o login final
+        wait_network_idle(driver, replaces=2) # Página carregada após o login final
+        save_session(driver, "maps")
         return True
     except Exception:
         logging.error("Falha no login:")
         traceback.print_exc() # Imprime o erro completo para depuração
         return False
 
+@span("wait_for_downloads")
 def wait_for_downloads(download_path, timeout=120):
-    download_wait_time = 5
-    waited = 0
+    # Acorda a cada evento da pasta (inotify) em vez de olhar a cada 1s
     logging.info("Verificando downloads pendentes...")
-    def still_downloading():
-        for filename in os.listdir(download_path):
-            # Verifica se há arquivos temporários de download
-            if any(filename.endswith(ext) for ext in TEMP_EXTENSIONS):
-                return True
-        return False
-    
-    # Loop enquanto houver arquivos temporários
-    while still_downloading():
-        if waited >= timeout:
-            logging.warning("Tempo máximo de espera para download atingido.")
-            break
-        logging.info(f"Aguardando finalização do download... {download_wait_time}s restantes para timeout ({timeout - waited}s).")
-        time.sleep(download_wait_time)
-        waited += download_wait_time
+    with DownloadWatcher(download_path) as watcher:
+        pendentes = watcher.pending()
+        if pendentes:
+            logging.info(f"Aguardando finalização de {len(pendentes)} download(s) (timeout {timeout}s).")
+            if not watcher.wait_idle(timeout):
+                logging.warning("Tempo máximo de espera para download atingido.")
+                return
 
     logging.info("Todos os downloads concluídos.")
 
 
+def _formatos(baixar_pdf, baixar_xlsx):
+    """Tipos de arquivo solicitados (chave do ledger: <relatorio>_<formato>)"""
+    return [formato for formato, ativo in (("pdf", baixar_pdf), ("xlsx", baixar_xlsx)) if ativo]
+
+
+def _download_iniciado(download_path, antes):
+    """
+    Espera o arquivo pedido aparecer na pasta (antes: sleep fixo de 1,5s).
+
+    Returns:
+        False se nenhum arquivo surgiu no prazo (sem pasta nao ha como conferir)
+    """
+    if download_path:
+        return bool(wait_download_started(download_path, antes, timeout=15, replaces=1.5))
+    pause(1.5)
+    return True
+
+
+def _pendente(relatorio, fundo, data, formatos):
+    """Fundo ainda precisa ser baixado: fora do checkpoint e algum formato fora do ledger"""
+    if unit_done(f"maps_{relatorio}", fundo, data):
+        return False
+    return any(not ledger_done("maps", fundo, f"{relatorio}_{formato}", data) for formato in formatos)
+
+
+@span("exportar_ativos")
 def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx, download_path, pdf_path, maps_path):
     wait = WebDriverWait(driver, 15) # Aumentei o tempo de espera geral para elementos
 
+    total_unidades = len(lista_datas) * len(lista_fundos)
+    feitos = 0
+    pulados = 0
+    formatos = _formatos(baixar_pdf, baixar_xlsx)
+
     for data in lista_datas:
+        # Checkpoint/ledger: fundos ja baixados nesta data em execucao anterior
+        pendentes = [fundo for fundo in lista_fundos if _pendente("ativos", fundo, data, formatos)]
+        feitos += len(lista_fundos) - len(pendentes)
+        pulados += len(lista_fundos) - len(pendentes)
+        if not pendentes:
+            logging.info(f"Data {data} já concluída em execução anterior (checkpoint/ledger). Pulando.")
+            continue
+        concluidos = []
+        antes = snapshot(download_path) if download_path else set()
+
         try:
             logging.info(f"Iniciando processamento para data: {data}")
 
@@ -142,7 +249,7 @@ def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx,
                 if botoes_stop_redirect:
                     botoes_stop_redirect[0].click()
                     logging.info("Botão 'stop-redirect' clicado.")
-                    time.sleep(3) # Pausa para a página carregar após o clique
+                    wait_network_idle(driver, replaces=3) # Página carregada após o clique
                 else:
                     logging.warning("Botão 'stop-redirect' não encontrado. Pode indicar problema na navegação inicial.")
             except Exception as e:
@@ -154,7 +261,7 @@ def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx,
                 primeiro_li = wait.until(EC.element_to_be_clickable((By.XPATH, "(//div[@class='sub-menu']//div[@class='sub-menu-container']//ul[@class='unstyled']/li)[1]")))
                 primeiro_li.click()
                 logging.info("Primeiro item do submenu clicado.")
-                time.sleep(2) # **PAUSA MAIOR AQUI:** Crucial para a página carregar todos os elementos após a navegação
+                wait_network_idle(driver, replaces=2) # Crucial: página com todos os elementos após a navegação
             except Exception as e:
                 logging.error(f"Erro ao clicar no primeiro item do submenu: {e}")
                 traceback.print_exc()
@@ -163,46 +270,33 @@ def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx,
 
             # --- Fim da Navegação/Reset ---
 
-            for fundo in lista_fundos:
+            for fundo in pendentes:
+                report_progress("maps", feitos, total_unidades, "ativos", pulados=pulados)
+                feitos += 1
                 logging.info(f"Processando: {fundo} - {data}")
                 try:
                     # Tenta clicar no seletor de fundos
                     select2_button = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "select2-choice")))
                     select2_button.click()
-                    time.sleep(1) # Pequena pausa para o campo de busca abrir
+                    # Campo de busca aberto
+                    wait_element(driver, (By.CLASS_NAME, "select2-input"), timeout=2, replaces=1, visible=True, required=False)
                     
                     # Envia o nome do fundo e seleciona
                     select2_button.send_keys(fundo)
                     select2_button.send_keys(Keys.TAB) 
-                    time.sleep(2) # Pausa para os resultados da busca aparecerem
                     
-                    # Clica no item correspondente ao fundo
-                    wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "select2-match"))).click()
-                    time.sleep(2)
+                    # Clica no item correspondente ao fundo (resultados da busca)
+                    wait_clickable(driver, (By.CLASS_NAME, "select2-match"), timeout=15, replaces=2).click()
+                    wait_network_idle(driver, replaces=2)
 
                     # --- INTERAÇÃO COM O CAMPO DE DATA ---                
                     input_field = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "date")))
                     
-                    # Limpeza robusta
-                    input_field.send_keys(Keys.CONTROL + "a")
-                    input_field.send_keys(Keys.DELETE)
-                    time.sleep(0.5)
-                    
-                    # Preenchimento com verificação
-                    for char in data:
-                        input_field.send_keys(char)
-                        time.sleep(0.1)
-                    
-                    # Validação
-                    atual = input_field.get_attribute("value")
-                    if atual != data:
-                        logging.warning(f"Valor inconsistente. Corrigindo...")
-                        driver.execute_script(f"arguments[0].value = '{data}';", input_field)
-                    
-                    # Dispara eventos JS
-                    driver.execute_script("arguments[0].dispatchEvent(new Event('change'))", input_field)
+                    # Preenchimento com verificação: JS + eventos; teclas (no ritmo
+                    # antigo da mascara) so se o valor nao conferir
+                    fill_input(driver, input_field, data, key_delay=0.1)
                     input_field.send_keys(Keys.TAB)
-                    time.sleep(0.5)
+                    wait_network_idle(driver, quiet=0.2, replaces=0.5)
                     
                     logging.info(f"Campo de data preenchido com sucesso: {data}")
                 
@@ -210,41 +304,53 @@ def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx,
                     # Clica no botão Pesquisar
                     driver.find_element(By.XPATH, "//input[@value='Pesquisar']").click()
                     logging.info("Botão 'Pesquisar' clicado.")
-                    time.sleep(3) # Pausa para a pesquisa carregar os resultados
+                    wait_network_idle(driver, timeout=30, replaces=3) # Pesquisa carregou os resultados
 
                     # Clica no botão Exportar
                     botao_exportar = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Exportar')]")))
                     botao_exportar.click()
                     logging.info("Botão 'Exportar' clicado.")
-                    time.sleep(0.5)
+
+                    # Fundo so conta como concluido se todos os downloads pedidos comecaram
+                    chegou = True
 
                     # PDF
                     if baixar_pdf:
-                        botao_pdf = driver.find_element(By.XPATH, '//img[@title="PDF"]/parent::a')
+                        botao_pdf = wait_clickable(driver, (By.XPATH, '//img[@title="PDF"]/parent::a'), replaces=0.5)
+                        antes_pdf = download_snapshot(download_path) if download_path else None
                         botao_pdf.click()
                         logging.info(f"Solicitado download PDF: {fundo} - {data}")
-                        time.sleep(1.5)
+                        chegou &= _download_iniciado(download_path, antes_pdf)
                     
                     # XLSX
+                    xlsx_falhou = False
                     if baixar_xlsx:
                         try:
                             # Espera e clica no botão XLSX
                             botao_xlsx = wait.until(EC.element_to_be_clickable((By.XPATH, '//img[@title="XLSX"]/parent::a')))
+                            antes_xlsx = download_snapshot(download_path) if download_path else None
                             botao_xlsx.click()
                             logging.info(f"Solicitado download XLSX: {fundo} - {data}")
-                            time.sleep(1.5)
+                            chegou &= _download_iniciado(download_path, antes_xlsx)
                         except Exception:
                             logging.warning("Clique normal no botão XLSX falhou, tentando clique por JavaScript.")
                             try:
                                 # Tenta clicar via JavaScript como fallback
                                 botao_xlsx_js = driver.find_element(By.XPATH, '//img[@title="XLSX"]/parent::a')
+                                antes_xlsx = download_snapshot(download_path) if download_path else None
                                 driver.execute_script("arguments[0].click();", botao_xlsx_js)
                                 logging.info(f"Solicitado download XLSX via JS: {fundo} - {data}")
-                                time.sleep(1.5)
+                                chegou &= _download_iniciado(download_path, antes_xlsx)
                             except Exception as e:
                                 logging.error(f"Não foi possível clicar no botão XLSX para {fundo}: {e}")
                                 traceback.print_exc()
                                 # Não usa 'continue' aqui para não pular o fundo inteiro, mas falha o download XLSX
+                                xlsx_falhou = True
+
+                    if not xlsx_falhou and chegou:
+                        concluidos.append(fundo)
+                    elif not xlsx_falhou:
+                        logging.warning(f"Download de {fundo} - {data} não chegou; fundo fica pendente.")
 
                 except Exception as e:
                     logging.warning(f"Erro ao processar fundo {fundo} na data {data}: {e}")
@@ -257,14 +363,43 @@ def exportar_ativos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx,
             continue # Pula para a próxima data se ocorrer um erro crítico nesta
 
         # Ao terminar todos os fundos de uma data: aguarda e redistribui arquivos
+        arquivos = []
         if download_path and pdf_path and maps_path:
             wait_for_downloads(download_path)
-            redistribuir_arquivos(download_path, pdf_path, maps_path)
+            novos = {os.path.basename(p) for p in new_files(download_path, antes)}
+            arquivos = [p for p in redistribuir_arquivos(download_path, pdf_path, maps_path)
+                        if os.path.basename(p) in novos]
+
+        # Unidades so contam como concluidas depois que os downloads da data terminaram.
+        # Hash do ledger = lote da data nos destinos finais (os arquivos sao redistribuidos por tipo)
+        for fundo in concluidos:
+            mark_unit_done("maps_ativos", fundo, data)
+            for formato in formatos:
+                record_done("maps", fundo, f"ativos_{formato}", data, arquivos)
 
+    report_progress("maps", total_unidades, total_unidades, "ativos", pulados=pulados)
+
+
+@span("exportar_passivos")
 def exportar_passivos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx, download_path, pdf_path, maps_path):
     wait = WebDriverWait(driver, 15) 
 
+    total_unidades = len(lista_datas) * len(lista_fundos)
+    feitos = 0
+    pulados = 0
+    formatos = _formatos(baixar_pdf, baixar_xlsx)
+
     for data in lista_datas:
+        # Checkpoint/ledger: fundos ja baixados nesta data em execucao anterior
+        pendentes = [fundo for fundo in lista_fundos if _pendente("passivos", fundo, data, formatos)]
+        feitos += len(lista_fundos) - len(pendentes)
+        pulados += len(lista_fundos) - len(pendentes)
+        if not pendentes:
+            logging.info(f"Data {data} já concluída em execução anterior (checkpoint/ledger). Pulando.")
+            continue
+        concluidos = []
+        antes = snapshot(download_path) if download_path else set()
+
         try:
             logging.info(f"Iniciando processamento para data: {data}")
 
@@ -285,7 +420,7 @@ def exportar_passivos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx
                 if botoes_stop_redirect:
                     botoes_stop_redirect[1].click()
                     logging.info("Botão 'stop-redirect' clicado.")
-                    time.sleep(3) # Pausa para a página carregar após o clique
+                    wait_network_idle(driver, replaces=3) # Página carregada após o clique
                 else:
                     logging.warning("Botão 'stop-redirect' não encontrado. Pode indicar problema na navegação inicial.")
             except Exception as e:
@@ -296,7 +431,7 @@ def exportar_passivos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx
             try:
                 botao = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//span[text()='Posição por Fundo']")))
                 botao.click()
-                time.sleep(2) # **PAUSA MAIOR AQUI:** Crucial para a página carregar todos os elementos após a navegação
+                wait_network_idle(driver, replaces=2) # Crucial: página com todos os elementos após a navegação
             except Exception as e:
                 logging.error(f"Erro ao clicar no terceiro item do submenu: {e}")
                 traceback.print_exc()
@@ -305,88 +440,87 @@ def exportar_passivos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx
 
             # --- Fim da Navegação/Reset ---
 
-            for fundo in lista_fundos:
+            for fundo in pendentes:
+                report_progress("maps", feitos, total_unidades, "passivos", pulados=pulados)
+                feitos += 1
                 logging.info(f"Processando: {fundo} - {data}")
                 try:
                     # Tenta clicar no seletor de fundos
                     select2_button = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "select2-choice")))
                     select2_button.click()
-                    time.sleep(1) # Pequena pausa para o campo de busca abrir
+                    # Campo de busca aberto
+                    wait_element(driver, (By.CLASS_NAME, "select2-input"), timeout=2, replaces=1, visible=True, required=False)
                     
                     # Envia o nome do fundo e seleciona
                     select2_button.send_keys(fundo)
                     select2_button.send_keys(Keys.TAB) 
-                    time.sleep(2) # Pausa para os resultados da busca aparecerem
                     
-                    # Clica no item correspondente ao fundo
-                    wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "select2-match"))).click()
-                    time.sleep(0.5)
+                    # Clica no item correspondente ao fundo (resultados da busca)
+                    wait_clickable(driver, (By.CLASS_NAME, "select2-match"), timeout=15, replaces=2).click()
+                    wait_network_idle(driver, quiet=0.2, replaces=0.5)
 
                     # --- INTERAÇÃO COM O CAMPO DE DATA ---                
                            
                     input_field = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "date")))
                     
-                    # Limpeza robusta
-                    input_field.send_keys(Keys.CONTROL + "a")
-                    input_field.send_keys(Keys.DELETE)
-                    time.sleep(0.5)
-                    
-                    # Preenchimento com verificação
-                    for char in data:
-                        input_field.send_keys(char)
-                        time.sleep(0.1)
-                    
-                    # Validação
-                    atual = input_field.get_attribute("value")
-                    if atual != data:
-                        logging.warning(f"Valor inconsistente. Corrigindo...")
-                        driver.execute_script(f"arguments[0].value = '{data}';", input_field)
-                    
-                    # Dispara eventos JS
-                    driver.execute_script("arguments[0].dispatchEvent(new Event('change'))", input_field)
+                    # Preenchimento com verificação: JS + eventos; teclas (no ritmo
+                    # antigo da mascara) so se o valor nao conferir
+                    fill_input(driver, input_field, data, key_delay=0.1)
                     input_field.send_keys(Keys.TAB)
-                    time.sleep(0.5)
+                    wait_network_idle(driver, quiet=0.2, replaces=0.5)
                     
                     logging.info(f"Campo de data preenchido com sucesso: {data}")
 
                     # Clica no botão Pesquisar
                     driver.find_element(By.XPATH, "//input[@value='Pesquisar']").click()
                     logging.info("Botão 'Pesquisar' clicado.")
-                    time.sleep(3) # Pausa para a pesquisa carregar os resultados
+                    wait_network_idle(driver, timeout=30, replaces=3) # Pesquisa carregou os resultados
 
                     # Clica no botão Exportar
                     botao_exportar = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Exportar')]")))
                     botao_exportar.click()
                     logging.info("Botão 'Exportar' clicado.")
-                    time.sleep(0.5)
+
+                    # Fundo so conta como concluido se todos os downloads pedidos comecaram
+                    chegou = True
 
                     # PDF
                     if baixar_pdf:
-                        botao_pdf = driver.find_element(By.XPATH, '//img[@title="PDF"]/parent::a')
+                        botao_pdf = wait_clickable(driver, (By.XPATH, '//img[@title="PDF"]/parent::a'), replaces=0.5)
+                        antes_pdf = download_snapshot(download_path) if download_path else None
                         botao_pdf.click()
                         logging.info(f"Solicitado download PDF: {fundo} - {data}")
-                        time.sleep(1.5)
+                        chegou &= _download_iniciado(download_path, antes_pdf)
                     
                     # XLSX
+                    xlsx_falhou = False
                     if baixar_xlsx:
                         try:
                             # Espera e clica no botão XLSX
                             botao_xlsx = wait.until(EC.element_to_be_clickable((By.XPATH, '//img[@title="XLSX"]/parent::a')))
+                            antes_xlsx = download_snapshot(download_path) if download_path else None
                             botao_xlsx.click()
                             logging.info(f"Solicitado download XLSX: {fundo} - {data}")
-                            time.sleep(1.5)
+                            chegou &= _download_iniciado(download_path, antes_xlsx)
                         except Exception:
                             logging.warning("Clique normal no botão XLSX falhou, tentando clique por JavaScript.")
                             try:
                                 # Tenta clicar via JavaScript como fallback
                                 botao_xlsx_js = driver.find_element(By.XPATH, '//img[@title="XLSX"]/parent::a')
+                                antes_xlsx = download_snapshot(download_path) if download_path else None
                                 driver.execute_script("arguments[0].click();", botao_xlsx_js)
                                 logging.info(f"Solicitado download XLSX via JS: {fundo} - {data}")
-                                time.sleep(1.5)
+                                chegou &= _download_iniciado(download_path, antes_xlsx)
                             except Exception as e:
                                 logging.error(f"Não foi possível clicar no botão XLSX para {fundo}: {e}")
                                 traceback.print_exc()
                                 # Não usa 'continue' aqui para não pular o fundo inteiro, mas falha o download XLSX
+                                xlsx_falhou = True
+
+                    if not xlsx_falhou and chegou:
+                        concluidos.append(fundo)
+                    elif not xlsx_falhou:
+                        logging.warning(f"Download de {fundo} - {data} não chegou; fundo fica pendente.")
 
                 except Exception as e:
                     logging.warning(f"Erro ao processar fundo {fundo} na data {data}: {e}")
@@ -399,13 +533,29 @@ def exportar_passivos(driver, lista_datas, lista_fundos, baixar_pdf, baixar_xlsx
             continue # Pula para a próxima data se ocorrer um erro crítico nesta
 
         # Ao terminar todos os fundos de uma data: aguarda e redistribui arquivos
+        arquivos = []
         if download_path and pdf_path and maps_path:
             wait_for_downloads(download_path)
-            redistribuir_arquivos(download_path, pdf_path, maps_path)
+            novos = {os.path.basename(p) for p in new_files(download_path, antes)}
+            arquivos = [p for p in redistribuir_arquivos(download_path, pdf_path, maps_path)
+                        if os.path.basename(p) in novos]
+
+        # Unidades so contam como concluidas depois que os downloads da data terminaram.
+        # Hash do ledger = lote da data nos destinos finais (os arquivos sao redistribuidos por tipo)
+        for fundo in concluidos:
+            mark_unit_done("maps_passivos", fundo, data)
+            for formato in formatos:
+                record_done("maps", fundo, f"passivos_{formato}", data, arquivos)
+
+    report_progress("maps", total_unidades, total_unidades, "passivos", pulados=pulados)
+
 
+@span("redistribuir_arquivos")
 def redistribuir_arquivos(download_path, pdf_path, maps_path):
+    """Move PDFs para pdf_path e XLSX para maps_path; retorna os destinos movidos"""
     arquivos = os.listdir(download_path)
     count_pdf, count_xlsx = 0, 0
+    movidos = []
     for arquivo in arquivos:
         arquivo_lower = arquivo.lower()
         origem = os.path.join(download_path, arquivo)
@@ -414,6 +564,7 @@ def redistribuir_arquivos(download_path, pdf_path, maps_path):
             try:
                 shutil.move(origem, destino)
                 count_pdf += 1
+                movidos.append(destino)
             except shutil.Error as e:
                 logging.error(f"Erro ao mover PDF '{arquivo}': {e}. Pode ser que o arquivo já exista ou esteja em uso.")
         elif arquivo_lower.endswith(".xlsx"):
@@ -421,9 +572,11 @@ def redistribuir_arquivos(download_path, pdf_path, maps_path):
             try:
                 shutil.move(origem, destino)
                 count_xlsx += 1
+                movidos.append(destino)
             except shutil.Error as e:
                 logging.error(f"Erro ao mover XLSX '{arquivo}': {e}. Pode ser que o arquivo já exista ou esteja em uso.")
     logging.info(f"Arquivos redistribuídos! PDFs: {count_pdf} | XLSX: {count_xlsx}")
+    return movidos
 
 if __name__ == "__main__":
     url_maps = "https://reag-gestores.cloud.maps.com.br/"
@@ -1,5 +1,14 @@
 import os
-import pandas as pd
+
+# Spans de tempo (utils/) - no-op quando rodando standalone
+try:
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
 
 
 
@@ -53,6 +62,8 @@ def ler_e_imprimir_conteudo_excels(lista_caminhos_excel):
         print("Nenhum arquivo Excel para ler e imprimir.")
         return
 
+    import pandas as pd  # carregado so quando ha arquivos para ler
+
     print("Iniciando a leitura e impressão dos arquivos Excel identificados:\n")
 
     for caminho_completo_arquivo in lista_caminhos_excel:
@@ -61,7 +72,8 @@ def ler_e_imprimir_conteudo_excels(lista_caminhos_excel):
 
         try:
             # Lê o arquivo Excel (por padrão, a primeira planilha)
-            df = pd.read_excel(caminho_completo_arquivo)
+            with span("read_excel"):
+                df = pd.read_excel(caminho_completo_arquivo)
             # Imprime o conteúdo do DataFrame
             #print(df)
             salvar_subset_excel_ativo(df, nome_arquivo)
@@ -5,7 +5,18 @@ import re # Para extrair informações do nome do arquivo
 from datetime import datetime, date
 import sys
 
+# Spans de tempo (utils/) - no-op quando rodando standalone
+try:
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
 # --- Função para conectar ao banco de dados Access ---
+@span("connect_to_access")
 def connect_to_access(db_path):
     """Tenta conectar ao banco de dados Access."""
     try:
@@ -64,7 +75,8 @@ def extract_info_from_filename(file_path, depara_path=None):
         table_name = None
         if depara_path and os.path.exists(depara_path):
             try:
-                df = pd.read_excel(depara_path, sheet_name='MAPS')
+                with span("read_excel"):
+                    df = pd.read_excel(depara_path, sheet_name='MAPS')
                 # Procura o tablename EXTRAÍDO (ex: "Valores_a_receber") na coluna D (case-insensitive)
                 match = df[df.iloc[:, 3].str.strip().str.lower() == tablename.lower()]
                 if not match.empty:
@@ -83,7 +95,8 @@ def get_primary_keys(cursor, table_name, depara_path):
     """Obtém as chaves primárias, tratando '0.1' como [0, 1]."""
     try:
         # 1. Carrega o mapeamento
-        df = pd.read_excel(depara_path, sheet_name="MAPS")
+        with span("read_excel"):
+            df = pd.read_excel(depara_path, sheet_name="MAPS")
         table_row = df[df.iloc[:, 1].str.strip().str.lower() == table_name.lower()]
         
         if table_row.empty:
@@ -121,6 +134,7 @@ def get_primary_keys(cursor, table_name, depara_path):
         print(f"[AVISO] Erro ao obter PKs: {str(e)[:200]}")
         return []
 
+@span("upload_data_to_access")
 def upload_data_to_access(db_path: str, file_path: str,  depara_path ):
 
 
@@ -174,7 +188,8 @@ def upload_data_to_access(db_path: str, file_path: str,  depara_path ):
         if extensao == '.csv':
             df = pd.read_csv(file_path, delimiter=';', encoding='ISO-8859-1', skiprows=3, header=None)
         elif extensao in ['.xls', '.xlsx']:
-            df = pd.read_excel(file_path, header=None, skiprows=3)
+            with span("read_excel"):
+                df = pd.read_excel(file_path, header=None, skiprows=3)
         else:
             raise ValueError(f"Formato não suportado: {extensao}")
 
@@ -311,6 +326,7 @@ def process_all_files_in_folder(db_path: str, folder_path: str, depara_path: str
     except Exception as e:
         print(f"Erro ao acessar a pasta: {str(e)}")
 
+@span("upload_cp_to_access")
 def upload_cp_to_access(db_path: str, file_path: str, depara_path: str):
     """
     Versão simplificada com conversão de tipos robusta para o Access
@@ -339,7 +355,8 @@ def upload_cp_to_access(db_path: str, file_path: str, depara_path: str):
         if extensao == '.csv':
             df = pd.read_csv(file_path, delimiter=';', encoding='ISO-8859-1', skiprows=0, header=None, keep_default_na=False)
         elif extensao in ['.xls', '.xlsx']:
-            df = pd.read_excel(file_path, header=None, skiprows=0, keep_default_na=False)
+            with span("read_excel"):
+                df = pd.read_excel(file_path, header=None, skiprows=0, keep_default_na=False)
         else:
             raise ValueError(f"Formato não suportado: {extensao}")
 
@@ -490,6 +507,7 @@ def delete_input(db_path: str, table_name: str, fundo: str, data: date):
         cursor.close()
         conn.close()
 
+@span("upload_passivo_to_access")
 def upload_passivo_to_access(db_path: str, file_path: str,  depara_path ):
 
 
@@ -538,7 +556,8 @@ def upload_passivo_to_access(db_path: str, file_path: str,  depara_path ):
         if extensao == '.csv':
             df = pd.read_csv(file_path, delimiter=';', encoding='ISO-8859-1', skiprows=3, header=None)
         elif extensao in ['.xls', '.xlsx']:
-            df = pd.read_excel(file_path, header=None, skiprows=3)
+            with span("read_excel"):
+                df = pd.read_excel(file_path, header=None, skiprows=3)
         else:
             raise ValueError(f"Formato não suportado: {extensao}")
 
@@ -661,7 +680,8 @@ def extract_investor_data(file_path):
                 if len(lines) >= 2:
                     segunda_linha = lines[1].strip()  # Segunda linha (índice 1)
         elif extensao in ['.xls', '.xlsx']:
-            df_temp = pd.read_excel(file_path, header=None, nrows=2)
+            with span("read_excel"):
+                df_temp = pd.read_excel(file_path, header=None, nrows=2)
             segunda_linha = str(df_temp.iloc[1, 0]) if len(df_temp) >= 2 else ""
         else:
             return None, None
@@ -1,9 +1,7 @@
 import os
 import json
 import shutil
-import time
 from pathlib import Path
-from tkinter import messagebox, Tk
 from datetime import date, timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -12,113 +10,137 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-import holidays
 from amplis_functions import wait_for_downloads, rename_file, setup_driver, login, insert_text_enter, click_button, clear_folder
+from base_driver import download_snapshot, wait_clickable, wait_download_started, wait_network_idle
+import http_export
+from spans import span
+from session_store import restore_session, save_session
 
+def _area_logada(driver, timeout=10):
+    """Grid de consultas (gridQuery) em vez do formulario de login"""
+    try:
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_element_located((By.ID, "gridQuery")),
+            EC.presence_of_element_located((By.ID, "Login1_UserName")),
+        ))
+    except Exception:
+        return False
+    return bool(driver.find_elements(By.ID, "gridQuery"))
+
+
+@span("login")
 def login(driver, username, password):
+    # Sessao da execucao anterior ainda valida: login pulado
+    if restore_session(driver, "britech", driver.current_url, _area_logada):
+        print("Previous session restored, login skipped.")
+        return True
     try:
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "Login1_UserName")))
-        time.sleep(0.5)
+        wait_clickable(driver, (By.ID, "Login1_UserName"), replaces=0.5)
         driver.find_element(By.ID, "Login1_UserName").send_keys(username)
         driver.find_element(By.ID, "Login1_Password").send_keys(password)
         driver.find_element(By.ID, "Login1_LoginButton").click()
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "gridQuery")))
         print("Login successful.")
+        save_session(driver, "britech")
         return True
     except Exception as e:
         print(f"Login failed: {e}")
         return False
 
-def donwload_3meses(driver,download_path):
-
-    time.sleep(5)
-    insert_text_enter(driver, "gridQuery_DXFREditorcol2_I", "1")
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn4")
-    time.sleep(0.5)
+def _exportar(driver, download_path, botao, nome, carga=0.5):
+    """
+    Abre a consulta `botao` no grid, exporta para Excel e renomeia o arquivo.
+
+    Os callbacks do grid (DevExpress) sao XHR: cada passo espera a rede
+    ociosa em vez dos sleeps fixos (0,5s antes do botao, `carga` depois dele
+    e 1s depois do export).
+    """
+    wait_network_idle(driver, replaces=0.5)
+    click_button(driver, botao)
+    wait_network_idle(driver, timeout=max(15, carga * 6), replaces=carga)
+    antes = download_snapshot(download_path)
     click_button(driver, "btnExportExcel")
-    time.sleep(1)
+    wait_download_started(download_path, antes, timeout=60, replaces=1)
     wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "sc.xlsx")
-    
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn5")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "hc.xlsx")
+    rename_file(download_path, ".xlsx", nome)
+
+
+def _exportar_lote(driver, download_path, consultas):
+    """
+    Exporta as consultas [(botao, nome, carga)] do grid.
+
+    Com ETL_HTTP_EXPORT (padrao) o navegador so abre cada consulta: o estado
+    do grid DevExpress vai nos campos do postback, entao o clique em
+    btnExportExcel e capturado como request (http_export.form_request) e os
+    arquivos sao baixados por HTTP em paralelo ao final. Consulta sem
+    request ou com download falho cai no _exportar (clique + download).
+    """
+    if not http_export.enabled():
+        for botao, nome, carga in consultas:
+            _exportar(driver, download_path, botao, nome, carga)
+        return
+
+    pedidos = []
+    pendentes = []
+    for consulta in consultas:
+        botao, nome, carga = consulta
+        wait_network_idle(driver, replaces=0.5)
+        click_button(driver, botao)
+        wait_network_idle(driver, timeout=max(15, carga * 6), replaces=carga)
+        try:
+            exportar = driver.find_element(By.ID, "btnExportExcel")
+            pedidos.append((consulta, http_export.form_request(driver, exportar, filename=nome, magic=b"PK")))
+        except Exception as e:
+            print(f"Sem export direto para {nome}: {e}")
+            pendentes.append(consulta)
+
+    if pedidos:
+        with http_export.session_from_driver(driver) as sessao:
+            resultados = http_export.fetch_all(sessao, [pedido for _, pedido in pedidos], download_path)
+        for (consulta, _), (_, resultado) in zip(pedidos, resultados):
+            if isinstance(resultado, Exception):
+                pendentes.append(consulta)
+            else:
+                os.replace(resultado, os.path.join(download_path, consulta[1]))
+                print(f"File downloaded via HTTP: {consulta[1]}")
+
+    for botao, nome, carga in pendentes:
+        _exportar(driver, download_path, botao, nome, carga)
+
+
+def _filtrar_grid(driver):
+    """Filtro da coluna 2 = 1 (grid pronto depois do login)"""
+    wait_clickable(driver, (By.ID, "gridQuery_DXFREditorcol2_I"), timeout=30, replaces=5)
+    insert_text_enter(driver, "gridQuery_DXFREditorcol2_I", "1")
 
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn6")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "pc.xlsx")
 
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn7")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "lh.xlsx")
+@span("download_3meses")
+def donwload_3meses(driver,download_path):
 
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn8")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "pf.xlsx")
+    _filtrar_grid(driver)
+    _exportar_lote(driver, download_path, [
+        ("gridQuery_DXCBtn4", "sc.xlsx", 0.5),
+        ("gridQuery_DXCBtn5", "hc.xlsx", 0.5),
+        ("gridQuery_DXCBtn6", "pc.xlsx", 0.5),
+        ("gridQuery_DXCBtn7", "lh.xlsx", 0.5),
+        ("gridQuery_DXCBtn8", "pf.xlsx", 0.5),
+    ])
 
     print("Download da base dos ultimos 3 meses realizado.")
 
 
-def donwload_total(driver,download_path):
-    time.sleep(5)
-    insert_text_enter(driver, "gridQuery_DXFREditorcol2_I", "1")
-    time.sleep(0.5)
 
-    click_button(driver, "gridQuery_DXCBtn0")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "sc.xlsx")
-    
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn1")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "hc.xlsx")
-
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn2")
-    time.sleep(0.5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "pc.xlsx")
-
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn9")
-    time.sleep(5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "pf.xlsx")
-
-    time.sleep(0.5)
-    click_button(driver, "gridQuery_DXCBtn3") 
-    time.sleep(5)
-    click_button(driver, "btnExportExcel")
-    time.sleep(1)
-    wait_for_downloads(download_path)
-    rename_file(download_path, ".xlsx", "lh.xlsx")
+@span("download_total")
+def donwload_total(driver,download_path):
+    _filtrar_grid(driver)
+    _exportar_lote(driver, download_path, [
+        ("gridQuery_DXCBtn0", "sc.xlsx", 0.5),
+        ("gridQuery_DXCBtn1", "hc.xlsx", 0.5),
+        ("gridQuery_DXCBtn2", "pc.xlsx", 0.5),
+        # Consultas pesadas: o grid demorava ate 5s para carregar
+        ("gridQuery_DXCBtn9", "pf.xlsx", 5),
+        ("gridQuery_DXCBtn3", "lh.xlsx", 5),
+    ])
 
     print("Download da base completa realizado.")
 
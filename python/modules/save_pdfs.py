@@ -1,8 +1,6 @@
 
 import os
-import fitz
 import logging
-import pandas as pd 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +26,7 @@ def load_de_para_mapping(excel_path):
     """Load the DE-PARA mapping from the Excel file."""
     try:
         # Read the Excel sheet starting from row 3
+        import pandas as pd
         df = pd.read_excel(excel_path, sheet_name='De Para', header=None, skiprows=2)
         
         # Extract columns B and C, which are index 1 and 2
@@ -44,6 +43,7 @@ def extract_date_from_pdf(pdf_path, is_aplicacao_resgate=False):
     """Extract the date from the PDF file."""
     
     try:
+        import fitz
         document = fitz.open(pdf_path)
         logging.info(f"Opened PDF: {pdf_path}")
         
@@ -80,6 +80,7 @@ def extract_carteira_from_pdf(pdf_path, is_aplicacao_resgate=False):
     """Extract the 'Carteira' name from the PDF file."""
     
     try:
+        import fitz
         document = fitz.open(pdf_path)
         logging.info(f"Opened PDF: {pdf_path}")
         
@@ -115,6 +116,7 @@ def extract_carteira_from_pdf(pdf_path, is_aplicacao_resgate=False):
 def is_aplicacao_resgate_pdf(pdf_path):
     """Check if the PDF is a 'Aplicação e Resgate' type based on its content."""
     try:
+        import fitz
         document = fitz.open(pdf_path)
         logging.info(f"Opened PDF: {pdf_path}")
         
@@ -0,0 +1,263 @@
+"""
+Step TRUSTEE do pipeline
+
+Antes o main.py chamava um .bat fixo do Windows via shell=True: nao roda no
+container Linux, nao tem log estruturado nem tempo medido e prende o
+pipeline ate o timeout. Aqui o step e Python puro:
+
+- entrada: script Python da automacao Trustee, informado em
+  ETL_TRUSTEE_SCRIPT ou extraido do .bat legado (ETL_TRUSTEE_BAT ou o
+  caminho historico); a linha `python <script>.py` do .bat e o `cd`
+  anterior a ela definem script e diretorio de trabalho
+- execucao: o script roda com o mesmo interpretador do pipeline
+  (sys.executable), sem shell, em processo proprio com timeout
+- saida do script: cada linha vira log [INFO] [TRUSTEE] para o backend
+- incremental: a execucao do dia e registrada no ledger
+  ("trustee", None, "execucao", data) com os arquivos novos da pasta
+  auxiliar; reexecutar pula enquanto eles existirem (--force rebaixa).
+  Execucao sem arquivo novo nao e registrada e roda de novo
+- progresso: evento [PROGRESS] [trustee] 0/1 -> 1/1 execucoes
+
+As datas do periodo e a pasta auxiliar (paths.trustee) sao repassadas ao
+script em ETL_DATA_INICIAL, ETL_DATA_FINAL e ETL_TRUSTEE_AUX_PATH.
+"""
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Callable, List, NamedTuple, Optional
+
+# Progresso, ledger e spans (utils/) - no-op quando rodando standalone
+try:
+    from progress import report_progress
+    from ledger import ledger_done, record_done, snapshot, new_files
+    from spans import span
+except ImportError:
+    from contextlib import contextmanager
+
+    def report_progress(*args, **kwargs):
+        pass
+
+    def ledger_done(*args, **kwargs):
+        return False
+
+    def record_done(*args, **kwargs):
+        pass
+
+    def snapshot(folder):
+        return set()
+
+    def new_files(folder, before):
+        return []
+
+    @contextmanager
+    def span(*args, **kwargs):
+        yield
+
+SISTEMA = "trustee"
+
+# .bat usado ate aqui (estacao Windows da equipe)
+BAT_LEGADO = r"C:\bloko\Fundos - Documentos\00. Monitoramento\01. Rotinas\0. Python\TRUSTEE\Rodar_automacao_trustee.bat"
+
+DEFAULT_TIMEOUT = 300
+
+_PYTHON_EXES = {"python", "python3", "pythonw", "py"}
+
+
+class TrusteeEntry(NamedTuple):
+    """Script da automacao Trustee e como chama-lo"""
+    script: str
+    cwd: str
+    args: List[str]
+
+
+def _unquote(token: str) -> str:
+    return token.strip().strip('"').strip("'")
+
+
+def _is_python(token: str) -> bool:
+    name = os.path.basename(_unquote(token).replace("\\", "/")).lower()
+    if name.endswith(".exe"):
+        name = name[:-4]
+    return name in _PYTHON_EXES
+
+
+def _join(base: str, path: str) -> str:
+    """Junta caminhos do .bat (aceita separador do Windows)"""
+    path = path.replace("\\", os.sep) if os.sep != "\\" else path
+    return path if os.path.isabs(path) or ":" in path[:2] else os.path.join(base, path)
+
+
+def parse_bat(bat_path: str) -> Optional[TrusteeEntry]:
+    """
+    Extrai do .bat o script Python chamado e o diretorio de trabalho.
+
+    Reconhece `cd`/`cd /d`/`pushd` e linhas `python|py|...python.exe
+    <script>.py [args]` (com ou sem `call`/`start`). %~dp0 vira a pasta do .bat.
+
+    Returns:
+        TrusteeEntry ou None se o .bat nao chama nenhum script Python
+    """
+    bat_dir = os.path.dirname(bat_path)
+    cwd = bat_dir
+    with open(bat_path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+
+    for raw in lines:
+        line = raw.strip().replace("%~dp0", bat_dir + "\\").replace("%CD%", cwd)
+        if not line or line.lower().startswith(("rem ", "::", "@echo", "echo ")):
+            continue
+        try:
+            tokens = shlex.split(line, posix=False)
+        except ValueError:
+            continue
+        tokens = [t for t in tokens if t != "@"]
+        if tokens and tokens[0].startswith("@"):
+            tokens[0] = tokens[0][1:]
+        while tokens and tokens[0].lower() in ("call", "start", "/b", "/wait"):
+            tokens = tokens[1:]
+        if not tokens:
+            continue
+
+        head = tokens[0].lower()
+        if head in ("cd", "pushd", "chdir"):
+            rest = [t for t in tokens[1:] if t.lower() != "/d"]
+            if rest:
+                cwd = _join(cwd, _unquote(" ".join(rest)).rstrip("\\/"))
+            continue
+
+        if _is_python(tokens[0]):
+            rest = tokens[1:]
+            # Opcoes do interpretador (-u, -X utf8...) antes do script
+            while rest and rest[0].startswith("-") and not rest[0].lower().endswith(".py"):
+                rest = rest[1:] if rest[0] != "-X" else rest[2:]
+            if rest and _unquote(rest[0]).lower().endswith(".py"):
+                script = _join(cwd, _unquote(rest[0]))
+                return TrusteeEntry(script, cwd, [_unquote(t) for t in rest[1:]])
+    return None
+
+
+def resolve_entry(script: Optional[str] = None, bat: Optional[str] = None) -> TrusteeEntry:
+    """
+    Localiza o script da automacao Trustee.
+
+    Ordem: `script` / ETL_TRUSTEE_SCRIPT, depois `bat` / ETL_TRUSTEE_BAT /
+    BAT_LEGADO (lido, nunca executado).
+
+    Raises:
+        FileNotFoundError: Nenhuma entrada encontrada
+    """
+    script = script or os.getenv("ETL_TRUSTEE_SCRIPT", "")
+    if script:
+        if not os.path.isfile(script):
+            raise FileNotFoundError(f"Script Trustee nao encontrado: {script}")
+        return TrusteeEntry(os.path.abspath(script), os.path.dirname(os.path.abspath(script)), [])
+
+    bat = bat or os.getenv("ETL_TRUSTEE_BAT", "") or BAT_LEGADO
+    if not os.path.isfile(bat):
+        raise FileNotFoundError(
+            f"Automacao Trustee nao encontrada: defina ETL_TRUSTEE_SCRIPT (.bat procurado: {bat})"
+        )
+    entry = parse_bat(bat)
+    if entry is None:
+        raise FileNotFoundError(f"Nenhum script Python chamado em {bat}")
+    if not os.path.isfile(entry.script):
+        raise FileNotFoundError(f"Script Trustee nao encontrado: {entry.script} (lido de {bat})")
+    return entry
+
+
+def _reference_date(data_inicial: Optional[str], data_final: Optional[str]):
+    texto = data_final or data_inicial
+    if not texto:
+        return date.today()
+    return datetime.strptime(texto, "%d/%m/%Y").date()
+
+
+def run_trustee(
+    aux_path: str = "",
+    data_inicial: Optional[str] = None,
+    data_final: Optional[str] = None,
+    script: Optional[str] = None,
+    bat: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """
+    Executa a automacao Trustee.
+
+    Args:
+        aux_path: Pasta auxiliar (paths.trustee); arquivos novos vao para o ledger
+        data_inicial, data_final: Periodo (DD/MM/YYYY), repassado ao script
+        script, bat: Entrada explicita (ver resolve_entry)
+        timeout: Segundos ate o script ser encerrado
+        log: Recebe cada linha de saida do script
+
+    Returns:
+        {"skipped": bool, "seconds": float, "files": [...]}
+
+    Raises:
+        FileNotFoundError: Automacao nao encontrada
+        TimeoutError: Script excedeu o timeout
+        RuntimeError: Script terminou com codigo diferente de zero
+    """
+    dia = _reference_date(data_inicial, data_final)
+    report_progress(SISTEMA, 0, 1, "execucoes")
+    if ledger_done(SISTEMA, None, "execucao", dia):
+        log(f"Execucao de {dia:%d/%m/%Y} ja concluida anteriormente (ledger). Pulando.")
+        report_progress(SISTEMA, 1, 1, "execucoes", pulados=1)
+        return {"skipped": True, "seconds": 0.0, "files": []}
+
+    entry = resolve_entry(script, bat)
+    env = dict(os.environ)
+    env.update({
+        "PYTHONUNBUFFERED": "1",
+        "ETL_DATA_INICIAL": data_inicial or "",
+        "ETL_DATA_FINAL": data_final or data_inicial or "",
+        "ETL_TRUSTEE_AUX_PATH": aux_path or "",
+    })
+
+    antes = snapshot(aux_path)
+    started = time.perf_counter()
+    with span("script"):
+        proc = subprocess.Popen(
+            [sys.executable, entry.script, *entry.args],
+            cwd=entry.cwd or None,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        expirou = threading.Event()
+
+        def _kill():
+            expirou.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            for line in proc.stdout:
+                line = line.rstrip()
+                if line:
+                    log(line)
+            proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+    seconds = time.perf_counter() - started
+
+    if expirou.is_set():
+        raise TimeoutError(f"Automacao Trustee excedeu {timeout:.0f}s e foi encerrada")
+    if proc.returncode != 0:
+        raise RuntimeError(f"Automacao Trustee terminou com codigo {proc.returncode} ({seconds:.1f}s)")
+
+    files = new_files(aux_path, antes)
+    record_done(SISTEMA, None, "execucao", dia, files)
+    report_progress(SISTEMA, 1, 1, "execucoes")
+    return {"skipped": False, "seconds": seconds, "files": files}
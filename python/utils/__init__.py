@@ -1,9 +1,21 @@
 """
 Utility modules for ETL scripts
 """
-from .crypto import ETLCrypto, load_credentials
+from .crypto import ETLCrypto, load_credentials, read_data_key
+from .progress import report_progress
+from .checkpoint import CheckpointStore
+from .ledger import CompletionLedger
+from .business_calendar import BusinessCalendar, get_calendar
+from .spans import span
 
 __all__ = [
     "ETLCrypto",
     "load_credentials",
+    "read_data_key",
+    "report_progress",
+    "CheckpointStore",
+    "CompletionLedger",
+    "BusinessCalendar",
+    "get_calendar",
+    "span",
 ]
@@ -0,0 +1,112 @@
+"""
+Chrome emprestado do pool do backend (services/browser_pool.py)
+
+Quando o worker tem pool de navegadores, o executor passa ao main.py:
+    ETL_BROWSER_POOL        JSON [{"id", "address", "download_dir"}, ...]
+    ETL_BROWSER_LEASE_DIR   pasta onde os steps marcam o Chrome em uso
+
+Cada step (processo do step_scheduler) reivindica uma entrada livre com
+claim(): um arquivo <id>.lock criado com O_EXCL guarda o pid do dono. Locks
+de processos que ja morreram sao tomados de volta. O Chrome e liberado com
+release() (driver.quit no base_driver.pooled_driver) ou, no pior caso, ao
+fim do processo (atexit).
+
+Sem pool (variaveis ausentes) ou com todos em uso, claim() devolve None e o
+modulo abre o proprio Chrome como antes.
+"""
+import atexit
+import json
+import os
+from typing import List, Optional
+
+POOL_ENV = "ETL_BROWSER_POOL"
+LEASE_DIR_ENV = "ETL_BROWSER_LEASE_DIR"
+
+_held: List[dict] = []
+
+
+def entries() -> List[dict]:
+    """Navegadores emprestados ao job (vazio sem pool)"""
+    raw = os.environ.get(POOL_ENV)
+    if not raw or not os.environ.get(LEASE_DIR_ENV):
+        return []
+    try:
+        return [e for e in json.loads(raw) if e.get("address")]
+    except (ValueError, AttributeError):
+        return []
+
+
+def _lock_path(entry: dict) -> str:
+    return os.path.join(os.environ[LEASE_DIR_ENV], f"{entry['id']}.lock")
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Sem permissao (ou Windows): na duvida o dono continua vivo
+        return True
+    return True
+
+
+def _try_lock(path: str) -> bool:
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def _stale(path: str) -> bool:
+    """Lock de processo que morreu sem liberar"""
+    try:
+        with open(path) as f:
+            pid = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return False
+    return not _pid_alive(pid)
+
+
+def claim() -> Optional[dict]:
+    """
+    Reivindica um Chrome livre do pool.
+
+    Returns:
+        {"id", "address", "download_dir"} ou None (sem pool ou todos em uso)
+    """
+    for entry in entries():
+        path = _lock_path(entry)
+        if _try_lock(path):
+            _held.append(entry)
+            return entry
+        if _stale(path):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            if _try_lock(path):
+                _held.append(entry)
+                return entry
+    return None
+
+
+def release(entry: dict):
+    """Devolve o Chrome para os outros steps do job"""
+    if entry in _held:
+        _held.remove(entry)
+    try:
+        os.unlink(_lock_path(entry))
+    except (OSError, KeyError):
+        pass
+
+
+@atexit.register
+def _release_all():
+    for entry in list(_held):
+        release(entry)
@@ -0,0 +1,219 @@
+"""
+Calendario de dias uteis compartilhado pelos modulos ETL
+
+Os modulos montavam holidays.Brazil() e andavam dia a dia a cada chamada
+(muitas vezes dentro de loops). Aqui cada calendario e montado uma vez por
+processo, como tabelas pre-computadas sobre um intervalo de anos:
+
+    dias:   ordinais dos dias uteis, em ordem
+    antes:  antes[i] = dias uteis estritamente antes de (base + i)
+
+Com isso is_business_day, previous_business_day, next_business_day e
+business_days_between sao O(1), e range e O(tamanho do resultado). Datas
+fora do intervalo estendem as tabelas.
+
+Calendarios:
+    get_calendar("SP")                    nacional + Sao Paulo (padrao)
+    get_calendar(None)                    so feriados nacionais (AMPLIS PDF)
+    get_calendar(None, feriados=False)    so fins de semana (MAPS)
+"""
+import sys
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+DateLike = Union[date, datetime, str]
+
+# Anos cobertos na primeira montagem (relativos ao ano corrente)
+ANOS_ANTES = 10
+ANOS_DEPOIS = 2
+
+_avisou_sem_holidays = False
+
+
+def to_date(valor: DateLike) -> date:
+    """Aceita date, datetime, DD/MM/YYYY ou YYYY-MM-DD"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    formato = "%d/%m/%Y" if "/" in texto else "%Y-%m-%d"
+    return datetime.strptime(texto, formato).date()
+
+
+def carregar_feriados(anos: Iterable[int], estado: Optional[str] = "SP") -> set:
+    """
+    Feriados do pacote holidays para os anos pedidos.
+
+    Sem o pacote instalado retorna vazio (so fins de semana) e avisa uma vez.
+    """
+    global _avisou_sem_holidays
+    try:
+        import holidays
+    except ImportError:
+        if not _avisou_sem_holidays:
+            print("[AVISO] Pacote holidays nao instalado: calendario considera so fins de semana",
+                  file=sys.stderr)
+            _avisou_sem_holidays = True
+        return set()
+    anos = list(anos)
+    if estado:
+        return set(holidays.Brazil(state=estado, years=anos).keys())
+    return set(holidays.Brazil(years=anos).keys())
+
+
+class BusinessCalendar:
+    """
+    Dias uteis (seg-sex fora dos feriados) com consultas O(1).
+
+    Args:
+        estado: UF dos feriados estaduais (None = so nacionais)
+        feriados: False ignora feriados (so fins de semana)
+        anos: (primeiro, ultimo) ano da tabela inicial
+        datas_feriado: Feriados fixos (dispensa o pacote holidays; testes)
+    """
+
+    def __init__(
+        self,
+        estado: Optional[str] = "SP",
+        feriados: bool = True,
+        anos: Optional[Tuple[int, int]] = None,
+        datas_feriado: Optional[Iterable[date]] = None,
+    ):
+        self.estado = estado
+        self.feriados = feriados
+        self._fixos = set(datas_feriado) if datas_feriado is not None else None
+        self._lock = threading.Lock()
+        hoje = date.today().year
+        primeiro, ultimo = anos or (hoje - ANOS_ANTES, hoje + ANOS_DEPOIS)
+        self._montar(primeiro, ultimo)
+
+    def _feriados_de(self, anos: range) -> set:
+        if not self.feriados:
+            return set()
+        if self._fixos is not None:
+            return {d for d in self._fixos if d.year in anos}
+        return carregar_feriados(anos, self.estado)
+
+    def _montar(self, primeiro: int, ultimo: int):
+        """Monta as tabelas para [01/01/primeiro, 31/12/ultimo]"""
+        feriados = self._feriados_de(range(primeiro, ultimo + 1))
+        base = date(primeiro, 1, 1).toordinal()
+        fim = date(ultimo, 12, 31).toordinal()
+
+        dias: List[int] = []
+        antes = [0] * (fim - base + 2)
+        for ordinal in range(base, fim + 1):
+            antes[ordinal - base] = len(dias)
+            dia = date.fromordinal(ordinal)
+            if dia.weekday() < 5 and dia not in feriados:
+                dias.append(ordinal)
+        antes[fim - base + 1] = len(dias)
+
+        # Troca atomica: leitores em outras threads veem a tabela antiga ou a nova
+        self._tabela = _Tabela(primeiro, ultimo, base, dias, antes)
+
+    def _cobrir(self, *datas: date) -> "_Tabela":
+        """Tabela que cobre as datas (estendida se alguma estiver fora)"""
+        tabela = self._tabela
+        anos = [d.year for d in datas]
+        if min(anos) >= tabela.primeiro_ano and max(anos) <= tabela.ultimo_ano:
+            return tabela
+        with self._lock:
+            tabela = self._tabela
+            primeiro = min(tabela.primeiro_ano, min(anos) - 1)
+            ultimo = max(tabela.ultimo_ano, max(anos) + 1)
+            if (primeiro, ultimo) != (tabela.primeiro_ano, tabela.ultimo_ano):
+                self._montar(primeiro, ultimo)
+            return self._tabela
+
+    @property
+    def anos(self) -> Tuple[int, int]:
+        """(primeiro, ultimo) ano coberto pelas tabelas"""
+        return self._tabela.primeiro_ano, self._tabela.ultimo_ano
+
+    def is_business_day(self, dia: DateLike) -> bool:
+        dia = to_date(dia)
+        tabela = self._cobrir(dia)
+        return tabela.uteis_ate(dia) > tabela.uteis_antes(dia)
+
+    def previous_business_day(self, dia: DateLike, n: int = 1) -> date:
+        """N-esimo dia util estritamente antes de `dia`"""
+        dia = to_date(dia)
+        tabela = self._cobrir(dia)
+        while tabela.uteis_antes(dia) < n:
+            tabela = self._cobrir(date(tabela.primeiro_ano - 1, 1, 1))
+        return date.fromordinal(tabela.dias[tabela.uteis_antes(dia) - n])
+
+    def next_business_day(self, dia: DateLike, n: int = 1) -> date:
+        """N-esimo dia util estritamente depois de `dia`"""
+        dia = to_date(dia)
+        tabela = self._cobrir(dia)
+        while tabela.uteis_ate(dia) + n > len(tabela.dias):
+            tabela = self._cobrir(date(tabela.ultimo_ano + 1, 1, 1))
+        return date.fromordinal(tabela.dias[tabela.uteis_ate(dia) + n - 1])
+
+    def _limites(self, inicio: DateLike, fim: DateLike) -> Tuple["_Tabela", int, int]:
+        inicio, fim = to_date(inicio), to_date(fim)
+        tabela = self._cobrir(inicio, fim)
+        if fim < inicio:
+            return tabela, 0, 0
+        return tabela, tabela.uteis_antes(inicio), tabela.uteis_ate(fim)
+
+    def business_days_between(self, inicio: DateLike, fim: DateLike) -> int:
+        """Quantidade de dias uteis em [inicio, fim] (inclusive)"""
+        _, de, ate = self._limites(inicio, fim)
+        return ate - de
+
+    def range(self, inicio: DateLike, fim: DateLike) -> List[date]:
+        """Dias uteis em [inicio, fim] (inclusive), em ordem"""
+        tabela, de, ate = self._limites(inicio, fim)
+        return [date.fromordinal(o) for o in tabela.dias[de:ate]]
+
+
+class _Tabela(NamedTuple):
+    """Tabelas pre-computadas de um intervalo de anos"""
+    primeiro_ano: int
+    ultimo_ano: int
+    base: int
+    dias: List[int]
+    antes: List[int]
+
+    def uteis_antes(self, dia: date) -> int:
+        """Dias uteis estritamente antes de `dia`"""
+        return self.antes[dia.toordinal() - self.base]
+
+    def uteis_ate(self, dia: date) -> int:
+        """Dias uteis ate `dia`, inclusive"""
+        return self.antes[dia.toordinal() - self.base + 1]
+
+
+_calendarios: Dict[Tuple[Optional[str], bool], BusinessCalendar] = {}
+_calendarios_lock = threading.Lock()
+
+
+def get_calendar(estado: Optional[str] = "SP", feriados: bool = True) -> BusinessCalendar:
+    """Calendario compartilhado do processo (montado na primeira chamada)"""
+    chave = (estado, feriados)
+    calendario = _calendarios.get(chave)
+    if calendario is None:
+        with _calendarios_lock:
+            calendario = _calendarios.get(chave)
+            if calendario is None:
+                calendario = BusinessCalendar(estado, feriados)
+                _calendarios[chave] = calendario
+    return calendario
+
+
+def previous_business_day(dia: Optional[DateLike] = None, n: int = 1, estado: Optional[str] = "SP") -> date:
+    """N-esimo dia util antes de `dia` (padrao: hoje)"""
+    return get_calendar(estado).previous_business_day(dia or date.today(), n)
+
+
+def business_days_between(inicio: DateLike, fim: DateLike, estado: Optional[str] = "SP") -> int:
+    return get_calendar(estado).business_days_between(inicio, fim)
+
+
+def business_days_range(inicio: DateLike, fim: DateLike, estado: Optional[str] = "SP") -> List[date]:
+    return get_calendar(estado).range(inicio, fim)
@@ -0,0 +1,114 @@
+"""
+Checkpoint de unidades de trabalho por job
+
+Cada unidade concluida (sistema, fundo, data) e gravada em um arquivo JSONL
+append-only: <ETL_CHECKPOINT_DIR>/job_<id>.jsonl
+
+Com --resume os modulos consultam unit_done() e pulam o que ja foi baixado,
+entao um retry de um backfill longo so refaz as unidades restantes.
+"""
+import json
+import os
+import threading
+from typing import Optional, Set, Tuple
+
+UnitKey = Tuple[str, str, str]
+
+
+def _normalize(sistema, fundo, data) -> UnitKey:
+    """Chave canonica: sistema minusculo, fundo maiusculo, data DD/MM/YYYY"""
+    if hasattr(data, "strftime"):
+        data = data.strftime("%d/%m/%Y")
+    return (
+        str(sistema).strip().lower(),
+        str(fundo or "*").strip().upper(),
+        str(data).strip(),
+    )
+
+
+class CheckpointStore:
+    """
+    Armazena unidades concluidas de um job.
+
+    Args:
+        path: Arquivo JSONL do job
+        resume: Se True, unidades ja registradas sao puladas
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.resume = resume
+        self.skipped = 0
+        self._done: Set[UnitKey] = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    unit = json.loads(line)
+                    self._done.add(_normalize(unit["sistema"], unit["fundo"], unit["data"]))
+                except (ValueError, KeyError):
+                    # Linha truncada (processo morto no meio da escrita)
+                    continue
+
+    def is_done(self, sistema, fundo, data) -> bool:
+        """True se a unidade ja foi concluida e estamos retomando"""
+        if not self.resume:
+            return False
+        done = _normalize(sistema, fundo, data) in self._done
+        if done:
+            self.skipped += 1
+        return done
+
+    def mark_done(self, sistema, fundo, data):
+        """Registra unidade concluida (flush imediato)"""
+        key = _normalize(sistema, fundo, data)
+        with self._lock:
+            if key in self._done:
+                return
+            self._done.add(key)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"sistema": key[0], "fundo": key[1], "data": key[2]}) + "\n")
+                f.flush()
+
+    @property
+    def completed_count(self) -> int:
+        return len(self._done)
+
+    def discard(self):
+        """Remove o checkpoint (job concluido sem erros)"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+_store: Optional[CheckpointStore] = None
+
+
+def configure(checkpoint_dir: str, job_id: int, resume: bool = False) -> CheckpointStore:
+    """Inicializa o store do job atual (chamado pelo main.py)"""
+    global _store
+    _store = CheckpointStore(os.path.join(checkpoint_dir, f"job_{int(job_id)}.jsonl"), resume)
+    return _store
+
+
+def get_store() -> Optional[CheckpointStore]:
+    return _store
+
+
+def unit_done(sistema, fundo, data) -> bool:
+    """True se a unidade deve ser pulada (ja concluida em execucao anterior)"""
+    return _store is not None and _store.is_done(sistema, fundo, data)
+
+
+def mark_unit_done(sistema, fundo, data):
+    """Registra unidade concluida no job atual (no-op sem checkpoint)"""
+    if _store is not None:
+        _store.mark_done(sistema, fundo, data)
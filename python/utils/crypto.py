@@ -3,11 +3,40 @@ Crypto utilities for ETL modules.
 
 Lightweight crypto module for ETL subprocess use.
 Mirrors backend/services/crypto.py for consistent encryption/decryption.
+
+When started by the backend, the derived key arrives through an inherited
+pipe (--key-fd) and the PBKDF2 step is skipped; see read_data_key().
 """
 import os
 import base64
 import json
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Tuple
+
+DataKey = Tuple[bytes, bytes]
+
+
+def read_data_key(fd: int) -> Optional[DataKey]:
+    """
+    Reads the (salt, key) handed over by the backend on an inherited pipe.
+
+    Args:
+        fd: File descriptor (POSIX) or handle (Windows) from --key-fd.
+
+    Returns:
+        (salt, key), or None if the payload is unreadable or expired.
+    """
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fd = msvcrt.open_osfhandle(fd, os.O_RDONLY)
+        with os.fdopen(fd, "rb") as pipe:
+            payload = json.loads(pipe.read(4096))
+        if float(payload["expires_at"]) < time.time():
+            return None
+        return base64.b64decode(payload["salt"]), base64.b64decode(payload["key"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
 
 class ETLCrypto:
@@ -20,25 +49,32 @@ class ETLCrypto:
     AAD = b"ETL_CREDENTIALS_V1"
     SENSITIVE_FIELDS = {"password", "senha", "secret", "token", "api_key"}
 
-    def __init__(self, master_key: Optional[str] = None):
+    def __init__(self, master_key: Optional[str] = None, data_key: Optional[DataKey] = None):
         """
         Initialize crypto.
 
         Args:
             master_key: Base64-encoded master passphrase.
                        If None, reads from ETL_MASTER_KEY env var.
+            data_key: (salt, derived key) handed over by the backend.
 
         Raises:
-            ValueError: If no master key is found.
+            ValueError: If neither a master key nor a data key is available.
         """
         self._master_key = master_key or os.getenv("ETL_MASTER_KEY")
-        if not self._master_key:
+        self._data_key = data_key
+        if not self._master_key and not self._data_key:
             raise ValueError(
                 "ETL_MASTER_KEY environment variable required for encrypted credentials"
             )
 
     def _derive_key(self, salt: bytes) -> bytes:
-        """Derive encryption key from master passphrase using PBKDF2"""
+        """Derive encryption key (handed-over data key when the salt matches)"""
+        if self._data_key and self._data_key[0] == salt:
+            return self._data_key[1]
+        if not self._master_key:
+            raise ValueError("Data key does not match the credentials salt and ETL_MASTER_KEY is not set")
+
         from cryptography.hazmat.primitives import hashes
         from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
@@ -76,6 +112,16 @@ class ETLCrypto:
         salt = base64.b64decode(salt_b64)
         key = self._derive_key(salt)
 
+        try:
+            return self._decrypt_all(encrypted, key)
+        except Exception:
+            if not (self._data_key and self._master_key):
+                raise
+            # Data key invalido (ex.: arquivo regravado): derivar da master key
+            self._data_key = None
+            return self._decrypt_all(encrypted, self._derive_key(salt))
+
+    def _decrypt_all(self, encrypted: Dict[str, Any], key: bytes) -> Dict[str, Any]:
         decrypted = {
             "version": encrypted.get("version", "1.0")
         }
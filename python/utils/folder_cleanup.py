@@ -0,0 +1,172 @@
+"""
+Limpeza de pastas de saida antes da execucao
+
+Apagar arquivo por arquivo em sequencia custa minutos em compartilhamentos
+de rede com milhares de PDFs/Excel antigos (cada unlink e uma ida e volta ao
+servidor). Aqui:
+
+- remocao paralela: os itens da pasta sao apagados por um pool de threads
+  com concorrencia limitada (workers)
+- lixeira por rename (trash=True): a pasta inteira e renomeada para
+  .<nome>.lixo-<timestamp> no mesmo diretorio pai (O(1) por pasta) e
+  recriada vazia; o conteudo antigo e apagado em segundo plano. Sobras de
+  execucoes interrompidas sao apagadas na proxima limpeza. Se o rename
+  falhar (pasta em uso, sem permissao), cai na remocao paralela.
+
+Cada pasta reporta itens removidos, erros e tempo gasto.
+"""
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional
+
+# Threads de remocao por padrao (I/O bound: rede/disco)
+DEFAULT_WORKERS = 8
+
+TRASH_MARKER = ".lixo-"
+
+
+class CleanupResult(NamedTuple):
+    """Resultado da limpeza de uma pasta"""
+    folder: str
+    removed: int
+    errors: List[str]
+    seconds: float
+    trashed: bool = False
+
+
+def _remove(path: str, is_dir: bool):
+    if is_dir:
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def _trash_name(folder: str) -> str:
+    parent, name = os.path.split(os.path.normpath(folder))
+    stamp = time.strftime("%Y%m%d%H%M%S")
+    return os.path.join(parent, f".{name}{TRASH_MARKER}{stamp}-{os.getpid()}-{threading.get_ident()}")
+
+
+def trash_dirs(folder: str) -> List[str]:
+    """Lixeiras de `folder` deixadas no diretorio pai"""
+    parent, name = os.path.split(os.path.normpath(folder))
+    prefix = f".{name}{TRASH_MARKER}"
+    try:
+        return [
+            entry.path for entry in os.scandir(parent or ".")
+            if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False)
+        ]
+    except OSError:
+        return []
+
+
+def purge_trash(folders: Iterable[str]) -> int:
+    """Apaga as lixeiras das pastas (erros sao ignorados). Retorna quantas"""
+    purged = 0
+    for folder in folders:
+        for trash in trash_dirs(folder):
+            shutil.rmtree(trash, ignore_errors=True)
+            purged += 1
+    return purged
+
+
+def _delete_contents(folder: str, executor: ThreadPoolExecutor) -> CleanupResult:
+    started = time.perf_counter()
+    futures = []
+    errors: List[str] = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            futures.append((entry.path, executor.submit(_remove, entry.path, is_dir)))
+
+    removed = 0
+    for path, future in futures:
+        try:
+            future.result()
+            removed += 1
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+    return CleanupResult(folder, removed, errors, time.perf_counter() - started)
+
+
+def _move_to_trash(folder: str) -> Optional[CleanupResult]:
+    """Renomeia a pasta para a lixeira e recria vazia (None se nao deu)"""
+    started = time.perf_counter()
+    try:
+        removed = sum(1 for _ in os.scandir(folder))
+        trash = _trash_name(folder)
+        os.rename(folder, trash)
+    except OSError:
+        return None
+    try:
+        os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        # Sem a pasta o modulo falharia: devolve o conteudo antigo
+        try:
+            os.rename(trash, folder)
+        except OSError:
+            pass
+        return CleanupResult(folder, 0, [f"{folder}: {e}"], time.perf_counter() - started)
+    return CleanupResult(folder, removed, [], time.perf_counter() - started, trashed=True)
+
+
+def clean_folder(
+    folder: str,
+    workers: int = DEFAULT_WORKERS,
+    trash: bool = False,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Optional[CleanupResult]:
+    """
+    Esvazia uma pasta (a pasta em si continua existindo).
+
+    Args:
+        folder: Pasta a limpar (inexistente = nada a fazer)
+        workers: Threads de remocao (ignorado se `executor` for passado)
+        trash: Tentar a lixeira por rename antes da remocao item a item
+        executor: Pool compartilhado entre varias pastas
+
+    Returns:
+        CleanupResult, ou None se a pasta nao existe
+    """
+    if not folder or not os.path.isdir(folder):
+        return None
+
+    if trash:
+        result = _move_to_trash(folder)
+        if result is not None:
+            threading.Thread(target=purge_trash, args=([folder],), daemon=True).start()
+            return result
+
+    if executor is not None:
+        return _delete_contents(folder, executor)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cleanup") as pool:
+        return _delete_contents(folder, pool)
+
+
+def clean_folders(
+    folders: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    trash: bool = False,
+) -> List[CleanupResult]:
+    """
+    Limpa varias pastas com um unico pool de `workers` threads.
+
+    Pastas vazias, repetidas ou inexistentes sao ignoradas.
+    """
+    folders = [f for f in dict.fromkeys(folders) if f and os.path.isdir(f)]
+    results: List[CleanupResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cleanup") as pool:
+        for folder in folders:
+            try:
+                result = clean_folder(folder, trash=trash, executor=pool)
+            except OSError as e:
+                result = CleanupResult(folder, 0, [f"{folder}: {e}"], 0.0)
+            if result is not None:
+                results.append(result)
+    return results
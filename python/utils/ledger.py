@@ -0,0 +1,282 @@
+"""
+Ledger de unidades concluidas entre execucoes
+
+Diferente do checkpoint (por job, apagado ao final), o ledger e permanente:
+um SQLite em <ETL_LEDGER_PATH> (padrao: data/ledger.db) com uma linha por
+unidade (sistema, fundo, tipo de relatorio, data de referencia) e o hash do
+conteudo baixado. Reexecutar um periodo que se sobrepoe a uma execucao
+anterior pula o que ja foi baixado; --force ignora o ledger (mas continua
+registrando).
+
+Uma unidade so conta como concluida se os arquivos registrados ainda existem
+com o mesmo hash: pastas limpas (--limpar) ou arquivos alterados fazem a
+unidade ser baixada de novo. Unidades sem arquivo nao sao registradas.
+
+Uso nos modulos:
+    antes = snapshot(pasta)
+    if not ledger_done("amplis_reag", None, "pdf", dia):
+        ... baixa ...
+        record_done("amplis_reag", None, "pdf", dia, new_files(pasta, antes))
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Set
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completed_units (
+    sistema TEXT NOT NULL,
+    fundo TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    data TEXT NOT NULL,
+    content_hash TEXT,
+    files INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    paths TEXT,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (sistema, fundo, tipo, data)
+)
+"""
+
+
+def _normalize_date(data) -> str:
+    """Data de referencia em ISO (YYYY-MM-DD); aceita date ou DD/MM/YYYY"""
+    if isinstance(data, (date, datetime)):
+        return data.strftime("%Y-%m-%d")
+    text = str(data).strip()
+    try:
+        return datetime.strptime(text, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return text
+
+
+def _key(sistema, fundo, tipo, data) -> tuple:
+    """Chave canonica, mesmas regras do checkpoint (fundo None = '*')"""
+    return (
+        str(sistema).strip().lower(),
+        str(fundo or "*").strip().upper(),
+        str(tipo).strip().lower(),
+        _normalize_date(data),
+    )
+
+
+def content_hash(paths: Iterable[str]) -> Optional[str]:
+    """
+    SHA-256 do conteudo dos arquivos (ordenados por nome).
+
+    Returns:
+        Hex digest ou None se nenhum arquivo legivel
+    """
+    digest = hashlib.sha256()
+    found = False
+    for path in sorted(paths, key=lambda p: os.path.basename(p)):
+        try:
+            with open(path, "rb") as f:
+                digest.update(os.path.basename(path).encode("utf-8"))
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            found = True
+        except OSError:
+            continue
+    return digest.hexdigest() if found else None
+
+
+def snapshot(folder: str) -> Set[str]:
+    """Nomes dos arquivos presentes na pasta (para new_files)"""
+    if not folder:
+        return set()
+    try:
+        return set(os.listdir(folder))
+    except OSError:
+        return set()
+
+
+def new_files(folder: str, before: Set[str]) -> list:
+    """Arquivos que surgiram na pasta desde o snapshot (sem temporarios)"""
+    return [
+        os.path.join(folder, name)
+        for name in sorted(snapshot(folder) - before)
+        if not name.endswith((".crdownload", ".part", ".tmp"))
+    ]
+
+
+class CompletionLedger:
+    """
+    Ledger SQLite de unidades concluidas.
+
+    Args:
+        path: Arquivo SQLite
+        force: Se True, is_done() sempre retorna False (rebaixa tudo)
+    """
+
+    def __init__(self, path: str, force: bool = False):
+        self.path = path
+        self.force = force
+        self.skipped = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        # hash -> assinatura (caminho, tamanho, mtime) ja conferida neste processo
+        self._verified = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Um processo por step: WAL permite leituras concorrentes e o
+        # timeout cobre escritas simultaneas de steps paralelos
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        colunas = {row[1] for row in self._conn.execute("PRAGMA table_info(completed_units)")}
+        if "paths" not in colunas:
+            # Ledger anterior aos caminhos: linhas sem paths nao sao verificaveis e serao rebaixadas
+            self._conn.execute("ALTER TABLE completed_units ADD COLUMN paths TEXT")
+        self._conn.commit()
+
+    def _files_intact(self, paths_json: Optional[str], digest: Optional[str]) -> bool:
+        """Arquivos registrados ainda existem e o conteudo confere com o hash"""
+        if not paths_json or not digest:
+            return False
+        try:
+            paths = json.loads(paths_json)
+            assinatura = tuple(
+                (p, os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in sorted(paths)
+            )
+        except (OSError, ValueError, TypeError):
+            return False
+        if not assinatura:
+            return False
+        if self._verified.get(digest) == assinatura:
+            return True
+        if content_hash(paths) != digest:
+            return False
+        self._verified[digest] = assinatura
+        return True
+
+    def is_done(self, sistema, fundo, tipo, data) -> bool:
+        """
+        True se a unidade ja foi concluida e os arquivos registrados seguem
+        intactos (e nao estamos em --force). Arquivos apagados ou alterados
+        fazem a unidade ser baixada de novo.
+        """
+        if self.force:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paths, content_hash FROM completed_units WHERE sistema=? AND fundo=? AND tipo=? AND data=?",
+                _key(sistema, fundo, tipo, data)
+            ).fetchone()
+            done = row is not None and self._files_intact(*row)
+            if done:
+                self.skipped += 1
+        return done
+
+    def record(self, sistema, fundo, tipo, data, files: Iterable[str] = ()) -> Optional[str]:
+        """
+        Registra unidade concluida com o hash dos arquivos produzidos.
+
+        Sem arquivo (download que nao chegou, portal sem dados) nada e
+        registrado: a unidade continua pendente na proxima execucao.
+
+        Returns:
+            Hash do conteudo (None se nenhum arquivo legivel - nao registrado)
+        """
+        files = sorted({os.path.abspath(p) for p in files if os.path.isfile(p)})
+        digest = content_hash(files)
+        if digest is None:
+            return None
+        size = sum(os.path.getsize(p) for p in files)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completed_units "
+                "(sistema, fundo, tipo, data, content_hash, files, bytes, paths, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*_key(sistema, fundo, tipo, data), digest, len(files), size, json.dumps(files),
+                 datetime.now().isoformat(timespec="seconds"))
+            )
+            self._conn.commit()
+            self.recorded += 1
+        return digest
+
+    def relocate(self, moves: Dict[str, str]) -> int:
+        """
+        Atualiza os caminhos registrados de arquivos movidos (staging de um
+        shard -> pasta configurada). O hash nao muda: o nome e o conteudo
+        sao os mesmos.
+
+        Returns:
+            Linhas atualizadas
+        """
+        moves = {os.path.abspath(src): os.path.abspath(dst) for src, dst in moves.items()}
+        if not moves:
+            return 0
+        # Filtro grosso no SQL (prefixo comum, como aparece no JSON); o exato e feito aqui
+        prefixo = json.dumps(os.path.commonpath(list(moves)))[1:-1]
+        atualizadas = 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, paths FROM completed_units WHERE instr(paths, ?) > 0", (prefixo,)
+            ).fetchall()
+            for rowid, paths_json in rows:
+                try:
+                    paths = json.loads(paths_json)
+                except (ValueError, TypeError):
+                    continue
+                novos = sorted(moves.get(p, p) for p in paths)
+                if novos != sorted(paths):
+                    self._conn.execute(
+                        "UPDATE completed_units SET paths = ? WHERE rowid = ?", (json.dumps(novos), rowid)
+                    )
+                    atualizadas += 1
+            self._conn.commit()
+        return atualizadas
+
+    def get(self, sistema, fundo, tipo, data) -> Optional[dict]:
+        """Linha da unidade (ou None)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM completed_units WHERE sistema=? AND fundo=? AND tipo=? AND data=?",
+                _key(sistema, fundo, tipo, data)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([c[0] for c in cursor.description], row))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_ledger: Optional[CompletionLedger] = None
+
+
+def configure(path: str, force: bool = False) -> CompletionLedger:
+    """Inicializa o ledger do processo atual (chamado pelo main.py)"""
+    global _ledger
+    _ledger = CompletionLedger(path, force)
+    return _ledger
+
+
+def get_ledger() -> Optional[CompletionLedger]:
+    return _ledger
+
+
+def ledger_done(sistema, fundo, tipo, data) -> bool:
+    """True se a unidade deve ser pulada (concluida em execucao anterior)"""
+    return _ledger is not None and _ledger.is_done(sistema, fundo, tipo, data)
+
+
+def relocate_files(moves: Dict[str, str]) -> int:
+    """Atualiza caminhos de arquivos movidos (no-op sem ledger configurado)"""
+    if _ledger is not None:
+        return _ledger.relocate(moves)
+    return 0
+
+
+def record_done(sistema, fundo, tipo, data, files: Iterable[str] = ()) -> Optional[str]:
+    """Registra unidade concluida (no-op sem ledger configurado ou sem arquivos)"""
+    if _ledger is not None:
+        return _ledger.record(sistema, fundo, tipo, data, files)
+    return None
@@ -0,0 +1,28 @@
+"""
+Eventos de progresso para o backend (protocolo de log)
+
+Formato da linha:
+    [PROGRESS] [sistema] <feitos>/<total> <unidade> [pulados=<n>]
+
+pulados = quantas das unidades feitas foram puladas (checkpoint/ledger) sem
+trabalho; o backend as deixa fora do tempo por unidade.
+
+O backend usa esses contadores para calcular percentual e ETA do job.
+"""
+
+
+def report_progress(sistema: str, feitos: int, total: int, unidade: str = "fundos", pulados: int = 0):
+    """
+    Emite um evento de progresso no stdout.
+
+    Args:
+        sistema: ID do sistema (maps, fidc, qore, amplis_reag...)
+        feitos: Unidades concluidas
+        total: Total de unidades
+        unidade: Nome da unidade (fundos, datas, sistemas...)
+        pulados: Quantas das unidades feitas foram puladas (checkpoint/ledger)
+    """
+    if total <= 0:
+        return
+    sufixo = f" pulados={pulados}" if pulados > 0 else ""
+    print(f"[PROGRESS] [{sistema}] {feitos}/{total} {unidade}{sufixo}", flush=True)
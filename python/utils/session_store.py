@@ -0,0 +1,216 @@
+"""
+Sessoes de portal persistidas entre execucoes (cookies criptografados)
+
+Depois de um login completo o modulo salva os cookies do Chrome (todos os
+dominios, via CDP: inclui o SSO/Keycloak do MAPS) em
+<ETL_SESSION_DIR>/<portal>.session, cifrados com AES-256-GCM. Na execucao
+seguinte os cookies sao recolocados no navegador, uma pagina protegida e
+aberta e uma checagem barata do modulo (elemento da area logada) decide:
+sessao valida = login pulado (inclusive o OTP do MAPS); expirada = arquivo
+descartado e login completo.
+
+Chave: ETL_SESSION_KEY ou, na falta, derivada da ETL_MASTER_KEY (HKDF, sem
+o PBKDF2 das credenciais). Sem chave o store fica desligado: cookies de
+sessao nunca vao para o disco em texto puro.
+
+Uso nos modulos:
+    if not restore_session(driver, "maps", url_area_logada, esta_logado):
+        login(...)
+        save_session(driver, "maps")
+
+Variaveis:
+    ETL_SESSIONS               false desliga (padrao: true)
+    ETL_SESSION_DIR            pasta dos arquivos (padrao: data/sessions)
+    ETL_SESSION_MAX_AGE_HOURS  idade maxima de uma sessao salva (padrao: 12)
+"""
+import base64
+import json
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_INFO = b"ETL_SESSIONS_V1"
+NONCE_LENGTH = 12
+
+# Campos aceitos por Network.setCookies (getAllCookies devolve outros, ex.: size)
+_COOKIE_PARAMS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires", "priority")
+
+
+def session_key() -> Optional[bytes]:
+    """Chave AES-256 do store (None sem ETL_SESSION_KEY/ETL_MASTER_KEY ou sem cryptography)"""
+    segredo = os.getenv("ETL_SESSION_KEY") or os.getenv("ETL_MASTER_KEY")
+    if not segredo:
+        return None
+    try:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    except ImportError:
+        return None
+    try:
+        material = base64.b64decode(segredo, validate=True)
+    except ValueError:
+        material = segredo.encode("utf-8")
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=SESSION_INFO).derive(material)
+
+
+class SessionStore:
+    """
+    Cookies por portal, cifrados em disco.
+
+    Args:
+        directory: Pasta dos arquivos <portal>.session
+        key: Chave AES-256 (session_key())
+        max_age: Idade maxima em segundos de uma sessao salva
+    """
+
+    def __init__(self, directory: str, key: bytes, max_age: float = 12 * 3600):
+        self.directory = directory
+        self.max_age = max_age
+        self._key = key
+
+    def path(self, portal: str) -> str:
+        return os.path.join(self.directory, f"{portal.lower()}.session")
+
+    def save(self, portal: str, cookies: List[dict]):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        payload = json.dumps({"portal": portal, "saved_at": time.time(), "cookies": cookies}).encode("utf-8")
+        nonce = os.urandom(NONCE_LENGTH)
+        dados = nonce + AESGCM(self._key).encrypt(nonce, payload, SESSION_INFO + portal.lower().encode())
+
+        os.makedirs(self.directory, exist_ok=True)
+        caminho = self.path(portal)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+
+    def load(self, portal: str) -> Optional[List[dict]]:
+        """
+        Cookies ainda nao expirados da sessao salva.
+
+        Returns:
+            Lista de cookies, ou None (sem arquivo, velho demais, chave
+            diferente, arquivo corrompido, todos os cookies expirados)
+        """
+        from cryptography.exceptions import InvalidTag
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        try:
+            with open(self.path(portal), "rb") as f:
+                dados = f.read()
+            payload = json.loads(AESGCM(self._key).decrypt(
+                dados[:NONCE_LENGTH], dados[NONCE_LENGTH:], SESSION_INFO + portal.lower().encode()
+            ))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, InvalidTag) as e:
+            logger.info(f"Sessao salva de {portal} ilegivel ({type(e).__name__}); descartando")
+            self.discard(portal)
+            return None
+
+        agora = time.time()
+        if agora - float(payload.get("saved_at", 0)) > self.max_age:
+            self.discard(portal)
+            return None
+        # expires <= 0: cookie de sessao do navegador (vale ate o servidor dizer que nao)
+        cookies = [c for c in payload.get("cookies", []) if not (0 < c.get("expires", -1) < agora)]
+        return cookies or None
+
+    def discard(self, portal: str):
+        try:
+            os.unlink(self.path(portal))
+        except FileNotFoundError:
+            pass
+
+
+_store: Optional[SessionStore] = None
+_store_loaded = False
+
+
+def get_store() -> Optional[SessionStore]:
+    """Store do processo (None se desligado ou sem chave)"""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store_loaded = True
+        if os.getenv("ETL_SESSIONS", "true").lower() in ("0", "false", "no"):
+            return None
+        key = session_key()
+        if key is None:
+            logger.info("Sessoes persistidas desligadas: sem ETL_SESSION_KEY/ETL_MASTER_KEY")
+            return None
+        directory = os.getenv(
+            "ETL_SESSION_DIR",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "sessions"),
+        )
+        max_age = float(os.getenv("ETL_SESSION_MAX_AGE_HOURS", "12")) * 3600
+        _store = SessionStore(directory, key, max_age)
+    return _store
+
+
+def configure(store: Optional[SessionStore]):
+    """Troca o store do processo (testes, ou None para desligar)"""
+    global _store, _store_loaded
+    _store, _store_loaded = store, True
+
+
+def save_session(driver, portal: str) -> bool:
+    """Salva os cookies do navegador logado (no-op sem store)"""
+    store = get_store()
+    if store is None:
+        return False
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        store.save(portal, [{k: c[k] for k in _COOKIE_PARAMS if k in c} for c in cookies])
+        logger.info(f"Sessao de {portal} salva ({len(cookies)} cookies)")
+        return True
+    except Exception as e:
+        logger.warning(f"Nao foi possivel salvar a sessao de {portal}: {e}")
+        return False
+
+
+def restore_session(driver, portal: str, url: str, logged_in: Callable[[object], bool]) -> bool:
+    """
+    Recoloca a sessao salva e confere se ainda vale.
+
+    Args:
+        url: Pagina da area logada aberta para a checagem
+        logged_in: Checagem barata do modulo (ex.: elemento so da area logada)
+
+    Returns:
+        True se o login pode ser pulado. False = fazer o login completo (a
+        sessao invalida ja foi descartada e os cookies limpos)
+    """
+    store = get_store()
+    cookies = store.load(portal) if store is not None else None
+    if not cookies:
+        return False
+
+    inicio = time.monotonic()
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        driver.get(url)
+        if logged_in(driver):
+            logger.info(f"Sessao salva de {portal} valida: login pulado ({time.monotonic() - inicio:.1f}s)")
+            return True
+    except Exception as e:
+        logger.info(f"Sessao salva de {portal} falhou na checagem: {e}")
+
+    logger.info(f"Sessao salva de {portal} expirada; login completo")
+    store.discard(portal)
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except Exception:
+        pass
+    return False
+
+
+def discard_session(portal: str):
+    """Apaga a sessao salva (ex.: apos erro de autorizacao no meio do fluxo)"""
+    store = get_store()
+    if store is not None:
+        store.discard(portal)
@@ -0,0 +1,104 @@
+"""
+Spans de tempo por etapa (protocolo de log)
+
+Formato da linha, emitida ao fechar o span:
+    [SPAN] [sistema] <caminho> <ms>ms [erro]
+
+O caminho junta os spans abertos com ';' a partir do step (raiz), ex.:
+    [SPAN] [maps] maps;login 812.4ms
+    [SPAN] [maps] maps;exportar_ativos;wait_for_downloads 1520.0ms
+
+O backend soma os spans de cada caminho e monta a arvore de tempos do job
+(total, tempo proprio, contagem e erros por etapa).
+
+Uso nos modulos:
+    with span("login"):
+        ...
+
+    @span("read_excel")
+    def ler_planilha(...):
+        ...
+
+A raiz e aberta pelo step_scheduler (step_span) em cada step. Spans abertos
+em threads auxiliares (sem span pai na thread) ficam sob o step do processo.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+SPAN_LEVEL = "SPAN"
+
+# Sistema dos spans abertos fora de qualquer step
+DEFAULT_SISTEMA = "etl"
+
+_local = threading.local()
+
+# (nome, sistema) do step em execucao neste processo
+_raiz: Optional[Tuple[str, str]] = None
+
+
+def _stack() -> List[Tuple[str, str]]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _clean(nome) -> str:
+    """Nome sem espacos nem ';' (separador do caminho)"""
+    return re.sub(r"[\s;]+", "_", str(nome).strip()) or "span"
+
+
+def emit(sistema: str, caminho: str, seconds: float, ok: bool = True):
+    """Escreve a linha SPAN no stdout"""
+    sufixo = "" if ok else " erro"
+    print(f"[{SPAN_LEVEL}] [{sistema}] {caminho} {seconds * 1000:.1f}ms{sufixo}", flush=True)
+
+
+@contextmanager
+def span(nome: str, sistema: Optional[str] = None):
+    """
+    Mede o bloco (ou a funcao, usado como decorator) e emite um SPAN.
+
+    Args:
+        nome: Nome da etapa (login, wait_for_downloads...)
+        sistema: Sistema da linha; padrao: o do span pai ou do step
+    """
+    stack = _stack()
+    # Thread auxiliar do step (sem span pai): pendura no step
+    virtual = not stack and _raiz is not None and sistema is None
+    if virtual:
+        stack.append(_raiz)
+    if sistema is None:
+        sistema = stack[-1][1] if stack else DEFAULT_SISTEMA
+
+    stack.append((_clean(nome), sistema))
+    caminho = ";".join(n for n, _ in stack)
+    ok = True
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ok = False
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        if virtual:
+            stack.pop()
+        emit(sistema, caminho, elapsed, ok)
+
+
+@contextmanager
+def step_span(nome: str):
+    """Span raiz de um step (usado pelo step_scheduler)"""
+    global _raiz
+    anterior = _raiz
+    _raiz = (_clean(nome), nome)
+    try:
+        with span(nome, sistema=nome):
+            yield
+    finally:
+        _raiz = anterior
@@ -0,0 +1,81 @@
+"""
+Pasta de staging de um shard
+
+Shards irmaos de um periodo dividido (backend, shard_days) rodam em paralelo
+em slots diferentes. Os modulos detectam downloads pelo que surge na pasta
+de saida, entao cada shard baixa numa pasta propria (--staging-dir):
+
+    stage_paths()  troca as pastas de saida de credentials["paths"] por
+                   <staging>/<chave>
+    promote()      ao final do shard, move os arquivos prontos para as
+                   pastas configuradas (mesma estrutura de subpastas)
+
+Arquivos parciais de download ficam para tras e sao apagados com o staging.
+"""
+import os
+import shutil
+from typing import Dict, Iterable, List, Tuple
+
+# Downloads incompletos (mesmos sufixos de ledger.new_files)
+_PARCIAIS = (".crdownload", ".part", ".tmp")
+
+
+def stage_paths(paths: dict, keys: Iterable[str], staging_dir: str) -> dict:
+    """Copia de `paths` com cada chave de saida apontando para <staging_dir>/<chave>"""
+    staged = dict(paths)
+    for key in keys:
+        pasta = os.path.join(os.path.abspath(staging_dir), key)
+        os.makedirs(pasta, exist_ok=True)
+        staged[key] = pasta
+    return staged
+
+
+def _move(origem: str, destino: str):
+    """Move sobrescrevendo; entre discos diferentes copia e apaga"""
+    try:
+        os.replace(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+        os.remove(origem)
+
+
+def _move_tree(origem: str, destino: str, movidos: Dict[str, str], erros: List[str]):
+    for nome in sorted(os.listdir(origem)):
+        src, dst = os.path.join(origem, nome), os.path.join(destino, nome)
+        if os.path.isdir(src):
+            _move_tree(src, dst, movidos, erros)
+            continue
+        if nome.endswith(_PARCIAIS):
+            continue
+        try:
+            os.makedirs(destino, exist_ok=True)
+            _move(src, dst)
+            movidos[src] = dst
+        except OSError as e:
+            erros.append(f"{src}: {e}")
+
+
+def promote(staged: dict, final: dict, keys: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Move os arquivos de cada pasta de staging para a pasta configurada.
+
+    Returns:
+        ({origem: destino} dos arquivos movidos, erros)
+    """
+    movidos: Dict[str, str] = {}
+    erros: List[str] = []
+    for key in keys:
+        origem, destino = staged.get(key), final.get(key)
+        if not origem or not os.path.isdir(origem):
+            continue
+        if not destino:
+            if os.listdir(origem):
+                erros.append(f"{key}: pasta de saida nao configurada, arquivos ficam em {origem}")
+            continue
+        _move_tree(origem, os.path.abspath(destino), movidos, erros)
+    return movidos, erros
+
+
+def discard(staging_dir: str):
+    """Apaga o staging (chamado quando tudo foi movido)"""
+    shutil.rmtree(staging_dir, ignore_errors=True)
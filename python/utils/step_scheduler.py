@@ -0,0 +1,266 @@
+"""
+Scheduler de steps do pipeline
+
+Cada sistema e um Step declarado em main.py: nome, funcao de entrada,
+dependencias e classe de recurso (browser, cpu, io). run_steps() executa os
+steps em processos separados respeitando:
+- dependencias: o step so inicia depois que as dependencias terminaram
+  (ordem apenas - falha de uma dependencia nao bloqueia, como no loop
+  sequencial antigo)
+- limite por classe de recurso (ex.: no maximo N navegadores simultaneos)
+- pastas de saida: steps que baixam no mesmo diretorio nao rodam juntos (os
+  modulos detectam downloads pelo que surge na pasta); main.py preenche
+  Step.folders com os diretorios ja normalizados, nao com as chaves
+- limite total de workers
+
+Steps independentes rodam em paralelo, entao o tempo total tende ao do
+sistema mais lento em vez da soma de todos.
+
+Este modulo e importado no inicio de todo job: multiprocessing so e carregado
+quando run_steps() realmente precisa de workers (ver -X importtime).
+"""
+import time
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+RESOURCE_CLASSES = ("browser", "cpu", "io")
+
+
+class Step(NamedTuple):
+    """Step declarativo do pipeline (imutavel; folders comparadas por igualdade)"""
+    name: str
+    entry: Callable[..., bool]
+    deps: Tuple[str, ...] = ()
+    resource: str = "browser"
+    folders: Tuple[str, ...] = ()
+
+
+def plan(registry: Dict[str, Step], selected: Sequence[str]) -> List[Step]:
+    """
+    Ordena os steps selecionados respeitando dependencias.
+
+    Dependencias fora da selecao sao ignoradas. A ordem da selecao e mantida
+    entre steps independentes.
+
+    Raises:
+        ValueError: step desconhecido, classe de recurso invalida ou ciclo
+    """
+    names = list(dict.fromkeys(selected))
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise ValueError(f"Step(s) desconhecido(s): {', '.join(unknown)}")
+
+    for name in names:
+        if registry[name].resource not in RESOURCE_CLASSES:
+            raise ValueError(f"Classe de recurso invalida para {name}: {registry[name].resource}")
+
+    ordered: List[Step] = []
+    done = set()
+    remaining = names[:]
+    while remaining:
+        ready = [
+            name for name in remaining
+            if all(dep in done or dep not in names for dep in registry[name].deps)
+        ]
+        if not ready:
+            raise ValueError(f"Dependencia circular entre: {', '.join(remaining)}")
+        for name in ready:
+            ordered.append(registry[name])
+            done.add(name)
+            remaining.remove(name)
+    return ordered
+
+
+def waves(steps: Sequence[Step]) -> List[List[str]]:
+    """Agrupa steps em ondas que podem rodar juntas (para dry-run/log)"""
+    names = {step.name for step in steps}
+    level: Dict[str, int] = {}
+    for step in steps:
+        deps = [level[dep] for dep in step.deps if dep in names]
+        level[step.name] = max(deps) + 1 if deps else 0
+
+    grouped: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for step in steps:
+        grouped[level[step.name]].append(step.name)
+    return grouped
+
+
+def _call_entry(entry: Callable[..., bool], args: tuple, name: Optional[str] = None) -> bool:
+    """
+    Executa o step; sys.exit() dentro do modulo conta como resultado.
+
+    Com `name`, o step inteiro vira o span raiz dos spans do modulo e o
+    resumo dos waits do step (wait_stats) e escrito no log ao final.
+    """
+    if name is None:
+        try:
+            return bool(entry(*args))
+        except SystemExit as e:
+            return e.code in (0, None)
+
+    from spans import step_span
+    import wait_stats
+    wait_stats.reset()
+    try:
+        with step_span(name):
+            return _call_entry(entry, args)
+    finally:
+        wait_stats.report(name)
+
+
+def _collect(collect: Optional[Callable[[], Dict[str, int]]]) -> Dict[str, int]:
+    if collect is None:
+        return {}
+    try:
+        return dict(collect())
+    except Exception:
+        return {}
+
+
+def _worker(name, entry, args, initializer, initargs, conn, collect=None):
+    """Processo worker: roda um step e envia (resultado, contadores) pelo pipe"""
+    ok = False
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        ok = _call_entry(entry, args, name)
+    except Exception as e:
+        print(f"[ERROR] [{name.upper()}] Erro: {e}", flush=True)
+    finally:
+        conn.send((ok, _collect(collect)))
+        conn.close()
+
+
+def run_sequential(
+    steps: Sequence[Step],
+    args: tuple = (),
+    on_start: Optional[Callable[[Step], None]] = None,
+    on_finish: Optional[Callable[[Step, bool, float], None]] = None,
+    collect: Optional[Callable[[], Dict[str, int]]] = None,
+    counters: Optional[Counter] = None,
+) -> Dict[str, bool]:
+    """Executa os steps em ordem no processo atual"""
+    results: Dict[str, bool] = {}
+    for step in steps:
+        if on_start:
+            on_start(step)
+        started = time.monotonic()
+        try:
+            ok = _call_entry(step.entry, args, step.name)
+        except Exception as e:
+            print(f"[ERROR] [{step.name.upper()}] Erro: {e}", flush=True)
+            ok = False
+        results[step.name] = ok
+        if on_finish:
+            on_finish(step, ok, time.monotonic() - started)
+    # Mesmo processo para todos os steps: contadores ja sao o total
+    if counters is not None:
+        counters.update(_collect(collect))
+    return results
+
+
+def run_steps(
+    steps: Sequence[Step],
+    args: tuple = (),
+    max_workers: Optional[int] = None,
+    limits: Optional[Dict[str, int]] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    on_start: Optional[Callable[[Step], None]] = None,
+    on_finish: Optional[Callable[[Step, bool, float], None]] = None,
+    collect: Optional[Callable[[], Dict[str, int]]] = None,
+    counters: Optional[Counter] = None,
+) -> Dict[str, bool]:
+    """
+    Executa os steps em processos worker (um processo por step).
+
+    Args:
+        steps: Steps ja ordenados por plan()
+        args: Argumentos passados para cada entry (precisam ser picklable)
+        max_workers: Maximo de steps simultaneos (padrao: todos)
+        limits: Maximo simultaneo por classe de recurso, ex. {"browser": 3}
+        initializer: Chamado em cada worker antes do step (ex.: checkpoint)
+        on_start/on_finish: Callbacks no processo principal
+        collect: Chamado no processo do step ao final; devolve contadores
+            (ex.: unidades puladas pelo ledger) - precisa ser picklable
+        counters: Recebe a soma dos contadores de todos os steps
+
+    Returns:
+        {nome_do_step: sucesso}
+    """
+    max_workers = max_workers or len(steps) or 1
+    if max_workers <= 1 or len(steps) <= 1:
+        # Processo atual ja esta configurado: initializer nao e necessario
+        return run_sequential(steps, args, on_start, on_finish, collect, counters)
+
+    import multiprocessing
+    from multiprocessing.connection import wait
+
+    limits = limits or {}
+    ctx = multiprocessing.get_context("spawn")
+    names = {step.name for step in steps}
+
+    pending = list(steps)
+    running = {}
+    active = Counter()
+    busy_folders = set()
+    finished = set()
+    results: Dict[str, bool] = {}
+
+    while pending or running:
+        for step in list(pending):
+            if len(running) >= max_workers:
+                break
+            if any(dep in names and dep not in finished for dep in step.deps):
+                continue
+            if active[step.resource] >= limits.get(step.resource, max_workers):
+                continue
+            if busy_folders.intersection(step.folders):
+                continue
+
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=_worker,
+                args=(step.name, step.entry, args, initializer, initargs, send_conn, collect),
+                name=f"step-{step.name}",
+            )
+            process.start()
+            send_conn.close()
+
+            running[process.sentinel] = (step, process, recv_conn, time.monotonic())
+            active[step.resource] += 1
+            busy_folders.update(step.folders)
+            pending.remove(step)
+            if on_start:
+                on_start(step)
+
+        if not running:
+            # Nada pode iniciar (limite de recurso 0): evita loop infinito
+            for step in pending:
+                results[step.name] = False
+            break
+
+        for sentinel in wait(list(running)):
+            step, process, recv_conn, started = running.pop(sentinel)
+            process.join()
+
+            ok, counts = False, {}
+            try:
+                if recv_conn.poll():
+                    ok, counts = recv_conn.recv()
+                    ok = bool(ok)
+            except (EOFError, OSError, TypeError, ValueError):
+                ok = False
+            finally:
+                recv_conn.close()
+
+            results[step.name] = ok
+            if counters is not None:
+                counters.update(counts)
+            finished.add(step.name)
+            active[step.resource] -= 1
+            busy_folders.difference_update(step.folders)
+            if on_finish:
+                on_finish(step, ok, time.monotonic() - started)
+
+    return results
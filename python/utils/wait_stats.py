@@ -0,0 +1,90 @@
+"""
+Contagem das esperas do toolkit de waits (base_driver)
+
+Cada wait condicional registra quanto esperou de fato e quanto o time.sleep
+fixo que ele substituiu teria esperado (`replaces`). Pausas fixas que
+continuam no codigo (pause) tambem sao contadas. Ao fim de cada step o
+step_scheduler escreve o resumo:
+
+    [INFO] [fidc] Waits: 184 condicoes em 21.4s (substituem 412.0s de sleep fixo: -390.6s), 3 pausas fixas (3.0s)
+
+Contadores por processo (cada step roda no proprio worker).
+"""
+import threading
+from typing import Dict
+
+_lock = threading.Lock()
+_kinds: Dict[str, Dict[str, float]] = {}
+_pauses = {"count": 0, "seconds": 0.0}
+
+
+def record(kind: str, waited: float, replaces: float = 0.0, ok: bool = True):
+    """
+    Registra um wait condicional.
+
+    Args:
+        kind: Tipo do wait (element, clickable, network_idle...)
+        waited: Segundos efetivamente esperados
+        replaces: Segundos do sleep fixo que o wait substituiu
+        ok: False quando terminou por timeout
+    """
+    with _lock:
+        stats = _kinds.setdefault(kind, {"count": 0, "waited": 0.0, "replaced": 0.0, "timeouts": 0})
+        stats["count"] += 1
+        stats["waited"] += waited
+        stats["replaced"] += replaces
+        if not ok:
+            stats["timeouts"] += 1
+
+
+def record_pause(seconds: float):
+    """Registra uma pausa fixa que continua no codigo"""
+    with _lock:
+        _pauses["count"] += 1
+        _pauses["seconds"] += seconds
+
+
+def summary() -> dict:
+    """
+    Totais desde o ultimo reset().
+
+    Returns:
+        {"waits", "waited", "replaced", "saved", "timeouts", "pauses",
+         "paused", "kinds": {kind: {...}}}
+    """
+    with _lock:
+        kinds = {kind: dict(stats) for kind, stats in _kinds.items()}
+        pauses = dict(_pauses)
+    waited = sum(s["waited"] for s in kinds.values())
+    replaced = sum(s["replaced"] for s in kinds.values())
+    return {
+        "waits": int(sum(s["count"] for s in kinds.values())),
+        "waited": waited,
+        "replaced": replaced,
+        "saved": replaced - waited,
+        "timeouts": int(sum(s["timeouts"] for s in kinds.values())),
+        "pauses": pauses["count"],
+        "paused": pauses["seconds"],
+        "kinds": kinds,
+    }
+
+
+def reset():
+    with _lock:
+        _kinds.clear()
+        _pauses["count"] = 0
+        _pauses["seconds"] = 0.0
+
+
+def report(sistema: str):
+    """Escreve o resumo no log (nada quando o step nao usou o toolkit)"""
+    stats = summary()
+    if not stats["waits"] and not stats["pauses"]:
+        return
+    timeouts = f", {stats['timeouts']} timeouts" if stats["timeouts"] else ""
+    print(
+        f"[INFO] [{sistema}] Waits: {stats['waits']} condicoes em {stats['waited']:.1f}s "
+        f"(substituem {stats['replaced']:.1f}s de sleep fixo: {-stats['saved']:+.1f}s){timeouts}, "
+        f"{stats['pauses']} pausas fixas ({stats['paused']:.1f}s)",
+        flush=True,
+    )
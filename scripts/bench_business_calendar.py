@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: business-day helpers, legacy day-by-day walks vs the shared
+precomputed calendar (python/utils/business_calendar.py).
+
+Legacy implementations are reproduced from the modules before the change:
+
+- previous:  amplis_functions.get_previous_working_day_sp (builds
+             holidays.Brazil(state='SP') and walks back day by day)
+- range:     the AMPLIS/FIDC loops (build holidays.Brazil() and test every
+             calendar day of the period)
+- count:     FIDC total_unidades (a second walk over the same period)
+
+Each operation runs --calls times with varying dates, as it happens when the
+helpers are called inside per-fund/per-date loops. Without the `holidays`
+package both sides use weekends only (the legacy side then only measures the
+walk, not the calendar construction).
+
+Usage:
+    python scripts/bench_business_calendar.py [--calls 2000] [--days 365]
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+
+from business_calendar import get_calendar  # noqa: E402
+
+try:
+    import holidays
+except ImportError:
+    holidays = None
+
+
+def _legacy_calendar(state=None):
+    if holidays is None:
+        return set()
+    return holidays.Brazil(state=state) if state else holidays.Brazil()
+
+
+def legacy_previous(today, days_before=2):
+    br_holidays = _legacy_calendar("SP")
+    current_date = today
+    while days_before > 0:
+        current_date -= timedelta(days=1)
+        if current_date.weekday() < 5 and current_date not in br_holidays:
+            days_before -= 1
+    return current_date
+
+
+def legacy_range(start, end):
+    br_holidays = _legacy_calendar()
+    return [
+        start + timedelta(days=i)
+        for i in range((end - start).days + 1)
+        if (start + timedelta(days=i)).weekday() < 5
+        and (start + timedelta(days=i)) not in br_holidays
+    ]
+
+
+def legacy_count(start, end):
+    br_holidays = _legacy_calendar("SP")
+    return sum(
+        1 for i in range((end - start).days + 1)
+        if (start + timedelta(days=i)).weekday() < 5
+        and (start + timedelta(days=i)).strftime('%Y-%m-%d') not in br_holidays
+    )
+
+
+def timed(fn, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365, help="Period length for range/count")
+    args = parser.parse_args()
+
+    base = date.today() - timedelta(days=2 * 365)
+    period = timedelta(days=args.days)
+
+    # Montagem das tabelas: paga uma vez por processo
+    started = time.perf_counter()
+    sp = get_calendar("SP")
+    build_ms = (time.perf_counter() - started) * 1000
+    nacional = get_calendar(None)
+
+    cases = [
+        ("previous (D-2)",
+         lambda i: legacy_previous(base + timedelta(days=i % 700)),
+         lambda i: sp.previous_business_day(base + timedelta(days=i % 700), 2)),
+        (f"range ({args.days} days)",
+         lambda i: legacy_range(base + timedelta(days=i % 300), base + timedelta(days=i % 300) + period),
+         lambda i: nacional.range(base + timedelta(days=i % 300), base + timedelta(days=i % 300) + period)),
+        (f"count ({args.days} days)",
+         lambda i: legacy_count(base + timedelta(days=i % 300), base + timedelta(days=i % 300) + period),
+         lambda i: sp.business_days_between(base + timedelta(days=i % 300), base + timedelta(days=i % 300) + period)),
+    ]
+
+    # Mesmos resultados antes de medir
+    for i in (0, 17, 250):
+        for _, legacy, new in cases:
+            assert legacy(i) == new(i), f"divergence at call {i}"
+
+    print(f"holidays package:          {'yes' if holidays else 'no (weekends only)'}")
+    print(f"Calls per operation:       {args.calls}")
+    print(f"Shared calendar build:     {build_ms:8.1f} ms (once per process)")
+    print(f"{'operation':<26}{'legacy us':>12}{'shared us':>12}{'speedup':>10}")
+    for name, legacy, new in cases:
+        legacy_us = timed(legacy, args.calls)
+        new_us = timed(new, args.calls)
+        print(f"{name:<26}{legacy_us:12.1f}{new_us:12.1f}{legacy_us / new_us:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: navigation latency, stock Chrome vs the lean profile of base_driver.
+
+Serves a local test page shaped like the portals (DOM plus --images images,
+web fonts and an analytics script, every asset delayed by --latency-ms) and
+times driver.get() and "element present" for each profile:
+
+- stock:  headless Chrome with the default page load strategy ("normal")
+- lean:   lean_options() (eager page load, no background networking) and
+          block_resources() (images, fonts, media, analytics blocked via CDP)
+
+The browser cache is disabled so every navigation refetches the assets.
+Requires Chrome/Chromium and chromedriver on the PATH (or --binary).
+
+Usage:
+    python scripts/bench_chrome_profile.py [--runs 10] [--images 40] [--latency-ms 150]
+"""
+import argparse
+import statistics
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+sys.path.insert(0, str(ROOT / "python" / "modules"))
+
+from selenium import webdriver  # noqa: E402
+from selenium.webdriver.chrome.options import Options  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+
+import base_driver  # noqa: E402
+
+
+def png_1x1() -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"\0" * 5)) + chunk(b"IEND", b"")
+
+
+PNG = png_1x1()
+
+
+def make_handler(images: int, latency: float):
+    page = (
+        "<html><head><style>@font-face{font-family:p;src:url(/font/p.woff2)}body{font-family:p}</style>"
+        "<script async src='/collect/analytics.js'></script></head><body>"
+        "<div id='gridQuery'>Carteira</div>"
+        + "".join(f"<img src='/img/{i}.png' width='16' height='16'>" for i in range(images))
+        + "</body></html>"
+    ).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/":
+                body, kind = page, "text/html"
+            else:
+                time.sleep(latency)
+                if self.path.startswith("/img/"):
+                    body, kind = PNG, "image/png"
+                elif self.path.startswith("/font/"):
+                    body, kind = b"\0" * 20000, "font/woff2"
+                else:
+                    body, kind = b"void 0;", "application/javascript"
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def open_driver(lean: bool, binary: str = None) -> webdriver.Chrome:
+    options = Options()
+    if binary:
+        options.binary_location = binary
+    for argument in ("--headless=new", "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage"):
+        options.add_argument(argument)
+    if lean:
+        base_driver.lean_options(options)
+    driver = webdriver.Chrome(options=options)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+    if lean:
+        base_driver.block_resources(driver, base_driver.blocked_url_patterns() + ["*/collect/*"])
+    return driver
+
+
+def measure(driver, url: str, runs: int):
+    navigation, ready = [], []
+    for _ in range(runs):
+        driver.get("about:blank")
+        start = time.perf_counter()
+        driver.get(url)
+        navigation.append(time.perf_counter() - start)
+        driver.find_element(By.ID, "gridQuery")
+        ready.append(time.perf_counter() - start)
+    return navigation, ready
+
+
+def summary(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"median {statistics.median(ordered) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Delay of every image/font/script")
+    parser.add_argument("--binary", help="Chrome executable (default: chromedriver's choice)")
+    args = parser.parse_args()
+
+    base_driver.LEAN_PROFILE = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.images, args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print(f"Page: {args.images} images + font + analytics, {args.latency_ms:.0f} ms per asset, {args.runs} runs")
+    try:
+        for name, lean in (("stock", False), ("lean", True)):
+            driver = open_driver(lean, args.binary)
+            try:
+                navigation, ready = measure(driver, url, args.runs)
+            finally:
+                driver.quit()
+            print(f"{name:6s} driver.get   {summary(navigation)}")
+            print(f"{name:6s} element      {summary(ready)}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
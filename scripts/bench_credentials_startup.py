@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: python/main.py startup with and without the derived-key handoff.
+
+Creates a temporary encrypted credentials file, then runs
+`main.py --dry-run` (which loads and decrypts credentials and exits):
+
+- kdf:     child derives the key from ETL_MASTER_KEY (PBKDF2, 600k iterations)
+- handoff: backend derives once, child receives the key via --key-fd
+
+Usage:
+    python scripts/bench_credentials_startup.py [--runs 5]
+"""
+import argparse
+import base64
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from services.crypto import CryptoService  # noqa: E402
+from services import key_handoff  # noqa: E402
+
+MAIN = ROOT / "python" / "main.py"
+
+
+def run_child(config_path: str, env: dict, data_key=None) -> float:
+    cmd = [sys.executable, str(MAIN), "--config", config_path, "--dry-run"]
+    kwargs = {}
+    key_fd = None
+    if data_key is not None:
+        key_fd = key_handoff.open_key_pipe(key_handoff.build_payload(*data_key))
+        kwargs, key_arg = key_handoff.inherit_kwargs(key_fd)
+        cmd += ["--key-fd", str(key_arg)]
+
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, env=env, capture_output=True, text=True, **kwargs)
+    finally:
+        if key_fd is not None:
+            os.close(key_fd)
+    elapsed = time.perf_counter() - started
+
+    if result.returncode != 0 or "formato criptografado" not in result.stdout:
+        raise RuntimeError(f"main.py failed:\n{result.stdout}\n{result.stderr}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    master_key = base64.b64encode(secrets.token_bytes(32)).decode("ascii")
+    crypto = CryptoService(master_key)
+    encrypted = crypto.encrypt_credentials({
+        "version": "2.0",
+        "maps": {"url": "https://example", "username": "user", "password": "secret"},
+        "paths": {},
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "credentials.encrypted.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(encrypted, f)
+
+        t0 = time.perf_counter()
+        data_key = CryptoService(master_key).data_key_for(encrypted)
+        backend_kdf = time.perf_counter() - t0
+
+        env_kdf = dict(os.environ, ETL_MASTER_KEY=master_key)
+        env_handoff = {k: v for k, v in os.environ.items() if k != "ETL_MASTER_KEY"}
+
+        kdf = [run_child(config_path, env_kdf) for _ in range(args.runs)]
+        handoff = [run_child(config_path, env_handoff, data_key) for _ in range(args.runs)]
+
+    kdf_ms = statistics.median(kdf) * 1000
+    handoff_ms = statistics.median(handoff) * 1000
+
+    print(f"Runs per mode:             {args.runs}")
+    print(f"Backend KDF (once):        {backend_kdf * 1000:8.1f} ms")
+    print(f"Child startup, KDF:        {kdf_ms:8.1f} ms (median)")
+    print(f"Child startup, handoff:    {handoff_ms:8.1f} ms (median)")
+    print(f"Saved per job:             {kdf_ms - handoff_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: folder cleanup, legacy sequential loop vs python/utils/folder_cleanup.
+
+Creates --files files in a temporary folder and empties it with:
+
+- legacy:    os.listdir + os.unlink one by one (clear_folders before)
+- parallel:  clean_folder with --workers threads
+- trash:     clean_folder(trash=True) (rename + recreate; purge not timed)
+
+Local disks hide the cost of each delete; --latency-ms adds a sleep to every
+unlink to approximate a round trip to a network share.
+
+Usage:
+    python scripts/bench_folder_cleanup.py [--files 2000] [--workers 8] [--latency-ms 2]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "utils"))
+
+import folder_cleanup  # noqa: E402
+
+
+def populate(folder: str, files: int):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(folder, f"carteira_{i:05d}.pdf"), "wb") as f:
+            f.write(b"%PDF")
+
+
+def legacy_clear(folder: str):
+    for item in os.listdir(folder):
+        item_path = os.path.join(folder, item)
+        if os.path.isfile(item_path):
+            os.unlink(item_path)
+        elif os.path.isdir(item_path):
+            shutil.rmtree(item_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=folder_cleanup.DEFAULT_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per unlink")
+    args = parser.parse_args()
+
+    real_unlink = os.unlink
+
+    def slow_unlink(path, *a, **kw):
+        time.sleep(args.latency_ms / 1000)
+        return real_unlink(path, *a, **kw)
+
+    modes = [
+        ("legacy", lambda folder: legacy_clear(folder)),
+        ("parallel", lambda folder: folder_cleanup.clean_folder(folder, workers=args.workers)),
+        ("trash", lambda folder: folder_cleanup.clean_folder(folder, trash=True)),
+    ]
+
+    print(f"Files: {args.files}  workers: {args.workers}  latency per unlink: {args.latency_ms} ms")
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(folder_cleanup, "purge_trash"):  # purge da lixeira fora da medicao
+        for name, run in modes:
+            folder = os.path.join(tmp, name)
+            populate(folder, args.files)
+            with patch("os.unlink", slow_unlink):
+                started = time.perf_counter()
+                run(folder)
+                elapsed = time.perf_counter() - started
+            assert not os.listdir(folder)
+            print(f"{name:<10}{elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
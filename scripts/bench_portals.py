@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: every main.py step against the offline portal simulators.
+
+Starts the mock portals (scripts/mock_portals), writes a throwaway
+credentials.json pointing at them and runs, for each sistema, a fresh
+
+    python python/main.py --sistemas <sistema> --sequencial --force ...
+
+in its own process group (Chrome headless via ETL_CHROME_HEADLESS, portal
+sessions off, ledger/checkpoints and every download folder in a temporary
+directory). Per run it records the wall time, the exit code, how many
+downloads the portal served and how many files the step left on disk. The
+process group is always killed at the end, so a step that never quits its
+driver (or hangs until --timeout) does not leak Chrome into the next run.
+
+A baseline can be recorded and later compared against:
+
+    python scripts/bench_portals.py --record bench_portals.json
+    python scripts/bench_portals.py --compare bench_portals.json
+
+--serve only starts the portals and prints their URLs (run a module by hand
+against them, with a visible Chrome, to debug a flow).
+
+Requires Chrome/Chromium and chromedriver on the PATH.
+
+Usage:
+    python scripts/bench_portals.py [--sistemas fidc britech ...] [--runs 3]
+                                    [--latency-ms 50] [--work-ms 500] [--timeout 600]
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN = ROOT / "python" / "main.py"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_portals import PORTALS, PortalServer  # noqa: E402
+from mock_portals.files import xlsx  # noqa: E402
+
+# sistema (main.py STEPS) -> portals it talks to
+SISTEMAS = {
+    "amplis_reag": ("amplis_reag", "amplis_master"),
+    "amplis_master": ("amplis_master",),
+    "maps": ("maps",),
+    "fidc": ("fidc",),
+    "jcot": ("jcot",),
+    "britech": ("britech",),
+    "qore": ("qore",),
+}
+
+PATH_KEYS = ("csv", "pdf", "maps", "fidc", "jcot", "britech", "qore_excel", "qore_pdf", "selenium_temp", "trustee")
+
+IS_WINDOWS = os.name == "nt"
+
+
+def start_portals(names, latency: float, work: float, reference) -> Dict[str, PortalServer]:
+    servers = {}
+    for name in names:
+        kwargs = {"latency": latency, "work": work}
+        if name == "qore":
+            kwargs["reference"] = reference
+        servers[name] = PortalServer(PORTALS[name](**kwargs)).start()
+    return servers
+
+
+def write_inputs(workdir: Path, servers: Dict[str, PortalServer]):
+    """credentials.json (plaintext, format 2.0) and the QORE BD.xlsx"""
+    out = workdir / "out"
+    paths = {key: str(out / key) for key in PATH_KEYS}
+    for folder in paths.values():
+        os.makedirs(folder, exist_ok=True)
+
+    qore = servers.get("qore")
+    siglas = qore.portal.funds if qore else []
+    paths["bd_xlsx"] = str(workdir / "BD.xlsx")
+    linhas = [["ID", "Apelido", "Caminho", "", "", "", "", "", "", "Sistema"]]
+    linhas += [[n, f"FIP {sigla}", f"Fundos/{sigla}", "", "", "", "", "", "", "QORE"] for n, sigla in enumerate(siglas, 1)]
+    Path(paths["bd_xlsx"]).write_bytes(xlsx(linhas, sheet="BD"))
+
+    def url(name, path="/"):
+        return servers[name].url + path if name in servers else ""
+
+    def acesso(name, path="/"):
+        return {"url": url(name, path), "username": "bench", "password": "bench"}
+
+    def fundos(name):
+        return list(servers[name].portal.funds) if name in servers else []
+
+    credentials = {
+        "version": "2.0",
+        "amplis": {"reag": acesso("amplis_reag"), "master": acesso("amplis_master")},
+        "maps": {**acesso("maps"), "fundos": fundos("maps"), "usar_todos": False, "fundos_selecionados": fundos("maps")},
+        "fidc": {**acesso("fidc"), "fundos": fundos("fidc"), "usar_todos": False, "fundos_selecionados": fundos("fidc")},
+        "jcot": acesso("jcot"),
+        "britech": acesso("britech"),
+        "qore": {
+            **acesso("qore", "/dashboard"), "usar_todos": False,
+            "fundos": [f"FIP {sigla}" for sigla in siglas],
+            "fundos_selecionados": [f"FIP {sigla}" for sigla in siglas],
+        },
+        "paths": paths,
+        "fundos": {"selecionados": []},
+    }
+    (workdir / "credentials.json").write_text(json.dumps(credentials, indent=2), encoding="utf-8")
+
+
+def count_files(folder: Path) -> int:
+    return sum(
+        1 for _, _, names in os.walk(folder)
+        for name in names if not name.endswith((".crdownload", ".tmp", ".part"))
+    )
+
+
+def kill_group(process: subprocess.Popen):
+    """Kills the step and whatever it left behind (Chrome, chromedriver)"""
+    if IS_WINDOWS:
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.wait()
+
+
+def run_step(sistema: str, servers: Dict[str, PortalServer], args, log_dir: Optional[Path]) -> Dict:
+    """One run of `sistema` in a fresh working directory"""
+    for name in SISTEMAS[sistema]:
+        with servers[name].portal.lock:
+            servers[name].portal.stats.update(requests=0, logins=0, downloads=0)
+
+    with tempfile.TemporaryDirectory(prefix=f"bench_{sistema}_") as tmp:
+        workdir = Path(tmp)
+        write_inputs(workdir, servers)
+        env = dict(
+            os.environ,
+            PYTHONUNBUFFERED="1",
+            PYTHONIOENCODING="utf-8",
+            ETL_CHROME_HEADLESS="true",
+            ETL_SESSIONS="false",
+            ETL_LEDGER_PATH=str(workdir / "ledger.db"),
+            ETL_CHECKPOINT_DIR=str(workdir / "checkpoints"),
+        )
+        env.pop("ETL_BROWSER_POOL", None)
+        command = [
+            sys.executable, str(MAIN), "--config", str(workdir / "credentials.json"),
+            "--sistemas", sistema, "--sequencial", "--force",
+            "--data-inicial", args.data, "--data-final", args.data,
+        ]
+        log_path = log_dir / f"{sistema}.log" if log_dir else workdir / "step.log"
+        spawn = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if IS_WINDOWS else {"start_new_session": True}
+
+        started = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log:
+            # cwd = output folder: relative paths built by the modules (QORE fund base) stay inside it
+            process = subprocess.Popen(
+                command, cwd=str(workdir / "out"), env=env, stdout=log, stderr=subprocess.STDOUT, **spawn
+            )
+            timed_out = False
+            try:
+                process.wait(timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+            seconds = time.perf_counter() - started
+            returncode = process.returncode
+            kill_group(process)
+
+        files = count_files(workdir / "out")
+
+    stats = [servers[name].portal.stats for name in SISTEMAS[sistema]]
+    downloads = sum(s["downloads"] for s in stats)
+    return {
+        "seconds": round(seconds, 2),
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "logins": sum(s["logins"] for s in stats),
+        "requests": sum(s["requests"] for s in stats),
+        "downloads": downloads,
+        "files": files,
+        "ok": not timed_out and returncode == 0 and downloads > 0 and files > 0,
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "median_s": round(statistics.median(seconds), 2),
+        "min_s": round(min(seconds), 2),
+        "max_s": round(max(seconds), 2),
+        "ok": all(run["ok"] for run in runs),
+        "downloads": runs[-1]["downloads"],
+        "files": runs[-1]["files"],
+        "runs": runs,
+    }
+
+
+def print_report(sistema: str, summary: Dict, baseline: Optional[Dict] = None):
+    status = "ok" if summary["ok"] else "FAIL"
+    line = (
+        f"{sistema:<14} {summary['median_s']:8.1f} s  (min {summary['min_s']:.1f}, max {summary['max_s']:.1f})"
+        f"  {status:<4}  downloads {summary['downloads']}, files {summary['files']}"
+    )
+    if baseline:
+        before = baseline["median_s"]
+        line += f"   (baseline {before:.1f} s, {summary['median_s'] - before:+.1f} s)"
+    print(line)
+    for n, run in enumerate(summary["runs"], 1):
+        if not run["ok"]:
+            motivo = "timeout" if run["timed_out"] else f"exit {run['returncode']}"
+            print(f"    run {n}: {motivo}, {run['downloads']} download(s), {run['files']} file(s)")
+
+
+def serve(servers: Dict[str, PortalServer]):
+    for name, server in servers.items():
+        print(f"{name:<14} {server.url}/")
+    print("Any username/password logs in. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sistemas", nargs="+", choices=list(SISTEMAS), help="steps to run (default: all)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="added to every portal response")
+    parser.add_argument("--work-ms", type=float, default=500.0, help="server time of callbacks, searches and exports")
+    parser.add_argument("--data", default="15/03/2024", help="reference date passed to the steps (DD/MM/YYYY)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds before a step is killed")
+    parser.add_argument("--logs", metavar="DIR", help="keep each step's output in DIR/<sistema>.log")
+    parser.add_argument("--record", metavar="FILE", help="write results as a baseline JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline JSON")
+    parser.add_argument("--serve", action="store_true", help="only start the portals and print their URLs")
+    args = parser.parse_args()
+
+    sistemas = args.sistemas or list(SISTEMAS)
+    portals = sorted({name for sistema in sistemas for name in SISTEMAS[sistema]})
+    reference = datetime.strptime(args.data, "%d/%m/%Y").date()
+    servers = start_portals(portals, args.latency_ms / 1000, args.work_ms / 1000, reference)
+    try:
+        if args.serve:
+            serve(servers)
+            return
+
+        baseline = {}
+        if args.compare:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("sistemas", {})
+        log_dir = Path(args.logs) if args.logs else None
+        if log_dir:
+            log_dir.mkdir(parents=True, exist_ok=True)
+
+        print(f"Portals: latency {args.latency_ms:.0f} ms, work {args.work_ms:.0f} ms; "
+              f"date {args.data}; {args.runs} run(s) per step")
+        results = {}
+        for sistema in sistemas:
+            runs = [run_step(sistema, servers, args, log_dir) for _ in range(args.runs)]
+            results[sistema] = summarize(runs)
+            print_report(sistema, results[sistema], baseline.get(sistema))
+
+        if args.record:
+            report = {
+                "settings": {"latency_ms": args.latency_ms, "work_ms": args.work_ms, "data": args.data, "runs": args.runs},
+                "sistemas": results,
+            }
+            with open(args.record, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults written to {args.record}")
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Harness: fixed sleeps in the Selenium modules, now vs a baseline revision.
+
+Walks the AST of python/modules/*.py and sums, per module:
+
+- sleeps:   literal time.sleep(<n>) calls (seconds; "loop" = inside for/while,
+            paid once per fund/date)
+- waits:    base_driver wait_* calls with replaces=<n> (the sleep they replaced)
+- pauses:   pause(<n>) calls (fixed sleeps kept on purpose)
+
+With --baseline <rev> the same count runs on `git show <rev>:<file>` and the
+report shows the fixed sleep time removed per pass through each module.
+Polling sleeps with a non-literal argument (poll intervals) are not counted.
+
+The runtime counterpart is the per-step summary written by the pipeline
+(python/utils/wait_stats.py):
+
+    [INFO] [fidc] Waits: 184 condicoes em 21.4s (substituem 412.0s de sleep fixo: -390.6s), ...
+
+Usage:
+    python scripts/count_sleeps.py [--baseline HEAD~1] [--json]
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ROOT / "python" / "modules"
+
+WAIT_FUNCTIONS = {
+    "wait_until", "wait_element", "wait_elements", "wait_clickable", "wait_stale",
+    "wait_spinner_gone", "wait_network_idle", "wait_download_started", "wait_downloads_done",
+    "wait_download_complete",
+}
+
+
+def _number(node) -> Optional[float]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return float(node.value)
+    return None
+
+
+def _name(func) -> str:
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def count(source: str) -> Dict[str, float]:
+    """Sums of one module's source"""
+    totals = {"sleeps": 0, "sleep_seconds": 0.0, "loop_seconds": 0.0,
+              "waits": 0, "replaced_seconds": 0.0, "pauses": 0, "pause_seconds": 0.0}
+    tree = ast.parse(source)
+
+    def visit(node, in_loop=False):
+        for child in ast.iter_child_nodes(node):
+            loop = in_loop or isinstance(child, (ast.For, ast.While, ast.AsyncFor))
+            if isinstance(child, ast.Call):
+                name = _name(child.func)
+                is_time_sleep = (
+                    isinstance(child.func, ast.Attribute) and name == "sleep"
+                    and isinstance(child.func.value, ast.Name) and child.func.value.id == "time"
+                )
+                seconds = _number(child.args[0]) if child.args else None
+                if is_time_sleep and seconds is not None:
+                    totals["sleeps"] += 1
+                    totals["sleep_seconds"] += seconds
+                    if in_loop:
+                        totals["loop_seconds"] += seconds
+                elif name == "pause" and seconds is not None:
+                    totals["pauses"] += 1
+                    totals["pause_seconds"] += seconds
+                elif name in WAIT_FUNCTIONS:
+                    replaces = next((_number(k.value) for k in child.keywords if k.arg == "replaces"), None)
+                    if replaces is not None:
+                        totals["waits"] += 1
+                        totals["replaced_seconds"] += replaces
+            visit(child, loop)
+
+    visit(tree)
+    return totals
+
+
+def count_tree(rev: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """{module: totals} for the working tree (rev=None) or a git revision"""
+    result = {}
+    for path in sorted(MODULES.glob("*.py")):
+        if rev is None:
+            source = path.read_text(encoding="utf-8")
+        else:
+            rel = path.relative_to(ROOT).as_posix()
+            proc = subprocess.run(
+                ["git", "show", f"{rev}:{rel}"], cwd=ROOT, capture_output=True, text=True, encoding="utf-8",
+            )
+            if proc.returncode != 0:
+                continue
+            source = proc.stdout
+        totals = count(source)
+        if any(totals.values()):
+            result[path.stem] = totals
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--baseline", help="git revision to compare with (e.g. HEAD~1)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    atual = count_tree(None)
+    base = count_tree(args.baseline) if args.baseline else {}
+
+    if args.json:
+        print(json.dumps({"current": atual, "baseline": base}, indent=2))
+        return 0
+
+    header = f"{'module':<28}{'sleeps':>7}{'fixed s':>9}{'loop s':>8}{'waits':>7}{'repl s':>8}{'pause s':>9}"
+    if base:
+        header += f"{'base s':>9}{'removed':>9}"
+    print(header)
+    print("-" * len(header))
+    soma_atual = soma_base = 0.0
+    for module in sorted(set(atual) | set(base)):
+        t = atual.get(module, count(""))
+        line = (f"{module:<28}{t['sleeps']:>7}{t['sleep_seconds']:>9.1f}{t['loop_seconds']:>8.1f}"
+                f"{t['waits']:>7}{t['replaced_seconds']:>8.1f}{t['pause_seconds']:>9.1f}")
+        soma_atual += t["sleep_seconds"] + t["pause_seconds"]
+        if base:
+            b = base.get(module, count(""))
+            removed = b["sleep_seconds"] + b["pause_seconds"] - t["sleep_seconds"] - t["pause_seconds"]
+            soma_base += b["sleep_seconds"] + b["pause_seconds"]
+            line += f"{b['sleep_seconds']:>9.1f}{removed:>9.1f}"
+        print(line)
+
+    print("-" * len(header))
+    print(f"Fixed sleep per pass (each call once): {soma_atual:.1f}s")
+    if base:
+        print(f"Baseline {args.baseline}: {soma_base:.1f}s -> removed {soma_base - soma_atual:.1f}s per pass "
+              "(loop sleeps are paid again for every fund/date)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
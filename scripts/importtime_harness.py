@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the ETL entry point and step modules.
+
+Runs each target in a fresh interpreter under `python -X importtime`, parses
+the stderr report and prints the total plus the most expensive imports:
+
+- main:        python/main.py --dry-run (what every job pays before any step)
+- <module>:    `import <module>` for each python/modules step module (what a
+               step worker pays before touching the browser)
+
+A baseline can be recorded and later compared against:
+
+    python scripts/importtime_harness.py --record scripts/importtime_baseline.json
+    python scripts/importtime_harness.py --compare scripts/importtime_baseline.json
+
+Modules that are not installed in this environment (fitz, holidays, pyodbc...)
+make a module target fail; it is reported as such and skipped.
+
+Usage:
+    python scripts/importtime_harness.py [--runs 3] [--top 10] [TARGET ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+PYTHON_DIR = ROOT / "python"
+MAIN = PYTHON_DIR / "main.py"
+
+MODULE_TARGETS = [
+    "amplis_V02",
+    "maps_download_consolidado",
+    "maps_consolidado",
+    "FIDC_ESTOQUE_V02",
+    "Jcot_V02",
+    "query_britech_V02",
+    "automacao_qore_v5",
+]
+
+# Dependencies that must only be imported by the step that needs them
+HEAVY_MODULES = ("pandas", "selenium", "openpyxl", "fitz", "holidays", "tkinter", "pyodbc", "numpy")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        {module: {"self_us": int, "cumulative_us": int}} for top-level
+        entries and nested ones alike (first occurrence wins)
+    """
+    modules: Dict[str, Dict[str, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].strip()
+        modules.setdefault(name, {"self_us": self_us, "cumulative_us": cumulative_us})
+    return modules
+
+
+def total_us(modules: Dict[str, Dict[str, int]]) -> int:
+    """Sum of self time = total time spent importing"""
+    return sum(entry["self_us"] for entry in modules.values())
+
+
+def heavy_loaded(modules: Dict[str, Dict[str, int]]) -> List[str]:
+    return sorted(name for name in HEAVY_MODULES if name in modules)
+
+
+def target_command(target: str, config_path: str) -> List[str]:
+    if target == "main":
+        return [sys.executable, "-X", "importtime", str(MAIN), "--config", config_path, "--dry-run"]
+    code = (
+        "import sys; "
+        f"sys.path[:0] = [{str(PYTHON_DIR / 'modules')!r}, {str(PYTHON_DIR / 'utils')!r}]; "
+        f"import {target}"
+    )
+    return [sys.executable, "-X", "importtime", "-c", code]
+
+
+def profile(target: str, runs: int = 3) -> Optional[Dict]:
+    """
+    Profiles a target `runs` times and keeps the run with the median total.
+
+    Returns:
+        {"total_us", "heavy", "modules"} or None when the target fails
+    """
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Missing credentials file: main.py falls back to defaults, no KDF
+        config_path = os.path.join(tmp, "credentials.json")
+        for _ in range(runs):
+            result = subprocess.run(
+                target_command(target, config_path),
+                capture_output=True, text=True, cwd=str(PYTHON_DIR)
+            )
+            if result.returncode != 0:
+                last = (result.stderr.strip().splitlines() or ["?"])[-1]
+                print(f"  {target}: failed ({last})", file=sys.stderr)
+                return None
+            samples.append(parse_importtime(result.stderr))
+
+    samples.sort(key=total_us)
+    modules = samples[len(samples) // 2]
+    return {"total_us": total_us(modules), "heavy": heavy_loaded(modules), "modules": modules}
+
+
+def print_report(target: str, report: Dict, top: int, baseline: Optional[Dict] = None):
+    line = f"{target:<28} {report['total_us'] / 1000:8.1f} ms"
+    if baseline:
+        before = baseline["total_us"]
+        delta = report["total_us"] - before
+        line += f"   (baseline {before / 1000:.1f} ms, {delta / 1000:+.1f} ms)"
+    print(line)
+    if report["heavy"]:
+        print(f"  heavy: {', '.join(report['heavy'])}")
+    if baseline and baseline.get("heavy"):
+        dropped = sorted(set(baseline["heavy"]) - set(report["heavy"]))
+        if dropped:
+            print(f"  no longer imported: {', '.join(dropped)}")
+
+    if top:
+        ranked = sorted(
+            report["modules"].items(), key=lambda item: item[1]["cumulative_us"], reverse=True
+        )
+        for name, entry in ranked[:top]:
+            print(f"    {entry['cumulative_us'] / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("targets", nargs="*", help="main and/or module names (default: all)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="expensive imports to list per target")
+    parser.add_argument("--record", metavar="FILE", help="write results as a baseline JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline JSON")
+    args = parser.parse_args()
+
+    targets = args.targets or ["main"] + MODULE_TARGETS
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    for target in targets:
+        report = profile(target, args.runs)
+        if report is None:
+            continue
+        results[target] = report
+        print_report(target, report, args.top, baseline.get(target))
+
+    if args.record:
+        summary = {
+            target: {
+                "total_us": report["total_us"],
+                "heavy": report["heavy"],
+                "top": {
+                    name: entry["cumulative_us"]
+                    for name, entry in sorted(
+                        report["modules"].items(),
+                        key=lambda item: item[1]["cumulative_us"], reverse=True
+                    )[:args.top]
+                },
+            }
+            for target, report in results.items()
+        }
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nBaseline written to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
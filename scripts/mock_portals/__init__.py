@@ -0,0 +1,49 @@
+"""
+Offline portal simulators for end-to-end automation benchmarks.
+
+Each portal reproduces the DOM ids, the navigation flow and the download
+responses that its python/modules automation relies on, served locally by
+the stdlib HTTP server (no Flask, no network). Timing is configurable per
+portal: `latency` on every response and `work` on the requests that make
+the real portal compute (grid callbacks, searches, report exports).
+
+    from mock_portals import PORTALS, PortalServer
+
+    with PortalServer(PORTALS["fidc"](latency=0.05, work=0.5)) as server:
+        ...  # point credentials["fidc"]["url"] at server.url
+
+Credentials are not checked: any username/password logs in. The pages are
+simulators of the flows, not copies of the portals' markup.
+
+scripts/bench_portals.py runs the main.py steps against them.
+"""
+from .amplis import AmplisPortal
+from .britech import BritechPortal
+from .fidc import FidcPortal
+from .jcot import JcotPortal
+from .maps import MapsPortal
+from .qore import QorePortal
+from .server import Portal, PortalServer
+
+# Portal key (credentials.json section, amplis split in reag/master) -> factory
+PORTALS = {
+    "amplis_reag": lambda **kwargs: AmplisPortal("reag", **kwargs),
+    "amplis_master": lambda **kwargs: AmplisPortal("master", **kwargs),
+    "maps": MapsPortal,
+    "fidc": FidcPortal,
+    "jcot": JcotPortal,
+    "britech": BritechPortal,
+    "qore": QorePortal,
+}
+
+__all__ = [
+    "PORTALS",
+    "Portal",
+    "PortalServer",
+    "AmplisPortal",
+    "BritechPortal",
+    "FidcPortal",
+    "JcotPortal",
+    "MapsPortal",
+    "QorePortal",
+]
@@ -0,0 +1,103 @@
+"""
+AMPLIS portal (amplis_V02 / amplis_functions), REAG or MASTER instance.
+
+Flow: JSF login (loginForm:userLoginInput:campo, loginForm:userPasswordInput,
+loginForm:botaoOk) -> home (mainForm_menu1_label) with the favorite reports
+mainForm:listaDeFavoritosRelatorios:N:j_id_9m -> report form: date range,
+fund pick list (includeAll fills secondSelect), output type select
+(mainForm:saida:campo on favorite 0, mainForm:reportExtension:campo on the
+others; "3" = CSV, default PDF) and mainForm:confirmButton, which returns
+the report as an attachment. With no fund selected the page shows the
+portal's detailMessageListBoxId message instead.
+"""
+import re
+
+from .files import csv, pdf
+from .server import Portal, Request, page, redirect
+
+FAVORITES = ("Carteira Diaria", "Rentabilidade", "Aplicacoes e Resgates")
+
+REPORT_JS = """
+document.getElementById('mainForm:portfolioPickList:includeAll').addEventListener('click', function () {
+    var origem = document.getElementById('mainForm:portfolioPickList:firstSelect');
+    var destino = document.getElementById('mainForm:portfolioPickList:secondSelect');
+    while (origem.options.length) {
+        var opcao = origem.options[0];
+        opcao.selected = true;
+        destino.appendChild(opcao);
+    }
+});
+"""
+
+
+class AmplisPortal(Portal):
+    cookie_name = "JSESSIONID"
+
+    def __init__(self, name: str = "reag", funds=("FIP ALFA", "FIP BETA", "FIM GAMA"), **kwargs):
+        super().__init__(**kwargs)
+        self.name = f"amplis_{name}"
+        self.funds = list(funds)
+        self.route("GET", "/", self.home)
+        self.route("POST", "/login", lambda request: self.login("/home"))
+        self.route("GET", "/home", self.report)
+        self.route("GET", "/report/", self.report, prefix=True)
+        self.route("GET", "/confirm", self.confirm)
+
+    def home(self, request: Request):
+        if self.logged_in(request):
+            return redirect("/home")
+        return page("AMPLIS - Login", (
+            "<form id='loginForm' method='post' action='/login'>"
+            "<input id='loginForm:userLoginInput:campo' name='usuario'>"
+            "<input id='loginForm:userPasswordInput' name='senha' type='password'>"
+            "<input id='loginForm:botaoOk' type='submit' value='Ok'>"
+            "</form>"
+        ))
+
+    def _menu(self) -> str:
+        favoritos = "".join(
+            f"<li><a id='mainForm:listaDeFavoritosRelatorios:{i}:j_id_9m' href='/report/{i}'>{nome}</a></li>"
+            for i, nome in enumerate(FAVORITES)
+        )
+        return f"<span id='mainForm_menu1_label'>Relatorios</span><ul>{favoritos}</ul>"
+
+    def report(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        if request.path == "/home":
+            return page("AMPLIS", self._menu())
+        favorito = request.path.rsplit("/", 1)[-1]
+        if favorito not in {str(i) for i in range(len(FAVORITES))}:
+            return redirect("/home")
+        saida = "mainForm:saida:campo" if favorito == "0" else "mainForm:reportExtension:campo"
+        fundos = "".join(f"<option value='{fundo}'>{fundo}</option>" for fundo in self.funds)
+        return page("AMPLIS - Relatorio", self._menu() + (
+            "<form id='mainForm' method='get' action='/confirm'>"
+            f"<input type='hidden' name='favorito' value='{favorito}'>"
+            "<input id='mainForm:calendarDateBegin:campoInputDate' name='inicio'>"
+            "<input id='mainForm:calendarDateEnd:campoInputDate' name='fim'>"
+            f"<select id='mainForm:portfolioPickList:firstSelect' multiple>{fundos}</select>"
+            "<button id='mainForm:portfolioPickList:includeAll' type='button'>&gt;&gt;</button>"
+            "<select id='mainForm:portfolioPickList:secondSelect' name='fundos' multiple></select>"
+            f"<select id='{saida}' name='saida'><option value='1' selected>PDF</option>"
+            "<option value='2'>XLS</option><option value='3'>CSV</option></select>"
+            "<button id='mainForm:confirmButton' type='submit'>Ok</button>"
+            "</form>"
+        ), REPORT_JS)
+
+    def confirm(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        favorito = request.arg("favorito", "0")
+        fundos = request.query.get("fundos", [])
+        if not fundos:
+            return page("AMPLIS - Relatorio", self._menu() + (
+                "<div id='detailMessageListBoxId'>Nao ha dados para os parametros informados</div>"
+            ))
+        self.compute()
+        inicio = re.sub(r"\D", "", request.arg("inicio"))
+        base = f"{self.name}_{FAVORITES[int(favorito)].replace(' ', '_').lower()}_{inicio}"
+        if request.arg("saida") == "3":
+            linhas = [["Fundo", "Data", "Valor"]] + [[fundo, request.arg("inicio"), 1000.0] for fundo in fundos]
+            return self.download(f"{base}.csv", csv(linhas), "text/csv")
+        return self.download(f"{base}.pdf", pdf(f"{FAVORITES[int(favorito)]} {request.arg('inicio')}"), "application/pdf")
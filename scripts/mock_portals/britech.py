@@ -0,0 +1,96 @@
+"""
+Britech query portal (query_britech_V02).
+
+Flow: ASP.NET login (Login1_UserName/Login1_Password/Login1_LoginButton)
+-> query grid (#gridQuery): the column filter gridQuery_DXFREditorcol2_I
+plus Enter runs a callback (XHR) that lists the queries; each
+gridQuery_DXCBtnN runs the query in another callback and stores it in the
+postback form; btnExportExcel submits that form and gets the xlsx.
+"""
+from .files import XLSX_TYPE, xlsx
+from .server import Portal, Request, json_response, page, redirect
+
+QUERIES = 10
+
+GRID_JS = """
+function callback(params, pronto) {
+    fetch('/Callback.ashx?' + params, {method: 'POST'}).then(function (r) { return r.json(); }).then(pronto);
+}
+document.getElementById('gridQuery_DXFREditorcol2_I').addEventListener('keydown', function (e) {
+    if (e.key !== 'Enter') { return; }
+    e.preventDefault();
+    callback('filtro=' + encodeURIComponent(this.value), function () {
+        document.getElementById('gridQuery_linhas').style.display = '';
+    });
+});
+document.querySelectorAll('.dxgvCommandColumn').forEach(function (botao) {
+    botao.addEventListener('click', function () {
+        var consulta = botao.getAttribute('data-query');
+        callback('consulta=' + consulta, function () {
+            document.getElementById('consulta').value = consulta;
+            document.getElementById('resultado').textContent = 'Consulta ' + consulta + ' carregada';
+        });
+    });
+});
+"""
+
+
+class BritechPortal(Portal):
+    name = "britech"
+    cookie_name = "ASP.NET_SessionId"
+
+    # Queries that take longer on the real grid (pf.xlsx and lh.xlsx of the full base)
+    HEAVY = (3, 9)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.route("GET", "/", self.home)
+        self.route("POST", "/", lambda request: self.login("/"))
+        self.route("POST", "/Callback.ashx", self.callback)
+        self.route("POST", "/Consulta.aspx", self.export)
+
+    def home(self, request: Request):
+        if not self.logged_in(request):
+            return page("Britech - Login", (
+                "<form method='post' action='/'>"
+                "<input id='Login1_UserName' name='Login1$UserName'>"
+                "<input id='Login1_Password' name='Login1$Password' type='password'>"
+                "<input id='Login1_LoginButton' name='Login1$LoginButton' type='submit' value='Entrar'>"
+                "</form>"
+            ))
+        botoes = "".join(
+            f"<tr><td>{i}</td><td>Consulta {i}</td><td>1</td><td>"
+            f"<a id='gridQuery_DXCBtn{i}' class='dxgvCommandColumn' data-query='{i}' "
+            "href='javascript:void(0)'>Executar</a></td></tr>"
+            for i in range(QUERIES)
+        )
+        return page("Britech - Consultas", (
+            "<form id='form1' method='post' action='/Consulta.aspx'>"
+            "<input type='hidden' name='__VIEWSTATE' value='mock'>"
+            "<input type='hidden' id='consulta' name='consulta' value=''>"
+            "<table id='gridQuery'><thead><tr><td></td><td></td>"
+            "<td><input id='gridQuery_DXFREditorcol2_I' name='filtro'></td><td></td></tr></thead>"
+            f"<tbody id='gridQuery_linhas' style='display:none'>{botoes}</tbody></table>"
+            "<div id='resultado'></div>"
+            "<input type='submit' id='btnExportExcel' name='btnExportExcel' value='Exportar Excel'>"
+            "</form>"
+        ), GRID_JS)
+
+    def callback(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        consulta = request.arg("consulta")
+        self.compute()
+        if consulta and int(consulta) in self.HEAVY:
+            self.compute()
+        return json_response('{"ok": true}')
+
+    def export(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        consulta = request.arg("consulta")
+        if not consulta:
+            return page("Britech - Erro", "<p>Nenhuma consulta selecionada</p>")
+        self.compute()
+        linhas = [["Consulta", "Linha", "Valor"]] + [[int(consulta), n, n * 10.0] for n in range(1, 51)]
+        return self.download(f"Consulta_{consulta}.xlsx", xlsx(linhas), XLSX_TYPE)
@@ -0,0 +1,152 @@
+"""
+FIDC estoque portal (FIDC_ESTOQUE_V02).
+
+Flow: login (j_username/j_password) -> /reports/estoque (date, "chosen"
+fund picker, #csv queues a report over XHR) -> /reports/meusRelatorios
+(table.table-striped with AGUARDANDO rows until the report is ready,
+#refresh reloads; each ready row has a form with a button name="arquivo"
+that POSTs and returns the xlsx).
+"""
+import html
+import re
+import time
+import unicodedata
+
+from .files import XLSX_TYPE, xlsx
+from .server import Portal, Request, json_response, page, redirect
+
+NAV = (
+    "<nav><a href='/reports/estoque'>Estoque</a> | "
+    "<a href='/reports/meusRelatorios'>Meus Relatorios</a></nav>"
+)
+
+CHOSEN_JS = """
+var chzn = document.getElementById('fundoSelecionado_chzn');
+var drop = chzn.querySelector('.chzn-drop');
+var busca = chzn.querySelector('.chzn-search input');
+chzn.addEventListener('click', function (e) {
+    if (e.target.closest('.chzn-drop')) { return; }
+    drop.style.display = drop.style.display === 'none' ? 'block' : 'none';
+    if (drop.style.display === 'block') { busca.focus(); }
+});
+busca.addEventListener('input', function () {
+    var termo = busca.value.toLowerCase();
+    chzn.querySelectorAll('li').forEach(function (li) {
+        li.style.display = li.textContent.toLowerCase().indexOf(termo) >= 0 ? '' : 'none';
+    });
+});
+chzn.querySelectorAll('li').forEach(function (li) {
+    li.addEventListener('click', function () {
+        document.getElementById('fundoSelecionado').value = li.textContent;
+        chzn.querySelector('.chzn-single span').textContent = li.textContent;
+        drop.style.display = 'none';
+    });
+});
+document.getElementById('csv').addEventListener('click', function () {
+    var dados = new URLSearchParams();
+    dados.append('data', document.getElementById('data').value);
+    dados.append('fundo', document.getElementById('fundoSelecionado').value);
+    fetch('/reports/gerar', {method: 'POST', body: dados}).then(function (r) { return r.json(); }).then(function (j) {
+        document.getElementById('status').textContent = 'Relatorio ' + j.id + ' solicitado';
+    });
+});
+"""
+
+
+def slug(text: str) -> str:
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "_", ascii_text).strip("_").lower()
+
+
+class FidcPortal(Portal):
+    name = "fidc"
+    cookie_name = "JSESSIONID"
+
+    def __init__(self, funds=("FIDC ALFA", "FIDC BETA", "FIDC GAMA"), **kwargs):
+        super().__init__(**kwargs)
+        self.funds = list(funds)
+        # id -> {"fundo", "data", "pronto_em"}
+        self.reports = {}
+        self.route("GET", "/", self.home)
+        self.route("POST", "/login", lambda request: self.login("/"))
+        self.route("GET", "/reports/estoque", self.estoque)
+        self.route("POST", "/reports/gerar", self.gerar)
+        self.route("GET", "/reports/meusRelatorios", self.meus_relatorios)
+        self.route("POST", "/reports/arquivo", self.arquivo)
+
+    def home(self, request: Request):
+        if self.logged_in(request):
+            return page("FIDC", NAV + "<h1>Bem-vindo</h1>")
+        return page("FIDC - Login", (
+            "<form method='post' action='/login'>"
+            "<input id='j_username' name='j_username'>"
+            "<input id='j_password' name='j_password' type='password'>"
+            "<button type='submit' class='btn btn-primary'>Entrar</button>"
+            "</form>"
+        ))
+
+    def estoque(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        opcoes = "".join(
+            f"<li id='fundoSelecionado_chzn_o_{i}' class='active-result'>{html.escape(fundo)}</li>"
+            for i, fundo in enumerate(self.funds)
+        )
+        return page("FIDC - Estoque", NAV + (
+            "<input id='data' name='data'>"
+            "<input id='fundoSelecionado' type='hidden'>"
+            "<div id='fundoSelecionado_chzn' class='chzn-container' style='width:300px'>"
+            "<a class='chzn-single' href='javascript:void(0)' style='display:block'><span>Selecione</span></a>"
+            "<div class='chzn-drop' style='display:none'>"
+            "<div class='chzn-search'><input type='text' autocomplete='off'></div>"
+            f"<ul class='chzn-results'>{opcoes}</ul></div></div>"
+            "<button id='csv' type='button'>Gerar CSV</button><div id='status'></div>"
+        ), CHOSEN_JS)
+
+    def gerar(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        self.compute()
+        with self.lock:
+            report_id = len(self.reports) + 1
+            self.reports[report_id] = {
+                "fundo": request.arg("fundo") or self.funds[0],
+                "data": request.arg("data"),
+                "pronto_em": time.monotonic() + max(self.work, 0.5),
+            }
+        return json_response(f'{{"id": {report_id}}}')
+
+    def meus_relatorios(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        agora = time.monotonic()
+        linhas = []
+        for report_id, report in sorted(self.reports.items()):
+            if agora < report["pronto_em"]:
+                acao = "AGUARDANDO"
+            else:
+                acao = (
+                    "PRONTO <form method='post' action='/reports/arquivo' style='display:inline'>"
+                    f"<input type='hidden' name='id' value='{report_id}'>"
+                    f"<button type='submit' name='arquivo' value='{report_id}'>Baixar</button></form>"
+                )
+            linhas.append(
+                f"<tr><td>{report_id}</td><td>{html.escape(report['fundo'])}</td>"
+                f"<td>{html.escape(report['data'])}</td><td>{acao}</td></tr>"
+            )
+        return page("FIDC - Meus Relatorios", NAV + (
+            "<button id='refresh' type='button' onclick='location.reload()'>Atualizar</button>"
+            f"<table class='table table-striped'><tbody>{''.join(linhas)}</tbody></table>"
+        ))
+
+    def arquivo(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        report = self.reports.get(int(request.arg("id") or request.arg("arquivo") or 0))
+        if report is None:
+            return page("Erro", "<p>Relatorio inexistente</p>")
+        self.compute()
+        data = re.sub(r"\D", "", report["data"])
+        nome = f"estoque_{slug(report['fundo'])}_{data}.xlsx"
+        conteudo = xlsx([["Fundo", "Data", "Ativo", "Valor"], [report["fundo"], report["data"], "Direito Creditorio", 1000.0]])
+        return self.download(nome, conteudo, XLSX_TYPE)
@@ -0,0 +1,99 @@
+"""
+JCOT shareholder portal (Jcot_V02).
+
+Flow: #loginForm (userItem/passItem/btlogin) -> notice dialog closed via
+.ui-dialog-buttonset -> #menutree with 13 expandable hitareas (Relatorio =
+9, Cotista = 10, Posicao = 12 reveals "Por Data"/"Por Período") -> period
+form (dt_posicao_inicio/dt_posicao_fim, #tb-confirm) -> "long period"
+dialog with a Sim button -> #xpl6 downloads the xlsx.
+"""
+import html
+import re
+
+from .files import XLSX_TYPE, xlsx
+from .server import Portal, Request, page, redirect
+
+MENU = [
+    "Cadastro", "Movimentacao", "Aplicacao", "Resgate", "Transferencia", "Passivo",
+    "Tributacao", "Consultas", "Parametros", "Relatorio", "Cotista", "Extrato", "Posicao",
+]
+
+MAIN_JS = """
+function mostrar(id) { document.getElementById(id).style.display = ''; }
+function esconder(id) { document.getElementById(id).style.display = 'none'; }
+document.querySelector('.ui-dialog-buttonset').addEventListener('click', function () { esconder('aviso'); });
+document.querySelectorAll('#menutree .hitarea').forEach(function (hitarea) {
+    hitarea.addEventListener('click', function () {
+        var filhos = hitarea.parentNode.querySelector('ul');
+        if (filhos) { filhos.style.display = ''; }
+    });
+});
+document.getElementById('por-periodo').addEventListener('click', function () { mostrar('periodo'); });
+document.getElementById('tb-confirm').addEventListener('click', function () { mostrar('confirmacao'); });
+document.getElementById('sim').addEventListener('click', function () { esconder('confirmacao'); mostrar('xpl6'); });
+document.getElementById('xpl6').addEventListener('click', function () {
+    location.href = '/export?inicio=' + encodeURIComponent(document.getElementsByName('dt_posicao_inicio')[0].value)
+        + '&fim=' + encodeURIComponent(document.getElementsByName('dt_posicao_fim')[0].value);
+});
+"""
+
+
+class JcotPortal(Portal):
+    name = "jcot"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.route("GET", "/", self.home)
+        self.route("POST", "/login", lambda request: self.login("/main"))
+        self.route("GET", "/main", self.main)
+        self.route("GET", "/export", self.export)
+
+    def home(self, request: Request):
+        if self.logged_in(request):
+            return redirect("/main")
+        return page("JCOT - Login", (
+            "<form id='loginForm' method='post' action='/login'>"
+            "<input id='userItem' name='user'>"
+            "<input id='passItem' name='pass' type='password'>"
+            "<button id='btlogin' type='submit'>Entrar</button>"
+            "</form>"
+        ))
+
+    def main(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        itens = []
+        for i, nome in enumerate(MENU):
+            filhos = ""
+            if i == len(MENU) - 1:
+                filhos = (
+                    "<ul style='display:none'><li><span>Por Data</span></li>"
+                    "<li><span id='por-periodo'>Por Período</span></li></ul>"
+                )
+            itens.append(
+                "<li><div class='hitarea closed-hitarea expandable-hitarea' "
+                f"style='display:inline-block;width:12px;height:12px;background:#ccc'></div>"
+                f"<span>{html.escape(nome)}</span>{filhos}</li>"
+            )
+        return page("JCOT", (
+            "<div id='aviso' class='ui-dialog'><p>Aviso do sistema</p>"
+            "<div class='ui-dialog-buttonset'><button type='button'>OK</button></div></div>"
+            f"<ul id='menutree'>{''.join(itens)}</ul>"
+            "<div id='periodo' style='display:none'>"
+            "<input name='dt_posicao_inicio'> <input name='dt_posicao_fim'>"
+            "<a id='tb-confirm' href='javascript:void(0)'>Confirmar</a></div>"
+            "<div id='confirmacao' class='ui-dialog' style='display:none'>"
+            "<p>Periodo longo, deseja continuar?</p><button id='sim' type='button'><span>Sim</span></button></div>"
+            "<a id='xpl6' href='javascript:void(0)' style='display:none'>OK</a>"
+        ), MAIN_JS)
+
+    def export(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/")
+        self.compute()
+        inicio, fim = request.arg("inicio"), request.arg("fim")
+        linhas = [["Cotista", "Fundo", "Data", "Cotas"]] + [
+            [f"Cotista {n}", "FIDC ALFA", fim, n * 100.0] for n in range(1, 51)
+        ]
+        nome = f"posicao_cotistas_{re.sub(r'[^0-9]', '', inicio)}_{re.sub(r'[^0-9]', '', fim)}.xlsx"
+        return self.download(nome, xlsx(linhas), XLSX_TYPE)
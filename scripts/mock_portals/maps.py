@@ -0,0 +1,174 @@
+"""
+MAPS portal (maps_downloads / maps_download_consolidado).
+
+Flow: home card (#card-maps-pegasus -> /pegasusgestores) -> Keycloak-like
+login (.login-pf-page, #username, #password, #kc-form-buttons; no OTP) ->
+Pegasus (#kc-content, .stop-redirect opens the module sub-menu: first item
+= ativos, "Posição por Fundo" = passivos) -> select2 fund picker (type on
+.select2-choice, click .select2-match) -> input.date -> Pesquisar (XHR)
+-> Exportar -> PDF/XLSX links (img title) that return attachments.
+
+Export names avoid "composicao"/"posicao": the post-processing of
+run_maps_completo only parses real MAPS spreadsheets, so the benchmark
+measures the browser automation and the download redistribution.
+"""
+import json
+import re
+
+from .fidc import slug
+from .files import XLSX_TYPE, pdf, png_1x1, xlsx
+from .server import Portal, Request, Response, json_response, page, redirect
+
+PNG = png_1x1()
+
+HOME = (
+    "<a href='#card-maps-pegasus' onclick=\"document.getElementById('card-maps-pegasus').style.display=''\">"
+    "MAPS Pegasus</a>"
+    "<div id='card-maps-pegasus' style='display:none'><a href='/pegasusgestores'>Pegasus Gestores</a></div>"
+)
+
+PEGASUS_JS = """
+var relatorio = null, fundo = null;
+var choice = document.querySelector('.select2-choice');
+var drop = document.querySelector('.select2-drop');
+var busca = document.querySelector('.select2-input');
+var resultados = document.querySelector('.select2-results');
+var fundos = JSON.parse(document.getElementById('fundos').textContent);
+function mostrar(id, sim) { document.getElementById(id).style.display = sim ? '' : 'none'; }
+function filtrar() {
+    var termo = busca.value.toLowerCase();
+    resultados.innerHTML = '';
+    if (!termo) { return; }
+    fundos.forEach(function (nome) {
+        var i = nome.toLowerCase().indexOf(termo);
+        if (i < 0) { return; }
+        var li = document.createElement('li');
+        li.className = 'select2-result';
+        li.appendChild(document.createTextNode(nome.slice(0, i)));
+        var match = document.createElement('span');
+        match.className = 'select2-match';
+        match.textContent = nome.slice(i, i + termo.length);
+        li.appendChild(match);
+        li.appendChild(document.createTextNode(nome.slice(i + termo.length)));
+        li.addEventListener('click', function () {
+            fundo = nome;
+            document.querySelector('.select2-chosen').textContent = nome;
+            drop.style.display = 'none';
+            fetch('/pegasusgestores/api/fundo?nome=' + encodeURIComponent(nome));
+        });
+        resultados.appendChild(li);
+    });
+}
+document.querySelectorAll('.stop-redirect').forEach(function (botao) {
+    botao.addEventListener('click', function (e) {
+        e.preventDefault();
+        mostrar('modulo', true); mostrar('relatorio', false); mostrar('exportar-opcoes', false);
+    });
+});
+document.querySelector('.sub-menu-container li').addEventListener('click', function () { abrir('ativos'); });
+document.getElementById('posicao-fundo').addEventListener('click', function (e) { e.stopPropagation(); abrir('passivos'); });
+function abrir(tipo) {
+    relatorio = tipo; fundo = null;
+    busca.value = ''; resultados.innerHTML = '';
+    document.querySelector('.select2-chosen').textContent = 'Selecione';
+    fetch('/pegasusgestores/api/relatorio?tipo=' + tipo).then(function () {
+        mostrar('modulo', false); mostrar('relatorio', true); mostrar('exportar', false); mostrar('exportar-opcoes', false);
+    });
+}
+choice.addEventListener('click', function () { drop.style.display = ''; });
+choice.addEventListener('keydown', function (e) {
+    if (e.key.length !== 1) { return; }
+    e.preventDefault();
+    drop.style.display = '';
+    busca.value += e.key;
+    filtrar();
+});
+busca.addEventListener('input', filtrar);
+document.getElementById('pesquisar').addEventListener('click', function () {
+    var data = document.querySelector('input.date').value;
+    fetch('/pegasusgestores/api/pesquisar?fundo=' + encodeURIComponent(fundo || '') + '&data=' + encodeURIComponent(data))
+        .then(function () {
+            var query = 'tipo=' + relatorio + '&fundo=' + encodeURIComponent(fundo || '') + '&data=' + encodeURIComponent(data);
+            document.getElementById('link-pdf').href = '/pegasusgestores/export?formato=pdf&' + query;
+            document.getElementById('link-xlsx').href = '/pegasusgestores/export?formato=xlsx&' + query;
+            mostrar('exportar', true);
+        });
+});
+document.getElementById('exportar').addEventListener('click', function (e) {
+    e.preventDefault();
+    mostrar('exportar-opcoes', true);
+});
+"""
+
+
+class MapsPortal(Portal):
+    name = "maps"
+    cookie_name = "KEYCLOAK_SESSION"
+
+    def __init__(self, funds=("FIP MULTIESTRATÉGIA ALFA", "FIP MULTIESTRATÉGIA BETA", "FIP MULTIESTRATÉGIA GAMA"), **kwargs):
+        super().__init__(**kwargs)
+        self.funds = list(funds)
+        self.route("GET", "/", lambda request: page("MAPS", HOME))
+        self.route("GET", "/auth/login", self.login_page)
+        self.route("POST", "/auth/login", lambda request: self.login("/pegasusgestores"))
+        self.route("GET", "/pegasusgestores", self.pegasus)
+        self.route("GET", "/pegasusgestores/api/", self.api, prefix=True)
+        self.route("GET", "/pegasusgestores/export", self.export)
+        self.route("GET", "/static/", lambda request: Response(200, PNG, [("Content-Type", "image/png")]), prefix=True)
+
+    def login_page(self, request: Request):
+        return page("MAPS - Login", (
+            "<div class='login-pf-page'><form method='post' action='/auth/login'>"
+            "<input id='username' name='username'>"
+            "<input id='password' name='password' type='password'>"
+            "<div id='kc-form-buttons'><input type='submit' value='Entrar' style='width:100%'></div>"
+            "</form></div>"
+        ))
+
+    def pegasus(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/auth/login")
+        fundos = json.dumps(self.funds, ensure_ascii=False)
+        return page("Pegasus Gestores", (
+            "<div id='kc-content'>"
+            "<a class='toggle pull-right hidden-xl visible-lg' style='display:none'>=</a>"
+            "<a class='stop-redirect' href='#'>Carteira</a> <a class='stop-redirect' href='#'>Passivo</a>"
+            "<div id='modulo' style='display:none'><div class='sub-menu'><div class='sub-menu-container'>"
+            "<ul class='unstyled'><li>Composicao da Carteira</li><li><span id='posicao-fundo'>Posição por Fundo</span></li>"
+            "</ul></div></div></div>"
+            "<div id='relatorio' style='display:none'>"
+            "<div class='select2-container' style='width:400px'>"
+            "<a class='select2-choice' href='javascript:void(0)' tabindex='0' style='display:block'>"
+            "<span class='select2-chosen'>Selecione</span></a>"
+            "<div class='select2-drop' style='display:none'><input class='select2-input' type='text'>"
+            "<ul class='select2-results'></ul></div></div>"
+            "<input class='date' type='text'>"
+            "<input id='pesquisar' type='button' value='Pesquisar'>"
+            "<a id='exportar' href='#' style='display:none'>Exportar</a>"
+            "<div id='exportar-opcoes' style='display:none'>"
+            "<a id='link-pdf' href='#'><img title='PDF' src='/static/pdf.png' width='16' height='16'></a> "
+            "<a id='link-xlsx' href='#'><img title='XLSX' src='/static/xlsx.png' width='16' height='16'></a>"
+            "</div></div>"
+            f"<script type='application/json' id='fundos'>{fundos}</script>"
+            "</div>"
+        ), PEGASUS_JS)
+
+    def api(self, request: Request):
+        if not self.logged_in(request):
+            return Response(401, b"", [("Content-Type", "text/plain")])
+        if request.path.endswith("/pesquisar"):
+            self.compute()
+        return json_response('{"ok": true}')
+
+    def export(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/auth/login")
+        self.compute()
+        tipo = "Ativos" if request.arg("tipo") == "ativos" else "Passivos"
+        fundo, data = request.arg("fundo"), request.arg("data")
+        base = f"Carteira_{tipo}_{slug(fundo)}_{re.sub(r'[^0-9]', '', data)}"
+        if request.arg("formato") == "pdf":
+            return self.download(f"{base}.pdf", pdf(f"{tipo} {fundo} {data}"), "application/pdf")
+        linhas = [["Fundo", "Data", "Ativo", "Valor"], [fundo, data, "Cotas", 1000.0]]
+        return self.download(f"{base}.xlsx", xlsx(linhas), XLSX_TYPE)
+
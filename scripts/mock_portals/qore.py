@@ -0,0 +1,165 @@
+"""
+QORE dashboard (automacao_qore_v5).
+
+Flow: /login (inputs name=email/password, Enter) -> /dashboard with one
+link per fund (found by PARTIAL_LINK_TEXT = sigla) -> fund page with
+"Carteira PDF"/"Carteira Excel" buttons that load the document table over
+XHR (date in the 2nd column, download button in the 4th) and "Voltar".
+Batch mode: the ellipsis menu (div[data-kt-menu-trigger] > i.ellipsis-h)
+-> "Download em Lote" -> #dataInicial/#dataFinal -> "Download" returns a
+zip with one file per weekday, named carteira_<sigla>_<yyyymmdd>.<ext>.
+"""
+import html
+import json
+from datetime import date, datetime, timedelta
+
+from .files import XLSX_TYPE, pdf, xlsx, zip_of
+from .server import Portal, Request, json_response, page, redirect
+
+FUND_JS = """
+var fundo = document.getElementById('fundo').value;
+function carregar(tipo) {
+    fetch('/fundos/' + fundo + '/documentos?tipo=' + tipo).then(function (r) { return r.json(); }).then(function (linhas) {
+        var corpo = document.querySelector('#documentos tbody');
+        corpo.innerHTML = '';
+        linhas.forEach(function (linha) {
+            var tr = document.createElement('tr');
+            [linha.fundo, linha.data, tipo.toUpperCase()].forEach(function (texto) {
+                var td = document.createElement('td'); td.textContent = texto; tr.appendChild(td);
+            });
+            var td = document.createElement('td');
+            var botao = document.createElement('button');
+            botao.type = 'button'; botao.textContent = 'Baixar';
+            botao.addEventListener('click', function () {
+                location.href = '/fundos/' + fundo + '/arquivo?tipo=' + tipo + '&data=' + encodeURIComponent(linha.data);
+            });
+            td.appendChild(botao); tr.appendChild(td); corpo.appendChild(tr);
+        });
+        document.getElementById('documentos').setAttribute('data-tipo', tipo);
+    });
+}
+document.getElementById('btn-pdf').addEventListener('click', function () { carregar('pdf'); });
+document.getElementById('btn-excel').addEventListener('click', function () { carregar('excel'); });
+document.getElementById('btn-voltar').addEventListener('click', function () { location.href = '/dashboard'; });
+document.getElementById('menu').addEventListener('click', function () {
+    document.getElementById('menu-opcoes').style.display = '';
+});
+document.getElementById('lote').addEventListener('click', function (e) {
+    e.preventDefault();
+    document.getElementById('form-lote').style.display = '';
+});
+document.getElementById('btn-lote').addEventListener('click', function () {
+    var tipo = document.getElementById('documentos').getAttribute('data-tipo') || 'pdf';
+    location.href = '/fundos/' + fundo + '/lote?tipo=' + tipo
+        + '&inicio=' + document.getElementById('dataInicial').value
+        + '&fim=' + document.getElementById('dataFinal').value;
+});
+"""
+
+
+def weekdays(inicio: date, fim: date):
+    dia = inicio
+    while dia <= fim:
+        if dia.weekday() < 5:
+            yield dia
+        dia += timedelta(days=1)
+
+
+class QorePortal(Portal):
+    name = "qore"
+    cookie_name = "qore_session"
+
+    def __init__(self, funds=("ALFA", "BETA", "GAMA"), reference: date = None, days: int = 30, **kwargs):
+        """
+        Args:
+            funds: Siglas (the dashboard shows "FIP <SIGLA> MULTIESTRATEGIA")
+            reference: Last date of the document tables (default: today)
+            days: Calendar days of documents listed up to `reference`
+        """
+        super().__init__(**kwargs)
+        self.funds = list(funds)
+        self.reference = reference or date.today()
+        self.days = days
+        self.route("GET", "/", lambda request: redirect("/login"))
+        self.route("GET", "/login", self.login_page)
+        self.route("POST", "/login", lambda request: self.login("/dashboard"))
+        self.route("GET", "/dashboard", self.dashboard)
+        self.route("GET", "/fundos/", self.fundo, prefix=True)
+
+    def login_page(self, request: Request):
+        if self.logged_in(request):
+            return redirect("/dashboard")
+        return page("QORE - Login", (
+            "<form method='post' action='/login'>"
+            "<input name='email' type='email'>"
+            "<input name='password' type='password'>"
+            "<button type='submit'>Entrar</button>"
+            "</form>"
+        ))
+
+    def dashboard(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/login")
+        links = "".join(
+            f"<li><a href='/fundos/{i}'>FIP {html.escape(sigla)} MULTIESTRATEGIA</a></li>"
+            for i, sigla in enumerate(self.funds)
+        )
+        return page("QORE - Dashboard", f"<ul id='fundos'>{links}</ul>")
+
+    def fundo(self, request: Request):
+        if not self.logged_in(request):
+            return redirect("/login")
+        partes = request.path.strip("/").split("/")
+        try:
+            indice = int(partes[1])
+            sigla = self.funds[indice]
+        except (IndexError, ValueError):
+            return redirect("/dashboard")
+        acao = partes[2] if len(partes) > 2 else ""
+        if acao == "documentos":
+            return self.documentos(sigla)
+        if acao == "arquivo":
+            dia = datetime.strptime(request.arg("data"), "%d/%m/%Y").date()
+            self.compute()
+            nome, conteudo, tipo = self._arquivo(sigla, request.arg("tipo"), dia)
+            return self.download(nome, conteudo, tipo)
+        if acao == "lote":
+            inicio = datetime.strptime(request.arg("inicio"), "%Y-%m-%d").date()
+            fim = datetime.strptime(request.arg("fim"), "%Y-%m-%d").date()
+            self.compute()
+            arquivos = {}
+            for dia in weekdays(inicio, fim):
+                nome, conteudo, _ = self._arquivo(sigla, request.arg("tipo"), dia)
+                arquivos[nome] = conteudo
+            return self.download(f"lote_{sigla.lower()}.zip", zip_of(arquivos), "application/zip")
+
+        return page(f"QORE - {sigla}", (
+            f"<input id='fundo' type='hidden' value='{indice}'>"
+            "<button id='btn-pdf' type='button'>Carteira PDF</button>"
+            "<button id='btn-excel' type='button'>Carteira Excel</button>"
+            "<button id='btn-voltar' type='button'>Voltar</button>"
+            "<div id='menu' data-kt-menu-trigger='click' style='display:inline-block'>"
+            "<i class='fa fa-ellipsis-h' style='display:inline-block;width:16px;height:16px'></i></div>"
+            "<div id='menu-opcoes' style='display:none'><a id='lote' href='#'>Download em Lote</a></div>"
+            "<div id='form-lote' style='display:none'>"
+            "<input id='dataInicial' type='date'> <input id='dataFinal' type='date'>"
+            "<button id='btn-lote' type='button'>Download</button></div>"
+            "<table id='documentos'><thead><tr><th>Fundo</th><th>Data</th><th>Tipo</th><th></th></tr></thead>"
+            "<tbody></tbody></table>"
+        ), FUND_JS)
+
+    def documentos(self, sigla: str):
+        self.compute()
+        inicio = self.reference - timedelta(days=self.days)
+        linhas = [
+            {"fundo": sigla, "data": dia.strftime("%d/%m/%Y")}
+            for dia in reversed(list(weekdays(inicio, self.reference)))
+        ]
+        return json_response(json.dumps(linhas))
+
+    def _arquivo(self, sigla: str, tipo: str, dia: date):
+        nome = f"carteira_{sigla.lower()}_{dia.strftime('%Y%m%d')}"
+        if tipo == "excel":
+            linhas = [["Fundo", "Data", "Ativo", "Valor"], [sigla, dia.strftime("%d/%m/%Y"), "Cotas", 1000.0]]
+            return f"{nome}.xlsx", xlsx(linhas), XLSX_TYPE
+        return f"{nome}.pdf", pdf(f"Carteira {sigla} {dia.strftime('%d/%m/%Y')}"), "application/pdf"
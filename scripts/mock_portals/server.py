@@ -0,0 +1,217 @@
+"""
+HTTP plumbing shared by the mock portals.
+
+A Portal is a set of routes plus the state of one simulated site (sessions,
+generated reports). PortalServer serves one portal on its own port: the
+modules navigate to absolute paths ("/reports/estoque", "/pegasusgestores")
+and cookies are per host, so every portal gets a separate origin.
+
+Two knobs shape the timing:
+
+- latency: added to every response (page, XHR, asset, download)
+- work:    extra server-side time of the requests that make the real portal
+           compute something (grid callbacks, searches, report exports)
+"""
+import html
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    form: Dict[str, List[str]]
+    cookies: Dict[str, str]
+
+    def arg(self, name: str, default: str = "") -> str:
+        """First value of a form field or query parameter"""
+        values = self.form.get(name) or self.query.get(name)
+        return values[0] if values else default
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def page(title: str, body: str, script: str = "") -> Response:
+    """HTML page (UTF-8); `script` is inlined at the end of the body"""
+    document = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title></head><body>{body}"
+        + (f"<script>{script}</script>" if script else "")
+        + "</body></html>"
+    )
+    return Response(200, document.encode("utf-8"), [("Content-Type", "text/html; charset=utf-8")])
+
+
+def json_response(text: str) -> Response:
+    return Response(200, text.encode("utf-8"), [("Content-Type", "application/json")])
+
+
+def redirect(location: str) -> Response:
+    return Response(302, b"", [("Location", location)])
+
+
+def attachment(filename: str, data: bytes, content_type: str = "application/octet-stream") -> Response:
+    disposition = f"attachment; filename=\"{filename}\"; filename*=UTF-8''{quote(filename)}"
+    return Response(200, data, [("Content-Type", content_type), ("Content-Disposition", disposition)])
+
+
+def not_found() -> Response:
+    return Response(404, b"not found", [("Content-Type", "text/plain")])
+
+
+Handler = Callable[[Request], Response]
+
+
+class Portal:
+    """
+    Base of the simulated portals.
+
+    Subclasses register routes in __init__ (`self.route("GET", "/", ...)`)
+    and mark the requests that cost server time with `self.compute()`.
+
+    Args:
+        latency: Seconds added to every response
+        work: Seconds of server-side processing (callbacks, reports, exports)
+    """
+
+    name = "portal"
+    cookie_name = "SESSIONID"
+
+    def __init__(self, latency: float = 0.0, work: float = 0.0):
+        self.latency = latency
+        self.work = work
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.prefixes: List[Tuple[str, str, Handler]] = []
+        self.sessions = set()
+        self.stats = {"requests": 0, "logins": 0, "downloads": 0}
+        self.lock = threading.Lock()
+
+    def route(self, method: str, path: str, handler: Handler, prefix: bool = False):
+        if prefix:
+            self.prefixes.append((method, path, handler))
+        else:
+            self.routes[(method, path)] = handler
+
+    def compute(self):
+        if self.work:
+            time.sleep(self.work)
+
+    # --- sessions ---
+
+    def logged_in(self, request: Request) -> bool:
+        return request.cookies.get(self.cookie_name) in self.sessions
+
+    def login(self, location: str) -> Response:
+        """Opens a session and redirects to `location` (credentials are not checked)"""
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions.add(token)
+            self.stats["logins"] += 1
+        response = redirect(location)
+        response.headers.append(("Set-Cookie", f"{self.cookie_name}={token}; Path=/; HttpOnly"))
+        return response
+
+    def download(self, filename: str, data: bytes, content_type: str = "application/octet-stream") -> Response:
+        with self.lock:
+            self.stats["downloads"] += 1
+        return attachment(filename, data, content_type)
+
+    # --- dispatch ---
+
+    def handle(self, request: Request) -> Response:
+        with self.lock:
+            self.stats["requests"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            handler = next(
+                (h for method, prefix, h in self.prefixes
+                 if method == request.method and request.path.startswith(prefix)),
+                None,
+            )
+        return handler(request) if handler else not_found()
+
+
+class PortalServer:
+    """
+    One portal on 127.0.0.1:<port> (0 = any free port), served from a thread.
+
+    Usage:
+        with PortalServer(FidcPortal(latency=0.05)) as server:
+            print(server.url)
+    """
+
+    def __init__(self, portal: Portal, port: int = 0, host: str = "127.0.0.1"):
+        self.portal = portal
+        self.httpd = ThreadingHTTPServer((host, port), _handler_for(portal))
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PortalServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=self.portal.name, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _handler_for(portal: Portal):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8") if length else ""
+            cookies = SimpleCookie()
+            cookies.load(self.headers.get("Cookie") or "")
+            request = Request(
+                method=self.command,
+                path=url.path,
+                query=parse_qs(url.query, keep_blank_values=True),
+                form=parse_qs(body, keep_blank_values=True),
+                cookies={name: morsel.value for name, morsel in cookies.items()},
+            )
+            response = portal.handle(request)
+            self.send_response(response.status)
+            for name, value in response.headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(response.body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(response.body)
+
+        do_GET = _serve
+        do_POST = _serve
+
+        def log_message(self, *args):
+            pass
+
+    return Handler